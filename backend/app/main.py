@@ -4,11 +4,14 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+from app.utils.serialization import FastJSONResponse
+
 # 加载环境变量（从项目根目录）
 env_path = Path(__file__).parent.parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
@@ -50,9 +53,25 @@ async def lifespan(app: FastAPI):
     print(f"🌍 环境: {os.getenv('ENV', 'development')}")
     print("=" * 60)
 
+    # 盘中涨停池实时监控（可选）
+    from app.services.limit_live_monitor import get_limit_live_monitor, live_monitor_enabled
+    if live_monitor_enabled():
+        from app.services.limit_event_log import get_limit_event_log
+        monitor = get_limit_live_monitor()
+        event_log = get_limit_event_log()
+        # 封板事件追加写入当日事件日志，收盘后由调度器压缩为时间线；
+        # 盘中重启时从当日日志恢复状态，不重复记录已封板的股票
+        monitor.add_listener(event_log.append)
+        monitor.set_state_loader(event_log.live_state)
+        monitor.start()
+
     yield
 
     # 关闭时
+    if live_monitor_enabled():
+        await get_limit_live_monitor().stop()
+    from app.utils.supabase_client import SupabaseClient
+    await SupabaseClient.aclose()
     print("=" * 60)
     print(f"👋 {APP_TITLE} 关闭")
     print("=" * 60)
@@ -64,11 +83,22 @@ app = FastAPI(
     version=APP_VERSION,
     description=APP_DESCRIPTION,
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,  # orjson 序列化
     docs_url="/docs",           # Swagger UI
     redoc_url="/redoc",         # ReDoc
     openapi_url="/openapi.json" # OpenAPI schema
 )
 
+# HTTP 缓存（ETag/304、按交易日的 Cache-Control、gzip/br 压缩）
+# 先注册位于内层，缓存命中的响应仍经过 CORS 处理
+from app.middleware import HttpCacheMiddleware
+app.add_middleware(HttpCacheMiddleware)
+
+# 按需性能剖析（?profile=1，需 PROFILE_ALLOW_QUERY=true）
+# 位于 HTTP 缓存外层，X-Profile 响应头不会被缓存
+from app.middleware import ProfilingMiddleware
+app.add_middleware(ProfilingMiddleware)
+
 # 配置 CORS（跨域资源共享）
 app.add_middleware(
     CORSMiddleware,
@@ -80,8 +110,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile"],
 )
 
+# 请求级查询统计（Server-Timing 头 + /metrics 指标）
+from app.middleware import QueryMetricsMiddleware
+app.add_middleware(QueryMetricsMiddleware)
+
+ENABLE_METRICS = os.getenv("ENABLE_METRICS", "False").lower() in ("1", "true", "yes")
+
 
 # ============================================
 # 基础路由
@@ -122,11 +159,23 @@ async def get_config():
     }
 
 
+if ENABLE_METRICS:
+    from app.utils.metrics import metrics_registry
+
+    @app.get("/metrics", tags=["基础"], include_in_schema=False)
+    async def metrics():
+        """Prometheus 指标（按接口聚合的耗时 / 查询次数直方图）"""
+        return PlainTextResponse(
+            metrics_registry.render(),
+            media_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
 # ============================================
 # 路由注册
 # ============================================
 
-from app.routers import market_router, limit_stocks_router, concepts_router, sector_router, sentiment_router, stock_router, backtest_router
+from app.routers import market_router, limit_stocks_router, concepts_router, sector_router, sentiment_router, stock_router, backtest_router, dashboard_router, export_router, ops_router
 
 # 市场数据路由
 app.include_router(
@@ -175,6 +224,27 @@ app.include_router(
     tags=["回测分析"]
 )
 
+# 首页看板聚合路由
+app.include_router(
+    dashboard_router,
+    prefix="/api/dashboard",
+    tags=["首页看板"]
+)
+
+# 数据导出路由
+app.include_router(
+    export_router,
+    prefix="/api/export",
+    tags=["数据导出"]
+)
+
+# 运维状态路由
+app.include_router(
+    ops_router,
+    prefix="/api/ops",
+    tags=["运维状态"]
+)
+
 # TODO: 龙虎榜路由（需要先实现数据采集）
 # app.include_router(dragon_tiger_router, prefix="/api/dragon-tiger", tags=["龙虎榜"])
 
@@ -0,0 +1,14 @@
+"""
+ASGI 中间件导出
+"""
+
+from .http_cache import HttpCacheMiddleware, invalidate_http_cache
+from .profiling import ProfilingMiddleware
+from .query_metrics import QueryMetricsMiddleware
+
+__all__ = [
+    "HttpCacheMiddleware",
+    "invalidate_http_cache",
+    "QueryMetricsMiddleware",
+    "ProfilingMiddleware",
+]
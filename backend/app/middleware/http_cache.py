@@ -0,0 +1,356 @@
+"""
+按交易日感知的 HTTP 缓存中间件
+
+对 /api/ 下的 GET/HEAD JSON 响应:
+- 内容哈希弱 ETag，命中 If-None-Match 返回 304
+- Cache-Control:
+    * 查询已收盘交易日（trade_date / end_date 早于最新交易日）且接口声明数据完整
+      （响应头 X-Data-Complete，见 DATA_COMPLETE）: 长期 immutable
+    * 最新交易日、未指定日期、日期区间（start_date）或未声明完整: 短 max-age
+    * 其他可变接口（回测等）: no-cache（每次用 ETag 校验）
+- gzip 压缩（安装 brotli 时优先 br），Vary: Accept-Encoding
+- immutable 的响应及其压缩结果保存在进程内 LRU，重复访问不再执行接口；
+  采集器调用 invalidate_trade_date() 后对应交易日的响应一并清除。
+  只有单个交易日的完整数据才声明完整，跨日期区间 / 窗口的响应不会进入缓存，按交易日失效即可
+
+非 JSON（流式导出、SSE）、非 200、已压缩或接口自行设置 Cache-Control: no-store
+（如部分模块失败的聚合结果）的响应原样透传，不进入响应缓存。
+
+环境变量:
+    HTTP_CACHE_MAX_AGE            最新交易日响应的 max-age（秒，默认 60）
+    HTTP_CACHE_IMMUTABLE_MAX_AGE  已收盘交易日响应的 max-age（秒，默认 30 天）
+    HTTP_CACHE_STORE_MB           进程内响应缓存上限（MB，默认 64，0 关闭）
+    HTTP_COMPRESS_MIN_BYTES       小于该大小的响应不压缩（默认 1024）
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.result_cache import result_cache, sync_invalidations
+from app.utils.trading_date import get_latest_trading_date
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+
+# 按交易日组织数据的只读接口（历史交易日数据收盘后不再变化）
+DATE_SCOPED_PREFIXES = (
+    "/api/market",
+    "/api/limit",
+    "/api/concepts",
+    "/api/sector",
+    "/api/sentiment",
+    "/api/stock",
+    "/api/dashboard",
+)
+
+# 实时接口（SSE / 增量轮询）不做缓存处理
+UNCACHED_PREFIXES = ("/api/limit/live",)
+
+DATE_PARAMS = ("trade_date", "end_date")
+# 带这些参数的请求覆盖多个交易日，任一日重新采集都会变化，不标记 immutable
+RANGE_PARAMS = ("start_date",)
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# 接口确认该交易日数据完整时设置的响应头（中间件读取后去掉）:
+#   return trusted_response(content, headers=DATA_COMPLETE)
+#   response.headers.update(DATA_COMPLETE)   # 返回 Pydantic 模型的接口
+COMPLETE_HEADER = "X-Data-Complete"
+DATA_COMPLETE = {COMPLETE_HEADER: "1"}
+
+# 缓存响应时不保留的响应头（由中间件重新生成）
+_REGENERATED_HEADERS = {
+    b"content-length", b"content-encoding", b"etag", b"cache-control", b"vary", COMPLETE_HEADER.lower().encode(),
+}
+
+
+@dataclass
+class CachedResponse:
+    """一份可复用的响应（原始 body + 各编码的压缩结果）"""
+
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: str
+    cache_control: str
+    trade_date: Optional[str] = None
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(b) for b in self.encoded.values())
+
+
+class ResponseStore:
+    """按字节数限制的 LRU 响应缓存（仅存放已收盘交易日、接口声明完整的响应）"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def resize(self, key: str, delta: int) -> None:
+        """压缩结果追加到已缓存条目后更新占用"""
+        with self._lock:
+            if key in self._entries:
+                self._bytes += delta
+
+    def invalidate(self, trade_date: Optional[str] = None) -> int:
+        """
+        清除缓存
+
+        Args:
+            trade_date: 只清除该交易日的响应，None 清空全部
+
+        Returns:
+            清除的条目数
+        """
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if trade_date is None or e.trade_date == trade_date]
+            for key in keys:
+                self._bytes -= self._entries.pop(key).size
+            return len(keys)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_store = ResponseStore(int(float(os.getenv("HTTP_CACHE_STORE_MB", "64")) * 1024 * 1024))
+
+# 采集器写入某交易日后（invalidate_trade_date），同步清除该交易日的响应缓存
+result_cache.add_listener(response_store.invalidate)
+
+
+def invalidate_http_cache(trade_date: Optional[str] = None) -> int:
+    """清除进程内响应缓存（数据重新采集后调用）"""
+    return response_store.invalidate(trade_date)
+
+
+def make_etag(body: bytes) -> str:
+    """内容哈希弱 ETag（与压缩编码无关）"""
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 弱比较"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """按 Accept-Encoding 选择压缩方式（br 优先，q=0 视为拒绝）"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class HttpCacheMiddleware:
+    """纯 ASGI 中间件：ETag / 304 / Cache-Control / 压缩 / 已收盘交易日响应缓存"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_age: Optional[int] = None,
+        immutable_max_age: Optional[int] = None,
+        min_compress_size: Optional[int] = None,
+        store: Optional[ResponseStore] = None,
+    ):
+        self.app = app
+        self.max_age = max_age if max_age is not None else int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+        self.immutable_max_age = (
+            immutable_max_age
+            if immutable_max_age is not None
+            else int(os.getenv("HTTP_CACHE_IMMUTABLE_MAX_AGE", str(30 * 24 * 3600)))
+        )
+        self.min_compress_size = (
+            min_compress_size if min_compress_size is not None else int(os.getenv("HTTP_COMPRESS_MIN_BYTES", "1024"))
+        )
+        self.store = store if store is not None else response_store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope.get("method") not in ("GET", "HEAD")
+            or not scope.get("path", "").startswith("/api/")
+            or scope.get("path", "").startswith(UNCACHED_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        closed_date, cache_control = self._cache_policy(scope)
+        store_key = self._store_key(scope) if closed_date and self.store.max_bytes > 0 else None
+        immutable = f"public, max-age={self.immutable_max_age}, immutable"
+
+        if store_key:
+            sync_invalidations()
+            entry = self.store.get(store_key)
+            if entry is not None:
+                await self._respond(entry, request_headers, send, store_key)
+                return
+
+        start_message: Optional[Message] = None
+        body_parts: List[bytes] = []
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] != 200
+                    or "content-encoding" in headers
+                    or "no-store" in headers.get("cache-control", "")
+                    or not headers.get("content-type", "").startswith("application/json")
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(body_parts)
+            complete = bool(closed_date) and COMPLETE_HEADER in Headers(raw=start_message["headers"])
+            entry = CachedResponse(
+                status=start_message["status"],
+                headers=[(k, v) for k, v in start_message["headers"] if k.lower() not in _REGENERATED_HEADERS],
+                body=body,
+                etag=make_etag(body),
+                cache_control=immutable if complete else cache_control,
+                trade_date=closed_date,
+            )
+            if store_key and complete:
+                self.store.put(store_key, entry)
+            await self._respond(entry, request_headers, send, store_key if complete else None)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _cache_policy(self, scope: Scope) -> Tuple[Optional[str], str]:
+        """
+        根据路径和日期参数确定缓存策略
+
+        Returns:
+            (已收盘的交易日 或 None, 接口未声明完整时使用的 Cache-Control)
+        """
+        path = scope.get("path", "")
+        if not path.startswith(DATE_SCOPED_PREFIXES):
+            return None, "no-cache"
+
+        params = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+        requested = next((params[p] for p in DATE_PARAMS if params.get(p)), None)
+        if any(params.get(p) for p in RANGE_PARAMS):
+            requested = None
+        closed = bool(requested) and _DATE_RE.match(requested) and requested < get_latest_trading_date()
+        return (requested if closed else None), f"public, max-age={self.max_age}"
+
+    @staticmethod
+    def _store_key(scope: Scope) -> str:
+        params = sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True))
+        return f"{scope['path']}?{urlencode(params)}"
+
+    def _encoded_body(self, entry: CachedResponse, encoding: Optional[str], store_key: Optional[str]) -> bytes:
+        if encoding is None or len(entry.body) < self.min_compress_size:
+            return entry.body
+        encoded = entry.encoded.get(encoding)
+        if encoded is None:
+            encoded = _compress(entry.body, encoding)
+            entry.encoded[encoding] = encoded
+            if store_key:
+                self.store.resize(store_key, len(encoded))
+        return encoded
+
+    async def _respond(self, entry: CachedResponse, request_headers: Headers, send: Send, store_key: Optional[str]) -> None:
+        cache_headers = [
+            (b"etag", entry.etag.encode("latin-1")),
+            (b"cache-control", entry.cache_control.encode("latin-1")),
+            (b"vary", b"Accept-Encoding"),
+        ]
+
+        if etag_matches(request_headers.get("if-none-match"), entry.etag):
+            await send({"type": "http.response.start", "status": 304, "headers": cache_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        body = self._encoded_body(entry, encoding, store_key)
+        headers = list(entry.headers) + cache_headers
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        if body is not entry.body:
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,50 @@
+"""
+请求级性能剖析开关
+
+PROFILE_ALLOW_QUERY=true 时，带 ?profile=1 的请求在本次请求内开启剖析:
+请求经过的 @profiled 入口（如 SentimentService.get_analysis）写出火焰图和内存分配报告，
+报告文件名通过 X-Profile 响应头返回。
+结果缓存命中时入口函数不会执行，也就不会生成报告（没有 X-Profile 头）。
+
+生产环境默认关闭，避免任何人都能触发 tracemalloc 拖慢服务。
+"""
+
+import os
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.profiling import query_profiling_allowed, request_profiling, requested_reports, reset_request_profiling
+
+
+class ProfilingMiddleware:
+    """纯 ASGI 中间件（只在请求带 profile 参数时生效）"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not query_profiling_allowed() or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        token = request_profiling()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                reports = requested_reports()
+                if reports:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-Profile", ", ".join(os.path.basename(path) for path in reports))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_request_profiling(token)
+
+    @staticmethod
+    def _requested(scope: Scope) -> bool:
+        query = scope.get("query_string", b"").decode("latin-1")
+        return any(key == "profile" and value.lower() in ("1", "true", "yes") for key, value in parse_qsl(query))
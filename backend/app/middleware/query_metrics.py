@@ -0,0 +1,70 @@
+"""
+请求级 Supabase 查询统计中间件
+
+为每个 HTTP 请求:
+- 统计 Supabase 查询次数、返回行数、累计耗时
+- 添加 Server-Timing 响应头（浏览器 DevTools 可直接查看）
+- 聚合到按接口的 Prometheus 直方图（/metrics）
+- 查询次数超过预算时打印警告（QUERY_BUDGET，0 表示关闭）
+"""
+
+import os
+import time
+from typing import Optional
+
+from loguru import logger
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import MetricsRegistry, metrics_registry, start_query_stats, stop_query_stats
+
+
+class QueryMetricsMiddleware:
+    """纯 ASGI 中间件（不缓冲响应体，兼容流式响应）"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        registry: MetricsRegistry = metrics_registry,
+        query_budget: Optional[int] = None,
+    ):
+        self.app = app
+        self.registry = registry
+        self.query_budget = query_budget if query_budget is not None else int(os.getenv("QUERY_BUDGET", "0"))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_query_stats()
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing((time.perf_counter() - start) * 1000))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stop_query_stats(token)
+            duration = time.perf_counter() - start
+
+            # 使用路由模板（/api/concepts/stocks/{concept_name}）聚合，避免标签爆炸
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+
+            self.registry.observe_request(method, endpoint, status_code, duration, stats)
+
+            if self.query_budget and stats.queries > self.query_budget:
+                logger.warning(
+                    f"⚠️ 查询超出预算: {method} {scope.get('path')} "
+                    f"{stats.queries} 次查询(预算 {self.query_budget}), {stats.rows} 行, "
+                    f"DB {stats.db_ms:.0f}ms / 总计 {duration * 1000:.0f}ms"
+                )
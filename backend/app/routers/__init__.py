@@ -9,6 +9,9 @@ from .sector import router as sector_router
 from .sentiment import router as sentiment_router
 from .stock import router as stock_router
 from .backtest import router as backtest_router
+from .dashboard import router as dashboard_router
+from .export import router as export_router
+from .ops import router as ops_router
 
 __all__ = [
     "market_router",
@@ -18,4 +21,7 @@ __all__ = [
     "sentiment_router",
     "stock_router",
     "backtest_router",
+    "dashboard_router",
+    "export_router",
+    "ops_router",
 ]
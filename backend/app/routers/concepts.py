@@ -2,12 +2,13 @@
 概念板块相关 API 路由
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 from typing import Optional
-import json
 
+from app.middleware.http_cache import DATA_COMPLETE
 from app.utils.supabase_client import get_supabase
 from app.utils.trading_date import get_latest_trading_date
+from app.utils.serialization import project_rows, trusted_response
 from app.schemas.concepts import (
     HotConceptsResponse,
     HotConceptItem,
@@ -39,7 +40,7 @@ async def get_hot_concepts(
         supabase = get_supabase()
 
         # 构建查询
-        query = supabase.table("hot_concepts").select("*", count="exact")
+        query = supabase.table("hot_concepts").select("*")
         query = query.eq("trade_date", trade_date)
 
         # 排序（Supabase 格式）
@@ -63,13 +64,13 @@ async def get_hot_concepts(
                 detail=f"未找到 {trade_date} 的热门概念数据"
             )
 
-        concepts = [HotConceptItem(**item) for item in response.data]
+        concepts = project_rows(HotConceptItem, response.data)
 
-        return HotConceptsResponse(
-            success=True,
-            data=concepts,
-            total=len(concepts)
-        )
+        return trusted_response({
+            "success": True,
+            "data": concepts,
+            "total": len(concepts),
+        }, headers=DATA_COMPLETE)
 
     except HTTPException:
         raise
@@ -107,14 +108,14 @@ async def get_concept_stocks(
                 detail=f"未找到概念 '{concept_name}' 在 {trade_date} 的成分股数据"
             )
 
-        stocks = [ConceptStockItem(**item) for item in response.data]
+        stocks = project_rows(ConceptStockItem, response.data)
 
-        return ConceptStocksResponse(
-            success=True,
-            concept_name=concept_name,
-            data=stocks,
-            total=len(stocks)
-        )
+        return trusted_response({
+            "success": True,
+            "concept_name": concept_name,
+            "data": stocks,
+            "total": len(stocks),
+        }, headers=DATA_COMPLETE)
 
     except HTTPException:
         raise
@@ -124,6 +125,7 @@ async def get_concept_stocks(
 
 @router.get("/detail/{concept_name}", response_model=ConceptDetailResponse, summary="获取概念详情")
 async def get_concept_detail(
+    response: Response,
     concept_name: str,
     trade_date: Optional[str] = Query(None, description="交易日期 YYYY-MM-DD"),
 ):
@@ -161,8 +163,9 @@ async def get_concept_detail(
             "change_pct", desc=True, nullsfirst=True
         ).limit(10).execute()
 
-        top_stocks = [ConceptStockItem(**item) for item in stocks_response.data]
+        top_stocks = project_rows(ConceptStockItem, stocks_response.data)
 
+        response.headers.update(DATA_COMPLETE)
         return ConceptDetailResponse(
             success=True,
             concept_name=concept_name,
@@ -210,13 +213,13 @@ async def search_concepts(
                 total=0
             )
 
-        concepts = [HotConceptItem(**item) for item in response.data]
+        concepts = project_rows(HotConceptItem, response.data)
 
-        return HotConceptsResponse(
-            success=True,
-            data=concepts,
-            total=len(concepts)
-        )
+        return trusted_response({
+            "success": True,
+            "data": concepts,
+            "total": len(concepts),
+        }, headers=DATA_COMPLETE)
 
     except HTTPException:
         raise
@@ -0,0 +1,53 @@
+"""
+首页看板聚合 API 路由
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+
+from app.services.dashboard_service import (
+    DashboardService,
+    DASHBOARD_SECTIONS,
+    parse_sections,
+    parse_fields,
+    apply_fields,
+    is_complete,
+)
+from app.utils.serialization import trusted_response
+
+router = APIRouter()
+
+
+@router.get("", summary="获取首页看板数据（聚合接口）")
+async def get_dashboard(
+    trade_date: Optional[str] = Query(None, description="交易日期 YYYY-MM-DD，默认为最近交易日"),
+    sections: Optional[str] = Query(None, description=f"需要的模块（逗号分隔）: {','.join(DASHBOARD_SECTIONS)}，默认全部"),
+    top_n: int = Query(10, ge=1, le=50, description="热门概念数量"),
+    fields: Optional[str] = Query(None, description="字段裁剪，如 hot_concepts.concept_name,hot_concepts.change_pct"),
+):
+    """
+    一次请求返回首页需要的全部数据，替代分别调用:
+    /api/market/index、/api/market/sentiment、/api/market/stats、/api/limit/stats、/api/concepts/hot
+
+    - 共享的行只查一次，各模块并发查询
+    - 单个模块失败不影响其他模块，该模块为 null，错误信息放在 errors 中
+    - sections 只返回指定模块；fields 按 模块.字段 裁剪返回字段
+    - 有模块失败时响应不缓存（Cache-Control: no-store）
+    - 成交额环比、情绪阶段等依赖前几个交易日，不声明完整，只用短 max-age
+    """
+    try:
+        try:
+            selected = parse_sections(sections, DASHBOARD_SECTIONS)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        result = await DashboardService().get_dashboard(trade_date=trade_date, sections=selected, top_n=top_n)
+        content = {**result, "sections": apply_fields(result["sections"], parse_fields(fields))}
+        if not is_complete(result):
+            return trusted_response(content, headers={"Cache-Control": "no-store"})
+        return trusted_response(content)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取首页看板失败: {str(e)}")
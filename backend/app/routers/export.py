@@ -0,0 +1,221 @@
+"""
+数据导出 API 路由
+
+按日期区间流式导出涨停池、热门概念和昨日涨停表现:
+- 数据库侧按唯一键做键集分页，每次只取一页
+- 每页转换为 NDJSON / CSV 后立即写出，服务端内存占用与区间长度无关
+- 使用异步 Supabase 客户端，长时间导出不占用线程池
+"""
+
+import csv
+import io
+import json
+import re
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from loguru import logger
+
+from app.utils.keyset import KeysetField, apply_keyset, apply_order
+from app.utils.serialization import dumps
+from app.utils.supabase_client import get_async_supabase, supabase_timeout
+from app.utils.trading_date import get_latest_trading_date
+
+router = APIRouter()
+
+
+# 单页行数（不超过 PostgREST max-rows）
+EXPORT_PAGE_SIZE = 1000
+
+# 单页查询超时（秒）：区间越往后，键集条件越长，单页可能超过默认的 SUPABASE_TIMEOUT
+EXPORT_PAGE_TIMEOUT = 120
+
+_COLUMN_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+@dataclass(frozen=True)
+class ExportDataset:
+    """可导出的数据集"""
+
+    table: str
+    keys: Tuple[str, ...]          # 唯一键（键集分页顺序），首列为 trade_date
+    description: str
+
+
+EXPORT_DATASETS = {
+    "limit_stocks": ExportDataset(
+        table="limit_stocks_detail",
+        keys=("trade_date", "stock_code", "limit_type"),
+        description="涨跌停个股明细",
+    ),
+    "hot_concepts": ExportDataset(
+        table="hot_concepts",
+        keys=("trade_date", "concept_name"),
+        description="热门概念板块",
+    ),
+    "yesterday_limit_performance": ExportDataset(
+        table="yesterday_limit_performance",
+        keys=("trade_date", "stock_code"),
+        description="昨日涨停股今日表现",
+    ),
+}
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _parse_columns(columns: Optional[str], keys: Tuple[str, ...]) -> Optional[List[str]]:
+    """解析 columns 参数（唯一键列总是包含在内，用于翻页）"""
+    if not columns:
+        return None
+    selected = [c.strip() for c in columns.split(",") if c.strip()]
+    invalid = [c for c in selected if not _COLUMN_RE.match(c)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"无效的列名: {', '.join(invalid)}")
+    return list(keys) + [c for c in selected if c not in keys]
+
+
+async def iter_rows(
+    dataset: ExportDataset,
+    start_date: str,
+    end_date: str,
+    columns: Optional[List[str]] = None,
+    limit_type: Optional[str] = None,
+    page_size: int = EXPORT_PAGE_SIZE,
+) -> AsyncIterator[List[dict]]:
+    """
+    按唯一键分页读取区间内的数据
+
+    Yields:
+        每页的数据行
+    """
+    supabase = await get_async_supabase()
+    keys = [KeysetField(column) for column in dataset.keys]
+    select = ",".join(columns) if columns else "*"
+    cursor = None
+
+    while True:
+        query = supabase.table(dataset.table).select(select)\
+            .gte("trade_date", start_date)\
+            .lte("trade_date", end_date)
+        if limit_type and dataset.table == "limit_stocks_detail":
+            query = query.eq("limit_type", limit_type)
+        query = apply_order(query, keys)
+        if cursor is not None:
+            query = apply_keyset(query, keys, cursor)
+
+        with supabase_timeout(EXPORT_PAGE_TIMEOUT):
+            rows = (await query.limit(page_size).execute()).data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        cursor = [rows[-1].get(column) for column in dataset.keys]
+
+
+def _csv_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+async def stream_ndjson(pages: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    """每行一个 JSON 对象"""
+    async for rows in pages:
+        yield b"".join(dumps(row) + b"\n" for row in rows)
+
+
+async def stream_csv(pages: AsyncIterator[List[dict]], columns: Optional[List[str]] = None) -> AsyncIterator[bytes]:
+    """CSV（UTF-8 BOM，Excel 可直接打开）；未指定列时以第一页的列为表头"""
+    header = columns
+    first = True
+    async for rows in pages:
+        if header is None:
+            header = list(rows[0].keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if first:
+            buffer.write("\ufeff")
+            writer.writerow(header)
+            first = False
+        for row in rows:
+            writer.writerow([_csv_value(row.get(column)) for column in header])
+        yield buffer.getvalue().encode("utf-8")
+
+    # 区间内没有数据时仍输出表头（已指定列时）
+    if first and header:
+        buffer = io.StringIO()
+        buffer.write("\ufeff")
+        csv.writer(buffer).writerow(header)
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def _guarded(chunks: AsyncIterator[bytes], label: str, fmt: str) -> AsyncIterator[bytes]:
+    """响应头已发出后出错只能中断输出：记录日志，NDJSON 末尾追加错误行"""
+    exported = 0
+    try:
+        async for chunk in chunks:
+            exported += 1
+            yield chunk
+        logger.info(f"📤 导出完成 {label}，共 {exported} 页")
+    except Exception as e:
+        logger.error(f"❌ 导出中断 {label}: {e}")
+        if fmt == "ndjson":
+            yield dumps({"_error": f"导出中断: {str(e)}"}) + b"\n"
+
+
+@router.get("/{dataset}", summary="流式导出区间数据")
+async def export_dataset(
+    dataset: str,
+    start_date: str = Query(..., description="开始日期 YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD，默认为最近交易日"),
+    format: str = Query("ndjson", description="导出格式: ndjson/csv"),
+    columns: Optional[str] = Query(None, description="导出列（逗号分隔），默认全部列"),
+    limit_type: Optional[str] = Query(None, description="仅 limit_stocks: limit_up/limit_down"),
+):
+    """
+    流式导出区间内的数据（不分页、不限行数）
+
+    - **dataset**: limit_stocks / hot_concepts / yesterday_limit_performance
+    - 按 (交易日, 唯一键) 升序输出
+    - 服务端逐页读取、逐页写出，区间再长内存占用也不变
+    """
+    try:
+        spec = EXPORT_DATASETS.get(dataset)
+        if spec is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"未知数据集: {dataset}，可选: {', '.join(EXPORT_DATASETS)}"
+            )
+        if format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"format 可选: {', '.join(EXPORT_FORMATS)}")
+
+        end_date = end_date or get_latest_trading_date()
+        if not _DATE_RE.match(start_date) or not _DATE_RE.match(end_date):
+            raise HTTPException(status_code=400, detail="日期格式应为 YYYY-MM-DD")
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date 不能晚于 end_date")
+
+        selected = _parse_columns(columns, spec.keys)
+        pages = iter_rows(spec, start_date, end_date, selected, limit_type)
+        chunks = stream_ndjson(pages) if format == "ndjson" else stream_csv(pages, selected)
+
+        filename = f"{dataset}_{start_date}_{end_date}.{format}"
+        return StreamingResponse(
+            _guarded(chunks, filename, format),
+            media_type=EXPORT_FORMATS[format],
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                "Cache-Control": "no-store",
+            },
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"导出数据失败: {str(e)}")
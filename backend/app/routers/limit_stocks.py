@@ -2,32 +2,98 @@
 涨停池相关 API 路由
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
-import json
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import asyncio
 
+from app.middleware.http_cache import DATA_COMPLETE
 from app.utils.supabase_client import get_supabase
 from app.utils.trading_date import get_latest_trading_date
 from app.schemas.limit_stocks import (
     LimitStocksResponse,
     LimitStockItem,
     LimitStatsResponse,
-    LimitStatsItem,
 )
+from app.services.dashboard_service import build_limit_stats
+from app.services.limit_live_monitor import get_limit_live_monitor, live_monitor_enabled
+from app.services.limit_event_log import EVENT_NAMES, get_limit_event_log
+from app.utils.keyset import KeysetField, InvalidCursor, apply_order, apply_keyset, decode_cursor, paginate
+from app.utils.result_cache import cached
+from app.utils.serialization import dumps, project_rows, trusted_response
 
 router = APIRouter()
 
 
+# 排序字段（均为降序、空值在前，与原 offset 分页的顺序一致）
+ORDER_FIELDS = ("continuous_days", "change_pct", "amount")
+
+COUNT_MODES = ("exact", "planned", "estimated", "none")
+
+
+def _keyset_fields(order_by: str, multi_day: bool) -> List[KeysetField]:
+    """排序键: [交易日] + 排序字段 + 股票代码（保证顺序唯一）"""
+    order_field = order_by if order_by in ORDER_FIELDS else "continuous_days"
+    keys = [KeysetField(order_field, desc=True, nulls_first=True), KeysetField("stock_code")]
+    if multi_day:
+        keys.insert(0, KeysetField("trade_date", desc=True))
+    return keys
+
+
+def _apply_filters(query, start_date: str, end_date: str, limit_type: str,
+                   min_continuous_days: Optional[int], continuous_days: Optional[int], filter_st: bool):
+    """列表查询和计数查询共用的过滤条件"""
+    if start_date == end_date:
+        query = query.eq("trade_date", end_date)
+    else:
+        query = query.gte("trade_date", start_date).lte("trade_date", end_date)
+    query = query.eq("limit_type", limit_type)
+
+    # 筛选连板天数（精确匹配优先）
+    if continuous_days is not None and limit_type == "limit_up":
+        query = query.eq("continuous_days", continuous_days)
+    elif min_continuous_days is not None and limit_type == "limit_up":
+        query = query.gte("continuous_days", min_continuous_days)
+
+    # 过滤 ST（is_st 在采集时写入，可走索引）
+    if filter_st:
+        query = query.eq("is_st", False)
+    return query
+
+
+@cached("limit.stocks_count", date_arg="end_date")
+def count_limit_stocks(
+    end_date: str,
+    start_date: str,
+    limit_type: str,
+    min_continuous_days: Optional[int],
+    continuous_days: Optional[int],
+    filter_st: bool,
+) -> int:
+    """
+    精确计数（按交易日 + 筛选条件缓存，翻页时不重复 count）
+
+    采集器写入该交易日后缓存随 invalidate_trade_date 失效
+    """
+    query = get_supabase().table("limit_stocks_detail").select("id", count="exact")
+    query = _apply_filters(query, start_date, end_date, limit_type, min_continuous_days, continuous_days, filter_st)
+    response = query.limit(1).execute()
+    return response.count or 0
+
+
 @router.get("/stocks", response_model=LimitStocksResponse, summary="获取涨停/跌停股票列表")
 async def get_limit_stocks(
     trade_date: Optional[str] = Query(None, description="交易日期 YYYY-MM-DD"),
+    start_date: Optional[str] = Query(None, description="区间开始日期 YYYY-MM-DD（与 trade_date 组成多日区间）"),
     limit_type: str = Query("limit_up", description="类型: limit_up(涨停) / limit_down(跌停)"),
     min_continuous_days: Optional[int] = Query(None, description="最小连板天数"),
     continuous_days: Optional[int] = Query(None, description="精确连板天数"),
     filter_st: bool = Query(False, description="是否过滤ST股票"),
     order_by: str = Query("continuous_days", description="排序字段: continuous_days/change_pct/amount"),
-    page: int = Query(1, ge=1, description="页码"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的 next_cursor）"),
+    page: int = Query(1, ge=1, description="页码（兼容参数，深翻页请使用 cursor）"),
     page_size: int = Query(50, ge=1, le=200, description="每页数量"),
+    count: str = Query("exact", description="总数统计: exact(精确，按日缓存)/planned(执行计划估算)/estimated/none(不统计)"),
 ):
     """
     获取涨停/跌停股票列表
@@ -37,68 +103,78 @@ async def get_limit_stocks(
     - min_continuous_days: 最小连板天数（仅涨停有效）
     - filter_st: 是否过滤ST股票
     - order_by: 排序字段
+    - start_date: 与 trade_date 组成多日区间（按交易日倒序）
 
-    支持分页
+    分页：
+    - 推荐使用 cursor：第一页不传，之后传上一页返回的 next_cursor，翻到任意深度都是常数开销
+    - page 为兼容旧客户端的 offset 分页
     """
     try:
         if not trade_date:
             trade_date = get_latest_trading_date()
+        start_date = start_date or trade_date
+        if start_date > trade_date:
+            raise HTTPException(status_code=400, detail="start_date 不能晚于 trade_date")
+        if count not in COUNT_MODES:
+            raise HTTPException(status_code=400, detail=f"count 可选: {', '.join(COUNT_MODES)}")
+
+        keys = _keyset_fields(order_by, multi_day=start_date != trade_date)
+        filters = (start_date, trade_date, limit_type, min_continuous_days, continuous_days, filter_st)
 
         supabase = get_supabase()
 
-        # 构建查询
-        query = supabase.table("limit_stocks_detail").select("*", count="exact")
-        query = query.eq("trade_date", trade_date).eq("limit_type", limit_type)
-
-        # 筛选连板天数（精确匹配优先）
-        if continuous_days is not None and limit_type == "limit_up":
-            query = query.eq("continuous_days", continuous_days)
-        elif min_continuous_days is not None and limit_type == "limit_up":
-            query = query.gte("continuous_days", min_continuous_days)
-
-        # 过滤 ST
-        if filter_st:
-            query = query.not_.like("stock_name", "%ST%")
-
-        # 排序（Supabase 格式）
-        order_mapping = {
-            "continuous_days": ("continuous_days", {"desc": True, "nullsfirst": True}),
-            "change_pct": ("change_pct", {"desc": True, "nullsfirst": True}),
-            "amount": ("amount", {"desc": True, "nullsfirst": True}),
-        }
-        order_field, order_opts = order_mapping.get(order_by, ("continuous_days", {"desc": True, "nullsfirst": True}))
-        query = query.order(order_field, **order_opts)
-
-        # 分页
-        offset = (page - 1) * page_size
-        query = query.range(offset, offset + page_size - 1)
+        # 构建查询（多取一行判断是否还有下一页）
+        if count in ("planned", "estimated"):
+            query = supabase.table("limit_stocks_detail").select("*", count=count)
+        else:
+            query = supabase.table("limit_stocks_detail").select("*")
+        query = _apply_filters(query, *filters)
+        query = apply_order(query, keys)
+
+        if cursor:
+            try:
+                query = apply_keyset(query, keys, decode_cursor(cursor, keys))
+            except InvalidCursor as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            query = query.limit(page_size + 1)
+        else:
+            offset = (page - 1) * page_size
+            query = query.range(offset, offset + page_size)
 
         # 执行查询
         response = query.execute()
-
-        # 处理数据
-        stocks = []
-        for item in response.data:
-            # 解析 concepts 字段
-            if isinstance(item.get('concepts'), str):
-                try:
-                    item['concepts'] = json.loads(item['concepts'])
-                except:
-                    item['concepts'] = []
-            elif item.get('concepts') is None:
-                item['concepts'] = []
-
-            stocks.append(LimitStockItem(**item))
-
-        total = response.count if response.count is not None else len(stocks)
-
-        return LimitStocksResponse(
-            success=True,
-            data=stocks,
-            total=total,
-            page=page,
-            page_size=page_size
-        )
+        rows, next_cursor = paginate(response.data, keys, page_size)
+
+        # 可信数据库行直接裁剪字段（concepts 已在写入时规范化为数组）
+        stocks = project_rows(LimitStockItem, rows)
+
+        if count == "exact":
+            # 单日计数按交易日缓存；多日区间中任一日重新采集都会改变总数，不缓存
+            counter = count_limit_stocks if start_date == trade_date else count_limit_stocks.__wrapped__
+            total = counter(
+                end_date=trade_date,
+                start_date=start_date,
+                limit_type=limit_type,
+                min_continuous_days=min_continuous_days,
+                continuous_days=continuous_days,
+                filter_st=filter_st,
+            )
+        elif count == "none":
+            total = None
+        else:
+            total = response.count
+
+        # 单日且有数据才声明完整（多日区间、尚未采集的空结果不长期缓存）
+        complete = start_date == trade_date and bool(rows or cursor or page > 1)
+        return trusted_response({
+            "success": True,
+            "data": stocks,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+        }, headers=DATA_COMPLETE if complete else None)
 
     except HTTPException:
         raise
@@ -108,6 +184,7 @@ async def get_limit_stocks(
 
 @router.get("/stats", response_model=LimitStatsResponse, summary="获取涨停统计数据")
 async def get_limit_stats(
+    response: Response,
     trade_date: Optional[str] = Query(None, description="交易日期 YYYY-MM-DD")
 ):
     """
@@ -127,42 +204,28 @@ async def get_limit_stats(
         supabase = get_supabase()
 
         # 查询市场情绪数据（包含涨停统计）
-        response = supabase.table("market_sentiment").select("*").eq(
+        sentiment_response = supabase.table("market_sentiment").select("*").eq(
             "trade_date", trade_date
         ).execute()
 
-        if not response.data or len(response.data) == 0:
+        if not sentiment_response.data or len(sentiment_response.data) == 0:
             raise HTTPException(
                 status_code=404,
                 detail=f"未找到 {trade_date} 的涨停统计数据"
             )
 
-        data = response.data[0]
-
-        # 解析连板分布
-        continuous_dist = data.get('continuous_limit_distribution')
-        if isinstance(continuous_dist, str):
-            continuous_dist = json.loads(continuous_dist)
-
-        # 查询一字板数量
+        # 查询一字板数量（只需要计数，不取行）
         strong_limit_response = supabase.table("limit_stocks_detail").select(
-            "*", count="exact"
+            "id", count="exact"
         ).eq("trade_date", trade_date).eq("limit_type", "limit_up").eq(
             "is_strong_limit", True
-        ).execute()
+        ).limit(1).execute()
 
         strong_limit_count = strong_limit_response.count if strong_limit_response.count is not None else 0
 
-        stats = LimitStatsItem(
-            trade_date=trade_date,
-            limit_up_count=data['limit_up_count'],
-            limit_down_count=data['limit_down_count'],
-            continuous_distribution=continuous_dist,
-            strong_limit_count=strong_limit_count,
-            exploded_count=data.get('exploded_count', 0),
-            explosion_rate=data['explosion_rate']
-        )
+        stats = build_limit_stats(trade_date, sentiment_response.data[0], strong_limit_count)
 
+        response.headers.update(DATA_COMPLETE)
         return LimitStatsResponse(
             success=True,
             data=stats
@@ -176,6 +239,7 @@ async def get_limit_stats(
 
 @router.get("/stock/{stock_code}", response_model=LimitStockItem, summary="获取个股涨停详情")
 async def get_stock_limit_detail(
+    response: Response,
     stock_code: str,
     trade_date: Optional[str] = Query(None, description="交易日期 YYYY-MM-DD")
 ):
@@ -191,28 +255,156 @@ async def get_stock_limit_detail(
         supabase = get_supabase()
 
         # 查询个股数据
-        response = supabase.table("limit_stocks_detail").select("*").eq(
+        detail_response = supabase.table("limit_stocks_detail").select("*").eq(
             "trade_date", trade_date
         ).eq("stock_code", stock_code).execute()
 
-        if not response.data or len(response.data) == 0:
+        if not detail_response.data or len(detail_response.data) == 0:
             raise HTTPException(
                 status_code=404,
                 detail=f"未找到股票 {stock_code} 在 {trade_date} 的涨跌停数据"
             )
 
-        data = response.data[0]
+        response.headers.update(DATA_COMPLETE)
+        return LimitStockItem(**detail_response.data[0])
 
-        # 解析 concepts
-        if isinstance(data.get('concepts'), str):
-            try:
-                data['concepts'] = json.loads(data['concepts'])
-            except:
-                data['concepts'] = []
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取个股详情失败: {str(e)}")
 
-        return LimitStockItem(**data)
+
+@router.get("/timeline", summary="获取盘中封板时间线")
+async def get_limit_timeline(
+    trade_date: Optional[str] = Query(None, description="交易日期 YYYY-MM-DD"),
+    stock_code: Optional[str] = Query(None, description="股票代码，不传返回当日全部"),
+    limit_type: Optional[str] = Query(None, description="类型: limit_up/limit_down"),
+):
+    """
+    获取盘中封板 / 炸板 / 回封时间线
+
+    - 优先读取收盘压缩后的 limit_intraday_timeline
+    - 表中没有该日数据（当日盘中 / 收盘后压缩前，或压缩失败）时重放本机的事件日志
+    - events 为 [[当日秒数, 事件类型], ...]，类型: 1=封板 2=炸板 3=回封 4=连板数变化 5=封单变化 6=跌停 7=跌停打开
+    """
+    try:
+        if not trade_date:
+            trade_date = get_latest_trading_date()
+
+        query = get_supabase().table("limit_intraday_timeline").select("*").eq("trade_date", trade_date)
+        if stock_code:
+            query = query.eq("stock_code", stock_code)
+        rows = query.order("first_seal_time").execute().data or []
+        # 事件日志压缩前仍可能追加，只有读取已压缩的时间线才声明完整
+        complete = bool(rows)
+
+        if not rows:
+            event_log = get_limit_event_log()
+            if event_log.exists(trade_date):
+                rows = event_log.timelines(trade_date, stock_code)
+
+        if limit_type:
+            rows = [r for r in rows if r["limit_type"] == limit_type]
+
+        if not rows:
+            raise HTTPException(
+                status_code=404,
+                detail=f"未找到 {trade_date} 的盘中封板时间线"
+            )
+
+        return trusted_response({
+            "success": True,
+            "trade_date": trade_date,
+            "event_types": EVENT_NAMES,
+            "data": rows,
+            "total": len(rows),
+        }, headers=DATA_COMPLETE if complete else None)
 
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取个股详情失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"获取封板时间线失败: {str(e)}")
+
+
+# ============================================
+# 盘中实时涨停池
+# ============================================
+
+LIVE_HEARTBEAT_SECONDS = 15
+
+
+def _live_monitor():
+    monitor = get_limit_live_monitor()
+    if not live_monitor_enabled() or not monitor.running:
+        raise HTTPException(status_code=503, detail="盘中实时监控未开启（LIMIT_LIVE_ENABLED=true）")
+    return monitor
+
+
+def _sse(event: str, data, event_id: Optional[str] = None) -> bytes:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    return ("\n".join(lines) + "\n").encode("utf-8") + b"data: " + dumps(data) + b"\n\n"
+
+
+@router.get("/live", summary="盘中涨停池实时推送（SSE）")
+async def stream_limit_live(
+    request: Request,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Server-Sent Events 推送盘中涨停池变化
+
+    - 连接建立先发送 snapshot（完整涨停池/跌停池）；带 Last-Event-ID 重连时只补发缺失的事件，
+      服务重启或换日后旧 ID 失效，重新发送 snapshot
+    - 之后每轮轮询有变化时发送 delta（仅变化的股票和字段）
+    - 事件类型: seal/break/reseal/board_change/seal_change/limit_down/limit_down_open
+    """
+    monitor = _live_monitor()
+    queue = monitor.subscribe()
+
+    async def event_stream():
+        try:
+            missed = monitor.events_since(last_event_id) if last_event_id else None
+            if missed is None:
+                yield _sse("snapshot", monitor.snapshot(), monitor.event_id())
+            elif missed:
+                yield _sse("delta", {"events": missed}, monitor.event_id(missed[-1]["seq"]))
+
+            while True:
+                try:
+                    events = await asyncio.wait_for(queue.get(), timeout=LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": ping\n\n"
+                    continue
+                if events is None:
+                    break
+                yield _sse("delta", {"events": events}, monitor.event_id(events[-1]["seq"]))
+        finally:
+            monitor.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/live/changes", summary="盘中涨停池增量（轮询）")
+async def get_limit_live_changes(
+    since: Optional[str] = Query(None, description="上次返回的 event_id，不传表示获取完整快照"),
+):
+    """
+    不支持 SSE 的客户端轮询使用：返回 since 之后的事件，下次轮询传本次返回的 event_id；
+    不传 since、服务重启 / 换日后 ID 失效或已超出缓存范围时返回完整快照（snapshot 字段）
+    """
+    monitor = _live_monitor()
+    events = monitor.events_since(since) if since else None
+    if events is None:
+        return trusted_response({
+            "success": True, "seq": monitor.seq, "event_id": monitor.event_id(), "snapshot": monitor.snapshot(),
+        })
+    return trusted_response({"success": True, "seq": monitor.seq, "event_id": monitor.event_id(), "events": events})
@@ -3,128 +3,43 @@
 """
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
 from typing import Optional
 from datetime import datetime
-import json
 
+from app.middleware.http_cache import DATA_COMPLETE
 from app.utils.supabase_client import get_supabase
 from app.utils.trading_date import get_latest_trading_date
 from app.schemas.market import (
     MarketIndexResponse,
-    MarketIndexItem,
     MarketSentimentResponse,
-    MarketSentimentItem,
     MarketStatsResponse,
-    MarketStatsItem,
-    SentimentScoreDetail,
+)
+from app.services.dashboard_service import (
+    DashboardService,
+    OVERVIEW_SECTIONS,
+    DEFAULT_INDEX_CODES,
+    SENTIMENT_HISTORY_COLUMNS,
+    build_index_items,
+    build_sentiment_item,
+    build_market_stats,
+    build_index_history,
+    parse_sections,
+    parse_fields,
+    apply_fields,
+    is_complete,
+)
+from app.utils.downsample import lttb
+from app.utils.window_loader import load_window
+from app.utils.serialization import (
+    ARROW_MEDIA_TYPE,
+    arrow_available,
+    to_arrow_ipc,
+    to_columns,
+    trusted_response,
 )
 
 
-def calculate_sentiment_score(data: dict) -> SentimentScoreDetail:
-    """
-    计算市场情绪评分
-
-    评分维度（5项，每项 -1/0/+1，总分范围 -5 ~ +5）：
-    1. 上涨占比: >50% +1, 30%-50% 0, <30% -1
-    2. 成交额变化: >+10% +1, ±10% 0, <-10% -1
-    3. 涨停数（绝对数量）: >=100只 +1, 50-99只 0, <50只 -1
-    4. 跌停数（绝对数量）: <=5只 +1, 6-15只 0, >15只 -1
-    5. 炸板率: <20% +1, 20%-30% 0, >30% -1
-
-    情绪等级映射：
-    +4~+5: 极度亢奋 (深红)
-    +2~+3: 情绪偏热 (橙色)
-    +1: 情绪偏暖 (黄色)
-    0: 情绪中性 (灰色)
-    -1: 情绪偏冷 (黄色)
-    -2~-3: 情绪偏弱 (蓝色)
-    -4~-5: 极度冰点 (绿色)
-    """
-    scores = {}
-
-    # 1. 上涨占比得分
-    up_count = data.get('up_count', 0)
-    down_count = data.get('down_count', 0)
-    total = up_count + down_count
-    up_ratio = (up_count / total * 100) if total > 0 else 0
-
-    if up_ratio > 50:
-        scores['up_ratio_score'] = 1
-    elif up_ratio < 30:
-        scores['up_ratio_score'] = -1
-    else:
-        scores['up_ratio_score'] = 0
-
-    # 2. 成交额变化得分
-    amount_change_pct = data.get('total_amount_change_pct')
-    if amount_change_pct is not None:
-        if amount_change_pct > 10:
-            scores['amount_change_score'] = 1
-        elif amount_change_pct < -10:
-            scores['amount_change_score'] = -1
-        else:
-            scores['amount_change_score'] = 0
-    else:
-        scores['amount_change_score'] = 0
-
-    # 3. 涨停数得分（基于绝对数量，参考市场通用标准）
-    # 标准来源：主板涨停<50只为弱势，>100只为强势
-    limit_up = data.get('limit_up_count', 0)
-    if limit_up >= 100:
-        scores['limit_up_score'] = 1      # 强势：做多热情高涨
-    elif limit_up >= 50:
-        scores['limit_up_score'] = 0      # 中性：正常水平
-    else:
-        scores['limit_up_score'] = -1     # 弱势：市场情绪不佳
-
-    # 4. 跌停数得分（基于绝对数量，参考市场通用标准）
-    # 标准来源：跌停<=5只为情绪高涨，>15只为恐慌
-    limit_down = data.get('limit_down_count', 0)
-    if limit_down <= 5:
-        scores['limit_down_score'] = 1    # 情绪好：恐慌低
-    elif limit_down <= 15:
-        scores['limit_down_score'] = 0    # 中性：正常水平
-    else:
-        scores['limit_down_score'] = -1   # 情绪差：恐慌蔓延
-
-    # 5. 炸板率得分
-    explosion_rate = data.get('explosion_rate', 0)
-    if explosion_rate < 20:
-        scores['explosion_rate_score'] = 1
-    elif explosion_rate > 30:
-        scores['explosion_rate_score'] = -1
-    else:
-        scores['explosion_rate_score'] = 0
-
-    # 计算总分
-    total_score = sum(scores.values())
-    scores['total_score'] = total_score
-
-    # 确定情绪等级和颜色
-    if total_score >= 4:
-        scores['sentiment_level'] = '极度亢奋'
-        scores['sentiment_color'] = 'deep_red'
-    elif total_score >= 2:
-        scores['sentiment_level'] = '情绪偏热'
-        scores['sentiment_color'] = 'orange'
-    elif total_score == 1:
-        scores['sentiment_level'] = '情绪偏暖'
-        scores['sentiment_color'] = 'yellow'
-    elif total_score == 0:
-        scores['sentiment_level'] = '情绪中性'
-        scores['sentiment_color'] = 'gray'
-    elif total_score == -1:
-        scores['sentiment_level'] = '情绪偏冷'
-        scores['sentiment_color'] = 'yellow'
-    elif total_score >= -3:
-        scores['sentiment_level'] = '情绪偏弱'
-        scores['sentiment_color'] = 'blue'
-    else:
-        scores['sentiment_level'] = '极度冰点'
-        scores['sentiment_color'] = 'green'
-
-    return SentimentScoreDetail(**scores)
-
 router = APIRouter()
 
 
@@ -142,47 +57,22 @@ async def get_market_index(
         if not trade_date:
             trade_date = get_latest_trading_date()
 
-        supabase = get_supabase()
+        # 当日 + 前一交易日指数（一次查询）
+        window = load_window("market_index", trade_date, days=2, key_column="index_code", group_size=len(DEFAULT_INDEX_CODES))
+        today_rows = window.rows_on(trade_date)
 
-        # 查询指数数据
-        response = supabase.table("market_index").select("*").eq(
-            "trade_date", trade_date
-        ).order("index_code").execute()
-
-        if not response.data:
+        if not today_rows:
             raise HTTPException(
                 status_code=404,
                 detail=f"未找到 {trade_date} 的大盘指数数据"
             )
 
-        # 查询前一交易日数据用于计算成交额环比
-        prev_response = supabase.table("market_index").select("index_code,amount").lt(
-            "trade_date", trade_date
-        ).order("trade_date", desc=True).limit(3).execute()
-
-        # 构建前一日成交额映射
-        prev_amount_map = {}
-        if prev_response.data:
-            for item in prev_response.data:
-                if item['index_code'] not in prev_amount_map:
-                    prev_amount_map[item['index_code']] = item['amount']
-
-        # 转换数据并计算成交额环比
-        indexes = []
-        for item in response.data:
-            # 计算成交额环比变化率
-            index_code = item['index_code']
-            current_amount = item.get('amount')
-            prev_amount = prev_amount_map.get(index_code)
-
-            if current_amount and prev_amount and prev_amount > 0:
-                amount_change_pct = round((current_amount - prev_amount) / prev_amount * 100, 2)
-                item['amount_change_pct'] = amount_change_pct
-            else:
-                item['amount_change_pct'] = None
+        prev_date = window.previous_date(trade_date)
+        prev_rows = window.rows_on(prev_date) if prev_date else []
 
-            indexes.append(MarketIndexItem.model_validate(item))
+        indexes = build_index_items(today_rows, prev_rows)
 
+        # 成交额环比依赖前一交易日，前一日重采后当日响应也会变化，不声明完整（短 max-age）
         return MarketIndexResponse(
             success=True,
             data=indexes,
@@ -213,99 +103,19 @@ async def get_market_sentiment(
         if not trade_date:
             trade_date = get_latest_trading_date()
 
-        supabase = get_supabase()
-
-        # 查询市场情绪数据
-        response = supabase.table("market_sentiment").select("*").eq(
-            "trade_date", trade_date
-        ).execute()
+        # 当日 + 前两个交易日（一次查询，用于环比和连板对比）
+        window = load_window("market_sentiment", trade_date, days=3)
+        today = window.row_on(trade_date)
 
-        if not response.data or len(response.data) == 0:
+        if not today:
             raise HTTPException(
                 status_code=404,
                 detail=f"未找到 {trade_date} 的市场情绪数据"
             )
 
-        data = response.data[0]
-
-        # 解析 JSON 字段
-        if isinstance(data.get('continuous_limit_distribution'), str):
-            data['continuous_limit_distribution'] = json.loads(data['continuous_limit_distribution'])
-
-        # 查询前两个交易日的数据以计算环比和对比
-        try:
-            prev_response = supabase.table("market_sentiment").select("total_amount,up_count,down_count,limit_up_count,limit_down_count,explosion_rate,continuous_limit_distribution").lt(
-                "trade_date", trade_date
-            ).order("trade_date", desc=True).limit(2).execute()
-
-            if prev_response.data and len(prev_response.data) > 0:
-                # 前1个交易日数据
-                prev_data = prev_response.data[0]
-                prev_total_amount = prev_data['total_amount']
-                current_total_amount = data['total_amount']
-
-                # 计算环比变化
-                total_amount_change = current_total_amount - prev_total_amount
-                total_amount_change_pct = (total_amount_change / prev_total_amount * 100) if prev_total_amount > 0 else 0
-
-                data['total_amount_change'] = round(total_amount_change, 2)
-                data['total_amount_change_pct'] = round(total_amount_change_pct, 2)
-
-                # 添加前1日涨跌家数
-                data['prev_up_count'] = prev_data.get('up_count')
-                data['prev_down_count'] = prev_data.get('down_count')
-
-                # 添加前1日涨停跌停数据
-                data['prev_limit_up_count'] = prev_data.get('limit_up_count')
-                data['prev_limit_down_count'] = prev_data.get('limit_down_count')
-                data['prev_explosion_rate'] = prev_data.get('explosion_rate')
-
-                # 添加前1日连板分布
-                prev_distribution = prev_data.get('continuous_limit_distribution')
-                if isinstance(prev_distribution, str):
-                    data['prev_continuous_limit_distribution'] = json.loads(prev_distribution)
-                else:
-                    data['prev_continuous_limit_distribution'] = prev_distribution
-
-                # 前2个交易日数据（如果存在）
-                if len(prev_response.data) > 1:
-                    prev2_data = prev_response.data[1]
-                    prev2_distribution = prev2_data.get('continuous_limit_distribution')
-                    if isinstance(prev2_distribution, str):
-                        data['prev2_continuous_limit_distribution'] = json.loads(prev2_distribution)
-                    else:
-                        data['prev2_continuous_limit_distribution'] = prev2_distribution
-                else:
-                    data['prev2_continuous_limit_distribution'] = None
-            else:
-                # 如果无法获取前一日数据，设置为None
-                data['total_amount_change'] = None
-                data['total_amount_change_pct'] = None
-                data['prev_up_count'] = None
-                data['prev_down_count'] = None
-                data['prev_limit_up_count'] = None
-                data['prev_limit_down_count'] = None
-                data['prev_explosion_rate'] = None
-                data['prev_continuous_limit_distribution'] = None
-                data['prev2_continuous_limit_distribution'] = None
-        except Exception as e:
-            # 如果无法获取前一日数据，设置为None
-            data['total_amount_change'] = None
-            data['total_amount_change_pct'] = None
-            data['prev_up_count'] = None
-            data['prev_down_count'] = None
-            data['prev_limit_up_count'] = None
-            data['prev_limit_down_count'] = None
-            data['prev_explosion_rate'] = None
-            data['prev_continuous_limit_distribution'] = None
-            data['prev2_continuous_limit_distribution'] = None
-
-        # 计算情绪评分
-        sentiment_score = calculate_sentiment_score(data)
-        data['sentiment_score'] = sentiment_score
-
-        sentiment = MarketSentimentItem(**data)
+        sentiment = build_sentiment_item(today, window.before(trade_date, 2))
 
+        # 环比和连板对比依赖前两个交易日，不声明完整（短 max-age）
         return MarketSentimentResponse(
             success=True,
             data=sentiment
@@ -319,6 +129,7 @@ async def get_market_sentiment(
 
 @router.get("/stats", response_model=MarketStatsResponse, summary="获取市场统计数据")
 async def get_market_stats(
+    response: Response,
     trade_date: Optional[str] = Query(None, description="交易日期 YYYY-MM-DD，默认为最近交易日")
 ):
     """
@@ -337,40 +148,19 @@ async def get_market_stats(
         supabase = get_supabase()
 
         # 查询市场情绪数据
-        response = supabase.table("market_sentiment").select("*").eq(
+        result = supabase.table("market_sentiment").select("*").eq(
             "trade_date", trade_date
         ).execute()
 
-        if not response.data or len(response.data) == 0:
+        if not result.data or len(result.data) == 0:
             raise HTTPException(
                 status_code=404,
                 detail=f"未找到 {trade_date} 的市场数据"
             )
 
-        data = response.data[0]
-
-        # 计算市场状态
-        up_down_ratio = data['up_down_ratio']
-        limit_up_count = data['limit_up_count']
-
-        if up_down_ratio >= 1.5 and limit_up_count >= 50:
-            market_status = "强势"
-        elif up_down_ratio >= 0.8 and limit_up_count >= 20:
-            market_status = "震荡"
-        else:
-            market_status = "弱势"
-
-        stats = MarketStatsItem(
-            trade_date=data['trade_date'],
-            total_amount_yi=round(data['total_amount'] / 1e8, 2),
-            up_count=data['up_count'],
-            down_count=data['down_count'],
-            limit_up_count=data['limit_up_count'],
-            limit_down_count=data['limit_down_count'],
-            up_down_ratio=data['up_down_ratio'],
-            market_status=market_status
-        )
+        stats = build_market_stats(result.data[0])
 
+        response.headers.update(DATA_COMPLETE)
         return MarketStatsResponse(
             success=True,
             data=stats
@@ -382,17 +172,112 @@ async def get_market_stats(
         raise HTTPException(status_code=500, detail=f"获取市场统计失败: {str(e)}")
 
 
+# 历史接口的输出格式
+HISTORY_FORMATS = ("rows", "columnar", "arrow")
+
+# 单次查询的最大行数（PostgREST max-rows）
+HISTORY_PAGE_SIZE = 1000
+
+# 列式输出的默认列（不含逐行重复的走势描述字段）
+INDEX_HISTORY_COLUMNS = (
+    "trade_date", "open_price", "high_price", "low_price", "close_price",
+    "volume", "amount", "change_pct",
+)
+INDEX_TREND_COLUMNS = ("trend", "change_5d", "ma5_position", "ma10_position", "ma20_position")
+SENTIMENT_HISTORY_FIELDS = tuple(SENTIMENT_HISTORY_COLUMNS.split(","))
+
+
+def _fetch_history(
+    table: str,
+    select: str,
+    end_date: str,
+    start_date: Optional[str] = None,
+    days: Optional[int] = None,
+    index_code: Optional[str] = None,
+) -> list:
+    """
+    按日期倒序分页读取历史数据（按 trade_date 翻页，不受单次 1000 行上限影响）
+
+    Args:
+        end_date: 截止日期（含）
+        start_date: 开始日期（含），为空时按 days 取最近 N 条
+        days: 最多取多少条
+
+    Returns:
+        按日期升序的数据行
+    """
+    supabase = get_supabase()
+    rows: list = []
+    last_date = None
+
+    while True:
+        page_size = HISTORY_PAGE_SIZE if days is None else min(HISTORY_PAGE_SIZE, days - len(rows))
+        if page_size <= 0:
+            break
+        query = supabase.table(table).select(select)
+        if index_code:
+            query = query.eq("index_code", index_code)
+        query = query.lt("trade_date", last_date) if last_date else query.lte("trade_date", end_date)
+        if start_date:
+            query = query.gte("trade_date", start_date)
+        page = query.order("trade_date", desc=True).limit(page_size).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            break
+        last_date = page[-1]["trade_date"]
+
+    rows.reverse()
+    return rows
+
+
+def _parse_history_fields(fields: Optional[str], default: tuple) -> tuple:
+    if not fields:
+        return default
+    selected = tuple(f.strip() for f in fields.split(",") if f.strip())
+    if any(not f.replace("_", "").isalnum() for f in selected):
+        raise HTTPException(status_code=400, detail="fields 只能包含列名")
+    return ("trade_date",) + tuple(f for f in selected if f != "trade_date")
+
+
+def _history_response(rows: list, total: int, columns: tuple, format: str, extra: dict) -> Response:
+    """列式 JSON 或 Arrow IPC 输出"""
+    if format == "arrow":
+        if not arrow_available():
+            raise HTTPException(status_code=400, detail="服务端未安装 pyarrow，请使用 format=columnar")
+        return Response(
+            content=to_arrow_ipc(rows, columns),
+            media_type=ARROW_MEDIA_TYPE,
+            headers={"X-Total-Count": str(total), "X-Point-Count": str(len(rows))},
+        )
+    return trusted_response({
+        "success": True,
+        **extra,
+        "total": total,
+        "points": len(rows),
+        "columns": list(columns),
+        "data": to_columns(rows, columns),
+    })
+
+
 @router.get("/index/history", summary="获取指数历史K线数据")
 async def get_index_history(
     index_code: str = Query("SH000001", description="指数代码"),
-    days: int = Query(20, ge=5, le=60, description="查询天数")
+    days: int = Query(20, ge=5, le=5000, description="查询天数（未指定 start_date 时生效）"),
+    start_date: Optional[str] = Query(None, description="开始日期 YYYY-MM-DD（按区间查询）"),
+    end_date: Optional[str] = Query(None, description="截止日期 YYYY-MM-DD，默认为最近交易日"),
+    points: Optional[int] = Query(None, ge=10, le=5000, description="LTTB 降采样目标点数（按收盘价）"),
+    format: str = Query("rows", description="输出格式: rows(逐行对象)/columnar(列式 JSON)/arrow(Arrow IPC)"),
+    fields: Optional[str] = Query(None, description="列式输出的列（逗号分隔），默认 OHLC + 成交量/额 + 涨跌幅"),
 ):
     """
     获取指数历史K线数据（含走势分析）
 
     参数:
     - index_code: 指数代码 (SH000001=上证, SZ399001=深证, SZ399006=创业板)
-    - days: 查询天数 (5-60天)
+    - days: 查询天数（未指定 start_date 时取截至 end_date 的最近 N 天）
+    - start_date / end_date: 按日期区间查询（可跨多年）
+    - points: 点数超过该值时用 LTTB 降采样，首尾两点总是保留
+    - format: rows 与原接口一致；columnar 返回 {列名: [值...]}；arrow 返回 Arrow IPC stream
 
     返回:
     - data: K线数据数组（按日期升序，含走势分析字段）
@@ -404,63 +289,43 @@ async def get_index_history(
       - change_5d: 5日涨跌幅
     """
     try:
-        supabase = get_supabase()
-
-        # 查询最近N天数据（已包含走势分析字段）
-        response = supabase.table("market_index")\
-            .select("*")\
-            .eq("index_code", index_code)\
-            .order("trade_date", desc=True)\
-            .limit(days)\
-            .execute()
+        if format not in HISTORY_FORMATS:
+            raise HTTPException(status_code=400, detail=f"format 可选: {', '.join(HISTORY_FORMATS)}")
+        if not end_date:
+            end_date = get_latest_trading_date()
+
+        columns = _parse_history_fields(fields, INDEX_HISTORY_COLUMNS)
+        select = "*" if format == "rows" else ",".join(dict.fromkeys(columns + INDEX_TREND_COLUMNS))
+
+        # 查询历史数据（已包含走势分析字段）
+        data = _fetch_history(
+            "market_index", select, end_date,
+            start_date=start_date,
+            days=None if start_date else days,
+            index_code=index_code,
+        )
 
-        if not response.data:
+        if not data:
             raise HTTPException(
                 status_code=404,
                 detail=f"未找到指数 {index_code} 的数据"
             )
 
-        # 按日期升序排列（K线图需要从旧到新）
-        data = sorted(response.data, key=lambda x: x['trade_date'])
-
-        # 从最新一条记录获取走势分析（已在采集时计算好）
-        latest = data[-1]
+        total = len(data)
+        if points:
+            data = lttb(data, points, key=lambda r: r.get("close_price"))
 
-        # 生成走势描述
-        trend = latest.get("trend")
-        change_5d = latest.get("change_5d") or 0
-        ma5_pos = latest.get("ma5_position")
+        if format == "rows":
+            result = build_index_history(data)
+            if points:
+                result["original_total"] = total
+            return result
 
-        if trend == "上涨":
-            description = f"多头排列，价格站上均线，近5日涨{change_5d:.2f}%"
-        elif trend == "下跌":
-            description = f"空头排列，价格跌破均线，近5日跌{abs(change_5d):.2f}%"
-        else:
-            if abs(change_5d) < 2:
-                description = f"横盘整理，近5日涨跌幅{change_5d:.2f}%，波动较小"
-            elif ma5_pos == "above":
-                description = f"短期偏强，价格站上MA5，区间震荡"
-            elif ma5_pos == "below":
-                description = f"短期偏弱，价格跌破MA5，区间震荡"
-            else:
-                description = f"区间震荡，等待方向选择"
-
-        trend_analysis = {
-            "trend": trend,
-            "ma5_position": ma5_pos,
-            "ma10_position": latest.get("ma10_position"),
-            "ma20_position": latest.get("ma20_position"),
-            "change_5d": change_5d,
-            "current_price": latest.get("close_price"),
-            "description": description,
-        }
-
-        return {
-            "success": True,
-            "data": data,
-            "total": len(data),
-            "trend_analysis": trend_analysis
-        }
+        trend_analysis = build_index_history(data[-1:])["trend_analysis"]
+        return _history_response(data, total, columns, format, {
+            "index_code": index_code,
+            "trend_analysis": trend_analysis,
+        })
 
     except HTTPException:
         raise
@@ -573,43 +438,106 @@ def analyze_trend(kline_data: list) -> dict:
 
 @router.get("/sentiment/history", summary="获取历史市场情绪数据")
 async def get_sentiment_history(
-    days: int = Query(60, ge=5, le=120, description="查询天数")
+    days: int = Query(60, ge=5, le=5000, description="查询天数（未指定 start_date 时生效）"),
+    start_date: Optional[str] = Query(None, description="开始日期 YYYY-MM-DD（按区间查询）"),
+    end_date: Optional[str] = Query(None, description="截止日期 YYYY-MM-DD，默认为最近交易日"),
+    points: Optional[int] = Query(None, ge=10, le=5000, description="LTTB 降采样目标点数（按成交额）"),
+    format: str = Query("rows", description="输出格式: rows(逐行对象)/columnar(列式 JSON)/arrow(Arrow IPC)"),
+    fields: Optional[str] = Query(None, description="列式输出的列（逗号分隔）"),
 ):
     """
     获取历史市场情绪数据（用于成交额趋势图等）
 
     参数:
-    - days: 查询天数 (5-120天)
+    - days: 查询天数（未指定 start_date 时取截至 end_date 的最近 N 天）
+    - start_date / end_date: 按日期区间查询（可跨多年）
+    - points: 点数超过该值时用 LTTB 降采样（按成交额），首尾两点总是保留
+    - format: rows 与原接口一致；columnar 返回 {列名: [值...]}；arrow 返回 Arrow IPC stream
 
     返回:
     - data: 历史数据数组（按日期升序）
     """
     try:
-        supabase = get_supabase()
-
-        # 查询最近N天数据
-        response = supabase.table("market_sentiment")\
-            .select("trade_date,total_amount,up_count,down_count,limit_up_count,limit_down_count")\
-            .order("trade_date", desc=True)\
-            .limit(days)\
-            .execute()
+        if format not in HISTORY_FORMATS:
+            raise HTTPException(status_code=400, detail=f"format 可选: {', '.join(HISTORY_FORMATS)}")
+        if not end_date:
+            end_date = get_latest_trading_date()
+
+        columns = _parse_history_fields(fields, SENTIMENT_HISTORY_FIELDS)
+
+        # 查询历史数据
+        data = _fetch_history(
+            "market_sentiment", ",".join(columns), end_date,
+            start_date=start_date,
+            days=None if start_date else days,
+        )
 
-        if not response.data:
+        if not data:
             raise HTTPException(
                 status_code=404,
                 detail="未找到市场情绪历史数据"
             )
 
-        # 按日期升序排列
-        data = sorted(response.data, key=lambda x: x['trade_date'])
+        total = len(data)
+        if points:
+            data = lttb(data, points, key=lambda r: r.get("total_amount"))
 
-        return {
-            "success": True,
-            "data": data,
-            "total": len(data)
-        }
+        if format == "rows":
+            result = {
+                "success": True,
+                "data": data,
+                "total": len(data)
+            }
+            if points:
+                result["original_total"] = total
+            return result
+
+        return _history_response(data, total, columns, format, {})
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取市场情绪历史数据失败: {str(e)}")
+
+
+@router.get("/overview", summary="获取市场页概览（聚合接口）")
+async def get_market_overview(
+    end_date: Optional[str] = Query(None, description="截止交易日期 YYYY-MM-DD，默认为最近交易日"),
+    sections: Optional[str] = Query(None, description=f"需要的模块（逗号分隔）: {','.join(OVERVIEW_SECTIONS)}，默认全部"),
+    index_codes: Optional[str] = Query(None, description=f"指数代码（逗号分隔），默认 {','.join(DEFAULT_INDEX_CODES)}"),
+    index_days: int = Query(20, ge=5, le=60, description="指数K线天数"),
+    sentiment_days: int = Query(60, ge=5, le=120, description="情绪历史天数"),
+    fields: Optional[str] = Query(None, description="字段裁剪，如 sentiment_history.trade_date,sentiment_history.total_amount"),
+):
+    """
+    一次请求返回市场页需要的全部数据（三大指数K线 + 成交额/情绪历史）
+
+    - 所有指数一次查询，各模块并发查询
+    - 单个模块失败不影响其他模块，错误信息放在 errors 中
+    - sections / fields 可只取需要渲染的部分
+    - 有模块失败时响应不缓存（Cache-Control: no-store）
+    """
+    try:
+        try:
+            selected = parse_sections(sections, OVERVIEW_SECTIONS)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        codes = tuple(c.strip() for c in index_codes.split(",") if c.strip()) if index_codes else DEFAULT_INDEX_CODES
+
+        result = await DashboardService().get_market_overview(
+            end_date=end_date,
+            sections=selected,
+            index_codes=codes,
+            index_days=index_days,
+            sentiment_days=sentiment_days,
+        )
+        content = {**result, "sections": apply_fields(result["sections"], parse_fields(fields))}
+        if not is_complete(result):
+            return trusted_response(content, headers={"Cache-Control": "no-store"})
+        return content
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取市场概览失败: {str(e)}")
@@ -0,0 +1,61 @@
+"""
+运维状态API路由
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from loguru import logger
+
+from app.utils.run_ledger import load_runs, summarize_runs
+from app.utils.source_orchestrator import get_source_health
+
+router = APIRouter()
+
+
+@router.get("/sources", summary="获取数据源健康度")
+async def get_sources():
+    """
+    各多数据源编排器（如热门概念）中每个来源的健康度
+
+    - **error_rate**: 滚动错误率（EWMA，0~1）
+    - **latency_ms**: 滚动平均耗时（EWMA）
+    - **state**: closed 正常 / open 熔断中 / half_open 试探中
+    - **consecutive_failures**: 连续失败次数
+    """
+    try:
+        health = get_source_health()
+        return {
+            "orchestrators": {
+                name: sorted(sources.values(), key=lambda s: (s.get("state") != "closed", s.get("error_rate", 0)))
+                for name, sources in health.items()
+            },
+        }
+    except Exception as e:
+        logger.error(f"获取数据源健康度失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取数据源健康度失败: {str(e)}")
+
+
+@router.get("/runs", summary="获取采集步骤耗时统计")
+async def get_runs(
+    step: Optional[str] = Query(None, description="只看某个步骤（如 limit_stocks、limit_stocks.daily_data）"),
+    days: int = Query(30, ge=1, le=365, description="统计最近多少天"),
+):
+    """
+    按步骤汇总采集台账（collection_runs）
+
+    - **duration_ms**: 耗时 p50 / p90 / p99 / max（毫秒）
+    - **failure_rate**: 失败率
+    - **avg_rows_out / avg_api_calls**: 平均写出行数 / 数据源接口调用次数
+    - **daily**: 逐日耗时分位数，用于观察夜间任务是否逐渐变慢
+    """
+    try:
+        rows = load_runs(days=days, step=step)
+        return {
+            "days": days,
+            "total": len(rows),
+            "steps": summarize_runs(rows),
+        }
+    except Exception as e:
+        logger.error(f"获取采集步骤耗时统计失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取采集步骤耗时统计失败: {str(e)}")
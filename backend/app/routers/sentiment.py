@@ -7,7 +7,9 @@ from typing import Optional
 from loguru import logger
 
 from app.schemas.sentiment import SentimentAnalysisResponse
+from app.services.premium_summary import ROLLING_WINDOWS, PremiumSummaryService
 from app.services.sentiment_service import SentimentService
+from app.utils.serialization import trusted_response
 
 router = APIRouter(prefix="/api/sentiment", tags=["情绪分析"])
 
@@ -34,3 +36,34 @@ async def get_sentiment_analysis(
     except Exception as e:
         logger.error(f"获取情绪分析数据失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取情绪分析数据失败: {str(e)}")
+
+
+@router.get("/premium/history", summary="获取昨日涨停溢价历史")
+async def get_premium_history(
+    end_date: Optional[str] = Query(None, description="截止日期 YYYY-MM-DD，默认最新交易日"),
+    start_date: Optional[str] = Query(None, description="开始日期 YYYY-MM-DD，指定时忽略 days"),
+    days: int = Query(60, ge=1, le=1000, description="最近N个交易日"),
+):
+    """
+    获取昨日涨停溢价日汇总历史（按日期升序）
+
+    每日包含整体/开盘/首板/二板/高位板溢价、晋级率、大面率、高位大面率，
+    以及核心指标的 5/10/20 日滚动均值（字段后缀 _5d/_10d/_20d）
+    """
+    try:
+        rows = PremiumSummaryService().get_history(end_date=end_date, start_date=start_date, days=days)
+        if not rows:
+            raise HTTPException(status_code=404, detail="未找到昨日涨停溢价汇总数据")
+
+        return trusted_response({
+            "success": True,
+            "data": rows,
+            "total": len(rows),
+            "rolling_windows": list(ROLLING_WINDOWS),
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取昨日涨停溢价历史失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取昨日涨停溢价历史失败: {str(e)}")
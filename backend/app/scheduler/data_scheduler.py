@@ -36,6 +36,9 @@ from app.services.collectors.market_sentiment_collector import MarketSentimentCo
 from app.services.collectors.hot_concepts_collector import HotConceptsCollector
 from app.services.collectors.yesterday_limit_collector import YesterdayLimitCollector
 from app.services.backtest_service import BacktestService
+from app.services.emotion_stage import EmotionStageService
+from app.services.limit_event_log import compact_limit_events
+from app.utils.run_ledger import RunLedger, set_rows_out
 from app.utils.trading_date import get_latest_trading_date, get_previous_trading_date
 import asyncio
 
@@ -50,6 +53,7 @@ def collect_market_index():
         results = collector.collect_incremental()
 
         total = sum(results.values())
+        set_rows_out(total)
         logger.info(f"大盘指数采集完成: 共 {total} 条新数据")
         for symbol, count in results.items():
             logger.info(f"  {symbol}: {count} 条")
@@ -68,6 +72,7 @@ def collect_limit_stocks():
 
         collector = LimitStocksCollector()
         results = collector.collect_and_save()
+        set_rows_out(results['limit_up'] + results['limit_down'])
 
         logger.info(f"涨跌停股池采集完成: 涨停{results['limit_up']}只, 跌停{results['limit_down']}只")
 
@@ -87,6 +92,7 @@ def collect_market_sentiment():
         success = collector.collect_and_save()
 
         if success:
+            set_rows_out(1)
             logger.info("市场情绪数据采集完成")
         else:
             logger.warning("市场情绪数据采集失败")
@@ -105,6 +111,7 @@ def collect_hot_concepts():
 
         collector = HotConceptsCollector()
         count = collector.collect_and_save(top_n=50)
+        set_rows_out(count)
 
         logger.info(f"热门概念板块采集完成: 共 {count} 个概念")
 
@@ -122,6 +129,7 @@ def collect_yesterday_limit():
 
         collector = YesterdayLimitCollector()
         result = collector.collect()
+        set_rows_out(result.get('total_count', 0))
 
         logger.info(f"昨日涨停表现采集完成: {result.get('saved', 0)} 条记录")
 
@@ -131,6 +139,26 @@ def collect_yesterday_limit():
         return False
 
 
+def compute_emotion_stage():
+    """计算并保存当日情绪阶段（依赖市场情绪和昨日涨停表现）"""
+    try:
+        logger.info("=" * 60)
+        logger.info("开始计算情绪阶段...")
+
+        trade_date = get_latest_trading_date()
+        result = EmotionStageService().compute(trade_date)
+        if result is None:
+            return False
+        set_rows_out(1)
+
+        logger.info(f"情绪阶段计算完成: {trade_date} {result['emotion_stage']} (总分 {result['total_score']})")
+
+        return True
+    except Exception as e:
+        logger.error(f"情绪阶段计算失败: {str(e)}")
+        return False
+
+
 def save_backtest_data():
     """保存昨日涨停股的回测数据（评分 vs 今日实际表现）"""
     try:
@@ -155,6 +183,7 @@ def save_backtest_data():
             limit=100  # 最多处理100只股票
         ))
 
+        set_rows_out(result['success'])
         logger.info(f"回测数据保存完成: 成功 {result['success']}/{result['total']} 只")
 
         return result['success'] > 0
@@ -165,6 +194,24 @@ def save_backtest_data():
         return False
 
 
+def compact_limit_timeline():
+    """压缩当日盘中封板事件日志为封板时间线（未开启盘中监控时跳过）"""
+    try:
+        logger.info("=" * 60)
+        logger.info("开始压缩盘中封板事件日志...")
+
+        trade_date = get_latest_trading_date()
+        saved = compact_limit_events(trade_date)
+        set_rows_out(saved)
+
+        logger.info(f"盘中封板时间线完成: {saved} 只股票")
+
+        return True
+    except Exception as e:
+        logger.error(f"盘中封板事件压缩失败: {str(e)}")
+        return False
+
+
 def run_daily_collection():
     """每日数据采集主任务"""
     logger.info("\n" + "=" * 80)
@@ -177,26 +224,38 @@ def run_daily_collection():
         "market_sentiment": False,
         "hot_concepts": False,
         "yesterday_limit": False,
+        "emotion_stage": False,
         "backtest_data": False,  # 新增：回测数据保存
+        "limit_timeline": False,
     }
 
+    # 每个步骤的耗时 / 行数 / 接口调用写入 collection_runs（/api/ops/runs 查看趋势）
+    ledger = RunLedger("scheduler")
+    trade_date = get_latest_trading_date()
+
     # 1. 采集大盘指数
-    results["market_index"] = collect_market_index()
+    results["market_index"] = ledger.run_step("market_index", collect_market_index, trade_date=trade_date)
 
     # 2. 采集涨跌停股池
-    results["limit_stocks"] = collect_limit_stocks()
+    results["limit_stocks"] = ledger.run_step("limit_stocks", collect_limit_stocks, trade_date=trade_date)
 
     # 3. 采集市场情绪
-    results["market_sentiment"] = collect_market_sentiment()
+    results["market_sentiment"] = ledger.run_step("market_sentiment", collect_market_sentiment, trade_date=trade_date)
 
     # 4. 采集热门概念
-    results["hot_concepts"] = collect_hot_concepts()
+    results["hot_concepts"] = ledger.run_step("hot_concepts", collect_hot_concepts, trade_date=trade_date)
 
     # 5. 采集昨日涨停表现（情绪分析用）
-    results["yesterday_limit"] = collect_yesterday_limit()
+    results["yesterday_limit"] = ledger.run_step("yesterday_limit", collect_yesterday_limit, trade_date=trade_date)
+
+    # 5.5 计算情绪阶段（状态机推进一天，写入 emotion_stage_daily）
+    results["emotion_stage"] = ledger.run_step("emotion_stage", compute_emotion_stage, trade_date=trade_date)
 
     # 6. 保存回测数据（昨日评分 vs 今日表现）
-    results["backtest_data"] = save_backtest_data()
+    results["backtest_data"] = ledger.run_step("backtest_data", save_backtest_data, trade_date=trade_date)
+
+    # 7. 压缩盘中封板事件日志（与涨停池明细按 trade_date+stock_code 对应）
+    results["limit_timeline"] = ledger.run_step("limit_timeline", compact_limit_timeline, trade_date=trade_date)
 
     # 汇总结果
     logger.info("\n" + "=" * 80)
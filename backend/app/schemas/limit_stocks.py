@@ -42,9 +42,11 @@ class LimitStocksResponse(BaseModel):
     """涨停股票列表响应"""
     success: bool = True
     data: List[LimitStockItem]
-    total: int
+    total: Optional[int] = Field(None, description="总数（count=none 时为空，planned/estimated 为估算值）")
     page: int
     page_size: int
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有更多数据")
+    has_more: bool = Field(False, description="是否还有下一页")
 
 
 # ============================================
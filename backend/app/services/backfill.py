@@ -0,0 +1,324 @@
+"""
+日期区间并行回补
+
+把（采集器, 交易日）拆成独立单元，交给线程池并行执行；所有线程共用 data_source 的
+Tushare / AKShare 全局限流预算，线程数只决定并发度，不会放大对数据源的调用频率。
+
+- 默认只回补 completeness.find_gaps 检出的缺失 / 不完整单元（--force 强制重采全部）
+- 有依赖的采集器分阶段执行: 昨日涨停表现依赖前一交易日的涨停股池，等第一阶段完成后再跑
+- 支持区间批量采集的步骤（市场情绪）把连续缺口合并为一个区间，一次批量拉取代替逐日调用
+- 区间类步骤（溢价汇总滚动统计、情绪阶段状态机）依赖日期顺序，在逐日单元全部完成后按区间重建一次
+- 每完成一个单元打印进度、吞吐和预计剩余时间，并写入采集台账（collection_runs，source=backfill）
+
+Example:
+    runner = BackfillRunner(["limit_stocks", "yesterday_limit", "emotion_stage"], "2026-07-01", "2026-09-30", workers=6)
+    report = runner.run()
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.services.completeness import find_gaps
+from app.utils.data_source import get_budget
+from app.utils.run_ledger import RunLedger, set_rows_out
+from app.utils.trading_date import get_trading_dates
+
+
+def _run_market_index(trade_date: str) -> bool:
+    from app.services.collectors.market_index_collector import MarketIndexCollector
+
+    counts = MarketIndexCollector().collect_all_indexes(start_date=trade_date, end_date=trade_date)
+    return sum(counts.values()) > 0
+
+
+def _run_limit_stocks(trade_date: str) -> bool:
+    from app.services.collectors.limit_stocks_collector import LimitStocksCollector
+
+    counts = LimitStocksCollector().collect_and_save(trade_date=trade_date)
+    return counts.get("limit_up", 0) + counts.get("limit_down", 0) > 0
+
+
+def _run_market_sentiment(start_date: str, end_date: str) -> int:
+    from app.services.collectors.market_sentiment_collector import MarketSentimentCollector
+
+    return MarketSentimentCollector().collect_and_save_range(start_date, end_date)
+
+
+def _run_hot_concepts(trade_date: str) -> bool:
+    from app.services.collectors.hot_concepts_collector import HotConceptsCollector
+
+    return HotConceptsCollector().collect_and_save(trade_date=trade_date) > 0
+
+
+def _run_yesterday_limit(trade_date: str) -> bool:
+    from app.services.collectors.yesterday_limit_collector import YesterdayLimitCollector
+
+    return bool(YesterdayLimitCollector().collect(trade_date).get("success"))
+
+
+def _rebuild_premium_summary(start_date: str, end_date: str) -> int:
+    from app.services.premium_summary import PremiumSummaryService
+
+    return PremiumSummaryService().rebuild(start_date=start_date, end_date=end_date)
+
+
+def _rebuild_emotion_stage(start_date: str, end_date: str) -> int:
+    from app.services.emotion_stage import EmotionStageService
+
+    return EmotionStageService().rebuild(start_date=start_date, end_date=end_date)
+
+
+@dataclass(frozen=True)
+class BackfillStep:
+    """可回补的采集步骤（完成判定见 completeness.EXPECTATIONS，键与 name 一致）"""
+
+    name: str
+    label: str
+    stage: int = 1                                           # 执行阶段，小的先跑
+    run_day: Optional[Callable[[str], bool]] = None          # 逐日单元
+    run_batch: Optional[Callable[[str, str], int]] = None    # 逐日单元的批量采集（连续缺口合并为区间，返回写入天数）
+    run_range: Optional[Callable[[str, str], int]] = None    # 区间步骤（逐日单元全部完成后执行）
+
+    @property
+    def per_day(self) -> bool:
+        """按交易日判定完整度、生成单元的步骤"""
+        return bool(self.run_day or self.run_batch)
+
+
+STEPS: Dict[str, BackfillStep] = {
+    step.name: step
+    for step in (
+        BackfillStep("market_index", "大盘指数", run_day=_run_market_index),
+        BackfillStep("limit_stocks", "涨跌停股池", run_day=_run_limit_stocks),
+        BackfillStep("market_sentiment", "市场情绪", run_batch=_run_market_sentiment),
+        BackfillStep("hot_concepts", "热门概念", run_day=_run_hot_concepts),
+        BackfillStep("yesterday_limit", "昨日涨停表现", stage=2, run_day=_run_yesterday_limit),
+        BackfillStep("premium_summary", "溢价汇总", stage=3, run_range=_rebuild_premium_summary),
+        BackfillStep("emotion_stage", "情绪阶段", stage=4, run_range=_rebuild_emotion_stage),
+    )
+}
+
+# 区间重建步骤的前置: 回补了这些步骤后自动追加（可传递）
+IMPLIED_STEPS = {
+    "yesterday_limit": ("premium_summary", "emotion_stage"),  # 并行写入时滚动统计顺序不保证，按区间重建一次
+    "market_sentiment": ("emotion_stage",),                   # 情绪阶段读取涨停数、炸板率、连板分布
+    "premium_summary": ("emotion_stage",),                    # 情绪阶段读取溢价汇总
+}
+
+
+def resolve_steps(names: Optional[List[str]] = None) -> List[BackfillStep]:
+    """
+    解析步骤名（默认全部），补上隐含的区间重建步骤，按阶段排序
+
+    Raises:
+        ValueError: 未知步骤
+    """
+    names = list(names or STEPS)
+    unknown = [name for name in names if name not in STEPS]
+    if unknown:
+        raise ValueError(f"未知的采集步骤: {', '.join(unknown)}（可选: {', '.join(STEPS)}）")
+    for name in names:  # 追加的步骤同样展开
+        for implied in IMPLIED_STEPS.get(name, ()):
+            if implied not in names:
+                names.append(implied)
+    order = list(STEPS)
+    return sorted((STEPS[name] for name in set(names)), key=lambda s: (s.stage, order.index(s.name)))
+
+
+@dataclass
+class BackfillReport:
+    """回补结果"""
+
+    total: int = 0
+    done: int = 0
+    skipped: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)   # [(步骤, 日期)]
+    ranges: Dict[str, int] = field(default_factory=dict)          # 区间步骤写入行数
+    elapsed: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return not self.failed
+
+
+class _Progress:
+    """线程安全的进度 / 吞吐 / ETA 统计"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.finished = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def tick(self, count: int = 1) -> str:
+        with self._lock:
+            self.finished += count
+            elapsed = time.perf_counter() - self.started
+            remaining = self.total - self.finished
+            rate = self.finished / elapsed if elapsed > 0 else 0.0
+            eta = remaining / rate if rate > 0 else 0.0
+            return (
+                f"[{self.finished}/{self.total}] {rate * 60:.1f} 单元/分钟，"
+                f"已用 {_format_seconds(elapsed)}，预计剩余 {_format_seconds(eta)}"
+            )
+
+
+def _format_seconds(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+class BackfillRunner:
+    """（采集步骤, 交易日）单元的并行回补"""
+
+    def __init__(
+        self,
+        steps: Optional[List[str]],
+        start_date: str,
+        end_date: str,
+        workers: int = 4,
+        force: bool = False,
+    ):
+        self.steps = resolve_steps(steps)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.workers = max(1, workers)
+        self.force = force
+        self.trade_dates = get_trading_dates(start_date, end_date)
+        self.ledger = RunLedger("backfill")
+
+    def plan(self) -> List[Tuple[BackfillStep, str]]:
+        """需要执行的逐日单元（force 时为全部，否则只取缺口）"""
+        day_steps = [step for step in self.steps if step.per_day]
+        if self.force:
+            return [(step, trade_date) for step in day_steps for trade_date in self.trade_dates]
+        gaps = find_gaps(self.start_date, self.end_date, [step.name for step in day_steps], self.trade_dates)
+        return [(STEPS[gap.step], gap.trade_date) for gap in gaps]
+
+    def _range_needed(self, step: BackfillStep, ran_days: bool) -> bool:
+        """区间步骤: 强制、本次有逐日单元执行、或汇总表本身有缺口时才重建"""
+        if self.force or ran_days:
+            return True
+        return bool(find_gaps(self.start_date, self.end_date, [step.name], self.trade_dates))
+
+    def _run_unit(self, step: BackfillStep, trade_date: str) -> bool:
+        """执行单个单元，返回是否成功"""
+        started = time.perf_counter()
+        with self.ledger.step(step.name, trade_date=trade_date) as record:
+            try:
+                ok = step.run_day(trade_date)
+            except Exception as e:
+                record.fail(f"{type(e).__name__}: {e}")
+                logger.error(f"❌ {step.label} {trade_date} 失败: {e}")
+                return False
+            if ok:
+                logger.info(f"✅ {step.label} {trade_date} 完成 ({time.perf_counter() - started:.1f}s)")
+            else:
+                record.fail("无数据")
+                logger.warning(f"⚠️ {step.label} {trade_date} 无数据")
+            return ok
+
+    def _batches(self, step: BackfillStep, dates: List[str]) -> List[List[str]]:
+        """把缺口日期按连续交易日分组（中间已完整的日期不重采）"""
+        index = {trade_date: i for i, trade_date in enumerate(self.trade_dates)}
+        batches: List[List[str]] = []
+        for trade_date in sorted(dates):
+            if batches and index[trade_date] == index[batches[-1][-1]] + 1:
+                batches[-1].append(trade_date)
+            else:
+                batches.append([trade_date])
+        return batches
+
+    def _run_batch(self, step: BackfillStep, dates: List[str]) -> List[str]:
+        """批量执行一段连续交易日，返回失败（仍缺数据）的日期"""
+        started = time.perf_counter()
+        start_date, end_date = dates[0], dates[-1]
+        with self.ledger.step(step.name, trade_date=end_date) as record:
+            try:
+                written = step.run_batch(start_date, end_date)
+            except Exception as e:
+                record.fail(f"{type(e).__name__}: {e}")
+                logger.error(f"❌ {step.label} {start_date} ~ {end_date} 失败: {e}")
+                return dates
+            set_rows_out(written)
+            missing = [] if written >= len(dates) else [
+                gap.trade_date for gap in find_gaps(start_date, end_date, [step.name], dates)
+            ]
+            if missing:
+                record.fail(f"{len(missing)} 天无数据")
+                logger.warning(f"⚠️ {step.label} {start_date} ~ {end_date} 有 {len(missing)} 天无数据")
+            else:
+                logger.info(
+                    f"✅ {step.label} {start_date} ~ {end_date}（{len(dates)} 天）完成 "
+                    f"({time.perf_counter() - started:.1f}s)"
+                )
+            return missing
+
+    def run(self) -> BackfillReport:
+        started = time.perf_counter()
+        day_steps = [step for step in self.steps if step.per_day]
+        range_steps = [step for step in self.steps if step.run_range]
+        report = BackfillReport(total=len(day_steps) * len(self.trade_dates))
+
+        logger.info(
+            f"🚀 回补 {self.start_date} ~ {self.end_date}: {len(self.trade_dates)} 个交易日，"
+            f"步骤 {', '.join(step.name for step in self.steps)}，{self.workers} 线程"
+        )
+        if not self.trade_dates:
+            logger.warning("区间内没有交易日")
+            return report
+
+        units = self.plan()
+        report.skipped = report.total - len(units)
+        logger.info(f"🔍 待回补 {len(units)} 个单元，已完整跳过 {report.skipped} 个")
+
+        progress = _Progress(len(units))
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backfill") as pool:
+            for stage in sorted({step.stage for step, _ in units}):
+                stage_units = [(step, trade_date) for step, trade_date in units if step.stage == stage]
+                futures = {
+                    pool.submit(self._run_unit, step, trade_date): (step, [trade_date])
+                    for step, trade_date in stage_units if step.run_day
+                }
+                for step in {step for step, _ in stage_units if step.run_batch}:
+                    dates = [trade_date for unit_step, trade_date in stage_units if unit_step is step]
+                    for batch in self._batches(step, dates):
+                        futures[pool.submit(self._run_batch, step, batch)] = (step, batch)
+
+                for future in as_completed(futures):
+                    step, dates = futures[future]
+                    result = future.result()
+                    failed = ([] if result else dates) if isinstance(result, bool) else result
+                    report.done += len(dates) - len(failed)
+                    report.failed.extend((step.name, trade_date) for trade_date in failed)
+                    logger.info(f"📊 {progress.tick(len(dates))}")
+
+        for step in range_steps:
+            if not self._range_needed(step, ran_days=bool(units)):
+                logger.info(f"⏭️  {step.label}已完整，跳过重建")
+                continue
+            logger.info(f"🔁 重建{step.label}: {self.start_date} ~ {self.end_date}")
+            try:
+                with self.ledger.step(step.name, trade_date=self.end_date):
+                    report.ranges[step.name] = step.run_range(self.start_date, self.end_date)
+                    set_rows_out(report.ranges[step.name])
+            except Exception as e:
+                logger.error(f"❌ 重建{step.label}失败: {e}")
+                report.failed.append((step.name, f"{self.start_date}~{self.end_date}"))
+
+        report.elapsed = time.perf_counter() - started
+        budgets = ", ".join(
+            f"{stats['source']} {stats['calls']} 次（限流等待 {stats['waited_seconds']}s）"
+            for stats in (get_budget("tushare").stats(), get_budget("akshare").stats())
+        )
+        logger.info(
+            f"🏁 回补结束: 完成 {report.done}，跳过 {report.skipped}，失败 {len(report.failed)}，"
+            f"耗时 {_format_seconds(report.elapsed)}；数据源调用: {budgets}"
+        )
+        return report
@@ -8,6 +8,9 @@ import tushare as ts
 import os
 
 from app.utils.supabase_client import get_supabase
+from app.utils.bulk_writer import BulkWriter
+from app.utils.profiling import profiled
+from app.utils.trading_date import get_next_trading_date
 from app.services.premium_probability_service import PremiumProbabilityService
 
 
@@ -26,23 +29,24 @@ class BacktestService:
             self.ts_api = None
             logger.warning("TUSHARE_TOKEN未配置，次日数据查询可能不完整")
 
-    async def save_backtest_record(
+    async def build_backtest_record(
         self,
         stock_code: str,
         trade_date: str,
         next_trade_date: Optional[str] = None,
         cached_market_data: Optional[Dict] = None
-    ) -> bool:
+    ) -> Optional[Dict]:
         """
-        保存单个股票的回测记录
+        计算单个股票的回测记录（不写库）
 
         Args:
             stock_code: 股票代码
             trade_date: 评测日期（涨停日）YYYY-MM-DD
             next_trade_date: 次日交易日期，不传则自动计算
+            cached_market_data: 预计算的市场环境数据
 
         Returns:
-            bool: 是否保存成功
+            回测记录，失败返回 None
         """
         try:
             # 1. 计算溢价评分（使用缓存的市场数据）
@@ -52,15 +56,14 @@ class BacktestService:
 
             if not score_result:
                 logger.warning(f"股票 {stock_code} {trade_date} 评分失败")
-                return False
+                return None
 
             # 2. 获取次日交易数据
             if not next_trade_date:
-                # 自动计算下一个交易日（简单处理，假设+1天）
-                from datetime import datetime, timedelta
-                trade_dt = datetime.strptime(trade_date, "%Y-%m-%d")
-                next_dt = trade_dt + timedelta(days=1)
-                next_trade_date = next_dt.strftime("%Y-%m-%d")
+                next_trade_date = get_next_trading_date(trade_date)
+                if not next_trade_date:
+                    logger.warning(f"无法获取 {trade_date} 的下一交易日")
+                    return None
 
             next_day_data = self._get_next_day_data(stock_code, next_trade_date)
 
@@ -96,20 +99,51 @@ class BacktestService:
                     next_day_data.get("change_pct")
                 )
                 record["prediction_result"] = prediction_result
-                record["is_profitable"] = next_day_data.get("change_pct", 0) > 0
+                record["is_profitable"] = bool((next_day_data.get("change_pct") or 0) > 0)
 
-            # 4. 保存到数据库（upsert）
-            response = self.supabase.table("premium_score_backtest")\
+            return record
+
+        except Exception as e:
+            logger.error(f"计算回测记录失败: {stock_code} {trade_date} {e}", exc_info=True)
+            return None
+
+    async def save_backtest_record(
+        self,
+        stock_code: str,
+        trade_date: str,
+        next_trade_date: Optional[str] = None,
+        cached_market_data: Optional[Dict] = None
+    ) -> bool:
+        """
+        保存单个股票的回测记录
+
+        Args:
+            stock_code: 股票代码
+            trade_date: 评测日期（涨停日）YYYY-MM-DD
+            next_trade_date: 次日交易日期，不传则自动计算
+
+        Returns:
+            bool: 是否保存成功
+        """
+        record = await self.build_backtest_record(
+            stock_code, trade_date, next_trade_date, cached_market_data
+        )
+        if not record:
+            return False
+
+        try:
+            self.supabase.table("premium_score_backtest")\
                 .upsert(record, on_conflict="stock_code,trade_date")\
                 .execute()
 
-            logger.info(f"✅ 保存回测记录: {stock_code} {trade_date} 评分{score_result.total_score:.2f}")
+            logger.info(f"✅ 保存回测记录: {stock_code} {trade_date} 评分{record['total_score']:.2f}")
             return True
 
         except Exception as e:
             logger.error(f"保存回测记录失败: {e}", exc_info=True)
             return False
 
+    @profiled("backtest.batch_save_backtest")
     async def batch_save_backtest(
         self,
         trade_date: str,
@@ -147,21 +181,21 @@ class BacktestService:
         stocks = response.data
         logger.info(f"找到 {len(stocks)} 只涨停股票")
 
-        success_count = 0
-        fail_count = 0
-
+        records = []
         for stock in stocks:
-            success = await self.save_backtest_record(
+            record = await self.build_backtest_record(
                 stock["stock_code"],
                 trade_date,
                 next_trade_date,
                 cached_market_data=market_data  # 复用市场数据
             )
+            if record:
+                records.append(record)
 
-            if success:
-                success_count += 1
-            else:
-                fail_count += 1
+        # 一次性分块 upsert，替代逐条写入
+        result = BulkWriter("premium_score_backtest", on_conflict="stock_code,trade_date").write(records)
+        success_count = result.written
+        fail_count = len(stocks) - success_count
 
         logger.info(f"批量保存完成: 成功 {success_count}, 失败 {fail_count}")
 
@@ -223,10 +257,13 @@ class BacktestService:
                 return None
 
             # 解析数据
+            # DataFrame 取出的是 numpy 标量，转成 Python 类型后才能 JSON 序列化写库
             row = df.iloc[0]
-            change_pct = row['pct_chg']  # 涨跌幅%
-            close_price = row['close']
-            turnover_rate = row['turnover_rate'] if 'turnover_rate' in df.columns else None
+            change_pct = float(row['pct_chg'])  # 涨跌幅%
+            close_price = float(row['close'])
+            turnover_rate = None
+            if 'turnover_rate' in df.columns and row['turnover_rate'] == row['turnover_rate']:  # 排除 NaN
+                turnover_rate = float(row['turnover_rate'])
 
             # 判断涨跌停（简单判断：>=9.9%为涨停，<=-9.9%为跌停）
             limit_type = None
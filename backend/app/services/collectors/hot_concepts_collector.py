@@ -5,27 +5,36 @@
 数据源优先级（Tushare优先，保证概念名称统一）:
 1. Tushare - 同花顺板块日行情 (ths_daily + ths_index) - 需要积分，数据最可靠，概念名称统一，可计算5日涨幅
 2. AKShare - 同花顺概念板块 (stock_board_concept_name_ths) - 免费，数据丰富，备用方案
-3. AKShare - 东方财富概念板块 (stock_board_concept_name_em) - 免费，实时性好，最终备用
+3. AKShare - 东方财富概念板块 (stock_board_concept_name_em) - 免费，实时性好，最终备用；
+   只有当日实时数据，仅在采集最近交易日时使用（历史日期跳过）
 
 采集逻辑:
-1. 按优先级尝试各数据源
-2. 第一个成功的数据源完成采集
-3. 所有数据源都失败时记录错误
-4. 采集后计算每个概念的涨停股数量和龙头股
-5. Tushare数据源返回ts_code，避免名称匹配问题，使用5日涨幅排序
+1. SourceOrchestrator 按健康度（滚动错误率 / 耗时）排序各数据源，熔断中的跳过
+2. HOT_CONCEPTS_HEDGE 开启时，当前数据源明显慢于自身常态（滚动耗时的 2 倍，不低于
+   HOT_CONCEPTS_HEDGE_MIN_DELAY 秒）仍未返回就并行启动下一个，取最先成功的结果，落败的停止请求
+3. 所有数据源都失败时抛出异常
+4. AKShare 来源按名称映射补 ts_code；映射覆盖率低于 HOT_CONCEPTS_MIN_CODE_COVERAGE 的结果
+   算不出涨停数和龙头股，按不合格处理（换下一个数据源，都不合格则本日采集失败、留给缺口重采）
+5. 采集后计算每个概念的涨停股数量和龙头股
+6. Tushare数据源返回ts_code，避免名称匹配问题，使用5日涨幅排序
 """
 
-import akshare as ak
-import pandas as pd
 import os
+import pandas as pd
 import re
-import time
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Tuple, Set
 from loguru import logger
 from enum import Enum
 
 from app.utils.supabase_client import get_supabase
+from app.utils.bulk_writer import BulkWriter
+from app.utils.data_source import akshare_api as ak, get_tushare_pro, pace
+from app.utils.profiling import profiled
+from app.utils.result_cache import invalidate_trade_dates
+from app.utils.run_ledger import count_retry
+from app.utils.source_orchestrator import SourceOrchestrator, SourceSkipped, SourcesExhausted
+from app.utils.trading_date import get_latest_trading_date
 
 
 class DataSource(Enum):
@@ -49,29 +58,26 @@ class HotConceptsCollector:
             DataSource.AKSHARE_EM,     # 备用：东方财富只有当日数据
         ]
 
+        source_methods = {
+            DataSource.TUSHARE: self._collect_from_tushare,
+            DataSource.AKSHARE_THS: self._collect_from_akshare_ths,
+            DataSource.AKSHARE_EM: self._collect_from_akshare_em,
+        }
+        # 涨停数 / 龙头股依赖 ts_code（ths_member），代码覆盖率不足的结果不采用
+        self.min_code_coverage = float(os.getenv("HOT_CONCEPTS_MIN_CODE_COVERAGE", "0.8"))
+        self.orchestrator = SourceOrchestrator(
+            "hot_concepts",
+            [(source.value, source_methods[source]) for source in self.data_source_priority],
+            accept=self._accept,
+            hedge=os.getenv("HOT_CONCEPTS_HEDGE", "").strip().lower() in ("1", "true", "yes", "on"),
+            hedge_min_delay=float(os.getenv("HOT_CONCEPTS_HEDGE_MIN_DELAY", "120")),
+        )
+
     @property
     def tushare_pro(self):
-        """懒加载 Tushare Pro API（支持高级账号配置）"""
+        """Tushare Pro API（进程内共享，调用计入全局限流预算）"""
         if self._tushare_pro is None:
-            try:
-                import tushare as ts
-                token = os.getenv('TUSHARE_TOKEN')
-                if token:
-                    ts.set_token(token)
-                    self._tushare_pro = ts.pro_api()
-
-                    # 配置高级账号的自定义HTTP URL（如果提供）
-                    http_url = os.getenv('TUSHARE_HTTP_URL')
-                    if http_url:
-                        self._tushare_pro._DataApi__token = token
-                        self._tushare_pro._DataApi__http_url = http_url
-                        logger.info(f"✅ Tushare Pro API 初始化成功（高级账号）: {http_url}")
-                    else:
-                        logger.debug("Tushare Pro API 初始化成功（标准账号）")
-                else:
-                    logger.warning("TUSHARE_TOKEN 未配置，Tushare 数据源不可用")
-            except Exception as e:
-                logger.warning(f"Tushare 初始化失败: {e}")
+            self._tushare_pro = get_tushare_pro()
         return self._tushare_pro
 
     # ==================== 数据源1: AKShare 同花顺 ====================
@@ -170,6 +176,7 @@ class HotConceptsCollector:
                 c['rank'] = rank
 
             logger.info(f"✅ AKShare 同花顺: 成功采集 {len(hot_concepts)} 个概念")
+            self._fill_concept_codes(hot_concepts)
             return hot_concepts, True
 
         except Exception as e:
@@ -182,9 +189,18 @@ class HotConceptsCollector:
         """
         从 AKShare 东方财富接口采集数据
 
+        接口只返回当日实时行情，trade_date 不是最近交易日时跳过（否则会把今天的涨跌幅记到历史日期）
+
         Returns:
             (数据列表, 是否成功)
+
+        Raises:
+            SourceSkipped: trade_date 不是最近交易日
         """
+        latest_date = get_latest_trading_date()
+        if trade_date != latest_date:
+            raise SourceSkipped(f"东方财富只有当日数据，无法采集 {trade_date}（最近交易日 {latest_date}）")
+
         logger.info("🔄 尝试数据源: AKShare 东方财富...")
 
         try:
@@ -239,6 +255,7 @@ class HotConceptsCollector:
                 c['rank'] = rank
 
             logger.info(f"✅ AKShare 东方财富: 成功采集 {len(hot_concepts)} 个概念")
+            self._fill_concept_codes(hot_concepts)
             return hot_concepts, True
 
         except Exception as e:
@@ -265,7 +282,7 @@ class HotConceptsCollector:
 
         try:
             # 获取同花顺概念板块列表
-            time.sleep(0.3)  # 避免频率限制
+            pace(0.3)  # 避免频率限制
             index_df = self.tushare_pro.ths_index()
             concept_list = index_df[index_df['type'] == 'N']
 
@@ -277,7 +294,7 @@ class HotConceptsCollector:
 
             # 获取指定日期的板块日行情（当日数据）
             date_str = trade_date.replace("-", "")
-            time.sleep(0.3)  # 避免频率限制
+            pace(0.3)  # 避免频率限制
             daily_df = self.tushare_pro.ths_daily(trade_date=date_str)
 
             if daily_df is None or daily_df.empty:
@@ -412,7 +429,7 @@ class HotConceptsCollector:
 
                     while not success and retry_count <= max_retries:
                         try:
-                            time.sleep(0.1)  # 避免频率限制
+                            pace(0.1)  # 避免频率限制
                             single_df = self.tushare_pro.ths_daily(
                                 ts_code=ts_code,
                                 start_date=start_date,
@@ -443,7 +460,8 @@ class HotConceptsCollector:
                                 retry_count += 1
                                 if retry_count <= max_retries:
                                     logger.warning(f"      {ts_code}: 被限速，等待{wait_time}秒后重试 ({retry_count}/{max_retries})...")
-                                    time.sleep(wait_time)
+                                    pace(wait_time)
+                                    count_retry()
                                 else:
                                     logger.error(f"      {ts_code}: 重试{max_retries}次后仍失败，跳过")
                             else:
@@ -509,10 +527,10 @@ class HotConceptsCollector:
 
     def collect_hot_concepts(self, trade_date: Optional[str] = None, top_n: int = 50) -> List[Dict]:
         """
-        采集热门概念板块数据（只使用Tushare数据源）
+        采集热门概念板块数据（多数据源编排）
 
-        优先使用Tushare数据源，如果失败（包括限速）则直接报错，不自动切换到其他数据源。
-        这样可以确保涨停数和龙头股数据的完整性（需要ts_code）。
+        按健康度选择数据源（默认 Tushare 优先，概念名称统一且带 ts_code），
+        开启对冲时，当前数据源明显慢于自身常态就并行启动下一个，取最先成功的结果。
 
         Args:
             trade_date: 交易日期 YYYY-MM-DD（可选，默认今天）
@@ -522,24 +540,25 @@ class HotConceptsCollector:
             热门概念数据列表
 
         Raises:
-            Exception: 当Tushare数据源失败时抛出异常
+            Exception: 所有数据源都失败时抛出异常
         """
         if not trade_date:
             trade_date = datetime.now().strftime("%Y-%m-%d")
 
         logger.info(f"=" * 50)
         logger.info(f"开始采集 {trade_date} 热门概念板块数据...")
-        logger.info(f"数据源: Tushare（唯一数据源）")
+        logger.info(f"数据源: 按健康度选择（对冲: {'开启' if self.orchestrator.hedge else '关闭'}）")
         logger.info(f"=" * 50)
 
-        # 只使用Tushare数据源
-        concepts, success = self._collect_from_tushare(trade_date, top_n)
-
-        if not success or not concepts:
-            error_msg = f"❌ Tushare数据源采集失败！请检查是否被限速或网络问题。"
+        try:
+            source, (concepts, _) = self.orchestrator.run(trade_date, top_n)
+        except SourcesExhausted as e:
+            error_msg = f"❌ 热门概念所有数据源采集失败！{e}"
             logger.error(error_msg)
             raise Exception(error_msg)
 
+        data_source = DataSource(source)
+
         # 更新连续上榜天数（基于数据库历史）
         for concept in concepts:
             concept['consecutive_days'] = self.get_consecutive_days(
@@ -553,9 +572,54 @@ class HotConceptsCollector:
         # 计算每个概念的龙头股
         concepts = self._calculate_leader_stock(concepts, trade_date)
 
-        self._log_top_concepts(concepts, DataSource.TUSHARE)
+        self._log_top_concepts(concepts, data_source)
         return concepts
 
+    def _accept(self, result: Tuple[List[Dict], bool], trade_date: str, top_n: int = None) -> bool:
+        """数据源结果是否合格: 非空、日期与请求一致且概念代码覆盖率达到阈值"""
+        concepts, ok = result
+        if not ok or not concepts:
+            return False
+        other_dates = {c.get('trade_date') for c in concepts} - {trade_date}
+        if other_dates:
+            logger.warning(
+                f"⚠️ {concepts[0].get('data_source')} 返回的日期 {', '.join(sorted(map(str, other_dates)))} "
+                f"与请求的 {trade_date} 不一致，不采用"
+            )
+            return False
+        coverage = sum(1 for c in concepts if c.get('concept_code')) / len(concepts)
+        if coverage < self.min_code_coverage:
+            logger.warning(
+                f"⚠️ {concepts[0].get('data_source')} 概念代码覆盖率 {coverage:.0%} "
+                f"低于 {self.min_code_coverage:.0%}，无法计算涨停数和龙头股，不采用"
+            )
+            return False
+        return True
+
+    def _fill_concept_codes(self, concepts: List[Dict]):
+        """AKShare 来源没有 ts_code，按同花顺概念指数名称映射补上（ths_member 需要 .TI 代码）"""
+        if self.tushare_pro is None:
+            return
+        try:
+            index_df = self.tushare_pro.ths_index()
+            concept_list = index_df[index_df['type'] == 'N']
+        except Exception as e:
+            logger.warning(f"获取同花顺概念指数列表失败，跳过代码映射: {e}")
+            return
+
+        mapping = dict(zip(concept_list['name'], concept_list['ts_code']))
+        # "概念" 后缀双向匹配
+        for name, code in list(mapping.items()):
+            mapping.setdefault(name[:-2] if name.endswith('概念') else f"{name}概念", code)
+
+        matched = 0
+        for concept in concepts:
+            code = mapping.get(concept['concept_name'])
+            if code and not concept.get('concept_code'):
+                concept['concept_code'] = code
+                matched += 1
+        logger.info(f"   概念代码映射: {matched}/{len(concepts)} 个")
+
     def _log_top_concepts(self, concepts: List[Dict], data_source: DataSource):
         """打印采集结果摘要"""
         logger.info(f"\n{'=' * 50}")
@@ -585,7 +649,7 @@ class HotConceptsCollector:
         if self.tushare_pro:
             try:
                 logger.debug("   尝试从 Tushare limit_list_ths 获取涨停股数据...")
-                time.sleep(0.3)  # 避免频率限制
+                pace(0.3)  # 避免频率限制
                 limit_up_df = self.tushare_pro.limit_list_ths(
                     trade_date=trade_date.replace("-", ""),
                     limit_type='涨停池'
@@ -734,7 +798,7 @@ class HotConceptsCollector:
                 if concept_code and self.tushare_pro:
                     try:
                         # 使用ths_member获取该概念的成分股
-                        time.sleep(0.1)  # 避免频率限制
+                        pace(0.1)  # 避免频率限制
                         members_df = self.tushare_pro.ths_member(ts_code=concept_code)
 
                         if members_df is not None and not members_df.empty:
@@ -793,7 +857,7 @@ class HotConceptsCollector:
         if self.tushare_pro:
             try:
                 logger.debug("   尝试从 Tushare limit_list_ths 获取涨停池数据...")
-                time.sleep(0.3)
+                pace(0.3)
                 limit_up_df = self.tushare_pro.limit_list_ths(
                     trade_date=trade_date.replace("-", ""),
                     limit_type='涨停池'
@@ -921,7 +985,7 @@ class HotConceptsCollector:
 
                 try:
                     # 使用ths_member获取该概念的成分股
-                    time.sleep(0.1)  # 避免频率限制
+                    pace(0.1)  # 避免频率限制
                     members_df = self.tushare_pro.ths_member(ts_code=concept_code)
 
                     if members_df is None or members_df.empty:
@@ -1065,17 +1129,17 @@ class HotConceptsCollector:
                 record = {k: v for k, v in c.items() if k not in ['data_source', 'concept_code']}
                 records.append(record)
 
-            response = self.supabase.table("hot_concepts").upsert(
-                records, on_conflict="trade_date,concept_name"
-            ).execute()
+            result = BulkWriter("hot_concepts", on_conflict="trade_date,concept_name").write(records)
+            invalidate_trade_dates(r.get("trade_date") for r in records)
 
-            logger.info(f"✅ 成功保存 {len(records)} 个热门概念数据")
-            return len(records)
+            logger.info(f"✅ 成功保存 {result.written} 个热门概念数据")
+            return result.written
 
         except Exception as e:
             logger.error(f"保存热门概念数据失败: {e}")
             return 0
 
+    @profiled("hot_concepts.collect_and_save")
     def collect_and_save(self, trade_date: Optional[str] = None, top_n: int = 10) -> int:
         """
         采集并保存热门概念数据（含异动板块）
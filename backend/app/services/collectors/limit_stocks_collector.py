@@ -10,20 +10,46 @@
 包含: 股票代码、名称、涨跌幅、封板时间、连板天数、开板次数、封单金额、概念板块等
 """
 
-import akshare as ak
 import pandas as pd
-import tushare as ts
 from datetime import datetime
 from typing import Optional, List, Dict
 from loguru import logger
-import time
-import os
+import json
 
 from app.utils.supabase_client import get_supabase
+from app.utils.bulk_writer import BulkWriter
+from app.utils.data_source import akshare_api as ak, get_tushare_pro, pace
+from app.utils.profiling import profiled
+from app.utils.result_cache import invalidate_trade_dates
+from app.utils.run_ledger import ledger_step
 from app.utils.trading_date import get_latest_trading_date, get_previous_trading_date
 from app.services.collectors.ths_concept_collector import ThsConceptCollector
 
 
+def normalize_concepts(value) -> List[str]:
+    """
+    概念字段规范化为去重的字符串数组（写入时处理一次，接口直接返回）
+
+    兼容 None、JSON 字符串、逗号/分号分隔字符串和列表
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        text = value.strip()
+        if text.startswith("["):
+            try:
+                return normalize_concepts(json.loads(text))
+            except ValueError:
+                pass
+        value = text.replace("；", ",").replace(";", ",").split(",")
+    concepts = []
+    for item in value:
+        name = str(item).strip()
+        if name and name not in concepts:
+            concepts.append(name)
+    return concepts
+
+
 class LimitStocksCollector:
     """涨停/跌停股池数据采集器"""
 
@@ -35,26 +61,9 @@ class LimitStocksCollector:
 
     @property
     def tushare_pro(self):
-        """延迟初始化 Tushare Pro API"""
+        """Tushare Pro API（进程内共享，调用计入全局限流预算）"""
         if self._tushare_pro is None:
-            token = os.getenv("TUSHARE_TOKEN")
-            if token:
-                try:
-                    http_url = os.getenv("TUSHARE_HTTP_URL")
-                    if http_url:
-                        # 使用自定义HTTP URL（高级账号）
-                        self._tushare_pro = ts.pro_api()
-                        # 手动设置token和http_url
-                        self._tushare_pro._DataApi__token = token
-                        self._tushare_pro._DataApi__http_url = http_url
-                        logger.info(f"✅ Tushare Pro API 初始化成功（高级账号）: {http_url}")
-                    else:
-                        # 使用默认API地址
-                        self._tushare_pro = ts.pro_api(token)
-                        logger.info("✅ Tushare Pro API 初始化成功（标准账号）")
-                except Exception as e:
-                    logger.warning(f"Tushare Pro 初始化失败: {e}")
-
+            self._tushare_pro = get_tushare_pro()
         return self._tushare_pro
 
     def get_fund_flow_data(self, stock_code: str, trade_date: str) -> Dict:
@@ -119,7 +128,7 @@ class LimitStocksCollector:
 
         try:
             if self.tushare_pro:
-                time.sleep(0.1)  # 避免频率限制
+                pace(0.1)  # 避免频率限制
                 df = self.tushare_pro.concept_detail(ts_code=ts_code)
 
                 if df is not None and not df.empty:
@@ -154,7 +163,7 @@ class LimitStocksCollector:
         if self.tushare_pro:
             try:
                 logger.info("   尝试从 Tushare limit_list_d 获取涨停池数据...")
-                time.sleep(0.3)  # 避免频率限制
+                pace(0.3)  # 避免频率限制
 
                 df = self.tushare_pro.limit_list_d(
                     trade_date=date_str,
@@ -205,7 +214,7 @@ class LimitStocksCollector:
         if self.tushare_pro:
             try:
                 logger.info("   尝试从 Tushare limit_list_d 获取跌停池数据...")
-                time.sleep(0.3)  # 避免频率限制
+                pace(0.3)  # 避免频率限制
 
                 df = self.tushare_pro.limit_list_d(
                     trade_date=date_str,
@@ -483,7 +492,7 @@ class LimitStocksCollector:
                 # 每获取10只股票休息一下，避免请求过快
                 if (i + 1) % 10 == 0:
                     logger.info(f"已获取 {i + 1}/{len(records)} 只股票的资金流向")
-                    time.sleep(0.5)
+                    pace(0.5)
             except Exception as e:
                 logger.warning(f"获取 {record['stock_code']} 资金流向失败: {e}")
 
@@ -641,7 +650,7 @@ class LimitStocksCollector:
                 record.update(fund_flow)
                 if (i + 1) % 10 == 0:
                     logger.info(f"已获取 {i + 1}/{len(records)} 只股票的资金流向")
-                    time.sleep(0.5)
+                    pace(0.5)
             except Exception as e:
                 logger.warning(f"获取 {record['stock_code']} 资金流向失败: {e}")
 
@@ -665,13 +674,19 @@ class LimitStocksCollector:
         try:
             logger.info(f"准备保存 {len(records)} 条涨跌停股票数据...")
 
-            # 批量插入（使用 upsert）
-            response = self.supabase.table("limit_stocks_detail").upsert(
-                records, on_conflict="trade_date,stock_code,limit_type"
-            ).execute()
+            # ST 标记（列表接口按 is_st 过滤，可走索引）和概念数组规范化
+            for record in records:
+                record["is_st"] = "ST" in str(record.get("stock_name") or "").upper()
+                record["concepts"] = normalize_concepts(record.get("concepts"))
+
+            # 并行分块 upsert
+            result = BulkWriter(
+                "limit_stocks_detail", on_conflict="trade_date,stock_code,limit_type"
+            ).write(records)
+            invalidate_trade_dates(r["trade_date"] for r in records)
 
-            logger.info(f"成功保存 {len(records)} 条涨跌停股票数据")
-            return len(records)
+            logger.info(f"成功保存 {result.written} 条涨跌停股票数据")
+            return result.written
 
         except Exception as e:
             logger.error(f"保存涨跌停数据失败: {str(e)}")
@@ -702,6 +717,7 @@ class LimitStocksCollector:
             logger.error(f"查询前一交易日涨停股票失败: {e}")
             return []
 
+    @ledger_step("limit_stocks.daily_data")
     def _collect_stocks_daily_data(self, stock_codes: List[str], trade_date: str) -> pd.DataFrame:
         """
         使用Tushare批量获取股票的日线数据
@@ -735,7 +751,7 @@ class LimitStocksCollector:
                     ts_code = f"{stock_code}.SH"
 
                 # 调用Tushare API
-                time.sleep(0.05)  # 避免频率限制
+                pace(0.05)  # 避免频率限制
                 df = self.tushare_pro.daily(
                     ts_code=ts_code,
                     start_date=ts_date,
@@ -836,7 +852,7 @@ class LimitStocksCollector:
                 record.update(fund_flow)
                 if (i + 1) % 10 == 0:
                     logger.info(f"已获取 {i + 1}/{len(records)} 只股票的资金流向")
-                    time.sleep(0.5)
+                    pace(0.5)
             except Exception as e:
                 logger.warning(f"获取 {record['stock_code']} 资金流向失败: {e}")
 
@@ -861,6 +877,7 @@ class LimitStocksCollector:
         logger.info(f"处理日线数据完成，共 {len(records)} 条有效记录")
         return records
 
+    @profiled("limit_stocks.collect_and_save")
     def collect_and_save(self, trade_date: Optional[str] = None) -> Dict[str, int]:
         """
         采集并保存涨跌停股池数据
@@ -3,16 +3,16 @@
 优先使用 Tushare 采集指数数据（更及时），AKShare作为备用
 """
 
-import akshare as ak
-import tushare as ts
 import pandas as pd
-import time
-import os
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict
 from loguru import logger
 
 from app.utils.supabase_client import get_supabase
+from app.utils.bulk_writer import BulkWriter
+from app.utils.data_source import akshare_api as ak, get_tushare_pro, pace
+from app.utils.result_cache import invalidate_trade_dates
+from app.utils.run_ledger import count_retry
 
 
 class MarketIndexCollector:
@@ -30,29 +30,16 @@ class MarketIndexCollector:
 
     @property
     def tushare_pro(self):
-        """延迟初始化 Tushare Pro API"""
+        """Tushare Pro API（进程内共享，调用计入全局限流预算）"""
         if self._tushare_pro is None:
-            token = os.getenv("TUSHARE_TOKEN")
-            if token:
-                try:
-                    http_url = os.getenv("TUSHARE_HTTP_URL")
-                    if http_url:
-                        self._tushare_pro = ts.pro_api()
-                        self._tushare_pro._DataApi__token = token
-                        self._tushare_pro._DataApi__http_url = http_url
-                        logger.debug(f"✅ Tushare Pro API 初始化成功（高级账号）")
-                    else:
-                        self._tushare_pro = ts.pro_api(token)
-                        logger.debug("✅ Tushare Pro API 初始化成功（标准账号）")
-                except Exception as e:
-                    logger.warning(f"Tushare Pro 初始化失败: {e}")
+            self._tushare_pro = get_tushare_pro()
         return self._tushare_pro
 
     def collect_index_daily(
         self, symbol: str, start_date: Optional[str] = None, end_date: Optional[str] = None, max_retries: int = 3
     ) -> pd.DataFrame:
         """
-        采集指定指数的日线数据（使用pro_bar接口，包含MA均线数据）
+        采集指定指数的日线数据（Tushare index_daily，AKShare 备用；包含MA均线数据）
 
         Args:
             symbol: 指数代码 (sh000001, sz399001, sz399006)
@@ -69,56 +56,9 @@ class MarketIndexCollector:
 
                 df = pd.DataFrame()
 
-                # 方法1：优先使用Tushare pro_bar（支持均线数据）
+                # 方法1：优先使用Tushare index_daily（均线自行计算，与 pro_bar(ma=...) 一致，
+                # 不直接调用 tushare 模块函数，请求全部经过限流 / 录制代理）
                 if self.tushare_pro and symbol in self.index_mapping:
-                    try:
-                        ts_code = self.index_mapping[symbol]["ts_code"]
-                        start_ts = start_date.replace("-", "") if start_date else None
-                        end_ts = end_date.replace("-", "") if end_date else None
-
-                        logger.debug(f"   尝试从Tushare pro_bar获取 {ts_code} 数据（含均线）...")
-
-                        # 使用pro_bar接口，支持ma参数获取均线
-                        df_ts = ts.pro_bar(
-                            ts_code=ts_code,
-                            api=self.tushare_pro,
-                            start_date=start_ts,
-                            end_date=end_ts,
-                            asset='I',  # I=指数
-                            ma=[5, 10, 20]  # 获取5/10/20日均线
-                        )
-
-                        if df_ts is not None and not df_ts.empty:
-                            # 重命名列
-                            df = df_ts.rename(columns={
-                                "trade_date": "trade_date_raw",
-                                "open": "open_price",
-                                "high": "high_price",
-                                "low": "low_price",
-                                "close": "close_price",
-                                "vol": "volume",
-                                "amount": "amount",
-                                "pct_chg": "change_pct",
-                            })
-
-                            # 格式化日期
-                            df["trade_date"] = pd.to_datetime(df["trade_date_raw"]).dt.strftime("%Y-%m-%d")
-                            df = df.drop("trade_date_raw", axis=1)
-
-                            # 排序（pro_bar返回的是倒序）
-                            df = df.sort_values("trade_date")
-
-                            # 计算振幅
-                            df["amplitude"] = (
-                                (df["high_price"] - df["low_price"]) / df["close_price"].shift(1) * 100
-                            )
-
-                            logger.info(f"✅ Tushare pro_bar 成功采集 {symbol} 数据（含均线），共 {len(df)} 条记录")
-                    except Exception as e:
-                        logger.warning(f"   Tushare pro_bar获取失败: {e}，尝试备用方案...")
-
-                # 方法2：备用 - 使用index_daily（不含均线，需要自己计算）
-                if df.empty and self.tushare_pro and symbol in self.index_mapping:
                     try:
                         ts_code = self.index_mapping[symbol]["ts_code"]
                         start_ts = start_date.replace("-", "") if start_date else None
@@ -161,7 +101,7 @@ class MarketIndexCollector:
                     except Exception as e:
                         logger.warning(f"   Tushare index_daily获取失败: {e}，尝试AKShare...")
 
-                # 方法3：备用AKShare（需要自己计算均线）
+                # 方法2：备用AKShare（需要自己计算均线）
                 if df.empty:
                     logger.debug(f"   使用AKShare获取 {symbol} 数据...")
                     df_ak = ak.stock_zh_index_daily(symbol=symbol)
@@ -207,7 +147,8 @@ class MarketIndexCollector:
                 if attempt < max_retries - 1:
                     wait_time = (attempt + 1) * 2
                     logger.info(f"等待 {wait_time} 秒后重试...")
-                    time.sleep(wait_time)
+                    pace(wait_time)
+                    count_retry()
                 else:
                     logger.error(f"采集指数 {symbol} 数据失败，已达最大重试次数")
                     return pd.DataFrame()
@@ -338,12 +279,11 @@ class MarketIndexCollector:
             # 批量插入/更新数据（使用 upsert）
             logger.info(f"准备保存 {len(records)} 条 {index_name} 数据...")
 
-            response = self.supabase.table("market_index").upsert(
-                records, on_conflict="trade_date,index_code"
-            ).execute()
+            result = BulkWriter("market_index", on_conflict="trade_date,index_code").write(records)
+            invalidate_trade_dates(r["trade_date"] for r in records)
 
-            logger.info(f"成功保存 {index_name} 数据: {len(records)} 条")
-            return len(records)
+            logger.info(f"成功保存 {index_name} 数据: {result.written} 条")
+            return result.written
 
         except Exception as e:
             logger.error(f"保存数据到数据库失败: {str(e)}")
@@ -374,7 +314,7 @@ class MarketIndexCollector:
             try:
                 # 在每个请求之间添加延迟，避免频繁请求
                 if i > 0:
-                    time.sleep(2)
+                    pace(2)
 
                 # 采集数据
                 df = self.collect_index_daily(symbol, start_date, end_date)
@@ -582,12 +522,11 @@ class MarketIndexCollector:
             # 批量插入/更新数据（使用 upsert）
             logger.info(f"准备保存 {len(records)} 条 {index_name} 数据...")
 
-            response = self.supabase.table("market_index").upsert(
-                records, on_conflict="trade_date,index_code"
-            ).execute()
+            result = BulkWriter("market_index", on_conflict="trade_date,index_code").write(records)
+            invalidate_trade_dates(r["trade_date"] for r in records)
 
-            logger.info(f"成功保存 {index_name} 数据: {len(records)} 条")
-            return len(records)
+            logger.info(f"成功保存 {index_name} 数据: {result.written} 条")
+            return result.written
 
         except Exception as e:
             logger.error(f"保存数据到数据库失败: {str(e)}")
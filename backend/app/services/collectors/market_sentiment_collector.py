@@ -5,20 +5,36 @@
 数据来源:
 - daily: 每日行情（统计涨跌家数、总成交额）✅ Tushare
 - limit_list_d: 涨跌停列表（涨停、跌停、炸板、连板统计）✅ Tushare
+
+区间回填（collect_and_save_range）按日期区间分页拉取 daily / limit_list_d，
+groupby 一次算出所有交易日的统计，再一次批量 upsert，不再逐日各调两次接口。
 """
 
-import tushare as ts
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List
 from loguru import logger
 import json
-import os
+import time
 
+from app.utils.bulk_writer import BulkWriter
+from app.utils.data_source import get_tushare_pro, pace
+from app.utils.result_cache import invalidate_trade_date, invalidate_trade_dates
 from app.utils.supabase_client import get_supabase
 from app.utils.trading_date import get_latest_trading_date
 
 
+# Tushare 单次调用返回行数上限（超过需 offset 分页）
+DAILY_PAGE_LIMIT = 6000
+LIMIT_LIST_PAGE_LIMIT = 2500
+
+
+def _format_date(value) -> str:
+    """Tushare 日期 '20251211' -> '2025-12-11'"""
+    text = str(value)
+    return f"{text[0:4]}-{text[4:6]}-{text[6:8]}"
+
+
 class MarketSentimentCollector:
     """市场情绪数据采集器（基于Tushare）"""
 
@@ -28,25 +44,11 @@ class MarketSentimentCollector:
 
     @property
     def tushare_pro(self):
-        """延迟初始化 Tushare Pro API"""
+        """Tushare Pro API（进程内共享，调用计入全局限流预算）"""
         if self._tushare_pro is None:
-            token = os.getenv("TUSHARE_TOKEN")
-            if not token:
-                raise ValueError("TUSHARE_TOKEN 未配置")
-
-            try:
-                http_url = os.getenv("TUSHARE_HTTP_URL")
-                if http_url:
-                    self._tushare_pro = ts.pro_api()
-                    self._tushare_pro._DataApi__token = token
-                    self._tushare_pro._DataApi__http_url = http_url
-                    logger.debug(f"✅ Tushare Pro API 初始化成功（高级账号）")
-                else:
-                    self._tushare_pro = ts.pro_api(token)
-                    logger.debug("✅ Tushare Pro API 初始化成功（标准账号）")
-            except Exception as e:
-                logger.error(f"Tushare Pro 初始化失败: {e}")
-                raise
+            self._tushare_pro = get_tushare_pro()
+            if self._tushare_pro is None:
+                raise ValueError("TUSHARE_TOKEN 未配置或 Tushare Pro 初始化失败")
         return self._tushare_pro
 
     def collect_market_stats(self, trade_date: str) -> Dict:
@@ -198,18 +200,43 @@ class MarketSentimentCollector:
         # 2. 采集涨跌停数据（涨停、跌停、炸板、连板分布）
         limit_data = self.collect_limit_data(date_ts)
 
-        # 3. 计算涨跌比
+        sentiment_data = self.build_sentiment(trade_date, market_stats, limit_data)
+        up_count = sentiment_data["up_count"]
+        down_count = sentiment_data["down_count"]
+        limit_up_count = sentiment_data["limit_up_count"]
+        explosion_rate = sentiment_data["explosion_rate"]
+
+        logger.info(
+            f"市场情绪数据采集完成: 涨{up_count}/跌{down_count}, "
+            f"涨停{limit_up_count}/跌停{limit_data.get('limit_down_count', 0)}, "
+            f"总成交额{market_stats.get('total_amount', 0)/1e8:.2f}亿, "
+            f"炸板率{explosion_rate:.2f}%"
+        )
+
+        return sentiment_data
+
+    @staticmethod
+    def build_sentiment(trade_date: str, market_stats: Dict, limit_data: Dict) -> Dict:
+        """
+        由市场统计和涨跌停数据组装一天的市场情绪（单日采集和区间回填共用）
+
+        Args:
+            trade_date: 交易日期 YYYY-MM-DD
+            market_stats: {up_count, down_count, flat_count, total_amount}
+            limit_data: {limit_up_count, limit_down_count, exploded_count, continuous_limit_distribution}
+        """
+        # 1. 计算涨跌比
         up_count = market_stats.get('up_count', 0)
         down_count = market_stats.get('down_count', 0)
         up_down_ratio = (up_count / down_count) if down_count > 0 else 0.0
 
-        # 4. 计算炸板率（通用口径：炸板数 / 触及涨停总数）
+        # 2. 计算炸板率（通用口径：炸板数 / 触及涨停总数）
         limit_up_count = limit_data.get('limit_up_count', 0)
         exploded_count = limit_data.get('exploded_count', 0)
         total_touched = limit_up_count + exploded_count
         explosion_rate = (exploded_count / total_touched * 100) if total_touched > 0 else 0.0
 
-        # 5. 计算市场状态（基于上涨股票占比）
+        # 3. 计算市场状态（基于上涨股票占比）
         total_stocks = up_count + down_count
         up_pct = (up_count / total_stocks * 100) if total_stocks > 0 else 0
 
@@ -235,15 +262,26 @@ class MarketSentimentCollector:
             "market_status": market_status,
         }
 
-        logger.info(
-            f"市场情绪数据采集完成: 涨{up_count}/跌{down_count}, "
-            f"涨停{limit_up_count}/跌停{limit_data.get('limit_down_count', 0)}, "
-            f"总成交额{market_stats.get('total_amount', 0)/1e8:.2f}亿, "
-            f"炸板率{explosion_rate:.2f}%"
-        )
-
         return sentiment_data
 
+    @staticmethod
+    def _to_record(sentiment_data: Dict) -> Dict:
+        """市场情绪 -> market_sentiment 行（连板分布转为 JSON）"""
+        return {
+            "trade_date": sentiment_data["trade_date"],
+            "total_amount": float(sentiment_data["total_amount"]),
+            "up_count": int(sentiment_data["up_count"]),
+            "down_count": int(sentiment_data["down_count"]),
+            "flat_count": int(sentiment_data.get("flat_count", 0)),
+            "up_down_ratio": float(sentiment_data["up_down_ratio"]),
+            "limit_up_count": int(sentiment_data["limit_up_count"]),
+            "limit_down_count": int(sentiment_data["limit_down_count"]),
+            "continuous_limit_distribution": json.dumps(sentiment_data["continuous_limit_distribution"]),
+            "exploded_count": int(sentiment_data.get("exploded_count", 0)),
+            "explosion_rate": float(sentiment_data["explosion_rate"]),
+            "market_status": sentiment_data["market_status"],
+        }
+
     def save_to_database(self, sentiment_data: Dict) -> bool:
         """
         保存市场情绪数据到 Supabase
@@ -255,21 +293,7 @@ class MarketSentimentCollector:
             是否保存成功
         """
         try:
-            # 转换连板分布为 JSON
-            record = {
-                "trade_date": sentiment_data["trade_date"],
-                "total_amount": float(sentiment_data["total_amount"]),
-                "up_count": int(sentiment_data["up_count"]),
-                "down_count": int(sentiment_data["down_count"]),
-                "flat_count": int(sentiment_data.get("flat_count", 0)),
-                "up_down_ratio": float(sentiment_data["up_down_ratio"]),
-                "limit_up_count": int(sentiment_data["limit_up_count"]),
-                "limit_down_count": int(sentiment_data["limit_down_count"]),
-                "continuous_limit_distribution": json.dumps(sentiment_data["continuous_limit_distribution"]),
-                "exploded_count": int(sentiment_data.get("exploded_count", 0)),
-                "explosion_rate": float(sentiment_data["explosion_rate"]),
-                "market_status": sentiment_data["market_status"],
-            }
+            record = self._to_record(sentiment_data)
 
             logger.info(f"保存市场情绪数据: {sentiment_data['trade_date']}")
 
@@ -277,6 +301,7 @@ class MarketSentimentCollector:
             response = self.supabase.table("market_sentiment").upsert(
                 record, on_conflict="trade_date"
             ).execute()
+            invalidate_trade_date(record["trade_date"])
 
             logger.info(f"✅ 成功保存市场情绪数据")
             return True
@@ -299,6 +324,165 @@ class MarketSentimentCollector:
         return self.save_to_database(sentiment_data)
 
 
+    # ============================================
+    # 区间回填
+    # ============================================
+
+    def _fetch_range(self, api_name: str, start_ts: str, end_ts: str, fields: str, page_limit: int) -> pd.DataFrame:
+        """
+        按日期区间分页拉取 Tushare 接口（offset 翻页，直到返回不足一页）
+
+        Args:
+            api_name: 接口名，如 daily / limit_list_d
+            start_ts: 开始日期 YYYYMMDD
+            end_ts: 结束日期 YYYYMMDD
+            fields: 返回字段（只取统计需要的列，减少传输）
+            page_limit: 单次调用返回行数上限
+        """
+        api = getattr(self.tushare_pro, api_name)
+        frames = []
+        offset = 0
+        while True:
+            df = api(start_date=start_ts, end_date=end_ts, fields=fields, limit=page_limit, offset=offset)
+            if df is None or df.empty:
+                break
+            frames.append(df)
+            logger.debug(f"{api_name} {start_ts}~{end_ts} offset={offset}: {len(df)} 行")
+            if len(df) < page_limit:
+                break
+            offset += len(df)
+            pace(0.3)  # 避免频率限制
+
+        logger.info(f"{api_name} {start_ts}~{end_ts}: {len(frames)} 次调用，{sum(len(f) for f in frames)} 行")
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    @staticmethod
+    def aggregate_market_stats(daily_df: pd.DataFrame) -> Dict[str, Dict]:
+        """
+        daily 区间数据按交易日汇总涨跌家数和总成交额
+
+        Returns:
+            {YYYY-MM-DD: {up_count, down_count, flat_count, total_amount}}
+        """
+        if daily_df.empty:
+            return {}
+
+        pct = daily_df['pct_chg']
+        grouped = daily_df.assign(up=pct > 0, down=pct < 0, flat=pct == 0).groupby('trade_date').agg(
+            up_count=('up', 'sum'),
+            down_count=('down', 'sum'),
+            flat_count=('flat', 'sum'),
+            amount=('amount', 'sum'),
+        )
+
+        return {
+            _format_date(trade_date): {
+                'up_count': int(row.up_count),
+                'down_count': int(row.down_count),
+                'flat_count': int(row.flat_count),
+                'total_amount': float(row.amount) * 1000,  # 千元 -> 元
+            }
+            for trade_date, row in grouped.iterrows()
+        }
+
+    @staticmethod
+    def aggregate_limit_data(limit_df: pd.DataFrame) -> Dict[str, Dict]:
+        """
+        limit_list_d 区间数据按交易日汇总涨停/跌停/炸板数和连板分布
+
+        口径与 collect_limit_data 一致：limit_times 为空按首板计；当日无涨停时分布为 {"1": 0}
+
+        Returns:
+            {YYYY-MM-DD: {limit_up_count, limit_down_count, exploded_count, continuous_limit_distribution}}
+        """
+        if limit_df.empty:
+            return {}
+
+        counts = limit_df.groupby(['trade_date', 'limit']).size().unstack(fill_value=0)
+
+        up_df = limit_df[limit_df['limit'] == 'U']
+        if 'limit_times' in up_df.columns:
+            times = up_df['limit_times'].fillna(1).astype(int)
+        else:
+            times = pd.Series(1, index=up_df.index)
+        distribution = up_df.assign(times=times).groupby(['trade_date', 'times']).size()
+
+        result = {}
+        for trade_date, row in counts.iterrows():
+            day_distribution = (
+                {str(t): int(n) for t, n in distribution.loc[trade_date].items()}
+                if trade_date in distribution.index.get_level_values(0) else {"1": 0}
+            )
+            result[_format_date(trade_date)] = {
+                'limit_up_count': int(row.get('U', 0)),
+                'limit_down_count': int(row.get('D', 0)),
+                'exploded_count': int(row.get('Z', 0)),
+                'continuous_limit_distribution': day_distribution,
+            }
+        return result
+
+    def collect_range(self, start_date: str, end_date: str) -> List[Dict]:
+        """
+        区间采集市场情绪（分页批量拉取 + groupby 汇总）
+
+        Args:
+            start_date: 开始日期 YYYY-MM-DD
+            end_date: 结束日期 YYYY-MM-DD
+
+        Returns:
+            每个有行情的交易日一条市场情绪（日期升序）
+        """
+        start_ts, end_ts = start_date.replace("-", ""), end_date.replace("-", "")
+        logger.info(f"开始区间采集市场情绪 {start_date} ~ {end_date}（Tushare 批量）...")
+
+        started = time.perf_counter()
+        daily_df = self._fetch_range("daily", start_ts, end_ts, "trade_date,pct_chg,amount", DAILY_PAGE_LIMIT)
+        limit_df = self._fetch_range(
+            "limit_list_d", start_ts, end_ts, "trade_date,ts_code,limit,limit_times", LIMIT_LIST_PAGE_LIMIT
+        )
+        fetched = time.perf_counter()
+
+        market_stats = self.aggregate_market_stats(daily_df)
+        limit_data = self.aggregate_limit_data(limit_df)
+        empty_limit = {
+            'limit_up_count': 0,
+            'limit_down_count': 0,
+            'exploded_count': 0,
+            'continuous_limit_distribution': {},
+        }
+
+        # 以有行情的日期为准（非交易日没有 daily 数据）
+        results = [
+            self.build_sentiment(trade_date, market_stats[trade_date], limit_data.get(trade_date, empty_limit))
+            for trade_date in sorted(market_stats)
+        ]
+
+        logger.info(
+            f"✅ 区间采集完成: {len(results)} 个交易日，"
+            f"拉取 {fetched - started:.1f}s，计算 {time.perf_counter() - fetched:.2f}s"
+        )
+        return results
+
+    def save_many(self, sentiments: List[Dict]) -> int:
+        """批量 upsert 多日市场情绪"""
+        if not sentiments:
+            return 0
+        records = [self._to_record(s) for s in sentiments]
+        result = BulkWriter("market_sentiment", on_conflict="trade_date").write(records)
+        invalidate_trade_dates([r["trade_date"] for r in records])
+        logger.info(f"✅ 批量保存市场情绪 {result.written}/{len(records)} 天")
+        return result.written
+
+    def collect_and_save_range(self, start_date: str, end_date: str) -> int:
+        """
+        区间回填市场情绪
+
+        Returns:
+            写入的交易日数
+        """
+        return self.save_many(self.collect_range(start_date, end_date))
+
+
 # 便捷函数
 def collect_market_sentiment(trade_date: Optional[str] = None) -> Dict:
     """采集市场情绪数据"""
@@ -310,3 +494,9 @@ def collect_and_save_market_sentiment(trade_date: Optional[str] = None) -> bool:
     """采集并保存市场情绪数据"""
     collector = MarketSentimentCollector()
     return collector.collect_and_save(trade_date)
+
+
+def collect_and_save_market_sentiment_range(start_date: str, end_date: str) -> int:
+    """区间回填市场情绪"""
+    collector = MarketSentimentCollector()
+    return collector.collect_and_save_range(start_date, end_date)
@@ -9,13 +9,13 @@
 - ths_member: 同花顺概念成分股
 """
 
-import os
-import time
-import tushare as ts
 from typing import List, Dict, Optional
 from loguru import logger
 
 from app.utils.supabase_client import get_supabase
+from app.utils.bulk_writer import BulkWriter
+from app.utils.data_source import get_tushare_pro, pace
+from app.utils.result_cache import invalidate_all
 
 
 class ThsConceptCollector:
@@ -27,22 +27,9 @@ class ThsConceptCollector:
 
     @property
     def tushare_pro(self):
-        """延迟初始化 Tushare Pro API"""
+        """Tushare Pro API（进程内共享，调用计入全局限流预算）"""
         if self._tushare_pro is None:
-            token = os.getenv("TUSHARE_TOKEN")
-            if token:
-                try:
-                    http_url = os.getenv("TUSHARE_HTTP_URL")
-                    if http_url:
-                        self._tushare_pro = ts.pro_api()
-                        self._tushare_pro._DataApi__token = token
-                        self._tushare_pro._DataApi__http_url = http_url
-                        logger.info("✅ Tushare Pro API 初始化成功（高级账号）")
-                    else:
-                        self._tushare_pro = ts.pro_api(token)
-                        logger.info("✅ Tushare Pro API 初始化成功（标准账号）")
-                except Exception as e:
-                    logger.warning(f"Tushare Pro 初始化失败: {e}")
+            self._tushare_pro = get_tushare_pro()
         return self._tushare_pro
 
     def get_all_concepts(self) -> List[Dict]:
@@ -86,7 +73,7 @@ class ThsConceptCollector:
             return []
 
         try:
-            time.sleep(0.15)  # 避免频率限制
+            pace(0.15)  # 避免频率限制
             df = self.tushare_pro.ths_member(ts_code=concept_code)
 
             if df is None or df.empty:
@@ -125,18 +112,8 @@ class ThsConceptCollector:
             logger.error("无法获取概念列表")
             return 0
 
-        # 2. 清空旧数据
-        try:
-            self.supabase.table("ths_concept_members").delete().neq("id", 0).execute()
-            logger.info("✅ 已清空旧的概念成分股数据")
-        except Exception as e:
-            logger.warning(f"清空旧数据失败: {e}")
-
-        # 3. 遍历每个概念，获取成分股
-        total_records = 0
-        batch_records = []
-        batch_size = 500  # 批量插入大小
-
+        # 2. 遍历每个概念，获取成分股
+        records = []
         for i, concept in enumerate(concepts):
             concept_code = concept['ts_code']
             concept_name = concept['name']
@@ -144,38 +121,35 @@ class ThsConceptCollector:
             members = self.get_concept_members(concept_code)
 
             for member in members:
-                batch_records.append({
+                records.append({
                     "concept_code": concept_code,
                     "concept_name": concept_name,
                     "stock_code": member["stock_code"],
                     "stock_name": member["stock_name"]
                 })
 
-            # 批量插入
-            if len(batch_records) >= batch_size:
-                try:
-                    self.supabase.table("ths_concept_members").insert(batch_records).execute()
-                    total_records += len(batch_records)
-                    logger.debug(f"   已插入 {total_records} 条记录")
-                    batch_records = []
-                except Exception as e:
-                    logger.error(f"批量插入失败: {e}")
-                    batch_records = []
-
             # 进度日志
             if (i + 1) % 50 == 0:
-                logger.info(f"   进度: {i + 1}/{len(concepts)} 概念, {total_records} 条记录")
-
-        # 插入剩余记录
-        if batch_records:
-            try:
-                self.supabase.table("ths_concept_members").insert(batch_records).execute()
-                total_records += len(batch_records)
-            except Exception as e:
-                logger.error(f"插入剩余记录失败: {e}")
-
-        logger.info(f"✅ 同花顺概念成分股采集完成，共 {total_records} 条记录")
-        return total_records
+                logger.info(f"   进度: {i + 1}/{len(concepts)} 概念, {len(records)} 条记录")
+
+        if not records:
+            logger.error("未获取到任何成分股数据，保留旧数据")
+            return 0
+
+        # 3. 清空旧数据（拉取完成后再清空，缩短空表窗口）
+        try:
+            self.supabase.table("ths_concept_members").delete().neq("id", 0).execute()
+            logger.info("✅ 已清空旧的概念成分股数据")
+        except Exception as e:
+            logger.warning(f"清空旧数据失败: {e}")
+
+        # 4. 并行分块写入
+        result = BulkWriter("ths_concept_members", on_conflict="concept_code,stock_code").write(records)
+        # 成分股影响所有交易日的概念归属
+        invalidate_all()
+
+        logger.info(f"✅ 同花顺概念成分股采集完成，共 {result.written} 条记录")
+        return result.written
 
     def get_stock_concepts(self, stock_code: str) -> List[str]:
         """
@@ -12,30 +12,16 @@
 - 今日行情：Tushare daily 接口
 """
 
-import os
-import tushare as ts
 from datetime import datetime
 from typing import Optional, List, Dict
 from loguru import logger
 
+from app.services.premium_summary import PremiumSummaryService
 from app.utils.supabase_client import get_supabase
-from app.utils.trading_date import get_latest_trading_date
-
-
-def _get_previous_trading_date(trade_date: str) -> Optional[str]:
-    """获取前一个交易日"""
-    try:
-        # 尝试多种导入路径
-        try:
-            from trading_calendar_2025 import get_calendar
-        except ImportError:
-            from backend.trading_calendar_2025 import get_calendar
-
-        calendar = get_calendar()
-        return calendar.get_previous_trading_day(trade_date)
-    except Exception as e:
-        logger.warning(f"获取前一交易日失败: {e}")
-        return None
+from app.utils.bulk_writer import BulkWriter
+from app.utils.data_source import get_tushare_pro
+from app.utils.result_cache import invalidate_trade_date
+from app.utils.trading_date import get_latest_trading_date, get_previous_trading_date
 
 
 class YesterdayLimitCollector:
@@ -47,24 +33,9 @@ class YesterdayLimitCollector:
 
     @property
     def tushare_pro(self):
-        """延迟初始化 Tushare Pro API"""
+        """Tushare Pro API（进程内共享，调用计入全局限流预算）"""
         if self._tushare_pro is None:
-            token = os.getenv("TUSHARE_TOKEN")
-            if token:
-                try:
-                    http_url = os.getenv("TUSHARE_HTTP_URL")
-                    if http_url:
-                        # 使用自定义HTTP URL（高级账号）
-                        self._tushare_pro = ts.pro_api()
-                        self._tushare_pro._DataApi__token = token
-                        self._tushare_pro._DataApi__http_url = http_url
-                        logger.info(f"✅ Tushare Pro API 初始化成功（高级账号）")
-                    else:
-                        # 使用默认API地址
-                        self._tushare_pro = ts.pro_api(token)
-                        logger.info("✅ Tushare Pro API 初始化成功（标准账号）")
-                except Exception as e:
-                    logger.warning(f"Tushare Pro 初始化失败: {e}")
+            self._tushare_pro = get_tushare_pro()
         return self._tushare_pro
 
     def collect(self, trade_date: Optional[str] = None) -> Dict:
@@ -80,7 +51,7 @@ class YesterdayLimitCollector:
         if not trade_date:
             trade_date = get_latest_trading_date()
 
-        yesterday = _get_previous_trading_date(trade_date)
+        yesterday = get_previous_trading_date(trade_date)
         if not yesterday:
             logger.error(f"无法获取 {trade_date} 的前一交易日")
             return {"success": False, "error": "无法获取前一交易日"}
@@ -267,18 +238,21 @@ class YesterdayLimitCollector:
                 .eq("trade_date", trade_date)\
                 .execute()
 
-            # 批量插入
-            batch_size = 50
-            for i in range(0, len(records), batch_size):
-                batch = records[i:i + batch_size]
-                self.supabase.table("yesterday_limit_performance")\
-                    .insert(batch)\
-                    .execute()
+            # 批量写入
+            result = BulkWriter("yesterday_limit_performance", on_conflict="trade_date,stock_code").write(records)
+            invalidate_trade_date(trade_date)
 
-            logger.info(f"成功写入 {len(records)} 条昨日涨停表现数据")
+            logger.info(f"成功写入 {result.written} 条昨日涨停表现数据")
 
         except Exception as e:
             logger.error(f"写入数据库失败: {e}")
+            return
+
+        # 写入当日溢价汇总（含 5/10/20 日滚动），情绪分析只读汇总行
+        try:
+            PremiumSummaryService().save_day(trade_date, records)
+        except Exception as e:
+            logger.error(f"写入昨日涨停溢价汇总失败: {e}")
 
     def _calculate_stats(self, records: List[Dict]) -> Dict:
         """计算统计数据"""
@@ -0,0 +1,156 @@
+"""
+采集数据完整性（缺口检测）
+
+按交易日历列出区间内应有数据的（采集步骤, 交易日）单元，与各采集表按交易日的实际行数比对，
+返回缺失（0 行）或不完整（少于期望行数）的单元。每张表一次分组查询（trade_date_counts RPC），
+未部署 RPC 时退回按 trade_date 分页读取计数。
+
+    gaps = find_gaps("2026-07-01", "2026-09-30")
+    for gap in gaps:
+        print(gap.step, gap.trade_date, gap.status, gap.count, gap.expected)
+
+每日采集和 scripts/backfill.py 据此只重采缺口，不再整日重跑。
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from app.services.dashboard_service import DEFAULT_INDEX_CODES
+from app.utils.keyset import KeysetField, iter_pages
+from app.utils.supabase_client import get_supabase
+from app.utils.trading_date import get_trading_dates
+
+
+@dataclass(frozen=True)
+class TableExpectation:
+    """采集步骤对应的表及每个交易日的期望行数（至少）"""
+
+    step: str
+    table: str
+    min_rows: int = 1
+
+
+EXPECTATIONS: Dict[str, TableExpectation] = {
+    exp.step: exp
+    for exp in (
+        # 上证 / 深证 / 创业板；只有上证的日期报告为不完整，由每日重试和回补补齐
+        TableExpectation("market_index", "market_index", len(DEFAULT_INDEX_CODES)),
+        TableExpectation("limit_stocks", "limit_stocks_detail"),
+        TableExpectation("market_sentiment", "market_sentiment"),
+        TableExpectation("hot_concepts", "hot_concepts", 10),         # TOP10 + 异动板块
+        TableExpectation("yesterday_limit", "yesterday_limit_performance"),
+        TableExpectation("premium_summary", "yesterday_limit_premium_daily"),
+        TableExpectation("emotion_stage", "emotion_stage_daily"),
+    )
+}
+
+# 每日采集检查的步骤
+DAILY_STEPS = ("market_index", "limit_stocks", "market_sentiment", "hot_concepts")
+
+
+@dataclass(frozen=True)
+class Gap:
+    """缺失或不完整的（采集步骤, 交易日）单元"""
+
+    step: str
+    table: str
+    trade_date: str
+    count: int
+    expected: int
+
+    @property
+    def status(self) -> str:
+        return "missing" if self.count == 0 else "partial"
+
+
+def _count_by_pages(table: str, start_date: str, end_date: str) -> Dict[str, int]:
+    """RPC 不可用时: 分页读取 trade_date 后计数"""
+    keys = [KeysetField("trade_date"), KeysetField("id")]
+    supabase = get_supabase()
+
+    def build_query():
+        return supabase.table(table).select("trade_date,id")\
+            .gte("trade_date", start_date)\
+            .lte("trade_date", end_date)
+
+    counts: Dict[str, int] = {}
+    for page in iter_pages(build_query, keys):
+        for row in page:
+            counts[row["trade_date"]] = counts.get(row["trade_date"], 0) + 1
+    return counts
+
+
+def fetch_date_counts(table: str, start_date: str, end_date: str) -> Dict[str, int]:
+    """
+    表在 [start_date, end_date] 内每个交易日的行数
+
+    Returns:
+        {trade_date: 行数}，没有数据的日期不出现
+    """
+    try:
+        response = get_supabase().rpc(
+            "trade_date_counts",
+            {"p_table": table, "p_start": start_date, "p_end": end_date},
+        ).execute()
+        return {row["trade_date"]: int(row["row_count"]) for row in response.data or []}
+    except Exception as e:
+        logger.debug(f"trade_date_counts RPC 不可用，改为分页计数 {table}: {e}")
+        return _count_by_pages(table, start_date, end_date)
+
+
+def find_gaps(
+    start_date: str,
+    end_date: str,
+    steps: Optional[Iterable[str]] = None,
+    trade_dates: Optional[List[str]] = None,
+) -> List[Gap]:
+    """
+    区间内缺失 / 不完整的（采集步骤, 交易日）单元
+
+    Args:
+        start_date: 开始日期
+        end_date: 结束日期
+        steps: 检查的步骤，默认 EXPECTATIONS 全部
+        trade_dates: 应有数据的交易日，默认按交易日历
+
+    Returns:
+        按步骤、日期排序的缺口列表
+
+    Raises:
+        ValueError: 未知步骤
+    """
+    if trade_dates is None:
+        trade_dates = get_trading_dates(start_date, end_date)
+    if not trade_dates:
+        return []
+
+    gaps: List[Gap] = []
+    for step in steps or EXPECTATIONS:
+        expectation = EXPECTATIONS.get(step)
+        if expectation is None:
+            raise ValueError(f"未知的采集步骤: {step}")
+        counts = fetch_date_counts(expectation.table, trade_dates[0], trade_dates[-1])
+        for trade_date in trade_dates:
+            count = counts.get(trade_date, 0)
+            if count < expectation.min_rows:
+                gaps.append(Gap(step, expectation.table, trade_date, count, expectation.min_rows))
+    return gaps
+
+
+def log_gaps(gaps: List[Gap], trade_dates: int, steps: Iterable[str]):
+    """按步骤汇总打印缺口"""
+    steps = list(steps)
+    by_step: Dict[str, List[Gap]] = {step: [] for step in steps}
+    for gap in gaps:
+        by_step.setdefault(gap.step, []).append(gap)
+    for step, step_gaps in by_step.items():
+        if not step_gaps:
+            logger.info(f"  {step}: {trade_dates}/{trade_dates} 天完整 ✅")
+            continue
+        missing = sum(1 for gap in step_gaps if gap.status == "missing")
+        logger.warning(
+            f"  {step}: 缺失 {missing} 天，不完整 {len(step_gaps) - missing} 天 ❌ "
+            f"({', '.join(gap.trade_date for gap in step_gaps[:5])}{' ...' if len(step_gaps) > 5 else ''})"
+        )
@@ -0,0 +1,663 @@
+"""
+首页看板 / 市场概览聚合服务
+
+把首页（指数、市场情绪、市场统计、涨停统计、情绪阶段、热门概念）和市场页（三大指数历史 K 线、
+情绪历史）需要的数据合并到一次请求:
+- 共享的行只查一次（market_sentiment 当日 + 前两日一条查询，三大指数一条查询）
+- 各模块的查询通过 asyncio.to_thread 并发执行
+- 支持按模块选择（sections）和按字段裁剪（fields），客户端只取需要渲染的部分
+
+数据组装函数与单项接口（routers/market.py、routers/limit_stocks.py）共用，保证返回结构一致。
+"""
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from app.schemas.concepts import HotConceptItem
+from app.schemas.limit_stocks import LimitStatsItem
+from app.schemas.market import (
+    MarketIndexItem,
+    MarketSentimentItem,
+    MarketStatsItem,
+    SentimentScoreDetail,
+)
+from app.services.emotion_stage import EmotionStageService, dashboard_from_row
+from app.utils.result_cache import cached
+from app.utils.serialization import project_rows
+from app.utils.supabase_client import get_supabase
+from app.utils.trading_calendar import get_trading_calendar
+from app.utils.trading_date import get_latest_trading_date
+from app.utils.window_loader import DayWindow, load_window
+
+
+DASHBOARD_SECTIONS = ("index", "sentiment", "stats", "limit_stats", "emotion", "hot_concepts")
+OVERVIEW_SECTIONS = ("index_history", "sentiment_history")
+
+DEFAULT_INDEX_CODES = ("SH000001", "SZ399001", "SZ399006")
+
+SENTIMENT_HISTORY_COLUMNS = "trade_date,total_amount,up_count,down_count,limit_up_count,limit_down_count"
+
+
+# ============================================
+# 数据组装（与单项接口共用）
+# ============================================
+
+def calculate_sentiment_score(data: dict) -> SentimentScoreDetail:
+    """
+    计算市场情绪评分
+
+    评分维度（5项，每项 -1/0/+1，总分范围 -5 ~ +5）：
+    1. 上涨占比: >50% +1, 30%-50% 0, <30% -1
+    2. 成交额变化: >+10% +1, ±10% 0, <-10% -1
+    3. 涨停数（绝对数量）: >=100只 +1, 50-99只 0, <50只 -1
+    4. 跌停数（绝对数量）: <=5只 +1, 6-15只 0, >15只 -1
+    5. 炸板率: <20% +1, 20%-30% 0, >30% -1
+
+    情绪等级映射：
+    +4~+5: 极度亢奋 (深红)
+    +2~+3: 情绪偏热 (橙色)
+    +1: 情绪偏暖 (黄色)
+    0: 情绪中性 (灰色)
+    -1: 情绪偏冷 (黄色)
+    -2~-3: 情绪偏弱 (蓝色)
+    -4~-5: 极度冰点 (绿色)
+    """
+    scores = {}
+
+    # 1. 上涨占比得分
+    up_count = data.get('up_count', 0)
+    down_count = data.get('down_count', 0)
+    total = up_count + down_count
+    up_ratio = (up_count / total * 100) if total > 0 else 0
+
+    if up_ratio > 50:
+        scores['up_ratio_score'] = 1
+    elif up_ratio < 30:
+        scores['up_ratio_score'] = -1
+    else:
+        scores['up_ratio_score'] = 0
+
+    # 2. 成交额变化得分
+    amount_change_pct = data.get('total_amount_change_pct')
+    if amount_change_pct is not None:
+        if amount_change_pct > 10:
+            scores['amount_change_score'] = 1
+        elif amount_change_pct < -10:
+            scores['amount_change_score'] = -1
+        else:
+            scores['amount_change_score'] = 0
+    else:
+        scores['amount_change_score'] = 0
+
+    # 3. 涨停数得分（基于绝对数量，参考市场通用标准）
+    # 标准来源：主板涨停<50只为弱势，>100只为强势
+    limit_up = data.get('limit_up_count', 0)
+    if limit_up >= 100:
+        scores['limit_up_score'] = 1      # 强势：做多热情高涨
+    elif limit_up >= 50:
+        scores['limit_up_score'] = 0      # 中性：正常水平
+    else:
+        scores['limit_up_score'] = -1     # 弱势：市场情绪不佳
+
+    # 4. 跌停数得分（基于绝对数量，参考市场通用标准）
+    # 标准来源：跌停<=5只为情绪高涨，>15只为恐慌
+    limit_down = data.get('limit_down_count', 0)
+    if limit_down <= 5:
+        scores['limit_down_score'] = 1    # 情绪好：恐慌低
+    elif limit_down <= 15:
+        scores['limit_down_score'] = 0    # 中性：正常水平
+    else:
+        scores['limit_down_score'] = -1   # 情绪差：恐慌蔓延
+
+    # 5. 炸板率得分
+    explosion_rate = data.get('explosion_rate', 0)
+    if explosion_rate < 20:
+        scores['explosion_rate_score'] = 1
+    elif explosion_rate > 30:
+        scores['explosion_rate_score'] = -1
+    else:
+        scores['explosion_rate_score'] = 0
+
+    # 计算总分
+    total_score = sum(scores.values())
+    scores['total_score'] = total_score
+
+    # 确定情绪等级和颜色
+    if total_score >= 4:
+        scores['sentiment_level'] = '极度亢奋'
+        scores['sentiment_color'] = 'deep_red'
+    elif total_score >= 2:
+        scores['sentiment_level'] = '情绪偏热'
+        scores['sentiment_color'] = 'orange'
+    elif total_score == 1:
+        scores['sentiment_level'] = '情绪偏暖'
+        scores['sentiment_color'] = 'yellow'
+    elif total_score == 0:
+        scores['sentiment_level'] = '情绪中性'
+        scores['sentiment_color'] = 'gray'
+    elif total_score == -1:
+        scores['sentiment_level'] = '情绪偏冷'
+        scores['sentiment_color'] = 'yellow'
+    elif total_score >= -3:
+        scores['sentiment_level'] = '情绪偏弱'
+        scores['sentiment_color'] = 'blue'
+    else:
+        scores['sentiment_level'] = '极度冰点'
+        scores['sentiment_color'] = 'green'
+
+    return SentimentScoreDetail(**scores)
+
+
+def _parse_distribution(value: Any) -> Any:
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def build_index_items(today_rows: List[dict], prev_rows: List[dict]) -> List[MarketIndexItem]:
+    """
+    组装大盘指数（含成交额环比）
+
+    Args:
+        today_rows: 当日各指数行
+        prev_rows: 前一交易日各指数行（index_code, amount）
+    """
+    # 构建前一日成交额映射
+    prev_amount_map = {}
+    for item in prev_rows:
+        if item['index_code'] not in prev_amount_map:
+            prev_amount_map[item['index_code']] = item['amount']
+
+    indexes = []
+    for item in today_rows:
+        item = dict(item)
+        current_amount = item.get('amount')
+        prev_amount = prev_amount_map.get(item['index_code'])
+
+        if current_amount and prev_amount and prev_amount > 0:
+            item['amount_change_pct'] = round((current_amount - prev_amount) / prev_amount * 100, 2)
+        else:
+            item['amount_change_pct'] = None
+
+        indexes.append(MarketIndexItem.model_validate(item))
+    return indexes
+
+
+def build_sentiment_item(data: dict, prev_rows: List[dict]) -> MarketSentimentItem:
+    """
+    组装市场情绪（含环比、前两日连板分布、情绪评分）
+
+    Args:
+        data: 当日 market_sentiment 行
+        prev_rows: 前两个交易日的行（按日期倒序）
+    """
+    data = dict(data)
+    data['continuous_limit_distribution'] = _parse_distribution(data.get('continuous_limit_distribution'))
+
+    empty_prev = {
+        'total_amount_change': None,
+        'total_amount_change_pct': None,
+        'prev_up_count': None,
+        'prev_down_count': None,
+        'prev_limit_up_count': None,
+        'prev_limit_down_count': None,
+        'prev_explosion_rate': None,
+        'prev_continuous_limit_distribution': None,
+        'prev2_continuous_limit_distribution': None,
+    }
+
+    try:
+        if prev_rows:
+            # 前1个交易日数据
+            prev_data = prev_rows[0]
+            prev_total_amount = prev_data['total_amount']
+            current_total_amount = data['total_amount']
+
+            # 计算环比变化
+            total_amount_change = current_total_amount - prev_total_amount
+            total_amount_change_pct = (total_amount_change / prev_total_amount * 100) if prev_total_amount > 0 else 0
+
+            data['total_amount_change'] = round(total_amount_change, 2)
+            data['total_amount_change_pct'] = round(total_amount_change_pct, 2)
+            data['prev_up_count'] = prev_data.get('up_count')
+            data['prev_down_count'] = prev_data.get('down_count')
+            data['prev_limit_up_count'] = prev_data.get('limit_up_count')
+            data['prev_limit_down_count'] = prev_data.get('limit_down_count')
+            data['prev_explosion_rate'] = prev_data.get('explosion_rate')
+            data['prev_continuous_limit_distribution'] = _parse_distribution(
+                prev_data.get('continuous_limit_distribution')
+            )
+
+            # 前2个交易日数据（如果存在）
+            if len(prev_rows) > 1:
+                data['prev2_continuous_limit_distribution'] = _parse_distribution(
+                    prev_rows[1].get('continuous_limit_distribution')
+                )
+            else:
+                data['prev2_continuous_limit_distribution'] = None
+        else:
+            data.update(empty_prev)
+    except Exception:
+        data.update(empty_prev)
+
+    # 计算情绪评分
+    data['sentiment_score'] = calculate_sentiment_score(data)
+    return MarketSentimentItem(**data)
+
+
+def build_market_stats(data: dict) -> MarketStatsItem:
+    """组装市场统计（含市场状态评估）"""
+    up_down_ratio = data['up_down_ratio']
+    limit_up_count = data['limit_up_count']
+
+    if up_down_ratio >= 1.5 and limit_up_count >= 50:
+        market_status = "强势"
+    elif up_down_ratio >= 0.8 and limit_up_count >= 20:
+        market_status = "震荡"
+    else:
+        market_status = "弱势"
+
+    return MarketStatsItem(
+        trade_date=data['trade_date'],
+        total_amount_yi=round(data['total_amount'] / 1e8, 2),
+        up_count=data['up_count'],
+        down_count=data['down_count'],
+        limit_up_count=data['limit_up_count'],
+        limit_down_count=data['limit_down_count'],
+        up_down_ratio=data['up_down_ratio'],
+        market_status=market_status
+    )
+
+
+def build_limit_stats(trade_date: str, data: dict, strong_limit_count: int) -> LimitStatsItem:
+    """组装涨停统计"""
+    return LimitStatsItem(
+        trade_date=trade_date,
+        limit_up_count=data['limit_up_count'],
+        limit_down_count=data['limit_down_count'],
+        continuous_distribution=_parse_distribution(data.get('continuous_limit_distribution')),
+        strong_limit_count=strong_limit_count,
+        exploded_count=data.get('exploded_count', 0),
+        explosion_rate=data['explosion_rate']
+    )
+
+
+def build_index_history(rows: List[dict]) -> dict:
+    """
+    组装指数历史 K 线（按日期升序）和最新一日的走势分析
+
+    Args:
+        rows: 同一指数的历史行（任意顺序，非空）
+    """
+    # 按日期升序排列（K线图需要从旧到新）
+    data = sorted(rows, key=lambda x: x['trade_date'])
+
+    # 从最新一条记录获取走势分析（已在采集时计算好）
+    latest = data[-1]
+
+    # 生成走势描述
+    trend = latest.get("trend")
+    change_5d = latest.get("change_5d") or 0
+    ma5_pos = latest.get("ma5_position")
+
+    if trend == "上涨":
+        description = f"多头排列，价格站上均线，近5日涨{change_5d:.2f}%"
+    elif trend == "下跌":
+        description = f"空头排列，价格跌破均线，近5日跌{abs(change_5d):.2f}%"
+    else:
+        if abs(change_5d) < 2:
+            description = f"横盘整理，近5日涨跌幅{change_5d:.2f}%，波动较小"
+        elif ma5_pos == "above":
+            description = "短期偏强，价格站上MA5，区间震荡"
+        elif ma5_pos == "below":
+            description = "短期偏弱，价格跌破MA5，区间震荡"
+        else:
+            description = "区间震荡，等待方向选择"
+
+    return {
+        "success": True,
+        "data": data,
+        "total": len(data),
+        "trend_analysis": {
+            "trend": trend,
+            "ma5_position": ma5_pos,
+            "ma10_position": latest.get("ma10_position"),
+            "ma20_position": latest.get("ma20_position"),
+            "change_5d": change_5d,
+            "current_price": latest.get("close_price"),
+            "description": description,
+        },
+    }
+
+
+# ============================================
+# 模块选择与字段裁剪
+# ============================================
+
+def parse_sections(value: Optional[str], available: Iterable[str]) -> tuple:
+    """
+    解析 sections 参数（逗号分隔），为空返回全部模块
+
+    Raises:
+        ValueError: 包含未知模块
+    """
+    available = tuple(available)
+    if not value:
+        return available
+    requested = [s.strip() for s in value.split(",") if s.strip()]
+    unknown = [s for s in requested if s not in available]
+    if unknown:
+        raise ValueError(f"未知模块: {', '.join(unknown)}，可选: {', '.join(available)}")
+    return tuple(s for s in available if s in requested)
+
+
+def parse_fields(value: Optional[str]) -> Dict[str, List[str]]:
+    """
+    解析 fields 参数: "hot_concepts.concept_name,hot_concepts.change_pct,index.close"
+
+    Returns:
+        {模块: [字段, ...]}
+    """
+    fields: Dict[str, List[str]] = {}
+    if not value:
+        return fields
+    for item in value.split(","):
+        section, _, field_name = item.strip().partition(".")
+        if section and field_name:
+            fields.setdefault(section, []).append(field_name)
+    return fields
+
+
+def _project(value: Any, keep: List[str]) -> Any:
+    """
+    按字段裁剪: 列表逐项裁剪，字典保留指定键；
+    字典不含任何指定键时向下一层裁剪（{"data": [...]} 的 data、按指数代码分组的各项）
+    """
+    if isinstance(value, list):
+        return [_project(v, keep) for v in value]
+    if isinstance(value, dict):
+        if any(k in value for k in keep):
+            return {k: v for k, v in value.items() if k in keep}
+        if isinstance(value.get("data"), list):
+            return {**value, "data": _project(value["data"], keep)}
+        if value and all(isinstance(v, dict) or v is None for v in value.values()):
+            return {k: _project(v, keep) for k, v in value.items()}
+        return {}
+    return value
+
+
+def apply_fields(sections: Dict[str, Any], fields: Dict[str, List[str]]) -> Dict[str, Any]:
+    """对各模块应用字段裁剪（未指定字段的模块原样返回）"""
+    if not fields:
+        return sections
+    return {name: _project(value, fields[name]) if name in fields else value for name, value in sections.items()}
+
+
+def is_complete(result: dict) -> bool:
+    """聚合结果是否完整（有模块失败时不缓存，下次请求重新查询）"""
+    return not result.get("errors")
+
+
+def _dump(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, list):
+        return [_dump(v) for v in value]
+    return value
+
+
+# ============================================
+# 聚合服务
+# ============================================
+
+class DashboardService:
+    """首页看板 / 市场概览聚合服务"""
+
+    def __init__(self):
+        self.supabase = get_supabase()
+
+    # ---------- 共享查询 ----------
+
+    def _fetch_sentiment_window(self, trade_date: str) -> DayWindow:
+        """当日 + 前两个交易日的 market_sentiment（一次查询）"""
+        return load_window("market_sentiment", trade_date, days=3)
+
+    def _fetch_index_window(self, trade_date: str) -> DayWindow:
+        """当日 + 前一交易日的指数行（一次查询）"""
+        return load_window("market_index", trade_date, days=2, key_column="index_code", group_size=len(DEFAULT_INDEX_CODES))
+
+    def _fetch_strong_limit_count(self, trade_date: str) -> int:
+        response = self.supabase.table("limit_stocks_detail").select("id", count="exact")\
+            .eq("trade_date", trade_date)\
+            .eq("limit_type", "limit_up")\
+            .eq("is_strong_limit", True)\
+            .limit(1)\
+            .execute()
+        return response.count if response.count is not None else 0
+
+    def _fetch_hot_concepts(self, trade_date: str, top_n: int) -> List[dict]:
+        response = self.supabase.table("hot_concepts").select("*")\
+            .eq("trade_date", trade_date)\
+            .order("change_pct", desc=True, nullsfirst=True)\
+            .limit(top_n)\
+            .execute()
+        return response.data or []
+
+    @staticmethod
+    async def _gather(tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        """并发执行同步查询，返回 {名称: 结果或异常}"""
+        names = list(tasks)
+        results = await asyncio.gather(
+            *(asyncio.to_thread(tasks[name]) for name in names), return_exceptions=True
+        )
+        return dict(zip(names, results))
+
+    # ---------- 首页看板 ----------
+
+    @cached("dashboard.home", cacheable=is_complete)
+    async def get_dashboard(
+        self,
+        trade_date: Optional[str] = None,
+        sections: tuple = DASHBOARD_SECTIONS,
+        top_n: int = 10,
+    ) -> dict:
+        """
+        首页看板数据
+
+        Args:
+            trade_date: 交易日期，默认最新交易日
+            sections: 需要的模块
+            top_n: 热门概念数量
+
+        Returns:
+            {"trade_date", "sections": {模块: 数据或 None}, "errors": {模块: 错误信息}}
+        """
+        if not trade_date:
+            trade_date = get_latest_trading_date()
+
+        wanted = set(sections)
+        tasks: Dict[str, Callable[[], Any]] = {}
+        if wanted & {"sentiment", "stats", "limit_stats"}:
+            tasks["sentiment_window"] = lambda: self._fetch_sentiment_window(trade_date)
+        if "index" in wanted:
+            tasks["index_window"] = lambda: self._fetch_index_window(trade_date)
+        if "limit_stats" in wanted:
+            tasks["strong_limit_count"] = lambda: self._fetch_strong_limit_count(trade_date)
+        if "emotion" in wanted:
+            tasks["emotion_row"] = lambda: EmotionStageService().get_or_compute(trade_date)
+        if "hot_concepts" in wanted:
+            tasks["hot_concepts"] = lambda: self._fetch_hot_concepts(trade_date, top_n)
+
+        fetched = await self._gather(tasks)
+
+        result: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+
+        def build(name: str, func: Callable[[], Any]) -> None:
+            try:
+                result[name] = _dump(func())
+            except Exception as e:
+                result[name] = None
+                errors[name] = str(e)
+
+        def require(key: str) -> Any:
+            value = fetched.get(key)
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        def today_sentiment() -> dict:
+            row = require("sentiment_window").row_on(trade_date)
+            if row is None:
+                raise LookupError(f"未找到 {trade_date} 的市场情绪数据")
+            return row
+
+        if "index" in wanted:
+            def index_section():
+                window = require("index_window")
+                today = window.rows_on(trade_date)
+                if not today:
+                    raise LookupError(f"未找到 {trade_date} 的大盘指数数据")
+                prev_date = window.previous_date(trade_date)
+                return build_index_items(today, window.rows_on(prev_date) if prev_date else [])
+            build("index", index_section)
+
+        if "sentiment" in wanted:
+            build("sentiment", lambda: build_sentiment_item(
+                today_sentiment(), require("sentiment_window").before(trade_date, 2)
+            ))
+
+        if "stats" in wanted:
+            build("stats", lambda: build_market_stats(today_sentiment()))
+
+        if "limit_stats" in wanted:
+            build("limit_stats", lambda: build_limit_stats(
+                trade_date, today_sentiment(), require("strong_limit_count")
+            ))
+
+        if "emotion" in wanted:
+            def emotion_section():
+                row = require("emotion_row")
+                if row is None:
+                    raise LookupError(f"未找到 {trade_date} 的市场情绪数据，无法计算情绪阶段")
+                return dashboard_from_row(row)
+            build("emotion", emotion_section)
+
+        if "hot_concepts" in wanted:
+            def hot_concepts_section():
+                rows = require("hot_concepts")
+                if not rows:
+                    raise LookupError(f"未找到 {trade_date} 的热门概念数据")
+                return project_rows(HotConceptItem, rows)
+            build("hot_concepts", hot_concepts_section)
+
+        if errors:
+            logger.warning(f"首页看板部分模块失败 {trade_date}: {errors}")
+
+        return {
+            "success": True,
+            "trade_date": trade_date,
+            "sections": result,
+            "errors": errors,
+        }
+
+    # ---------- 市场概览 ----------
+
+    @cached("dashboard.market_overview", date_arg="end_date", cacheable=is_complete)
+    async def get_market_overview(
+        self,
+        end_date: Optional[str] = None,
+        sections: tuple = OVERVIEW_SECTIONS,
+        index_codes: tuple = DEFAULT_INDEX_CODES,
+        index_days: int = 20,
+        sentiment_days: int = 60,
+    ) -> dict:
+        """
+        市场页数据（三大指数历史 K 线 + 情绪历史）
+
+        Args:
+            end_date: 截止交易日，默认最新交易日
+            sections: 需要的模块
+            index_codes: 指数代码
+            index_days: 指数 K 线天数
+            sentiment_days: 情绪历史天数
+
+        Returns:
+            {"end_date", "sections": {"index_history": {代码: ...}, "sentiment_history": ...}, "errors"}
+        """
+        if not end_date:
+            end_date = get_latest_trading_date()
+
+        calendar = get_trading_calendar()
+        tasks: Dict[str, Callable[[], Any]] = {}
+
+        if "index_history" in sections:
+            # 多取几天余量，缺数据的交易日不影响条数
+            window = calendar.get_recent_trading_days(end_date, index_days + 5)
+            start = window[0] if window else end_date
+
+            def fetch_index():
+                return self.supabase.table("market_index").select("*")\
+                    .in_("index_code", list(index_codes))\
+                    .gte("trade_date", start)\
+                    .lte("trade_date", end_date)\
+                    .order("trade_date", desc=True)\
+                    .execute().data or []
+
+            tasks["index_history"] = fetch_index
+
+        if "sentiment_history" in sections:
+            window = calendar.get_recent_trading_days(end_date, sentiment_days + 5)
+            start = window[0] if window else end_date
+
+            def fetch_sentiment():
+                return self.supabase.table("market_sentiment").select(SENTIMENT_HISTORY_COLUMNS)\
+                    .gte("trade_date", start)\
+                    .lte("trade_date", end_date)\
+                    .order("trade_date", desc=True)\
+                    .limit(sentiment_days)\
+                    .execute().data or []
+
+            tasks["sentiment_history"] = fetch_sentiment
+
+        fetched = await self._gather(tasks)
+        result: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+
+        if "index_history" in sections:
+            rows = fetched["index_history"]
+            if isinstance(rows, Exception):
+                result["index_history"] = None
+                errors["index_history"] = str(rows)
+            else:
+                by_code: Dict[str, List[dict]] = {code: [] for code in index_codes}
+                for row in rows:
+                    bucket = by_code.get(row["index_code"])
+                    if bucket is not None and len(bucket) < index_days:
+                        bucket.append(row)
+                result["index_history"] = {
+                    code: build_index_history(code_rows) if code_rows else None
+                    for code, code_rows in by_code.items()
+                }
+                missing = [code for code, code_rows in by_code.items() if not code_rows]
+                if missing:
+                    errors["index_history"] = f"未找到指数 {', '.join(missing)} 的数据"
+
+        if "sentiment_history" in sections:
+            rows = fetched["sentiment_history"]
+            if isinstance(rows, Exception) or not rows:
+                result["sentiment_history"] = None
+                errors["sentiment_history"] = str(rows) if isinstance(rows, Exception) else "未找到市场情绪历史数据"
+            else:
+                data = sorted(rows, key=lambda x: x['trade_date'])
+                result["sentiment_history"] = {"success": True, "data": data, "total": len(data)}
+
+        return {
+            "success": True,
+            "end_date": end_date,
+            "sections": result,
+            "errors": errors,
+        }
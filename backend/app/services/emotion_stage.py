@@ -0,0 +1,596 @@
+"""
+情绪阶段状态机
+
+情绪阶段（v2.3 多因子梯度打分 + 退潮判断 + 惯性区间）依赖前几日的状态:
+- 昨日原始阶段（惯性区间）
+- 最近 3 日空间板高度（退潮前置条件）
+- 昨日连板分布（晋级率）
+
+这里把判断逻辑拆成纯函数 + 按日期顺序推进的状态机（EmotionStageMachine），
+每日收盘后由调度器计算一次写入 emotion_stage_daily，接口只读一行。
+阈值调整后用 EmotionStageService.rebuild() 顺序重放全部历史，一次读取、一次批量写入。
+
+Example:
+    service = EmotionStageService()
+    service.compute("2026-10-16")          # 计算并保存单日
+    service.rebuild()                      # 重放全部历史
+    row = service.get_row("2026-10-16")    # 读取
+    dashboard = dashboard_from_row(row)
+"""
+
+import json
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from app.services.premium_summary import (
+    PREMIUM_COLUMNS,
+    PremiumSummaryService,
+    calculate_premium_stats,
+    group_by_date,
+    stats_from_row,
+)
+from app.utils.bulk_writer import BulkWriter
+from app.utils.keyset import KeysetField, iter_pages
+from app.utils.result_cache import invalidate_trade_dates
+from app.utils.supabase_client import get_supabase
+from app.utils.trading_date import get_latest_trading_date
+from app.utils.window_loader import load_window
+
+# 判断逻辑版本（阈值调整后递增，并执行 rebuild）
+STAGE_VERSION = "v2.3"
+
+STAGE_COLORS = {
+    "冰点期": "blue",
+    "回暖期": "yellow",
+    "加速期": "orange",
+    "高潮期": "red",
+    "退潮期": "green",
+}
+
+# 相邻阶段之间的总分边界（惯性区间用）
+STAGE_BOUNDARIES = {
+    ("冰点期", "回暖期"): -6,
+    ("回暖期", "冰点期"): -6,
+    ("回暖期", "加速期"): 0,
+    ("加速期", "回暖期"): 0,
+    ("加速期", "高潮期"): 6,
+    ("高潮期", "加速期"): 6,
+}
+
+# 退潮判断回看的交易日数
+RECENT_DAYS = 3
+
+SENTIMENT_COLUMNS = "trade_date,limit_up_count,limit_down_count,explosion_rate,continuous_limit_distribution"
+
+
+# ============================================
+# 纯函数
+# ============================================
+
+def parse_distribution(raw: Any) -> Dict[str, int]:
+    """连板分布（JSON 字符串或字典）-> {"连板数": 数量}"""
+    if not raw:
+        return {}
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    return raw or {}
+
+
+def max_height(distribution: Dict[str, int]) -> int:
+    """空间板高度（最高连板数）"""
+    return max(int(k) for k in distribution.keys()) if distribution else 0
+
+
+def calculate_promotion_rate(today: dict, yesterday: dict) -> List[dict]:
+    """计算分层晋级率"""
+    result = []
+    for n in range(1, 10):
+        yesterday_count = yesterday.get(str(n), 0)
+        today_count = today.get(str(n + 1), 0)
+
+        if yesterday_count > 0:
+            rate = round(today_count / yesterday_count * 100, 1)
+            result.append({
+                "from_days": n,
+                "to_days": n + 1,
+                "yesterday_count": yesterday_count,
+                "today_count": today_count,
+                "rate": rate
+            })
+
+    return result
+
+
+def recent_stage_label(space_height: int) -> str:
+    """
+    退潮前置条件用的简化阶段：空间>=7 视为高潮、>=5 视为加速
+    """
+    if space_height >= 7:
+        return "高潮期"
+    if space_height >= 5:
+        return "加速期"
+    return "其他"
+
+
+def score_factors(
+    space_height: int,
+    explosion_rate: float,
+    avg_promotion_rate: float,
+    limit_up_count: int,
+    limit_down_count: int,
+    premium_stats: Dict,
+) -> Dict[str, int]:
+    """
+    各因子梯度打分（-2 到 +2）
+
+    | 因子 | -2 | -1 | 0 | +1 | +2 |
+    |------|----|----|---|----|----|
+    | 空间板 | ≤2 | 3-4 | - | 5-6 | ≥7 |
+    | 涨停数 | <10 | 10-29 | 30-69 | 70-89 | ≥90 |
+    | 跌停数 | ≥50 | 30-49 | 10-29 | 0-9 | - |
+    | 炸板率 | >50 | 35-50 | 25-35 | 15-25 | <15 |
+    | 溢价率 | <-3 | -3~-1 | -1~+1 | +1~+3 | >+3 |
+    | 大面率 | >40 | 30-40 | 20-30 | 10-20 | <10 |
+    | 高位大面 | >50 | 30-50 | 15-30 | <15 | - |
+    | 晋级率 | <15 | 15-25 | 25-50 | 50-60 | >60 |
+    """
+    avg_premium = premium_stats.get("avg_premium")
+    big_loss_rate = premium_stats.get("big_loss_rate", 0)
+    high_board_big_loss_rate = premium_stats.get("high_board_big_loss_rate", 0)
+
+    factor_scores = {}
+
+    if space_height <= 2:
+        factor_scores["空间板高度"] = -2
+    elif space_height <= 4:
+        factor_scores["空间板高度"] = -1
+    elif space_height <= 6:
+        factor_scores["空间板高度"] = 1
+    else:
+        factor_scores["空间板高度"] = 2
+
+    if limit_up_count < 10:
+        factor_scores["涨停数"] = -2
+    elif limit_up_count < 30:
+        factor_scores["涨停数"] = -1
+    elif limit_up_count < 70:
+        factor_scores["涨停数"] = 0
+    elif limit_up_count < 90:
+        factor_scores["涨停数"] = 1
+    else:
+        factor_scores["涨停数"] = 2
+
+    # v2.2: 跌停数=0也只给+1，避免高估无跌停的情况
+    if limit_down_count >= 50:
+        factor_scores["跌停数"] = -2
+    elif limit_down_count >= 30:
+        factor_scores["跌停数"] = -1
+    elif limit_down_count >= 10:
+        factor_scores["跌停数"] = 0
+    else:
+        factor_scores["跌停数"] = 1
+
+    if explosion_rate > 50:
+        factor_scores["炸板率"] = -2
+    elif explosion_rate > 35:
+        factor_scores["炸板率"] = -1
+    elif explosion_rate > 25:
+        factor_scores["炸板率"] = 0
+    elif explosion_rate > 15:
+        factor_scores["炸板率"] = 1
+    else:
+        factor_scores["炸板率"] = 2
+
+    if avg_premium is None:
+        factor_scores["溢价率"] = 0
+    elif avg_premium < -3:
+        factor_scores["溢价率"] = -2
+    elif avg_premium < -1:
+        factor_scores["溢价率"] = -1
+    elif avg_premium < 1:
+        factor_scores["溢价率"] = 0
+    elif avg_premium < 3:
+        factor_scores["溢价率"] = 1
+    else:
+        factor_scores["溢价率"] = 2
+
+    if big_loss_rate > 40:
+        factor_scores["大面率"] = -2
+    elif big_loss_rate > 30:
+        factor_scores["大面率"] = -1
+    elif big_loss_rate > 20:
+        factor_scores["大面率"] = 0
+    elif big_loss_rate > 10:
+        factor_scores["大面率"] = 1
+    else:
+        factor_scores["大面率"] = 2
+
+    if high_board_big_loss_rate > 50:
+        factor_scores["高位大面率"] = -2
+    elif high_board_big_loss_rate > 30:
+        factor_scores["高位大面率"] = -1
+    elif high_board_big_loss_rate > 15:
+        factor_scores["高位大面率"] = 0
+    else:
+        factor_scores["高位大面率"] = 1
+
+    # v2.2: 细化低区间，更好区分冰点期
+    if avg_promotion_rate < 15:
+        factor_scores["晋级率"] = -2
+    elif avg_promotion_rate < 25:
+        factor_scores["晋级率"] = -1
+    elif avg_promotion_rate < 50:
+        factor_scores["晋级率"] = 0
+    elif avg_promotion_rate < 60:
+        factor_scores["晋级率"] = 1
+    else:
+        factor_scores["晋级率"] = 2
+
+    return factor_scores
+
+
+def map_score(total_score: int) -> str:
+    """总分映射阶段（不含退潮判断和惯性）"""
+    if total_score <= -6:
+        return "冰点期"
+    if total_score <= 0:
+        return "回暖期"
+    if total_score <= 6:
+        return "加速期"
+    return "高潮期"
+
+
+def determine_emotion_stage(
+    space_height: int,
+    explosion_rate: float,
+    promotion_details: List[dict],
+    limit_up_count: int = 0,
+    limit_down_count: int = 0,
+    premium_stats: Dict = None,
+    recent_stages: List[str] = None,
+    previous_stage: str = None
+) -> Tuple[str, str, dict]:
+    """
+    v2.3 多因子梯度打分 + 总分映射阶段 + 惯性区间
+
+    1. 每个因子独立打分（-2 到 +2），等权求和得到总分
+    2. 总分映射阶段: S ≤ -6 冰点期 / ≤ 0 回暖期 / ≤ 6 加速期 / > 6 高潮期
+    3. 退潮期: 最近 3 日有加速/高潮 + 恶化信号 + 总分 < 0
+    4. 惯性区间: 与昨日阶段相邻、总分在边界 ±1 内时沿用昨日阶段
+
+    Returns:
+        (阶段, 颜色, 判断详情)
+    """
+    premium_stats = premium_stats or {}
+    recent_stages = recent_stages or []
+
+    avg_premium = premium_stats.get("avg_premium")
+    big_loss_rate = premium_stats.get("big_loss_rate", 0)
+
+    avg_promotion_rate = 0
+    if promotion_details:
+        avg_promotion_rate = sum(p["rate"] for p in promotion_details) / len(promotion_details)
+
+    factor_scores = score_factors(
+        space_height, explosion_rate, avg_promotion_rate,
+        limit_up_count, limit_down_count, premium_stats,
+    )
+    total_score = sum(factor_scores.values())
+
+    # 退潮期：最近3天内有加速或高潮，且大面率>25%、溢价<0、空间板还没跌到冰点
+    had_recent_peak = any(s in ["加速期", "高潮期"] for s in recent_stages)
+    is_deteriorating = (
+        big_loss_rate > 25 and
+        (avg_premium is not None and avg_premium < 0) and
+        space_height >= 4
+    )
+
+    if had_recent_peak and is_deteriorating and total_score < 0:
+        stage_raw = "退潮期"
+    else:
+        stage_raw = map_score(total_score)
+
+    # 惯性区间：只检查相邻阶段之间的边界，退潮期视为回暖期
+    stage = stage_raw
+    used_inertia = False
+
+    if previous_stage and previous_stage != stage_raw:
+        previous_for_check = "回暖期" if previous_stage == "退潮期" else previous_stage
+        raw_for_check = "回暖期" if stage_raw == "退潮期" else stage_raw
+        boundary = STAGE_BOUNDARIES.get((previous_for_check, raw_for_check))
+
+        if boundary is not None and abs(total_score - boundary) <= 1:
+            stage = previous_stage
+            used_inertia = True
+
+    return (stage, STAGE_COLORS[stage], {
+        "factor_scores": factor_scores,
+        "total_score": total_score,
+        "had_recent_peak": had_recent_peak,
+        "is_deteriorating": is_deteriorating,
+        "stage_raw": stage_raw,
+        "used_inertia": used_inertia,
+        "previous_stage": previous_stage
+    })
+
+
+# ============================================
+# 状态机
+# ============================================
+
+class EmotionStageMachine:
+    """
+    按交易日顺序推进的情绪阶段状态机
+
+    每步只用上一步保留的状态（昨日行、昨日原始阶段、最近 3 日空间板），
+    不再为每个交易日回查前几日的数据。
+    """
+
+    def __init__(self):
+        self.prev_row: Optional[dict] = None
+        self.prev_distribution: Dict[str, int] = {}
+        self.prev_space_height = 0
+        self.prev_raw_stage: Optional[str] = None
+        self.recent_heights: deque = deque(maxlen=RECENT_DAYS)
+
+    def step(self, row: dict, premium_stats: Optional[Dict] = None) -> dict:
+        """
+        推进一个交易日
+
+        Args:
+            row: 当日 market_sentiment 行
+            premium_stats: 当日昨日涨停表现统计（calculate_premium_stats）
+
+        Returns:
+            emotion_stage_daily 行
+        """
+        premium_stats = premium_stats or {}
+        distribution = parse_distribution(row.get("continuous_limit_distribution"))
+        space_height = max_height(distribution)
+        explosion_rate = row.get("explosion_rate") or 0
+        limit_up_count = row.get("limit_up_count") or 0
+        limit_down_count = row.get("limit_down_count") or 0
+
+        promotion_details = calculate_promotion_rate(distribution, self.prev_distribution)
+        overall_promotion_rate = None
+        if promotion_details:
+            total_yesterday = sum(p["yesterday_count"] for p in promotion_details)
+            total_today = sum(p["today_count"] for p in promotion_details)
+            if total_yesterday > 0:
+                overall_promotion_rate = round(total_today / total_yesterday * 100, 1)
+
+        stage, color, details = determine_emotion_stage(
+            space_height=space_height,
+            explosion_rate=explosion_rate,
+            promotion_details=promotion_details,
+            limit_up_count=limit_up_count,
+            limit_down_count=limit_down_count,
+            premium_stats=premium_stats,
+            recent_stages=[recent_stage_label(h) for h in self.recent_heights],
+            previous_stage=self.prev_raw_stage,
+        )
+
+        prev = self.prev_row
+        result = {
+            "trade_date": row["trade_date"],
+            "emotion_stage": stage,
+            "emotion_stage_color": color,
+            "stage_raw": details["stage_raw"],
+            "total_score": details["total_score"],
+            "factor_scores": details["factor_scores"],
+            "had_recent_peak": details["had_recent_peak"],
+            "is_deteriorating": details["is_deteriorating"],
+            "used_inertia": details["used_inertia"],
+            "previous_stage": details["previous_stage"],
+            "space_height": space_height,
+            "space_height_change": space_height - self.prev_space_height if prev and self.prev_space_height > 0 else None,
+            "limit_up_count": limit_up_count,
+            "limit_up_change": limit_up_count - (prev.get("limit_up_count") or 0) if prev else None,
+            "explosion_rate": explosion_rate,
+            "explosion_rate_change": round(explosion_rate - (prev.get("explosion_rate") or 0), 1) if prev else None,
+            "overall_promotion_rate": overall_promotion_rate,
+            "promotion_details": promotion_details,
+            "premium_stats": premium_stats or None,
+            "stage_version": STAGE_VERSION,
+        }
+
+        # 昨日阶段取原始总分映射（不含退潮和惯性），与逐日计算时的口径一致
+        self.prev_raw_stage = map_score(details["total_score"])
+        self.prev_row = row
+        self.prev_distribution = distribution
+        self.prev_space_height = space_height
+        self.recent_heights.appendleft(space_height)
+        return result
+
+
+def replay(
+    sentiment_rows: Iterable[dict],
+    premium_stats_by_date: Dict[str, Dict],
+) -> Iterator[dict]:
+    """
+    按日期升序重放状态机
+
+    Args:
+        sentiment_rows: market_sentiment 行（按 trade_date 升序）
+        premium_stats_by_date: {trade_date: 昨日涨停表现统计}
+
+    Yields:
+        emotion_stage_daily 行
+    """
+    machine = EmotionStageMachine()
+    for row in sentiment_rows:
+        yield machine.step(row, premium_stats_by_date.get(row["trade_date"]))
+
+
+def dashboard_from_row(row: dict) -> dict:
+    """emotion_stage_daily 行 -> 情绪周期仪表盘（EmotionDashboard 结构）"""
+    premium_stats = row.get("premium_stats")
+    return {
+        "space_height": row.get("space_height") or 0,
+        "space_height_change": row.get("space_height_change"),
+        "limit_up_count": row.get("limit_up_count") or 0,
+        "limit_up_change": row.get("limit_up_change"),
+        "explosion_rate": row.get("explosion_rate") or 0,
+        "explosion_rate_change": row.get("explosion_rate_change"),
+        "overall_promotion_rate": row.get("overall_promotion_rate"),
+        "promotion_details": row.get("promotion_details") or [],
+        "emotion_stage": row["emotion_stage"],
+        "emotion_stage_color": row["emotion_stage_color"],
+        "premium_stats": {
+            "avg_premium": premium_stats.get("avg_premium"),
+            "avg_open_premium": premium_stats.get("avg_open_premium"),
+            "first_board_premium": premium_stats.get("first_board_premium"),
+            "high_board_premium": premium_stats.get("high_board_premium"),
+            "big_loss_rate": premium_stats.get("big_loss_rate"),
+            "high_board_big_loss_rate": premium_stats.get("high_board_big_loss_rate")
+        } if premium_stats else None,
+        "stage_details": {
+            "factor_scores": row.get("factor_scores"),
+            "total_score": row.get("total_score"),
+            "had_recent_peak": row.get("had_recent_peak"),
+            "is_deteriorating": row.get("is_deteriorating"),
+            "stage_raw": row.get("stage_raw"),
+            "used_inertia": row.get("used_inertia"),
+            "previous_stage": row.get("previous_stage")
+        },
+    }
+
+
+# ============================================
+# 持久化
+# ============================================
+
+class EmotionStageService:
+    """情绪阶段计算、保存与读取"""
+
+    TABLE = "emotion_stage_daily"
+
+    def __init__(self):
+        self.supabase = get_supabase()
+
+    def get_row(self, trade_date: str) -> Optional[dict]:
+        """
+        读取已保存的单日情绪阶段
+
+        由旧版本状态机计算的行（stage_version 不是 STAGE_VERSION）视为未命中，返回 None，
+        调用方按缺失处理现场重算
+        """
+        response = self.supabase.table(self.TABLE).select("*")\
+            .eq("trade_date", trade_date)\
+            .limit(1)\
+            .execute()
+        if not response.data:
+            return None
+        row = response.data[0]
+        if row.get("stage_version") != STAGE_VERSION:
+            logger.info(
+                f"{trade_date} 的情绪阶段由 {row.get('stage_version')} 计算，当前 {STAGE_VERSION}，重新计算"
+            )
+            return None
+        return row
+
+    def get_or_compute(self, trade_date: str) -> Optional[dict]:
+        """已保存的当前版本情绪阶段，缺失时现场推进状态机（不写入）"""
+        row = self.get_row(trade_date)
+        if row is None:
+            row = self.compute(trade_date, save=False)
+        return row
+
+    def _premium_stats_by_date(self, dates: List[str]) -> Dict[str, Dict]:
+        """优先读取溢价日汇总，缺失的日期再从明细计算"""
+        summaries = PremiumSummaryService().get_rows(dates)
+        stats = {d: stats_from_row(row) for d, row in summaries.items()}
+
+        missing = [d for d in dates if d not in summaries]
+        if missing:
+            response = self.supabase.table("yesterday_limit_performance")\
+                .select(PREMIUM_COLUMNS)\
+                .in_("trade_date", missing)\
+                .execute()
+            grouped: Dict[str, List[dict]] = defaultdict(list)
+            for record in response.data or []:
+                grouped[record["trade_date"]].append(record)
+            stats.update({d: calculate_premium_stats(records) for d, records in grouped.items()})
+        return stats
+
+    def compute(self, trade_date: Optional[str] = None, save: bool = True) -> Optional[dict]:
+        """
+        计算单日情绪阶段（当日 + 前 RECENT_DAYS 日共 4 行推进状态机）
+
+        Args:
+            trade_date: 交易日期，默认最新交易日
+            save: 是否写入 emotion_stage_daily
+
+        Returns:
+            emotion_stage_daily 行，当日无市场情绪数据时返回 None
+        """
+        if not trade_date:
+            trade_date = get_latest_trading_date()
+
+        window = load_window("market_sentiment", trade_date, days=RECENT_DAYS + 1, columns=SENTIMENT_COLUMNS)
+        if window.row_on(trade_date) is None:
+            logger.warning(f"未找到 {trade_date} 的市场情绪数据，跳过情绪阶段计算")
+            return None
+
+        rows = window.rows
+        premium = self._premium_stats_by_date([r["trade_date"] for r in rows])
+        result = list(replay(rows, premium))[-1]
+
+        logger.info(
+            f"情绪阶段 {trade_date}: 因子得分={result['factor_scores']}, 总分={result['total_score']}, "
+            f"原始阶段={result['stage_raw']}, 昨日阶段={result['previous_stage']}, "
+            f"惯性生效={result['used_inertia']}, 最终阶段={result['emotion_stage']}"
+        )
+
+        if save:
+            BulkWriter(self.TABLE, on_conflict="trade_date").write([result])
+            invalidate_trade_dates([trade_date])
+        return result
+
+    def _all_premium_stats(self) -> Dict[str, Dict]:
+        """逐页读取昨日涨停表现明细，按日期流式汇总（不在内存中保留全部明细）"""
+        pages = iter_pages(
+            lambda: self.supabase.table("yesterday_limit_performance").select(PREMIUM_COLUMNS),
+            [KeysetField("trade_date"), KeysetField("stock_code")],
+        )
+        return {trade_date: calculate_premium_stats(records) for trade_date, records in group_by_date(pages)}
+
+    def rebuild(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> int:
+        """
+        从 market_sentiment 全部历史重放状态机并批量写入
+
+        状态依赖前几日，因此总是从最早的数据开始重放，只写入 [start_date, end_date] 区间。
+
+        Returns:
+            写入行数
+        """
+        started = time.perf_counter()
+        sentiment_rows = [
+            row
+            for page in iter_pages(
+                lambda: self.supabase.table("market_sentiment").select(SENTIMENT_COLUMNS),
+                [KeysetField("trade_date")],
+            )
+            for row in page
+            if not end_date or row["trade_date"] <= end_date
+        ]
+        premium = self._all_premium_stats()
+
+        results = [
+            row for row in replay(sentiment_rows, premium)
+            if not start_date or row["trade_date"] >= start_date
+        ]
+        if not results:
+            logger.warning("没有可重算的情绪阶段")
+            return 0
+
+        written = BulkWriter(self.TABLE, on_conflict="trade_date").write(results).written
+        invalidate_trade_dates([row["trade_date"] for row in results])
+        logger.info(
+            f"✅ 情绪阶段重算完成 ({STAGE_VERSION}): {results[0]['trade_date']} ~ {results[-1]['trade_date']}，"
+            f"{written}/{len(results)} 天，耗时 {time.perf_counter() - started:.1f}s"
+        )
+        return written
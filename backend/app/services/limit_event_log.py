@@ -0,0 +1,317 @@
+"""
+盘中封板事件日志
+
+盘中监控（limit_live_monitor）产生的封板 / 炸板 / 回封事件按天追加写入定长二进制文件，
+收盘后压缩成每只股票一行的封板时间线写入 limit_intraday_timeline 表，
+通过 (trade_date, stock_code, limit_type) 与 limit_stocks_detail 对应。
+
+记录格式（17 字节，小端）:
+    uint32  当日秒数（09:31:05 -> 34265）
+    uint8   事件类型
+    6s      股票代码
+    uint8   炸板次数
+    uint8   连板数
+    float32 封板资金（万元）
+
+一天几千条事件只有几十 KB，struct.iter_unpack 读取、重放在毫秒级完成，不保存原始快照。
+
+环境变量:
+    LIMIT_EVENT_LOG_DIR        日志目录（默认 backend/.cache/limit_events）
+    LIMIT_EVENT_LOG_KEEP_DAYS  压缩后原始日志保留天数（默认 30）
+"""
+
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.utils.bulk_writer import BulkWriter
+from app.utils.result_cache import invalidate_trade_date
+
+DEFAULT_LOG_DIR = Path(__file__).resolve().parents[2] / ".cache" / "limit_events"
+
+RECORD = struct.Struct("<IB6sBBf")
+
+EVENT_TYPES = {
+    "seal": 1,
+    "break": 2,
+    "reseal": 3,
+    "board_change": 4,
+    "seal_change": 5,
+    "limit_down": 6,
+    "limit_down_open": 7,
+}
+EVENT_NAMES = {code: name for name, code in EVENT_TYPES.items()}
+
+LIMIT_DOWN_EVENTS = {"limit_down", "limit_down_open"}
+SEAL_EVENTS = {"seal", "reseal", "limit_down"}
+OPEN_EVENTS = {"break", "limit_down_open"}
+
+# 收盘、午间休市（秒）
+CLOSE_SECONDS = 15 * 3600
+LUNCH = (11 * 3600 + 30 * 60, 13 * 3600)
+
+
+def time_to_seconds(value: Optional[str]) -> int:
+    """'09:31:05' -> 34265"""
+    if not value:
+        return 0
+    parts = [int(p) for p in str(value).split(":")]
+    while len(parts) < 3:
+        parts.append(0)
+    return parts[0] * 3600 + parts[1] * 60 + parts[2]
+
+
+def seconds_to_time(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _trading_seconds(start: int, end: int) -> int:
+    """[start, end) 内的交易时长（扣除午间休市）"""
+    if end <= start:
+        return 0
+    lunch = max(0, min(end, LUNCH[1]) - max(start, LUNCH[0]))
+    return end - start - lunch
+
+
+class LimitEventLog:
+    """按天追加的二进制事件日志"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory or os.getenv("LIMIT_EVENT_LOG_DIR") or DEFAULT_LOG_DIR)
+        self._lock = threading.Lock()
+
+    def path(self, trade_date: str) -> Path:
+        return self.directory / f"{trade_date}.bin"
+
+    def exists(self, trade_date: str) -> bool:
+        return self.path(trade_date).exists()
+
+    # ---------- 写入 ----------
+
+    @staticmethod
+    def encode(event: dict) -> bytes:
+        data = event.get("data") or {}
+        # 封板类事件优先使用交易所的最后封板时间，其余使用轮询时间
+        when = data.get("last_limit_time") if event["type"] in SEAL_EVENTS else None
+        sealed = data.get("sealed_amount") or 0
+        return RECORD.pack(
+            time_to_seconds(when or event.get("time")),
+            EVENT_TYPES[event["type"]],
+            str(event["code"]).encode("ascii")[:6].ljust(6, b"0"),
+            min(int(data.get("opening_times") or 0), 255),
+            min(int(data.get("continuous_days") or 0), 255),
+            float(sealed) / 1e4,
+        )
+
+    def append(self, trade_date: str, events: Iterable[dict]) -> int:
+        """
+        追加事件（可直接注册为 LimitLiveMonitor 的监听）
+
+        Returns:
+            写入的事件数
+        """
+        payload = b"".join(self.encode(e) for e in events if e.get("type") in EVENT_TYPES)
+        if not payload:
+            return 0
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.path(trade_date), "ab") as f:
+                f.write(payload)
+        return len(payload) // RECORD.size
+
+    # ---------- 读取 ----------
+
+    def read(self, trade_date: str, stock_code: Optional[str] = None) -> List[tuple]:
+        """
+        读取当日事件
+
+        Returns:
+            [(秒数, 事件类型, 股票代码, 炸板次数, 连板数, 封板资金万元), ...]
+        """
+        path = self.path(trade_date)
+        if not path.exists():
+            return []
+        raw = path.read_bytes()
+        raw = raw[: len(raw) - len(raw) % RECORD.size]  # 忽略写入中断的残缺记录
+        records = []
+        for seconds, event_type, code, opening_times, continuous_days, sealed in RECORD.iter_unpack(raw):
+            code = code.decode("ascii")
+            if stock_code and code != stock_code:
+                continue
+            records.append((seconds, event_type, code, opening_times, continuous_days, sealed))
+        return records
+
+    def live_state(self, trade_date: str) -> Tuple[Dict[str, dict], Dict[str, dict], Set[str]]:
+        """
+        重放当日事件，还原盘中监控的状态（API 重启后作为比对基准，避免重复产生封板事件）
+
+        Returns:
+            (涨停池, 跌停池, 炸板过的股票)，池中只有日志里记录的字段
+        """
+        up: Dict[str, dict] = {}
+        down: Dict[str, dict] = {}
+        broken: Set[str] = set()
+        for seconds, event_type, code, opening_times, continuous_days, sealed in sorted(
+            self.read(trade_date), key=lambda r: r[0]
+        ):
+            name = EVENT_NAMES.get(event_type)
+            if name in ("seal", "reseal"):
+                item = up.get(code) or {}
+                up[code] = {
+                    "opening_times": opening_times or item.get("opening_times") or 0,
+                    "continuous_days": continuous_days or item.get("continuous_days"),
+                    "sealed_amount": sealed * 1e4 if sealed else item.get("sealed_amount"),
+                    "last_limit_time": seconds_to_time(seconds),
+                }
+                broken.discard(code)
+            elif name == "break":
+                up.pop(code, None)
+                broken.add(code)
+            elif name == "board_change" and code in up:
+                up[code]["continuous_days"] = continuous_days
+            elif name == "seal_change" and code in up:
+                up[code]["sealed_amount"] = sealed * 1e4
+            elif name == "limit_down":
+                down[code] = {"continuous_days": continuous_days, "sealed_amount": sealed * 1e4,
+                              "last_limit_time": seconds_to_time(seconds)}
+            elif name == "limit_down_open":
+                down.pop(code, None)
+        return up, down, broken
+
+    def timelines(self, trade_date: str, stock_code: Optional[str] = None) -> List[dict]:
+        """读取并按股票汇总为时间线（格式与 limit_intraday_timeline 表一致）"""
+        return build_timelines(trade_date, self.read(trade_date, stock_code))
+
+    # ---------- 压缩 ----------
+
+    def compact(self, trade_date: str) -> int:
+        """
+        收盘后把当日事件压缩为每只股票一行写入 limit_intraday_timeline
+
+        Returns:
+            写入的行数
+        """
+        started = time.perf_counter()
+        rows = self.timelines(trade_date)
+        if not rows:
+            logger.info(f"📭 {trade_date} 无盘中封板事件日志，跳过压缩")
+            return 0
+
+        result = BulkWriter(
+            "limit_intraday_timeline", on_conflict="trade_date,stock_code,limit_type"
+        ).write(rows)
+        invalidate_trade_date(trade_date)
+        logger.info(
+            f"🗜️ {trade_date} 封板事件压缩完成: {result.written} 只股票，"
+            f"耗时 {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+        self.prune()
+        return result.written
+
+    def prune(self, keep_days: Optional[int] = None) -> int:
+        """删除超过保留天数的原始日志"""
+        keep_days = keep_days if keep_days is not None else int(os.getenv("LIMIT_EVENT_LOG_KEEP_DAYS", "30"))
+        if not self.directory.exists():
+            return 0
+        cutoff = (datetime.now() - timedelta(days=keep_days)).strftime("%Y-%m-%d")
+        removed = 0
+        for path in self.directory.glob("*.bin"):
+            if path.stem < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+def build_timelines(trade_date: str, records: List[tuple]) -> List[dict]:
+    """
+    事件记录 -> 每只股票一行的时间线
+
+    events 列为 [[秒数, 事件类型], ...]（类型见 EVENT_TYPES），另外汇总:
+    首次/最后封板时间、炸板/回封次数、封板总时长（秒，扣除午休）、收盘状态
+    """
+    grouped: Dict[tuple, List[tuple]] = defaultdict(list)
+    # 每只股票当前封板事件的时间（未封板为 None），用于识别重复的封板记录
+    sealed_at: Dict[tuple, Optional[int]] = {}
+    for record in sorted(records, key=lambda r: r[0]):
+        name = EVENT_NAMES.get(record[1])
+        if name is None:
+            continue
+        limit_type = "limit_down" if name in LIMIT_DOWN_EVENTS else "limit_up"
+        key = (record[2], limit_type)
+        if name in SEAL_EVENTS:
+            if sealed_at.get(key) == record[0]:
+                # 已封板且最后封板时间不变：监控重启后对同一次封板重复记录，不算炸板
+                continue
+            sealed_at[key] = record[0]
+        elif name in OPEN_EVENTS:
+            sealed_at[key] = None
+        grouped[key].append(record)
+
+    rows = []
+    for (code, limit_type), items in grouped.items():
+        sealed_since: Optional[int] = None
+        sealed_seconds = 0
+        first_seal = last_seal = None
+        breaks = reseals = 0
+        max_sealed = 0.0
+
+        for seconds, event_type, _, _, _, sealed in items:
+            name = EVENT_NAMES[event_type]
+            if name in SEAL_EVENTS:
+                first_seal = first_seal if first_seal is not None else seconds
+                last_seal = seconds
+                if name == "reseal":
+                    reseals += 1
+                if sealed_since is None:
+                    sealed_since = seconds
+                else:
+                    # 两次轮询之间炸板又回封
+                    breaks += 1
+            elif name in OPEN_EVENTS:
+                breaks += 1
+                if sealed_since is not None:
+                    sealed_seconds += _trading_seconds(sealed_since, seconds)
+                    sealed_since = None
+            max_sealed = max(max_sealed, sealed or 0.0)
+
+        if sealed_since is not None:
+            sealed_seconds += _trading_seconds(sealed_since, max(CLOSE_SECONDS, sealed_since))
+
+        rows.append({
+            "trade_date": trade_date,
+            "stock_code": code,
+            "limit_type": limit_type,
+            "events": [[r[0], r[1]] for r in items],
+            "event_count": len(items),
+            "first_seal_time": seconds_to_time(first_seal) if first_seal is not None else None,
+            "last_seal_time": seconds_to_time(last_seal) if last_seal is not None else None,
+            "break_count": breaks,
+            "reseal_count": reseals,
+            "sealed_seconds": sealed_seconds,
+            "max_sealed_amount": round(max_sealed * 1e4, 2),
+            "final_sealed": sealed_since is not None,
+        })
+    return rows
+
+
+_event_log: Optional[LimitEventLog] = None
+
+
+def get_limit_event_log() -> LimitEventLog:
+    """获取全局事件日志实例"""
+    global _event_log
+    if _event_log is None:
+        _event_log = LimitEventLog()
+    return _event_log
+
+
+def compact_limit_events(trade_date: str) -> int:
+    """便捷函数：压缩指定交易日的事件日志"""
+    return get_limit_event_log().compact(trade_date)
@@ -0,0 +1,428 @@
+"""
+盘中涨停池实时监控
+
+交易时段内每 N 秒轮询 AKShare 涨停池 / 跌停池，与上一份快照在内存中比对，只推送变化:
+- seal: 首次封板
+- break: 炸板（从涨停池消失）
+- reseal: 回封（炸板后重新进入涨停池，或两次轮询之间炸板次数增加）
+- board_change: 连板数变化
+- seal_change: 封板资金变化超过阈值
+- limit_down / limit_down_open: 跌停 / 跌停打开
+
+订阅方（SSE 接口、事件日志）只收到增量事件，前端涨停池页面不必重复查询 Supabase。
+
+事件 ID 为 "<交易日>-<进程纪元>-<序号>"（如 20261016-19a8c2f1e3d-42），用于 SSE Last-Event-ID
+和 /live/changes?since= 断线续传。进程重启或换日后纪元变化，旧 ID 一律返回完整快照，
+避免序号从 0 重新计数后客户端误以为没有新事件。
+
+运行在 API 进程内（事件直接推给该进程的 SSE 连接），LIMIT_LIVE_ENABLED=true 时由 main.py 启动；
+多 worker 部署时每个 worker 各自轮询，建议只在单 worker 实例上开启。
+
+环境变量:
+    LIMIT_LIVE_ENABLED           是否启用（默认 false）
+    LIMIT_LIVE_INTERVAL          轮询间隔（秒，默认 10）
+    LIMIT_LIVE_SEAL_CHANGE_PCT   封板资金变化推送阈值（%，默认 20）
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from datetime import datetime, time as dtime
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from loguru import logger
+
+from app.utils.data_source import akshare_api as ak
+from app.utils.metrics import metrics_registry
+from app.utils.trading_calendar import get_trading_calendar
+
+TZ = ZoneInfo("Asia/Shanghai")
+
+# 交易时段（含集合竞价）
+SESSIONS = ((dtime(9, 15), dtime(11, 30, 30)), (dtime(13, 0), dtime(15, 0, 30)))
+
+# 快照中每只股票保留的字段
+UP_COLUMNS = {
+    "代码": "code",
+    "名称": "name",
+    "涨跌幅": "change_pct",
+    "封板资金": "sealed_amount",
+    "首次封板时间": "first_limit_time",
+    "最后封板时间": "last_limit_time",
+    "炸板次数": "opening_times",
+    "连板数": "continuous_days",
+}
+DOWN_COLUMNS = {
+    "代码": "code",
+    "名称": "name",
+    "涨跌幅": "change_pct",
+    "封单资金": "sealed_amount",
+    "最后封板时间": "last_limit_time",
+    "连续跌停": "continuous_days",
+}
+
+Pool = Dict[str, dict]
+EventListener = Callable[[str, List[dict]], None]
+StateLoader = Callable[[str], Tuple[Pool, Pool, Set[str]]]
+
+
+def _format_time(value) -> Optional[str]:
+    """AKShare 封板时间 '092500' -> '09:25:00'"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text or text.lower() == "nan":
+        return None
+    if ":" in text:
+        return text
+    text = text.zfill(6)
+    return f"{text[0:2]}:{text[2:4]}:{text[4:6]}"
+
+
+def _clean(value):
+    """pandas 空值 / numpy 标量转为 JSON 友好的值"""
+    if value is None:
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def parse_pool(df, columns: Dict[str, str]) -> Pool:
+    """AKShare 股池 DataFrame -> {代码: 字段}"""
+    pool: Pool = {}
+    if df is None or df.empty:
+        return pool
+    present = {src: dst for src, dst in columns.items() if src in df.columns}
+    for record in df[list(present)].rename(columns=present).to_dict("records"):
+        item = {key: _clean(value) for key, value in record.items()}
+        code = str(item.pop("code")).zfill(6)
+        for key in ("first_limit_time", "last_limit_time"):
+            if key in item:
+                item[key] = _format_time(item[key])
+        pool[code] = item
+    return pool
+
+
+def fetch_pools(date_str: str) -> Tuple[Pool, Pool]:
+    """
+    拉取当日涨停池和跌停池（同步，在线程中调用；计入 akshare 限流预算，支持录制 / 回放）
+
+    Args:
+        date_str: YYYYMMDD
+    """
+    up = parse_pool(ak.stock_zt_pool_em(date=date_str), UP_COLUMNS)
+    try:
+        down = parse_pool(ak.stock_zt_pool_dtgc_em(date=date_str), DOWN_COLUMNS)
+    except Exception as e:
+        logger.warning(f"⚠️ 跌停池获取失败，本轮仅比对涨停池: {e}")
+        down = None
+    return up, down
+
+
+def diff_pools(
+    prev_up: Pool,
+    curr_up: Pool,
+    prev_down: Pool,
+    curr_down: Pool,
+    broken: Set[str],
+    seal_change_pct: float = 20.0,
+) -> List[dict]:
+    """
+    比对两份快照，生成增量事件
+
+    Args:
+        prev_up / curr_up: 上一份 / 当前涨停池
+        prev_down / curr_down: 上一份 / 当前跌停池
+        broken: 当日炸板过的股票（会被更新）
+        seal_change_pct: 封板资金变化推送阈值（%）
+
+    Returns:
+        事件列表 {"type", "code", "name", "data"}
+    """
+    events: List[dict] = []
+
+    def emit(event_type: str, code: str, item: dict, data: Optional[dict] = None):
+        events.append({"type": event_type, "code": code, "name": item.get("name"), "data": data or {}})
+
+    for code, item in curr_up.items():
+        prev = prev_up.get(code)
+        if prev is None:
+            if code in broken:
+                broken.discard(code)
+                emit("reseal", code, item, item)
+            else:
+                emit("seal", code, item, item)
+            continue
+
+        if (item.get("opening_times") or 0) > (prev.get("opening_times") or 0):
+            # 两次轮询之间炸板又回封
+            emit("reseal", code, item, {
+                "opening_times": item.get("opening_times"),
+                "last_limit_time": item.get("last_limit_time"),
+            })
+        if item.get("continuous_days") != prev.get("continuous_days"):
+            emit("board_change", code, item, {"continuous_days": item.get("continuous_days")})
+
+        old_fund, new_fund = prev.get("sealed_amount") or 0, item.get("sealed_amount") or 0
+        if old_fund and abs(new_fund - old_fund) / old_fund * 100 >= seal_change_pct:
+            emit("seal_change", code, item, {"sealed_amount": new_fund})
+
+    for code, item in prev_up.items():
+        if code not in curr_up:
+            broken.add(code)
+            emit("break", code, item, {"opening_times": (item.get("opening_times") or 0) + 1})
+
+    for code, item in curr_down.items():
+        if code not in prev_down:
+            emit("limit_down", code, item, item)
+    for code, item in prev_down.items():
+        if code not in curr_down:
+            emit("limit_down_open", code, item)
+
+    return events
+
+
+def in_trading_session(now: Optional[datetime] = None) -> bool:
+    """当前是否处于交易时段"""
+    now = now or datetime.now(TZ)
+    if now.weekday() >= 5:
+        return False
+    date_str = now.strftime("%Y-%m-%d")
+    calendar = get_trading_calendar()
+    if calendar.covers(date_str) and not calendar.is_trading_day(date_str):
+        return False
+    current = now.time()
+    return any(start <= current <= end for start, end in SESSIONS)
+
+
+class LimitLiveMonitor:
+    """盘中涨停池轮询 + 增量推送"""
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        fetcher: Callable[[str], Tuple[Pool, Optional[Pool]]] = fetch_pools,
+        history: int = 5000,
+    ):
+        self.interval = interval if interval is not None else float(os.getenv("LIMIT_LIVE_INTERVAL", "10"))
+        self.seal_change_pct = float(os.getenv("LIMIT_LIVE_SEAL_CHANGE_PCT", "20"))
+        self.fetcher = fetcher
+        self.trade_date: Optional[str] = None
+        self.up: Pool = {}
+        self.down: Pool = {}
+        self.broken: Set[str] = set()
+        self.seq = 0
+        self.updated_at: Optional[str] = None
+        # 进程纪元（毫秒时间戳），与交易日一起组成事件 ID 前缀
+        self._boot = f"{int(time.time() * 1000):x}"
+        self._recent: Deque[dict] = deque(maxlen=history)
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._listeners: List[EventListener] = []
+        self._state_loader: Optional[StateLoader] = None
+        self._seeded = False
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------- 订阅 ----------
+
+    def subscribe(self, maxsize: int = 100) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def add_listener(self, listener: EventListener) -> None:
+        """注册事件监听（同步调用，参数: 交易日, 本轮事件）"""
+        self._listeners.append(listener)
+
+    def set_state_loader(self, loader: StateLoader) -> None:
+        """
+        注册当日状态恢复（参数: 交易日，返回: 涨停池, 跌停池, 炸板过的股票）
+
+        进程重启后第一份快照与恢复的状态比对，已记录过的封板不会再次产生 seal 事件
+        """
+        self._state_loader = loader
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def epoch(self) -> str:
+        return f"{(self.trade_date or '').replace('-', '')}-{self._boot}"
+
+    def event_id(self, seq: Optional[int] = None) -> str:
+        """事件 ID（默认为当前最新序号）"""
+        return f"{self.epoch}-{self.seq if seq is None else seq}"
+
+    def snapshot(self) -> dict:
+        """当前完整状态（SSE 连接建立时先发送）"""
+        return {
+            "trade_date": self.trade_date,
+            "seq": self.seq,
+            "event_id": self.event_id(),
+            "updated_at": self.updated_at,
+            "limit_up": self.up,
+            "limit_down": self.down,
+            "broken": sorted(self.broken),
+        }
+
+    def events_since(self, event_id: str) -> Optional[List[dict]]:
+        """
+        event_id 之后的事件（断线重连补发）
+
+        Returns:
+            事件列表；ID 无法解析、来自其他进程 / 交易日、序号超前或早于缓存范围时返回 None（需重新获取快照）
+        """
+        epoch, _, seq_text = (event_id or "").rpartition("-")
+        if epoch != self.epoch or not seq_text.isdigit():
+            return None
+        seq = int(seq_text)
+        if seq > self.seq:
+            return None
+        if seq == self.seq:
+            return []
+        if not self._recent or self._recent[0]["seq"] > seq + 1:
+            return None
+        return [event for event in self._recent if event["seq"] > seq]
+
+    def _publish(self, events: List[dict]) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(events)
+            except asyncio.QueueFull:
+                # 消费过慢的连接直接断开（队列中放入 None 通知结束），重连后从快照恢复
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+                logger.warning("⚠️ 实时涨停池订阅方消费过慢，已断开")
+        for listener in self._listeners:
+            try:
+                listener(self.trade_date, events)
+            except Exception as e:
+                logger.error(f"❌ 实时涨停池事件监听失败: {e}")
+
+    # ---------- 轮询 ----------
+
+    def _reset(self, trade_date: str) -> None:
+        self.trade_date = trade_date
+        self.up, self.down, self.broken = {}, {}, set()
+        self._recent.clear()
+        self._seeded = False
+        if self._state_loader is None:
+            return
+        try:
+            self.up, self.down, self.broken = self._state_loader(trade_date)
+        except Exception as e:
+            logger.warning(f"⚠️ {trade_date} 盘中状态恢复失败，按空状态开始比对: {e}")
+            self.up, self.down, self.broken = {}, {}, set()
+            return
+        self._seeded = bool(self.up or self.down or self.broken)
+        if self._seeded:
+            logger.info(
+                f"♻️ {trade_date} 已从事件日志恢复盘中状态: "
+                f"涨停{len(self.up)} 跌停{len(self.down)} 炸板{len(self.broken)}"
+            )
+
+    def apply(self, trade_date: str, up: Pool, down: Optional[Pool], now: Optional[datetime] = None) -> List[dict]:
+        """
+        应用一份新快照，返回并推送增量事件
+
+        Args:
+            down: 跌停池，None 表示本轮获取失败（保持上一份）
+        """
+        if trade_date != self.trade_date:
+            self._reset(trade_date)
+
+        down = self.down if down is None else down
+        if self._seeded:
+            # 恢复的状态只有日志记录的字段：仍在池中的股票用当前数据作基准，
+            # 只保留日志中的炸板次数，重启期间的炸板回封仍会产生 reseal
+            self._seeded = False
+            self.up = {
+                code: {**up[code], "opening_times": item.get("opening_times")} if code in up else item
+                for code, item in self.up.items()
+            }
+            self.down = {code: down.get(code, item) for code, item in self.down.items()}
+        events = diff_pools(self.up, up, self.down, down, self.broken, self.seal_change_pct)
+        self.up, self.down = up, down
+        self.updated_at = (now or datetime.now(TZ)).strftime("%H:%M:%S")
+
+        for event in events:
+            self.seq += 1
+            event["seq"] = self.seq
+            event["time"] = self.updated_at
+            self._recent.append(event)
+            metrics_registry.inc(
+                "limit_live_events_total", labels={"type": event["type"]}, help_text="盘中涨停池增量事件数"
+            )
+
+        if events:
+            self._publish(events)
+        return events
+
+    async def poll_once(self, now: Optional[datetime] = None) -> List[dict]:
+        now = now or datetime.now(TZ)
+        started = time.perf_counter()
+        up, down = await asyncio.to_thread(self.fetcher, now.strftime("%Y%m%d"))
+        events = self.apply(now.strftime("%Y-%m-%d"), up, down, now)
+        logger.debug(
+            f"实时涨停池 涨停{len(up)} 跌停{len(self.down)} 事件{len(events)} "
+            f"耗时{(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+        return events
+
+    async def run(self) -> None:
+        logger.info(f"📡 盘中涨停池监控已启动，轮询间隔 {self.interval}s")
+        while True:
+            try:
+                if in_trading_session():
+                    await self.poll_once()
+                    await asyncio.sleep(self.interval)
+                else:
+                    await asyncio.sleep(max(self.interval, 30))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ 盘中涨停池轮询失败: {e}")
+                await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("📡 盘中涨停池监控已停止")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+
+_monitor: Optional[LimitLiveMonitor] = None
+
+
+def get_limit_live_monitor() -> LimitLiveMonitor:
+    """获取全局监控实例"""
+    global _monitor
+    if _monitor is None:
+        _monitor = LimitLiveMonitor()
+    return _monitor
+
+
+def live_monitor_enabled() -> bool:
+    return os.getenv("LIMIT_LIVE_ENABLED", "false").lower() in ("1", "true", "yes")
@@ -0,0 +1,324 @@
+"""
+昨日涨停溢价日汇总
+
+YesterdayLimitCollector 写入明细时顺带汇总一行写入 yesterday_limit_premium_daily:
+- 当日统计: 整体 / 开盘 / 首板 / 二板 / 高位板溢价、晋级率、大面率、高位大面率、上涨/下跌家数
+- 滚动统计: 上述核心指标最近 5 / 10 / 20 个交易日的均值（按日等权）
+
+情绪分析、情绪阶段和溢价走势图只读汇总表（一次按 trade_date 索引读取），不再每次拉取全部明细重算。
+重采或补采较早的日期时，其后窗口内各日的滚动统计随之重算。
+
+Example:
+    service = PremiumSummaryService()
+    service.save_day("2026-10-16", records)           # 采集器调用
+    row = service.get_row("2026-10-16")
+    rows = service.get_history(end_date="2026-10-16", days=60)
+    service.rebuild()                                 # 从明细重建全部汇总
+"""
+
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from app.utils.bulk_writer import BulkWriter
+from app.utils.keyset import KeysetField, iter_pages
+from app.utils.result_cache import cached, invalidate_trade_dates
+from app.utils.supabase_client import get_supabase
+from app.utils.trading_date import get_latest_trading_date
+
+TABLE = "yesterday_limit_premium_daily"
+
+# 汇总需要的明细列
+PREMIUM_COLUMNS = "trade_date,stock_code,today_change_pct,today_open_pct,yesterday_continuous_days,is_limit_up,is_big_loss"
+
+# calculate_premium_stats 输出的字段
+STAT_KEYS = (
+    "total", "with_data", "avg_premium", "avg_open_premium",
+    "first_board_count", "first_board_premium",
+    "second_board_count", "second_board_premium",
+    "high_board_count", "high_board_premium",
+    "promotion_count", "promotion_rate",
+    "big_loss_count", "big_loss_rate",
+    "high_board_big_loss", "high_board_big_loss_rate",
+)
+
+ROLLING_WINDOWS = (5, 10, 20)
+ROLLING_METRICS = (
+    "avg_premium",
+    "first_board_premium",
+    "high_board_premium",
+    "promotion_rate",
+    "big_loss_rate",
+    "high_board_big_loss_rate",
+)
+ROLLING_COLUMNS = tuple(f"{metric}_{n}d" for metric in ROLLING_METRICS for n in ROLLING_WINDOWS)
+
+
+def calculate_premium_stats(records: List[dict]) -> Dict:
+    """
+    昨日涨停股今日表现统计（yesterday_limit_performance 当日全部行）
+    """
+    if not records:
+        return {}
+
+    total = len(records)
+
+    # 有涨跌幅数据的记录
+    with_change = [r for r in records if r.get("today_change_pct") is not None]
+    if not with_change:
+        return {"total": total, "with_data": 0}
+
+    # 计算整体溢价率
+    changes = [r["today_change_pct"] for r in with_change]
+    avg_premium = round(sum(changes) / len(changes), 2)
+
+    # 计算开盘溢价
+    with_open = [r for r in records if r.get("today_open_pct") is not None]
+    avg_open_premium = round(sum(r["today_open_pct"] for r in with_open) / len(with_open), 2) if with_open else None
+
+    # 分层统计
+    first_board = [r for r in records if r.get("yesterday_continuous_days") == 1]
+    second_board = [r for r in records if r.get("yesterday_continuous_days") == 2]
+    high_board = [r for r in records if (r.get("yesterday_continuous_days") or 0) >= 3]
+
+    def calc_avg(lst):
+        valid = [r["today_change_pct"] for r in lst if r.get("today_change_pct") is not None]
+        return round(sum(valid) / len(valid), 2) if valid else None
+
+    # 晋级数（今日涨停）
+    promotion_count = sum(1 for r in records if r.get("is_limit_up"))
+    promotion_rate = round(promotion_count / total * 100, 1) if total > 0 else 0
+
+    # 大面数（跌>5%）
+    big_loss_count = sum(1 for r in records if r.get("is_big_loss"))
+    big_loss_rate = round(big_loss_count / total * 100, 1) if total > 0 else 0
+
+    # 高位大面（3板+跌>5%）
+    high_board_big_loss = sum(1 for r in high_board if r.get("is_big_loss"))
+    high_board_big_loss_rate = round(high_board_big_loss / len(high_board) * 100, 1) if high_board else 0
+
+    return {
+        "total": total,
+        "with_data": len(with_change),
+        "avg_premium": avg_premium,           # 整体溢价率
+        "avg_open_premium": avg_open_premium, # 开盘溢价率
+        "first_board_count": len(first_board),
+        "first_board_premium": calc_avg(first_board),
+        "second_board_count": len(second_board),
+        "second_board_premium": calc_avg(second_board),
+        "high_board_count": len(high_board),
+        "high_board_premium": calc_avg(high_board),
+        "promotion_count": promotion_count,
+        "promotion_rate": promotion_rate,
+        "big_loss_count": big_loss_count,
+        "big_loss_rate": big_loss_rate,
+        "high_board_big_loss": high_board_big_loss,
+        "high_board_big_loss_rate": high_board_big_loss_rate
+    }
+
+
+def summarize_day(trade_date: str, records: List[dict]) -> dict:
+    """当日明细 -> 汇总行（不含滚动统计）"""
+    stats = calculate_premium_stats(records)
+    row = {key: stats.get(key) for key in STAT_KEYS}
+    row["trade_date"] = trade_date
+    row["up_count"] = sum(1 for r in records if (r.get("today_change_pct") or 0) > 0)
+    row["down_count"] = sum(1 for r in records if (r.get("today_change_pct") or 0) < 0)
+    return row
+
+
+def stats_from_row(row: Optional[dict]) -> Dict:
+    """汇总行 -> calculate_premium_stats 结构（情绪阶段打分用）"""
+    if not row or not row.get("total"):
+        return {}
+    if not row.get("with_data"):
+        return {"total": row["total"], "with_data": 0}
+    return {key: row.get(key) for key in STAT_KEYS}
+
+
+def add_rolling(row: dict, previous: Iterable[dict]) -> dict:
+    """
+    追加滚动均值列 {指标}_{N}d
+
+    Args:
+        row: 当日汇总行
+        previous: 之前的汇总行（按日期倒序，至少 max(ROLLING_WINDOWS) - 1 行）
+    """
+    window = [row] + list(previous)[: max(ROLLING_WINDOWS) - 1]
+    for metric in ROLLING_METRICS:
+        for n in ROLLING_WINDOWS:
+            values = [r[metric] for r in window[:n] if r.get(metric) is not None]
+            row[f"{metric}_{n}d"] = round(sum(values) / len(values), 2) if values else None
+    return row
+
+
+def roll_forward(previous: Iterable[dict], following: Iterable[dict]) -> List[dict]:
+    """
+    按日期顺序重算后续汇总行的滚动均值（某日汇总变化后，其后窗口内各日随之变化）
+
+    Args:
+        previous: 变化日及之前的汇总行（按日期倒序）
+        following: 之后的汇总行（按日期升序）
+
+    Returns:
+        重算后的 following（新字典，不修改入参）
+    """
+    size = max(ROLLING_WINDOWS) - 1
+    window: deque = deque(list(previous)[:size], maxlen=size)
+    updated = []
+    for row in following:
+        row = add_rolling(dict(row), window)
+        window.appendleft(row)
+        updated.append(row)
+    return updated
+
+
+def group_by_date(pages: Iterable[List[dict]]) -> Iterator[Tuple[str, List[dict]]]:
+    """按 trade_date 升序的分页明细 -> (trade_date, 当日明细)"""
+    current_date, current = None, []
+    for page in pages:
+        for record in page:
+            if record["trade_date"] != current_date:
+                if current:
+                    yield current_date, current
+                current_date, current = record["trade_date"], []
+            current.append(record)
+    if current:
+        yield current_date, current
+
+
+class PremiumSummaryService:
+    """昨日涨停溢价日汇总的写入与读取"""
+
+    def __init__(self):
+        self.supabase = get_supabase()
+
+    def _previous_rows(self, trade_date: str) -> List[dict]:
+        """之前的汇总行（倒序，滚动窗口用）"""
+        response = self.supabase.table(TABLE).select("*")\
+            .lt("trade_date", trade_date)\
+            .order("trade_date", desc=True)\
+            .limit(max(ROLLING_WINDOWS) - 1)\
+            .execute()
+        return response.data or []
+
+    def _following_rows(self, trade_date: str) -> List[dict]:
+        """之后滚动窗口内的汇总行（升序，重采较早日期时需要重算）"""
+        response = self.supabase.table(TABLE).select("*")\
+            .gt("trade_date", trade_date)\
+            .order("trade_date")\
+            .limit(max(ROLLING_WINDOWS) - 1)\
+            .execute()
+        return response.data or []
+
+    def save_day(self, trade_date: str, records: List[dict]) -> dict:
+        """
+        汇总当日明细并写入（采集器写入明细后调用）
+
+        该日之后已有汇总（重采 / 补采较早日期）时，重算其后窗口内各日的滚动列。
+
+        Returns:
+            汇总行
+        """
+        previous = self._previous_rows(trade_date)
+        row = add_rolling(summarize_day(trade_date, records), previous)
+        BulkWriter(TABLE, on_conflict="trade_date").write([row])
+
+        following = roll_forward([row] + previous, self._following_rows(trade_date))
+        if following:
+            BulkWriter(TABLE, on_conflict="trade_date").write([
+                {"trade_date": r["trade_date"], **{column: r[column] for column in ROLLING_COLUMNS}}
+                for r in following
+            ])
+            logger.info(f"🔁 {trade_date} 之后 {len(following)} 天的滚动统计已重算")
+        invalidate_trade_dates([trade_date] + [r["trade_date"] for r in following])
+        logger.info(
+            f"📈 {trade_date} 昨日涨停溢价汇总: 溢价 {row['avg_premium']}% "
+            f"(5日 {row['avg_premium_5d']}%)，大面率 {row['big_loss_rate']}%"
+        )
+        return row
+
+    def get_row(self, trade_date: str) -> Optional[dict]:
+        response = self.supabase.table(TABLE).select("*")\
+            .eq("trade_date", trade_date)\
+            .limit(1)\
+            .execute()
+        return response.data[0] if response.data else None
+
+    def get_rows(self, trade_dates: List[str]) -> Dict[str, dict]:
+        response = self.supabase.table(TABLE).select("*")\
+            .in_("trade_date", trade_dates)\
+            .execute()
+        return {row["trade_date"]: row for row in response.data or []}
+
+    @cached("sentiment.premium_history", date_arg="end_date")
+    def get_history(
+        self,
+        end_date: Optional[str] = None,
+        start_date: Optional[str] = None,
+        days: int = 60,
+    ) -> List[dict]:
+        """
+        汇总行历史（按日期升序）
+
+        Args:
+            end_date: 截止日期，默认最新交易日
+            start_date: 开始日期，指定时忽略 days
+            days: 最近 N 个交易日
+        """
+        if not end_date:
+            end_date = get_latest_trading_date()
+
+        keys = [KeysetField("trade_date", desc=True)]
+
+        def build_query():
+            query = self.supabase.table(TABLE).select("*").lte("trade_date", end_date)
+            return query.gte("trade_date", start_date) if start_date else query
+
+        rows: List[dict] = []
+        for page in iter_pages(build_query, keys):
+            rows.extend(page)
+            if not start_date and len(rows) >= days:
+                break
+        if not start_date:
+            rows = rows[:days]
+        rows.reverse()
+        return rows
+
+    def rebuild(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> int:
+        """
+        从 yesterday_limit_performance 明细重建汇总（逐页读取，按日期顺序滚动）
+
+        滚动窗口依赖前几日，因此总是从最早的数据开始汇总，只写入 [start_date, end_date] 区间。
+
+        Returns:
+            写入行数
+        """
+        started = time.perf_counter()
+        keys = [KeysetField("trade_date"), KeysetField("stock_code")]
+
+        def build_query():
+            query = self.supabase.table("yesterday_limit_performance").select(PREMIUM_COLUMNS)
+            return query.lte("trade_date", end_date) if end_date else query
+
+        previous: deque = deque(maxlen=max(ROLLING_WINDOWS) - 1)
+        rows = []
+        for trade_date, records in group_by_date(iter_pages(build_query, keys)):
+            row = add_rolling(summarize_day(trade_date, records), previous)
+            previous.appendleft(row)
+            if not start_date or trade_date >= start_date:
+                rows.append(row)
+
+        if not rows:
+            logger.warning("没有可重建的昨日涨停溢价汇总")
+            return 0
+
+        written = BulkWriter(TABLE, on_conflict="trade_date").write(rows).written
+        invalidate_trade_dates([row["trade_date"] for row in rows])
+        logger.info(
+            f"✅ 昨日涨停溢价汇总重建完成: {rows[0]['trade_date']} ~ {rows[-1]['trade_date']}，"
+            f"{written}/{len(rows)} 天，耗时 {time.perf_counter() - started:.1f}s"
+        )
+        return written
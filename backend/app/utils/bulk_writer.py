@@ -0,0 +1,241 @@
+"""
+批量写入工具
+
+采集器统一的 Supabase 批量 upsert/insert 写入器:
+- 按序列化后的请求体大小切块（同时限制单块行数）
+- 有界并发发送各块（共享连接池，线程安全）
+- 失败的块按错误类型处理，尽量保住好数据:
+    * 瞬时错误（网络 / 超时 / 5xx / 数据库繁忙）: 等待后重试，仍失败时二分拆块
+    * 行级数据错误（PostgreSQL 22xxx 数据异常、23xxx 约束冲突）: 不等待，直接二分定位坏行
+    * 其他错误（序列化 TypeError / ValueError、表结构不符等 4xx）: 整块失败，不重试
+- 输出写入行数与 rows/sec
+
+环境变量:
+    BULK_WRITE_MAX_BYTES  单块请求体上限（默认 512KB）
+    BULK_WRITE_MAX_ROWS   单块行数上限（默认 1000，PostgREST 默认 max-rows）
+    BULK_WRITE_WORKERS    并发块数（默认 4）
+
+Example:
+    writer = BulkWriter("limit_stocks_detail", on_conflict="trade_date,stock_code,limit_type")
+    result = writer.write(records)
+    logger.info(f"写入 {result.written} 条, {result.rows_per_sec:.0f} rows/s")
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import httpx
+from loguru import logger
+from postgrest.exceptions import APIError
+
+from app.utils.supabase_client import get_supabase
+
+# PostgreSQL SQLSTATE 类别: 连接异常 / 事务回滚（死锁、序列化失败）/ 资源不足 / 语句超时等
+TRANSIENT_SQLSTATE_CLASSES = ("08", "40", "53", "57")
+
+# 可定位到单行的数据错误: 数据异常（类型、长度）/ 约束冲突
+ROW_SQLSTATE_CLASSES = ("22", "23")
+
+
+def classify_error(error: Exception) -> str:
+    """
+    写入错误分类
+
+    Returns:
+        "transient" 可重试 / "row" 行级数据错误（拆块定位）/ "fatal" 整块失败
+    """
+    if isinstance(error, httpx.TransportError):
+        return "transient"
+    if isinstance(error, APIError):
+        code = str(error.code or "")
+        if len(code) == 3 and code.isdigit():
+            # 非 JSON 响应（网关错误页等）的 code 是 HTTP 状态码；SQLSTATE 为 5 位
+            return "transient" if int(code) >= 500 else "fatal"
+        if code[:2] in TRANSIENT_SQLSTATE_CLASSES:
+            return "transient"
+        if code[:2] in ROW_SQLSTATE_CLASSES:
+            return "row"
+        return "fatal"
+    if isinstance(error, (TypeError, ValueError)):
+        return "fatal"
+    return "transient"
+
+
+@dataclass
+class BulkWriteResult:
+    """批量写入结果"""
+
+    table: str
+    total: int = 0
+    written: int = 0
+    failed: int = 0
+    chunks: int = 0
+    retried_chunks: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.failed == 0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.written / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class BulkWriter:
+    """Supabase 并行分块批量写入器"""
+
+    def __init__(
+        self,
+        table: str,
+        on_conflict: Optional[str] = None,
+        mode: str = "upsert",
+        max_payload_bytes: Optional[int] = None,
+        max_rows: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        max_retries: int = 2,
+    ):
+        """
+        Args:
+            table: 目标表名
+            on_conflict: upsert 冲突列（逗号分隔），mode="upsert" 时使用
+            mode: "upsert" 或 "insert"
+            max_payload_bytes: 单块请求体上限（字节）
+            max_rows: 单块行数上限
+            max_workers: 并发块数
+            max_retries: 失败块单独重试次数
+        """
+        if mode not in ("upsert", "insert"):
+            raise ValueError(f"不支持的写入模式: {mode}")
+
+        self.table = table
+        self.on_conflict = on_conflict
+        self.mode = mode
+        self.max_payload_bytes = max_payload_bytes or int(os.getenv("BULK_WRITE_MAX_BYTES", 512 * 1024))
+        self.max_rows = max_rows or int(os.getenv("BULK_WRITE_MAX_ROWS", 1000))
+        self.max_workers = max_workers or int(os.getenv("BULK_WRITE_WORKERS", 4))
+        self.max_retries = max_retries
+        self.supabase = get_supabase()
+
+    def chunk(self, records: List[Dict]) -> List[List[Dict]]:
+        """按请求体大小和行数切块"""
+        chunks = []
+        current: List[Dict] = []
+        current_bytes = 2  # "[]"
+
+        for record in records:
+            size = len(json.dumps(record, ensure_ascii=False, default=str).encode("utf-8")) + 1
+            if current and (current_bytes + size > self.max_payload_bytes or len(current) >= self.max_rows):
+                chunks.append(current)
+                current, current_bytes = [], 2
+            current.append(record)
+            current_bytes += size
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _send(self, rows: List[Dict]) -> None:
+        query = self.supabase.table(self.table)
+        if self.mode == "upsert":
+            kwargs = {"on_conflict": self.on_conflict} if self.on_conflict else {}
+            query.upsert(rows, **kwargs).execute()
+        else:
+            query.insert(rows).execute()
+
+    def _try_send(self, rows: List[Dict]) -> Optional[Exception]:
+        try:
+            self._send(rows)
+            return None
+        except Exception as e:
+            return e
+
+    def _send_or_recover(self, rows: List[Dict], result: BulkWriteResult) -> int:
+        error = self._try_send(rows)
+        return len(rows) if error is None else self._recover(rows, error, result)
+
+    def _recover(self, rows: List[Dict], error: Exception, result: BulkWriteResult) -> int:
+        """
+        按错误类型处理失败的块: 瞬时错误等待重试，仍失败或行级数据错误时二分拆块（定位坏行）
+
+        Returns:
+            成功写入的行数
+        """
+        kind = classify_error(error)
+        if kind == "transient":
+            for attempt in range(1, self.max_retries + 1):
+                time.sleep(min(0.5 * attempt, 2.0))
+                error = self._try_send(rows)
+                if error is None:
+                    return len(rows)
+            kind = classify_error(error)
+
+        if kind == "fatal":
+            logger.error(f"❌ {self.table} 写入失败（{len(rows)} 行，不可重试）: {type(error).__name__}: {error}")
+            return 0
+
+        if len(rows) == 1:
+            logger.error(f"❌ {self.table} 写入失败（1 行）: {error}")
+            return 0
+
+        mid = len(rows) // 2
+        result.retried_chunks += 2
+        return self._send_or_recover(rows[:mid], result) + self._send_or_recover(rows[mid:], result)
+
+    def write(self, records: List[Dict]) -> BulkWriteResult:
+        """
+        批量写入
+
+        Args:
+            records: 记录列表
+
+        Returns:
+            BulkWriteResult
+        """
+        result = BulkWriteResult(table=self.table, total=len(records))
+        if not records:
+            return result
+
+        start = time.perf_counter()
+        chunks = self.chunk(records)
+        result.chunks = len(chunks)
+
+        workers = max(1, min(self.max_workers, len(chunks)))
+        if workers == 1:
+            errors = [self._try_send(rows) for rows in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"bulk-{self.table}") as pool:
+                errors = list(pool.map(self._try_send, chunks))
+
+        for rows, error in zip(chunks, errors):
+            if error is None:
+                result.written += len(rows)
+                continue
+            logger.warning(f"⚠️ {self.table} 块写入失败（{len(rows)} 行，{classify_error(error)}）: {error}")
+            result.retried_chunks += 1
+            result.written += self._recover(rows, error, result)
+
+        result.failed = result.total - result.written
+        result.elapsed = time.perf_counter() - start
+
+        log = logger.info if result.success else logger.warning
+        log(
+            f"{'✅' if result.success else '⚠️'} {self.table} 批量写入 {result.written}/{result.total} 行, "
+            f"{result.chunks} 块, {result.elapsed:.2f}s, {result.rows_per_sec:.0f} rows/s"
+            + (f", 失败 {result.failed} 行" if result.failed else "")
+        )
+        return result
+
+
+def bulk_upsert(table: str, records: List[Dict], on_conflict: Optional[str] = None, **kwargs) -> BulkWriteResult:
+    """便捷函数：批量 upsert"""
+    return BulkWriter(table, on_conflict=on_conflict, mode="upsert", **kwargs).write(records)
+
+
+def bulk_insert(table: str, records: List[Dict], **kwargs) -> BulkWriteResult:
+    """便捷函数：批量 insert"""
+    return BulkWriter(table, mode="insert", **kwargs).write(records)
@@ -0,0 +1,258 @@
+"""
+外部数据源（Tushare / AKShare）统一入口
+
+各采集器原先各自 ts.pro_api() 初始化、各自 sleep 控制频率，单进程顺序采集时没问题；
+多线程回补（scripts/backfill.py）时 N 个线程各自 sleep，实际调用频率是单线程的 N 倍，容易触发限流。
+这里提供进程内共享的客户端，每次接口调用先从对应数据源的全局预算（令牌桶）取一个令牌:
+
+    pro = get_tushare_pro()                 # 共享 Tushare Pro 客户端（未配置 token 返回 None）
+    df = pro.daily(trade_date="20261016")   # 调用前自动 acquire tushare 预算
+
+    from app.utils.data_source import akshare_api as ak
+    df = ak.stock_zt_pool_em(date="20261016")  # 调用前自动 acquire akshare 预算
+
+预算按每分钟调用次数配置（TUSHARE_CALLS_PER_MIN / AKSHARE_CALLS_PER_MIN，0 不限）。
+每次调用同时计入当前采集台账步骤（run_ledger.count_api_call，按 "数据源.接口" 统计）。
+
+DATA_SOURCE_MODE=record / replay 时录制或回放接口调用（见 source_fixtures），
+回放时不需要 TUSHARE_TOKEN，也不加载 tushare / akshare。采集器里的限频等待用 pace()，回放时跳过。
+
+在 cancel_scope(event) 内发起的调用，event 被置位后不再请求接口（抛出 CallCancelled），
+多数据源对冲时落败的一方借此尽快停下，不再占用限流预算和线程。
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from app.utils.run_ledger import count_api_call
+from app.utils.source_fixtures import get_fixture_store
+
+_cancel_event: ContextVar[Optional[threading.Event]] = ContextVar("data_source_cancel", default=None)
+
+
+class CallCancelled(Exception):
+    """所在的调用已被取消，不再发起新的接口请求"""
+
+
+@contextmanager
+def cancel_scope(event: threading.Event):
+    """
+    在上下文内（当前线程/协程）发起的接口调用和 pace() 等待前检查 event，已置位则抛出 CallCancelled
+    """
+    token = _cancel_event.set(event)
+    try:
+        yield
+    finally:
+        _cancel_event.reset(token)
+
+
+def raise_if_cancelled():
+    """当前 cancel_scope 已取消时抛出 CallCancelled"""
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise CallCancelled("数据源调用已取消")
+
+
+# 各数据源默认每分钟调用上限
+DEFAULT_CALLS_PER_MIN = {
+    "tushare": 400,
+    "akshare": 120,
+}
+
+
+class RateBudget:
+    """线程安全的令牌桶（每分钟 per_minute 次，允许 burst 次突发）"""
+
+    def __init__(self, name: str, per_minute: int, burst: Optional[int] = None):
+        self.name = name
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or max(1, per_minute // 20))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.waited = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """
+        取一个令牌，不足时阻塞等待
+
+        Returns:
+            等待秒数
+        """
+        if self.per_minute <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.calls += 1
+                    self.waited += waited
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def stats(self) -> Dict:
+        return {
+            "source": self.name,
+            "per_minute": self.per_minute,
+            "calls": self.calls,
+            "waited_seconds": round(self.waited, 1),
+        }
+
+
+_budgets: Dict[str, RateBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def get_budget(source: str) -> RateBudget:
+    """数据源的全局预算（进程内单例）"""
+    with _budgets_lock:
+        budget = _budgets.get(source)
+        if budget is None:
+            per_minute = int(os.getenv(f"{source.upper()}_CALLS_PER_MIN", DEFAULT_CALLS_PER_MIN.get(source, 0)))
+            budget = _budgets[source] = RateBudget(source, per_minute)
+        return budget
+
+
+class RateLimitedApi:
+    """代理对象: 访问到的可调用属性在调用前先从预算取令牌"""
+
+    def __init__(self, source: str, loader: Callable[[], Any]):
+        self._source = source
+        self._loader = loader
+        self._target = None
+        self._lock = threading.Lock()
+
+    @property
+    def target(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = self._loader()
+        return self._target
+
+    def __getattr__(self, name: str):
+        store = get_fixture_store()
+        budget = get_budget(self._source)
+        endpoint = f"{self._source}.{name}"
+
+        if store.replaying:
+            def call(*args, **kwargs):
+                raise_if_cancelled()
+                if store.rate_limited:
+                    budget.acquire()
+                try:
+                    result = store.replay(endpoint, args, kwargs)
+                except Exception:
+                    count_api_call(endpoint, ok=False)
+                    raise
+                count_api_call(endpoint, result)
+                return result
+
+            call.__name__ = name
+            return call
+
+        attr = getattr(self.target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            raise_if_cancelled()
+            budget.acquire()
+            raise_if_cancelled()
+            started = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception as e:
+                count_api_call(endpoint, ok=False)
+                if store.recording:
+                    store.record(endpoint, args, kwargs, error=e, elapsed=time.perf_counter() - started)
+                raise
+            count_api_call(endpoint, result)
+            if store.recording:
+                store.record(endpoint, args, kwargs, result=result, elapsed=time.perf_counter() - started)
+            return result
+
+        call.__name__ = name
+        return call
+
+
+def _load_tushare_pro():
+    import tushare as ts
+
+    token = os.getenv("TUSHARE_TOKEN")
+    http_url = os.getenv("TUSHARE_HTTP_URL")
+    if http_url:
+        # 使用自定义HTTP URL（高级账号）
+        pro = ts.pro_api(token)
+        pro._DataApi__token = token
+        pro._DataApi__http_url = http_url
+        logger.info(f"✅ Tushare Pro API 初始化成功（高级账号）: {http_url}")
+    else:
+        pro = ts.pro_api(token)
+        logger.info("✅ Tushare Pro API 初始化成功（标准账号）")
+    return pro
+
+
+def _load_akshare():
+    import akshare
+
+    return akshare
+
+
+_tushare_pro: Optional[RateLimitedApi] = None
+_tushare_lock = threading.Lock()
+
+
+def get_tushare_pro() -> Optional[RateLimitedApi]:
+    """
+    共享的 Tushare Pro 客户端（调用计入 tushare 预算）
+
+    Returns:
+        未配置 TUSHARE_TOKEN 或初始化失败时返回 None（回放模式始终返回客户端）
+    """
+    global _tushare_pro
+    if _tushare_pro is None:
+        replaying = get_fixture_store().replaying
+        if not replaying and not os.getenv("TUSHARE_TOKEN"):
+            return None
+        with _tushare_lock:
+            if _tushare_pro is None:
+                api = RateLimitedApi("tushare", _load_tushare_pro)
+                if not replaying:
+                    try:
+                        api.target
+                    except Exception as e:
+                        logger.warning(f"Tushare Pro 初始化失败: {e}")
+                        return None
+                _tushare_pro = api
+    return _tushare_pro
+
+
+# AKShare 模块代理（首次调用时才 import akshare）
+akshare_api = RateLimitedApi("akshare", _load_akshare)
+
+
+def pace(seconds: float):
+    """采集器调用之间的限频等待（回放模式下跳过；所在调用已取消时抛出 CallCancelled）"""
+    raise_if_cancelled()
+    if not get_fixture_store().replaying:
+        time.sleep(seconds)
+        raise_if_cancelled()
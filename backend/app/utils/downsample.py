@@ -0,0 +1,85 @@
+"""
+时间序列降采样
+
+LTTB（Largest-Triangle-Three-Buckets）: 把 N 个点降到目标点数，保留视觉上重要的拐点和极值，
+长周期折线图 / K 线在前端几乎看不出差异，传输量按比例下降。
+
+首尾两点总是保留（最新一日的数据不会被丢掉）。
+
+Example:
+    indices = lttb_indices([r["close_price"] for r in rows], 500)
+    rows = [rows[i] for i in indices]
+"""
+
+from typing import List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def _fill_missing(values: Sequence[Optional[float]]) -> List[float]:
+    """空值用前一个有效值填充（开头的空值用第一个有效值）"""
+    filled: List[float] = []
+    last = next((float(v) for v in values if v is not None), 0.0)
+    for value in values:
+        if value is not None:
+            last = float(value)
+        filled.append(last)
+    return filled
+
+
+def lttb_indices(values: Sequence[Optional[float]], threshold: int) -> List[int]:
+    """
+    LTTB 降采样，返回保留点的下标（升序）
+
+    横轴按等间距处理（交易日序列）。
+
+    Args:
+        values: 纵轴值（可含 None）
+        threshold: 目标点数，>= 3；点数不超过目标时原样返回全部下标
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    y = _fill_missing(values)
+    selected = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # 下一个桶的平均点
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        avg_x = (next_start + next_end - 1) / 2.0
+        avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+
+        # 当前桶中与前一选中点、下一桶平均点构成最大三角形的点
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = a, y[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (y[j] - ay) - (ax - j) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return selected
+
+
+def lttb(rows: Sequence[T], threshold: int, key) -> List[T]:
+    """
+    对数据行做 LTTB 降采样
+
+    Args:
+        rows: 按时间升序的数据行
+        threshold: 目标点数
+        key: 取纵轴值的函数，如 lambda r: r["close_price"]
+    """
+    if threshold >= len(rows):
+        return list(rows)
+    return [rows[i] for i in lttb_indices([key(r) for r in rows], threshold)]
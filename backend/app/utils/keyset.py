@@ -0,0 +1,177 @@
+"""
+键集（keyset）分页
+
+用上一页最后一行的排序键作为游标，下一页以 "排序键 > 游标" 过滤，而不是 offset 跳过前面的行:
+- 翻到第几页都只扫描当页的行（配合 (过滤列, 排序列, 唯一列) 复合索引）
+- 翻页过程中有新数据写入也不会重复或漏行
+- 排序键末尾必须是唯一列（如 stock_code），保证顺序确定
+
+游标是排序键值的 base64url(JSON)，附带排序签名，换了排序方式的旧游标会被拒绝。
+
+Example:
+    keys = [KeysetField("change_pct", desc=True, nulls_first=True), KeysetField("stock_code")]
+    query = apply_order(query, keys)
+    if cursor:
+        query = apply_keyset(query, keys, decode_cursor(cursor, keys))
+    rows = query.limit(page_size + 1).execute().data
+    rows, next_cursor = paginate(rows, keys, page_size)
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class KeysetField:
+    """排序键中的一列"""
+
+    column: str
+    desc: bool = False
+    nulls_first: bool = False
+
+    @property
+    def signature(self) -> str:
+        return f"{self.column}.{'desc' if self.desc else 'asc'}.{'nf' if self.nulls_first else 'nl'}"
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析或与当前排序不匹配"""
+
+
+def _signature(keys: Sequence[KeysetField]) -> str:
+    return ",".join(k.signature for k in keys)
+
+
+def encode_cursor(row: dict, keys: Sequence[KeysetField]) -> str:
+    """由一行数据生成游标"""
+    payload = {"k": _signature(keys), "v": [row.get(k.column) for k in keys]}
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[KeysetField]) -> List[Any]:
+    """
+    解析游标
+
+    Raises:
+        InvalidCursor: 格式错误或排序不一致
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = payload["v"]
+        signature = payload["k"]
+    except Exception:
+        raise InvalidCursor("无效的分页游标")
+    if signature != _signature(keys) or not isinstance(values, list) or len(values) != len(keys):
+        raise InvalidCursor("分页游标与当前排序方式不一致，请从第一页重新请求")
+    return values
+
+
+def _literal(value: Any) -> str:
+    """PostgREST 过滤值（含保留字符时加双引号）"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    text = str(value)
+    if any(ch in text for ch in ',.:()"\\ '):
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return text
+
+
+def _equal(key: KeysetField, value: Any) -> str:
+    if value is None:
+        return f"{key.column}.is.null"
+    return f"{key.column}.eq.{_literal(value)}"
+
+
+def _after(key: KeysetField, value: Any) -> Optional[str]:
+    """严格排在 value 之后的条件（None 表示不存在这样的行）"""
+    if value is None:
+        # 空值在前时，之后是所有非空值；空值在后时空值已是末尾
+        return f"{key.column}.not.is.null" if key.nulls_first else None
+    op = "lt" if key.desc else "gt"
+    condition = f"{key.column}.{op}.{_literal(value)}"
+    if key.nulls_first:
+        return condition
+    return f"or({condition},{key.column}.is.null)"
+
+
+def keyset_filter(keys: Sequence[KeysetField], values: Sequence[Any]) -> Optional[str]:
+    """
+    生成 "排序键 > 游标" 的 PostgREST or 过滤表达式（不含外层括号）
+
+    (a, b, c) > (va, vb, vc) 展开为:
+        a 在 va 之后
+        或 a = va 且 b 在 vb 之后
+        或 a = va 且 b = vb 且 c 在 vc 之后
+    """
+    branches = []
+    for i, key in enumerate(keys):
+        after = _after(key, values[i])
+        if after is None:
+            continue
+        conditions = [_equal(k, v) for k, v in zip(keys[:i], values[:i])] + [after]
+        branches.append(conditions[0] if len(conditions) == 1 else f"and({','.join(conditions)})")
+    if not branches:
+        return None
+    return ",".join(branches)
+
+
+def apply_order(query, keys: Sequence[KeysetField]):
+    """按排序键依次设置 order"""
+    for key in keys:
+        query = query.order(key.column, desc=key.desc, nullsfirst=key.nulls_first)
+    return query
+
+
+def apply_keyset(query, keys: Sequence[KeysetField], values: Sequence[Any]):
+    """
+    在查询上追加游标过滤
+
+    Raises:
+        InvalidCursor: 唯一列的游标值为空（排序键末尾应为非空唯一列）
+    """
+    expression = keyset_filter(keys, values)
+    if expression is None:
+        raise InvalidCursor("无效的分页游标")
+    return query.or_(expression)
+
+
+def paginate(rows: List[dict], keys: Sequence[KeysetField], page_size: int) -> Tuple[List[dict], Optional[str]]:
+    """
+    截取一页并生成下一页游标（查询时多取一行用于判断是否还有下一页）
+
+    Returns:
+        (当页数据, 下一页游标或 None)
+    """
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(rows[-1], keys)
+
+
+def iter_pages(build_query: Callable[[], Any], keys: Sequence[KeysetField], page_size: int = 1000) -> Iterator[List[dict]]:
+    """
+    按排序键逐页读取全部结果（后台任务整表扫描用）
+
+    Args:
+        build_query: 每页调用一次，返回带过滤条件的新查询（不含 order / limit）
+        keys: 排序键（末尾为唯一列）
+        page_size: 单页行数（不超过 PostgREST max-rows）
+
+    Yields:
+        每页的数据行
+    """
+    values = None
+    while True:
+        query = apply_order(build_query(), keys)
+        if values is not None:
+            query = apply_keyset(query, keys, values)
+        rows = query.limit(page_size).execute().data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        values = [rows[-1].get(key.column) for key in keys]
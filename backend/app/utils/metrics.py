@@ -0,0 +1,212 @@
+"""
+请求级查询统计与 Prometheus 指标
+
+- QueryStats: 单个 HTTP 请求内的 Supabase 查询次数 / 返回行数 / 耗时，
+  通过 contextvar 传递（线程池和 asyncio.to_thread 会复制上下文，统计对象共享）
+- MetricsRegistry: 按接口聚合的直方图和计数器，渲染为 Prometheus 文本格式
+
+Supabase 连接池 Transport 在每次逻辑请求完成后调用 record_query()，
+QueryMetricsMiddleware 负责为每个 HTTP 请求创建 QueryStats。
+"""
+
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+
+class QueryStats:
+    """单个请求内的 Supabase 查询统计"""
+
+    __slots__ = ("queries", "rows", "db_ms", "retries", "_lock")
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.db_ms = 0.0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def add(self, elapsed_ms: float, rows: int, retries: int = 0) -> None:
+        with self._lock:
+            self.queries += 1
+            self.rows += rows
+            self.db_ms += elapsed_ms
+            self.retries += retries
+
+    def server_timing(self, total_ms: float) -> str:
+        """生成 Server-Timing 头"""
+        return (
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries, {self.rows} rows", '
+            f"app;dur={max(total_ms - self.db_ms, 0):.1f}, "
+            f"total;dur={total_ms:.1f}"
+        )
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats() -> Tuple[QueryStats, object]:
+    """为当前上下文创建查询统计，返回 (stats, token)"""
+    stats = QueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def stop_query_stats(token) -> None:
+    _current_stats.reset(token)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def response_row_count(response: httpx.Response) -> int:
+    """
+    从 PostgREST 的 Content-Range 头解析返回行数
+
+    格式: "0-24/3573"、"0-24/*"、"*/0"
+    """
+    content_range = response.headers.get("content-range")
+    if not content_range:
+        return 0
+    span = content_range.split("/", 1)[0]
+    if "-" not in span:
+        return 0
+    try:
+        start, end = span.split("-", 1)
+        return int(end) - int(start) + 1
+    except ValueError:
+        return 0
+
+
+def record_query(elapsed_ms: float, rows: int = 0, retries: int = 0) -> None:
+    """记录一次 Supabase 查询（无请求上下文时忽略）"""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add(elapsed_ms, rows, retries)
+
+
+# ============================================
+# Prometheus 指标
+# ============================================
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+class Histogram:
+    """累积直方图（Prometheus 语义）"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: Dict[str, str]) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': repr(float(bound))})} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {self.count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {self.sum:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """按接口聚合的请求指标"""
+
+    HISTOGRAMS = {
+        "http_request_duration_seconds": ("HTTP 请求耗时", DURATION_BUCKETS),
+        "http_request_db_seconds": ("请求内 Supabase 查询累计耗时", DURATION_BUCKETS),
+        "http_request_db_queries": ("请求内 Supabase 查询次数", QUERY_COUNT_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        self._requests: Dict[Tuple[str, str, str], int] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._counter_help: Dict[str, str] = {}
+
+    def observe_request(self, method: str, endpoint: str, status: int, duration_s: float, stats: QueryStats) -> None:
+        with self._lock:
+            key = (method, endpoint, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            for name, value in (
+                ("http_request_duration_seconds", duration_s),
+                ("http_request_db_seconds", stats.db_ms / 1000),
+                ("http_request_db_queries", stats.queries),
+            ):
+                hkey = (name, method, endpoint)
+                hist = self._histograms.get(hkey)
+                if hist is None:
+                    hist = self._histograms[hkey] = Histogram(self.HISTOGRAMS[name][1])
+                hist.observe(value)
+            self._inc_locked("supabase_rows_total", stats.rows, {"endpoint": endpoint})
+            self._inc_locked("supabase_retries_total", stats.retries, {"endpoint": endpoint})
+
+    def inc(self, name: str, value: float = 1, labels: Optional[Dict[str, str]] = None, help_text: str = "") -> None:
+        """通用计数器（其他模块可复用）"""
+        with self._lock:
+            if help_text:
+                self._counter_help.setdefault(name, help_text)
+            self._inc_locked(name, value, labels or {})
+
+    def _inc_locked(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self) -> str:
+        """渲染为 Prometheus 文本格式"""
+        lines: List[str] = []
+        with self._lock:
+            lines.append("# HELP http_requests_total HTTP 请求数")
+            lines.append("# TYPE http_requests_total counter")
+            for (method, endpoint, status), n in sorted(self._requests.items()):
+                lines.append(
+                    f"http_requests_total{_format_labels({'method': method, 'endpoint': endpoint, 'status': status})} {n}"
+                )
+
+            for name, (help_text, _) in self.HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (hname, method, endpoint), hist in sorted(self._histograms.items()):
+                    if hname == name:
+                        lines.extend(hist.render(name, {"method": method, "endpoint": endpoint}))
+
+            counter_names = sorted({name for name, _ in self._counters})
+            for name in counter_names:
+                if name in self._counter_help:
+                    lines.append(f"# HELP {name} {self._counter_help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for (cname, labels), value in sorted(self._counters.items()):
+                    if cname == name:
+                        lines.append(f"{name}{_format_labels(dict(labels))} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+
+# 全局单例
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,363 @@
+"""
+按需性能剖析（采样火焰图 + tracemalloc 内存分配）
+
+夜间采集或 /api/sentiment/analysis 变慢时，不改代码即可对指定入口做一次剖析:
+- 采样: 后台线程按固定间隔读取所有线程的调用栈（sys._current_frames），过滤空闲等待的线程
+- 内存: tracemalloc 记录入口执行前后的分配差异和峰值
+
+每次剖析在 PROFILE_DIR 下生成:
+    <入口>_<时间>_<pid>_<序号>.speedscope.json   https://www.speedscope.app 直接打开（按线程分页）
+    <入口>_<时间>_<pid>_<序号>.folded            折叠栈，可用 flamegraph.pl / speedscope 生成火焰图
+    <入口>_<时间>_<pid>_<序号>.txt               自身耗时 / 累计耗时最高的函数 + 分配最多的代码行
+
+开启方式:
+    PROFILE_TARGETS=limit_stocks.collect_and_save,sentiment.analysis   # 环境变量，all 表示全部入口
+    GET /api/sentiment/analysis?profile=1                            # 需 PROFILE_ALLOW_QUERY=true
+
+Example:
+    class LimitStocksCollector:
+        @profiled("limit_stocks.collect_and_save")
+        def collect_and_save(self, trade_date=None):
+            ...
+
+嵌套的剖析入口（如 batch_save_backtest 内调用 get_analysis）只在最外层生成一份报告。
+
+环境变量:
+    PROFILE_TARGETS          开启剖析的入口（逗号分隔，all 全部，默认空）
+    PROFILE_ALLOW_QUERY      是否允许请求参数 ?profile=1 触发（默认 false）
+    PROFILE_DIR              输出目录（默认 backend/profiles）
+    PROFILE_INTERVAL         采样间隔（秒，默认 0.005）
+    PROFILE_MEMORY           是否记录内存分配（默认 true，tracemalloc 会明显拖慢执行）
+    PROFILE_TOP              报告中列出的条目数（默认 25）
+"""
+
+import asyncio
+import functools
+import itertools
+import json
+import os
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+DEFAULT_PROFILE_DIR = Path(__file__).resolve().parents[2] / "profiles"
+
+# 叶子帧落在这些位置的线程视为空闲（线程池等任务、事件循环等 IO），不计入样本
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+# 一帧: (函数名, 文件, 函数首行号)
+Frame = Tuple[str, str, int]
+
+# 请求级开关（ProfilingMiddleware 设置）: None 未请求，否则为本请求生成的报告列表
+_requested: ContextVar[Optional[List[str]]] = ContextVar("profile_requested", default=None)
+# 当前上下文是否已在剖析中（嵌套入口不重复剖析）
+_active: ContextVar[bool] = ContextVar("profile_active", default=False)
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False   # 是否由本模块启动（PYTHONTRACEMALLOC 等外部开启的不负责关闭）
+
+# 同一秒内多次剖析（如并行回补）时区分文件名
+_sequence = itertools.count(1)
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+def profile_targets() -> set:
+    return {name.strip() for name in os.getenv("PROFILE_TARGETS", "").split(",") if name.strip()}
+
+
+def query_profiling_allowed() -> bool:
+    return _env_flag("PROFILE_ALLOW_QUERY", "false")
+
+
+def request_profiling() -> object:
+    """为当前请求开启剖析（中间件调用），返回 token"""
+    return _requested.set([])
+
+
+def requested_reports() -> List[str]:
+    """当前请求生成的报告（不含扩展名的路径）"""
+    return _requested.get() or []
+
+
+def reset_request_profiling(token) -> None:
+    _requested.reset(token)
+
+
+def _enabled(name: str) -> bool:
+    if _active.get():
+        return False
+    if _requested.get() is not None:
+        return True
+    targets = profile_targets()
+    return "all" in targets or name in targets
+
+
+class _Sampler(threading.Thread):
+    """周期性采集所有线程调用栈的后台线程"""
+
+    def __init__(self, interval: float):
+        super().__init__(name="profiler", daemon=True)
+        self.interval = interval
+        self.samples: Counter = Counter()   # (线程名, 栈) -> 样本数，栈从根到叶
+        self.seconds: Counter = Counter()   # (线程名, 栈) -> 实际间隔累计秒数（采样本身有开销，比 样本数 × 间隔 准确）
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                if not stack or (os.path.basename(stack[0][1]), stack[0][0]) in IDLE_FRAMES:
+                    continue
+                stack.reverse()
+                key = (names.get(ident, str(ident)), tuple(stack))
+                self.samples[key] += 1
+                self.seconds[key] += elapsed
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0:
+            _tracemalloc_owned = not tracemalloc.is_tracing()
+            if _tracemalloc_owned:
+                tracemalloc.start()
+        _tracemalloc_users += 1
+        tracemalloc.reset_peak()
+    return tracemalloc.take_snapshot()
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+    return snapshot, peak
+
+
+class ProfileSession:
+    """一次剖析（start / stop 之间的采样和内存分配）"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.interval = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+        self.memory = _env_flag("PROFILE_MEMORY", "true")
+        self.top = int(os.getenv("PROFILE_TOP", "25"))
+        self.output_dir = Path(os.getenv("PROFILE_DIR") or DEFAULT_PROFILE_DIR)
+        self.sampler = _Sampler(self.interval)
+        self.snapshot = None
+        self.started_at = datetime.now()
+        self.elapsed = 0.0
+
+    def start(self):
+        if self.memory:
+            self.snapshot = _start_tracemalloc()
+        self._started = time.perf_counter()
+        self.sampler.start()
+
+    def stop(self) -> Optional[str]:
+        """停止剖析并写出报告，返回报告路径前缀（写出失败返回 None）"""
+        self.sampler.stop()
+        self.elapsed = time.perf_counter() - self._started
+        allocations, peak = None, None
+        if self.memory:
+            after, peak = _stop_tracemalloc()
+            allocations = after.compare_to(self.snapshot, "lineno")
+
+        base = self.output_dir / f"{self.name}_{self.started_at:%Y%m%d_%H%M%S}_{os.getpid()}_{next(_sequence)}"
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            self._write_speedscope(Path(f"{base}.speedscope.json"))
+            self._write_folded(Path(f"{base}.folded"))
+            self._write_report(Path(f"{base}.txt"), allocations, peak)
+        except OSError as e:
+            logger.warning(f"写入剖析报告失败 {self.name}: {e}")
+            return None
+
+        logger.info(
+            f"🔬 剖析 {self.name}: {self.elapsed:.2f}s, {sum(self.sampler.samples.values())} 个样本"
+            + (f", 内存峰值 {peak / 1024 / 1024:.1f}MB" if peak is not None else "")
+            + f" -> {base}.*"
+        )
+        return str(base)
+
+    # ==================== 输出 ====================
+
+    def _write_speedscope(self, path: Path):
+        frames: Dict[Frame, int] = {}
+        profiles: Dict[str, dict] = {}
+        for (thread, stack), seconds in self.sampler.seconds.items():
+            indexes = [frames.setdefault(frame, len(frames)) for frame in stack]
+            profile = profiles.setdefault(thread, {
+                "type": "sampled",
+                "name": thread,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(self.elapsed, 6),
+                "samples": [],
+                "weights": [],
+            })
+            profile["samples"].append(indexes)
+            profile["weights"].append(round(seconds, 6))
+
+        document = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.name} {self.started_at:%Y-%m-%d %H:%M:%S}",
+            "exporter": "stock-review profiling",
+            "activeProfileIndex": 0,
+            "shared": {
+                "frames": [
+                    {"name": name, "file": filename, "line": line}
+                    for (name, filename, line) in frames
+                ],
+            },
+            "profiles": sorted(profiles.values(), key=lambda p: -sum(p["weights"])),
+        }
+        path.write_text(json.dumps(document, ensure_ascii=False), encoding="utf-8")
+
+    def _write_folded(self, path: Path):
+        lines = []
+        for (thread, stack), count in sorted(self.sampler.samples.items(), key=lambda item: -item[1]):
+            names = [thread] + [f"{_short_path(filename)}:{name}" for name, filename, _ in stack]
+            lines.append(f"{';'.join(names)} {count}")
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def _write_report(self, path: Path, allocations, peak: Optional[int]):
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for (_, stack), count in self.sampler.samples.items():
+            self_counts[stack[-1]] += count
+            for frame in set(stack):
+                total_counts[frame] += count
+        samples = sum(self.sampler.samples.values()) or 1
+
+        def frame_lines(counter: Counter) -> List[str]:
+            return [
+                f"  {count / samples * 100:6.1f}%  {count:6d}  {name}  ({_short_path(filename)}:{line})"
+                for (name, filename, line), count in counter.most_common(self.top)
+            ]
+
+        lines = [
+            f"入口: {self.name}",
+            f"开始: {self.started_at:%Y-%m-%d %H:%M:%S}",
+            f"耗时: {self.elapsed:.3f}s",
+            f"采样: {sum(self.sampler.samples.values())} 个（间隔 {self.interval * 1000:g}ms，所有非空闲线程）",
+            "",
+            "== 自身耗时 ==",
+            *frame_lines(self_counts),
+            "",
+            "== 累计耗时 ==",
+            *frame_lines(total_counts),
+        ]
+        if allocations is not None:
+            lines += [
+                "",
+                f"== 内存分配（净增最多的代码行，峰值 {peak / 1024 / 1024:.1f}MB）==",
+            ]
+            for stat in allocations[: self.top]:
+                frame = stat.traceback[0]
+                lines.append(
+                    f"  {stat.size_diff / 1024:+10.1f}KB  {stat.count_diff:+8d} 块  "
+                    f"{_short_path(frame.filename)}:{frame.lineno}"
+                )
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+_STDLIB = sysconfig.get_paths()["stdlib"] + os.sep
+
+
+def _short_path(filename: str) -> str:
+    """site-packages / 项目目录 / 标准库之后的相对路径"""
+    for marker in ("site-packages" + os.sep, "backend" + os.sep):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    if filename.startswith(_STDLIB):
+        return filename[len(_STDLIB):]
+    return filename
+
+
+def _begin(name: str) -> Tuple[ProfileSession, object]:
+    session = ProfileSession(name)
+    token = _active.set(True)
+    session.start()
+    return session, token
+
+
+def _end(session: ProfileSession, token) -> None:
+    _active.reset(token)
+    base = session.stop()
+    reports = _requested.get()
+    if base and reports is not None:
+        reports.append(base)
+
+
+def profiled(name: str):
+    """
+    剖析入口装饰器（支持同步 / 异步函数）
+
+    未开启时只多一次环境变量检查；与 @cached 叠加时放在 @cached 下方，只剖析实际计算
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled(name):
+                    return await func(*args, **kwargs)
+                session, token = _begin(name)
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _end(session, token)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled(name):
+                return func(*args, **kwargs)
+            session, token = _begin(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _end(session, token)
+
+        return wrapper
+
+    return decorator
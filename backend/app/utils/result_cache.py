@@ -0,0 +1,413 @@
+"""
+进程内结果缓存
+
+服务层 / 路由函数的结果缓存装饰器:
+- 按规范化后的参数生成缓存键，trade_date 为空时先解析为最新交易日
+- 条目数上限 + LRU 淘汰
+- 已收盘交易日（早于最新交易日）使用长 TTL
+- 最新交易日使用短 TTL，过期后在 stale 窗口内先返回旧值，后台刷新（stale-while-revalidate）
+- 缓存未命中时经过 single-flight 合并，并发的相同请求只计算一次
+- 采集器写入某个交易日后调用 invalidate_trade_date() 清除相关缓存
+
+采集器通常运行在独立进程（定时任务），失效通知同时追加到失效日志文件，
+API 进程读取缓存时会定期检查该文件并同步失效（同机部署有效）。
+
+环境变量:
+    RESULT_CACHE_MAX_ENTRIES         最大条目数（默认 512，0 关闭缓存）
+    RESULT_CACHE_PAST_TTL            已收盘交易日 TTL（秒，默认 86400）
+    RESULT_CACHE_TTL                 最新交易日 TTL（秒，默认 60）
+    RESULT_CACHE_STALE_TTL           过期后可返回旧值的窗口（秒，默认 300）
+    RESULT_CACHE_INVALIDATION_FILE   失效日志文件（默认 backend/.cache/invalidations.log）
+
+Example:
+    class SentimentService:
+        @cached("sentiment.analysis")
+        async def get_analysis(self, trade_date: Optional[str] = None) -> dict:
+            ...
+
+    # 采集器写入后
+    invalidate_trade_date("2025-12-11")
+"""
+
+import asyncio
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from app.utils.single_flight import SingleFlight
+from app.utils.trading_date import get_latest_trading_date
+
+
+DEFAULT_INVALIDATION_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    ".cache",
+    "invalidations.log",
+)
+
+# 失效日志检查间隔（秒）
+JOURNAL_CHECK_INTERVAL = 2.0
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    stale_until: float
+    trade_date: Optional[str]
+
+
+class ResultCache:
+    """线程安全的 TTL + LRU 结果缓存"""
+
+    def __init__(self, max_entries: int, invalidation_file: Optional[str] = None):
+        self.max_entries = max_entries
+        self.invalidation_file = invalidation_file
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Optional[str]], Any]] = []
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+        self._journal_offset = self._journal_size()
+        self._journal_checked_at = time.monotonic()
+
+    # ---------- 读写 ----------
+
+    def get(self, key: Tuple) -> Tuple[Any, str]:
+        """
+        读取缓存
+
+        Returns:
+            (value, state)，state 为 "fresh" / "stale" / "miss"
+        """
+        self.sync_invalidations()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, "miss"
+            if now < entry.expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value, "fresh"
+            if now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return entry.value, "stale"
+            del self._entries[key]
+            self.misses += 1
+            return None, "miss"
+
+    def set(self, key: Tuple, value: Any, ttl: float, stale_ttl: float = 0, trade_date: Optional[str] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = _Entry(value, now + ttl, now + ttl + stale_ttl, trade_date)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---------- 失效 ----------
+
+    def add_listener(self, callback: Callable[[Optional[str]], Any]) -> None:
+        """注册失效回调（参数为交易日，None 表示全部），如 HTTP 响应缓存"""
+        self._listeners.append(callback)
+
+    def invalidate_local(self, trade_date: Optional[str] = None) -> int:
+        """清除本进程缓存（trade_date 为 None 清空全部），并通知回调"""
+        with self._lock:
+            if trade_date is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                keys = [k for k, e in self._entries.items() if e.trade_date == trade_date]
+                for key in keys:
+                    del self._entries[key]
+                removed = len(keys)
+
+        for callback in self._listeners:
+            try:
+                callback(trade_date)
+            except Exception as e:
+                logger.warning(f"缓存失效回调执行失败: {e}")
+        return removed
+
+    def _journal_size(self) -> int:
+        if not self.invalidation_file:
+            return 0
+        try:
+            return os.path.getsize(self.invalidation_file)
+        except OSError:
+            return 0
+
+    def publish(self, trade_dates: Iterable[Optional[str]]) -> None:
+        """追加失效日志，通知其他进程（写入失败只记录警告）"""
+        if not self.invalidation_file:
+            return
+        lines = "".join(f"{time.time():.3f}\t{d or '*'}\n" for d in trade_dates)
+        try:
+            os.makedirs(os.path.dirname(self.invalidation_file), exist_ok=True)
+            with open(self.invalidation_file, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError as e:
+            logger.warning(f"写入缓存失效日志失败: {e}")
+
+    def sync_invalidations(self, force: bool = False) -> None:
+        """读取其他进程追加的失效日志并应用（默认每 2 秒最多检查一次）"""
+        if not self.invalidation_file:
+            return
+        now = time.monotonic()
+        if not force and now - self._journal_checked_at < JOURNAL_CHECK_INTERVAL:
+            return
+        self._journal_checked_at = now
+
+        size = self._journal_size()
+        if size == self._journal_offset:
+            return
+        if size < self._journal_offset:
+            # 日志被截断或轮转，从头读取（重复失效无副作用）
+            self._journal_offset = 0
+
+        try:
+            with open(self.invalidation_file, "r", encoding="utf-8") as f:
+                f.seek(self._journal_offset)
+                content = f.read()
+                self._journal_offset = f.tell()
+        except OSError:
+            return
+
+        dates = {line.split("\t", 1)[1].strip() for line in content.splitlines() if "\t" in line}
+        if "*" in dates:
+            self.invalidate_local(None)
+        else:
+            for trade_date in dates:
+                self.invalidate_local(trade_date)
+        if dates:
+            logger.debug(f"同步缓存失效: {sorted(dates)}")
+
+
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512")),
+    invalidation_file=os.getenv("RESULT_CACHE_INVALIDATION_FILE", DEFAULT_INVALIDATION_FILE),
+)
+
+
+def invalidate_trade_date(trade_date: str) -> None:
+    """
+    清除某个交易日的缓存（采集器写入该交易日数据后调用）
+
+    Args:
+        trade_date: 交易日期 YYYY-MM-DD
+    """
+    invalidate_trade_dates([trade_date])
+
+
+def invalidate_trade_dates(trade_dates: Iterable[str]) -> None:
+    """批量清除多个交易日的缓存（历史回填时使用）"""
+    dates = sorted({d for d in trade_dates if d})
+    if not dates:
+        return
+    for trade_date in dates:
+        result_cache.invalidate_local(trade_date)
+    result_cache.publish(dates)
+
+
+def invalidate_all() -> None:
+    """清空全部缓存（影响所有交易日的数据变更，如概念成分股全量刷新）"""
+    result_cache.invalidate_local(None)
+    result_cache.publish([None])
+
+
+def sync_invalidations() -> None:
+    """同步其他进程的失效通知（不经过 get() 的缓存层调用）"""
+    result_cache.sync_invalidations()
+
+
+# ============================================
+# 装饰器
+# ============================================
+
+def _normalize(value: Any) -> Any:
+    """参数规范化为可哈希的值"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_normalize(v) for v in value]
+        return tuple(sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+# 进行中的异步后台刷新（事件循环只弱引用任务，不持有引用可能在完成前被回收）
+_refresh_tasks: set = set()
+
+
+def _refresh_done(task: asyncio.Task) -> None:
+    _refresh_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"后台刷新缓存失败 {task.get_name().removeprefix('refresh-')}: {task.exception()}")
+
+
+def cached(
+    namespace: Optional[str] = None,
+    past_ttl: Optional[float] = None,
+    current_ttl: Optional[float] = None,
+    stale_ttl: Optional[float] = None,
+    date_arg: str = "trade_date",
+    cache: Optional[ResultCache] = None,
+    coalesce: bool = True,
+    cacheable: Optional[Callable[[Any], bool]] = None,
+):
+    """
+    结果缓存装饰器（支持同步 / 异步函数、实例方法）
+
+    Args:
+        namespace: 缓存命名空间，默认 模块.函数名
+        past_ttl: 已收盘交易日 TTL（秒）
+        current_ttl: 最新交易日 TTL（秒）
+        stale_ttl: 过期后返回旧值并后台刷新的窗口（秒），仅最新交易日生效
+        date_arg: 交易日期参数名，为空时解析为最新交易日后再调用原函数
+        cache: 使用的缓存实例，默认全局 result_cache
+        coalesce: 未命中时合并并发的相同调用（single-flight）
+        cacheable: 判断结果能否缓存，返回 False 时照常返回但不写入（如部分模块失败的聚合结果）
+
+    注意: 返回值在调用方之间共享，调用方不应修改
+    """
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        params = list(signature.parameters)
+        skip_first = bool(params) and params[0] in ("self", "cls")
+        name = namespace or f"{func.__module__}.{func.__qualname__}"
+        is_async = asyncio.iscoroutinefunction(func)
+        flight = SingleFlight(name) if coalesce else None
+        refreshing = set()
+        refreshing_lock = threading.Lock()
+
+        def resolve(args, kwargs) -> tuple:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+
+            trade_date = None
+            latest = get_latest_trading_date()
+            if date_arg in bound.arguments:
+                value = bound.arguments[date_arg]
+                # 直接调用路由函数时默认值是 Query 对象，同样按未指定处理
+                if not isinstance(value, str) or not value:
+                    value = latest
+                    bound.arguments[date_arg] = value
+                trade_date = value
+
+            items = list(bound.arguments.items())[1:] if skip_first else list(bound.arguments.items())
+            key = (name, tuple((k, _normalize(v)) for k, v in items))
+
+            target = cache if cache is not None else result_cache
+            if trade_date and trade_date < latest:
+                ttl = past_ttl if past_ttl is not None else float(os.getenv("RESULT_CACHE_PAST_TTL", "86400"))
+                stale = 0.0
+            else:
+                ttl = current_ttl if current_ttl is not None else float(os.getenv("RESULT_CACHE_TTL", "60"))
+                stale = stale_ttl if stale_ttl is not None else float(os.getenv("RESULT_CACHE_STALE_TTL", "300"))
+            return bound.args, bound.kwargs, key, trade_date, ttl, stale, target
+
+        def begin_refresh(key) -> bool:
+            with refreshing_lock:
+                if key in refreshing:
+                    return False
+                refreshing.add(key)
+                return True
+
+        def end_refresh(key) -> None:
+            with refreshing_lock:
+                refreshing.discard(key)
+
+        if is_async:
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                call_args, call_kwargs, key, trade_date, ttl, stale, target = resolve(args, kwargs)
+                value, state = target.get(key)
+                if state == "fresh":
+                    return value
+
+                async def compute():
+                    result = await func(*call_args, **call_kwargs)
+                    if cacheable is None or cacheable(result):
+                        target.set(key, result, ttl, stale, trade_date)
+                    return result
+
+                async def load():
+                    return await flight.do(key, compute) if flight else await compute()
+
+                if state == "stale":
+                    if begin_refresh(key):
+
+                        async def refresh():
+                            try:
+                                await load()
+                            finally:
+                                end_refresh(key)
+
+                        task = asyncio.get_running_loop().create_task(refresh(), name=f"refresh-{name}")
+                        _refresh_tasks.add(task)
+                        task.add_done_callback(_refresh_done)
+                    return value
+
+                return await load()
+
+            wrapper = async_wrapper
+        else:
+
+            @functools.wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                call_args, call_kwargs, key, trade_date, ttl, stale, target = resolve(args, kwargs)
+                value, state = target.get(key)
+                if state == "fresh":
+                    return value
+
+                def compute():
+                    result = func(*call_args, **call_kwargs)
+                    if cacheable is None or cacheable(result):
+                        target.set(key, result, ttl, stale, trade_date)
+                    return result
+
+                def load():
+                    return flight.do_sync(key, compute) if flight else compute()
+
+                if state == "stale":
+                    if begin_refresh(key):
+
+                        def refresh():
+                            try:
+                                load()
+                            except Exception as e:
+                                logger.warning(f"后台刷新缓存失败 {name}: {e}")
+                            finally:
+                                end_refresh(key)
+
+                        threading.Thread(target=refresh, name=f"refresh-{name}", daemon=True).start()
+                    return value
+
+                return load()
+
+            wrapper = sync_wrapper
+
+        wrapper.cache_namespace = name
+        wrapper.flight = flight
+        return wrapper
+
+    return decorator
@@ -0,0 +1,281 @@
+"""
+采集运行台账
+
+调度器和回补脚本的每个步骤结束时往 collection_runs 写一行: 起止时间、耗时、状态、
+数据源接口返回行数、写出行数、按接口统计的 Tushare / AKShare 调用次数与错误、Supabase 查询与重试次数。
+
+    ledger = RunLedger("scheduler")
+    results["limit_stocks"] = ledger.run_step("limit_stocks", collect_limit_stocks)   # 返回值为假记为失败
+
+    with ledger.step("yesterday_limit", trade_date="2026-10-16") as step:
+        ...
+        step.rows_out = len(records)
+
+步骤内部（任意深度）可以:
+    set_rows_out(n)                       # 上报写出行数
+    count_retry()                         # 上报一次数据源重试
+    @ledger_step("limit_stocks.daily_data")  # 记为子步骤（单独一行，计数同时累加到父步骤）
+
+data_source 的接口代理每次调用自动 count_api_call；Supabase 查询复用 metrics.QueryStats。
+没有进行中的台账步骤时这些调用都是空操作。
+
+summarize_runs 按步骤汇总耗时分位数和逐日趋势（/api/ops/runs）。
+"""
+
+import math
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from loguru import logger
+
+from app.utils.keyset import KeysetField, iter_pages
+from app.utils.metrics import QueryStats, start_query_stats, stop_query_stats
+
+TABLE = "collection_runs"
+
+
+class StepRecord:
+    """进行中的台账步骤"""
+
+    def __init__(self, ledger: "RunLedger", name: str, trade_date: Optional[str], parent: Optional["StepRecord"]):
+        self.ledger = ledger
+        self.name = name
+        self.trade_date = trade_date
+        self.parent = parent
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.status = "success"
+        self.error: Optional[str] = None
+        self.rows_in = 0
+        self.rows_out: Optional[int] = None
+        self.retries = 0
+        self.api_calls: Dict[str, int] = {}
+        self.api_errors: Dict[str, int] = {}
+        self.query_stats: Optional[QueryStats] = None
+        self._lock = threading.Lock()
+
+    def fail(self, error: str):
+        self.status = "failed"
+        self.error = (error or "")[:1000]
+
+    def add_api_call(self, endpoint: str, rows: int, ok: bool):
+        with self._lock:
+            self.api_calls[endpoint] = self.api_calls.get(endpoint, 0) + 1
+            self.rows_in += rows
+            if not ok:
+                self.api_errors[endpoint] = self.api_errors.get(endpoint, 0) + 1
+
+    def merge(self, child: "StepRecord"):
+        """子步骤结束后把计数累加到父步骤"""
+        with self._lock:
+            for endpoint, n in child.api_calls.items():
+                self.api_calls[endpoint] = self.api_calls.get(endpoint, 0) + n
+            for endpoint, n in child.api_errors.items():
+                self.api_errors[endpoint] = self.api_errors.get(endpoint, 0) + n
+            self.rows_in += child.rows_in
+            self.retries += child.retries
+        if self.query_stats and child.query_stats:
+            stats = child.query_stats
+            self.query_stats.queries += stats.queries
+            self.query_stats.rows += stats.rows
+            self.query_stats.db_ms += stats.db_ms
+            self.query_stats.retries += stats.retries
+
+    def to_row(self) -> dict:
+        stats = self.query_stats or QueryStats()
+        return {
+            "run_id": self.ledger.run_id,
+            "source": self.ledger.source,
+            "step": self.name,
+            "parent_step": self.parent.name if self.parent else None,
+            "trade_date": self.trade_date,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": int((time.perf_counter() - self.started) * 1000),
+            "status": self.status,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "api_calls": self.api_calls,
+            "api_errors": self.api_errors,
+            "db_queries": stats.queries,
+            "retries": self.retries + stats.retries,
+            "error": self.error,
+        }
+
+
+_current_step: ContextVar[Optional[StepRecord]] = ContextVar("ledger_step", default=None)
+
+
+class RunLedger:
+    """一次调度 / 回补运行的台账"""
+
+    def __init__(self, source: str, run_id: Optional[str] = None):
+        self.source = source
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d%H%M%S") + uuid.uuid4().hex[:6]
+
+    @contextmanager
+    def step(self, name: str, trade_date: Optional[str] = None) -> Iterator[StepRecord]:
+        """记录一个步骤（异常记为失败并继续抛出）"""
+        parent = _current_step.get()
+        record = StepRecord(self, name, trade_date or (parent.trade_date if parent else None), parent)
+        record.query_stats, stats_token = start_query_stats()
+        token = _current_step.set(record)
+        try:
+            yield record
+        except Exception as e:
+            record.fail(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_step.reset(token)
+            stop_query_stats(stats_token)
+            if parent is not None:
+                parent.merge(record)
+            self._write(record.to_row())
+
+    def run_step(self, name: str, func: Callable[..., Any], *args, trade_date: Optional[str] = None, **kwargs) -> Any:
+        """执行 func 并记录为步骤，返回值为假时记为失败（调度器的步骤函数自行捕获异常返回 False）"""
+        with self.step(name, trade_date=trade_date) as record:
+            result = func(*args, **kwargs)
+            if not result and record.status == "success":
+                record.fail("步骤返回失败")
+            return result
+
+    def _write(self, row: dict):
+        try:
+            from app.utils.supabase_client import get_supabase
+
+            get_supabase().table(TABLE).insert(row).execute()
+        except Exception as e:
+            logger.debug(f"写入采集台账失败 {row['step']}: {e}")
+
+
+def current_step() -> Optional[StepRecord]:
+    return _current_step.get()
+
+
+def count_api_call(endpoint: str, result: Any = None, ok: bool = True):
+    """记录一次数据源接口调用（data_source 代理调用）"""
+    record = _current_step.get()
+    if record is not None:
+        try:
+            rows = len(result) if ok and result is not None else 0
+        except TypeError:
+            rows = 0
+        record.add_api_call(endpoint, rows, ok)
+
+
+def count_retry(n: int = 1):
+    """记录数据源重试"""
+    record = _current_step.get()
+    if record is not None:
+        record.retries += n
+
+
+def set_rows_out(rows: int):
+    """上报当前步骤写出行数"""
+    record = _current_step.get()
+    if record is not None:
+        record.rows_out = rows
+
+
+def ledger_step(name: str):
+    """装饰器: 在台账步骤内调用时，把函数记为子步骤（不在台账步骤内时直接调用）"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            parent = _current_step.get()
+            if parent is None:
+                return func(*args, **kwargs)
+            with parent.ledger.step(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# ==================== 汇总 ====================
+
+RUN_COLUMNS = "id,step,source,trade_date,started_at,duration_ms,status,rows_out,api_calls,retries"
+
+
+def load_runs(days: int = 30, step: Optional[str] = None) -> List[dict]:
+    """读取最近 days 天的台账（按 started_at, id 键集分页）"""
+    from app.utils.supabase_client import get_supabase
+
+    supabase = get_supabase()
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+    def build_query():
+        query = supabase.table(TABLE).select(RUN_COLUMNS).gte("started_at", since)
+        if step:
+            query = query.eq("step", step)
+        return query
+
+    keys = [KeysetField("started_at"), KeysetField("id")]
+    rows = []
+    for page in iter_pages(build_query, keys):
+        rows.extend(page)
+    return rows
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """最近秩分位数（values 已排序）"""
+    if not values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+def _durations(rows: List[dict]) -> Dict[str, Optional[float]]:
+    values = sorted(row["duration_ms"] for row in rows if row.get("duration_ms") is not None)
+    return {
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": values[-1] if values else None,
+    }
+
+
+def summarize_runs(rows: List[dict]) -> List[dict]:
+    """
+    按步骤汇总: 运行次数、失败率、耗时分位数、平均写出行数 / 接口调用数、重试总数，
+    以及按运行日期（UTC）的耗时分位数序列
+    """
+    by_step: Dict[str, List[dict]] = defaultdict(list)
+    for row in rows:
+        by_step[row["step"]].append(row)
+
+    summary = []
+    for name, step_rows in sorted(by_step.items()):
+        failures = sum(1 for row in step_rows if row.get("status") != "success")
+        rows_out = [row["rows_out"] for row in step_rows if row.get("rows_out") is not None]
+        api_calls = [sum((row.get("api_calls") or {}).values()) for row in step_rows]
+
+        by_day: Dict[str, List[dict]] = defaultdict(list)
+        for row in step_rows:
+            by_day[str(row["started_at"])[:10]].append(row)
+
+        summary.append({
+            "step": name,
+            "runs": len(step_rows),
+            "failures": failures,
+            "failure_rate": round(failures / len(step_rows), 4),
+            "duration_ms": _durations(step_rows),
+            "avg_rows_out": round(sum(rows_out) / len(rows_out), 1) if rows_out else None,
+            "avg_api_calls": round(sum(api_calls) / len(api_calls), 1),
+            "retries": sum(row.get("retries") or 0 for row in step_rows),
+            "daily": [
+                {"date": day, "runs": len(day_rows), **_durations(day_rows)}
+                for day, day_rows in sorted(by_day.items())
+            ],
+        })
+    return summary
@@ -0,0 +1,156 @@
+"""
+响应序列化快速通道
+
+数据库行是可信数据（类型由表结构保证），大列表接口不需要逐行 Pydantic 校验:
+- FastJSONResponse: orjson 序列化（未安装时依次回退 ujson / json），作为应用默认响应类
+- project_rows: 按 Schema 字段裁剪数据库行（只取字段、补默认值），不做校验
+- trusted_response: 直接返回 FastJSONResponse，跳过 response_model 的二次校验和 jsonable_encoder
+- to_columns / to_arrow_ipc: 列式输出（长序列不再逐行重复字段名），Arrow 需安装 pyarrow
+
+response_model 仍保留在路由上，用于 OpenAPI 文档。
+
+Example:
+    rows = project_rows(LimitStockItem, response.data)
+    return trusted_response({"success": True, "data": rows, "total": len(rows)})
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # 可选依赖
+    ujson = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # 可选依赖
+    pyarrow = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+_MISSING = object()
+
+
+def _default(value: Any) -> Any:
+    """标准库 json 无法处理的类型"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "item"):  # numpy 标量
+        return value.item()
+    if hasattr(value, "tolist"):  # numpy 数组
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """序列化为 JSON bytes（orjson > ujson > json）"""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+    if ujson is not None:
+        try:
+            return ujson.dumps(content, ensure_ascii=False).encode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson 序列化的 JSON 响应"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def _model_fields(model: Type[BaseModel]) -> Tuple[Tuple[str, Any, Any], ...]:
+    """(字段名, 默认值, 默认工厂)"""
+    fields = []
+    for name, info in model.model_fields.items():
+        default = _MISSING if info.is_required() else info.default
+        fields.append((name, default, info.default_factory))
+    return tuple(fields)
+
+
+def project_rows(model: Type[BaseModel], rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    按 Schema 字段裁剪可信数据库行（不做类型校验）
+
+    Args:
+        model: 响应项 Schema（字段名即数据库列名，不含别名）
+        rows: 数据库行
+
+    Returns:
+        只含 Schema 字段的字典列表，缺失的可选字段补默认值
+    """
+    fields = _model_fields(model)
+    result = []
+    for row in rows:
+        item = {}
+        for name, default, factory in fields:
+            value = row.get(name, _MISSING)
+            if value is _MISSING:
+                if factory is not None:
+                    value = factory()
+                elif default is _MISSING:
+                    value = None
+                else:
+                    value = default
+            item[name] = value
+        result.append(item)
+    return result
+
+
+def trusted_response(
+    content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None
+) -> FastJSONResponse:
+    """返回已是可信 JSON 结构的数据（跳过 response_model 校验）"""
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+
+def to_columns(rows: Sequence[Dict[str, Any]], columns: Sequence[str]) -> Dict[str, List[Any]]:
+    """行转列: {列名: [值, ...]}"""
+    return {column: [row.get(column) for row in rows] for column in columns}
+
+
+def arrow_available() -> bool:
+    return pyarrow is not None
+
+
+def to_arrow_ipc(rows: Sequence[Dict[str, Any]], columns: Sequence[str]) -> bytes:
+    """
+    行转 Arrow IPC stream（前端可用 apache-arrow 的 tableFromIPC 直接读取）
+
+    Raises:
+        RuntimeError: 未安装 pyarrow
+    """
+    if pyarrow is None:
+        raise RuntimeError("未安装 pyarrow，无法输出 Arrow 格式")
+    table = pyarrow.table(to_columns(rows, columns))
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
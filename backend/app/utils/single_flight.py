@@ -0,0 +1,174 @@
+"""
+请求合并（single-flight）
+
+同一时刻多个相同的请求（相同函数 + 规范化参数）只执行一次计算，其余调用方等待并共享结果:
+- 异步: 计算作为独立 Task 运行，发起方断开也不会取消，其他等待方照常拿到结果
+- 同步: 基于 threading.Event，适用于线程池中的调用
+- 等待有上限（max_wait），超时后等待方自行计算，避免被卡住的计算拖住所有请求
+- 合并次数、超时次数计入 /metrics（singleflight_*_total）
+
+结果缓存（result_cache.cached）在缓存未命中时默认经过这里，收盘后冷启动时
+同一交易日的分析只会打到 Supabase 一次。
+
+环境变量:
+    SINGLE_FLIGHT_MAX_WAIT  等待方最长等待时间（秒，默认 30）
+
+Example:
+    flight = SingleFlight("sentiment.analysis")
+    result = await flight.do(("2025-12-11",), lambda: service.compute("2025-12-11"))
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from loguru import logger
+
+from app.utils.metrics import metrics_registry
+
+
+class _SyncCall:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """按键合并并发的相同计算"""
+
+    def __init__(self, name: str, max_wait: Optional[float] = None):
+        """
+        Args:
+            name: 名称（指标标签）
+            max_wait: 等待方最长等待时间（秒），None 读取 SINGLE_FLIGHT_MAX_WAIT
+        """
+        self.name = name
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv("SINGLE_FLIGHT_MAX_WAIT", "30"))
+        self._tasks: Dict[Hashable, Tuple[asyncio.AbstractEventLoop, asyncio.Task]] = {}
+        self._calls: Dict[Hashable, _SyncCall] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, event: str) -> None:
+        metrics_registry.inc(
+            f"singleflight_{event}_total",
+            labels={"name": self.name},
+            help_text={
+                "leader": "实际执行的计算次数",
+                "coalesced": "合并到进行中计算的调用次数",
+                "timeout": "等待超时后自行计算的次数",
+            }[event],
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks) + len(self._calls)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行或合并异步计算
+
+        Args:
+            key: 合并键
+            factory: 返回协程的无参函数（仅由第一个调用方执行）
+
+        Returns:
+            计算结果（异常同样传递给所有等待方）
+        """
+        loop = asyncio.get_running_loop()
+        current = self._tasks.get(key)
+
+        if current is not None and current[0] is loop and not current[1].done():
+            task = current[1]
+            self._count("coalesced")
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                self._count("timeout")
+                logger.warning(f"⚠️ {self.name} 等待进行中的计算超时({self.max_wait}s)，自行计算: {key}")
+                return await factory()
+
+        task = loop.create_task(factory())
+        self._tasks[key] = (loop, task)
+        self._count("leader")
+
+        def _cleanup(finished: asyncio.Task) -> None:
+            if self._tasks.get(key, (None, None))[1] is finished:
+                del self._tasks[key]
+
+        task.add_done_callback(_cleanup)
+        return await asyncio.shield(task)
+
+    def do_sync(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        执行或合并同步计算（线程间合并）
+
+        Args:
+            key: 合并键
+            fn: 无参计算函数（仅由第一个调用方执行）
+
+        Returns:
+            计算结果
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _SyncCall()
+
+        if not leader:
+            self._count("coalesced")
+            if not call.event.wait(self.max_wait):
+                self._count("timeout")
+                logger.warning(f"⚠️ {self.name} 等待进行中的计算超时({self.max_wait}s)，自行计算: {key}")
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        self._count("leader")
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+
+def single_flight(name: str, key_func: Callable[..., Hashable], max_wait: Optional[float] = None):
+    """
+    请求合并装饰器（不缓存结果，只合并同时进行的调用）
+
+    Args:
+        name: 名称（指标标签）
+        key_func: 由调用参数生成合并键
+        max_wait: 等待方最长等待时间（秒）
+    """
+    flight = SingleFlight(name, max_wait)
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await flight.do(key_func(*args, **kwargs), lambda: func(*args, **kwargs))
+
+            async_wrapper.flight = flight
+            return async_wrapper
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            return flight.do_sync(key_func(*args, **kwargs), lambda: func(*args, **kwargs))
+
+        sync_wrapper.flight = flight
+        return sync_wrapper
+
+    return decorator
@@ -0,0 +1,226 @@
+"""
+数据源录制 / 回放
+
+采集器性能测试原先只能连线上 Tushare / AKShare: 有限流、数据每天在变，
+test_tushare_history.py、test_enhanced_collector.py 等脚本离线无法运行。
+data_source 的接口代理（get_tushare_pro() / akshare_api）按 DATA_SOURCE_MODE 工作:
+
+    live     直接调用数据源（默认）
+    record   调用数据源，同时把参数和返回值（含异常）写入夹具目录
+    replay   不访问数据源，按 接口 + 参数 从夹具目录返回录制结果；没有录制的调用抛出 FixtureMissing
+
+夹具按接口分目录，每次调用一个 pickle 文件:
+    <DATA_SOURCE_FIXTURES>/tushare.limit_list_d/<参数哈希>.pkl
+    {"endpoint", "args", "kwargs", "result" | "error", "elapsed", "recorded_at"}
+同一接口 + 参数多次调用时保留最后一次。
+
+回放默认零延迟、不走限流预算，采集器以满速运行；也可以模拟线上:
+    DATA_SOURCE_REPLAY_LATENCY=recorded     按录制时的耗时 sleep
+    DATA_SOURCE_REPLAY_LATENCY=200          每次调用固定 200ms
+    DATA_SOURCE_REPLAY_RATE_LIMIT=true      仍按 TUSHARE_CALLS_PER_MIN / AKSHARE_CALLS_PER_MIN 限流
+
+Example:
+    DATA_SOURCE_MODE=record python3 scripts/backfill.py --date 2026-10-16 --force
+    DATA_SOURCE_MODE=replay python3 scripts/backfill.py --date 2026-10-16 --force
+    python -m benchmarks.run --date 2026-10-16 --only collector --replay .cache/source_fixtures
+
+环境变量:
+    DATA_SOURCE_MODE                 live / record / replay（默认 live）
+    DATA_SOURCE_FIXTURES             夹具目录（默认 backend/.cache/source_fixtures）
+    DATA_SOURCE_REPLAY_LATENCY       none / recorded / 毫秒数（默认 none）
+    DATA_SOURCE_REPLAY_RATE_LIMIT    回放时是否仍走限流预算（默认 false）
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+from loguru import logger
+
+DEFAULT_FIXTURE_DIR = Path(__file__).resolve().parents[2] / ".cache" / "source_fixtures"
+
+MODES = ("live", "record", "replay")
+
+
+class FixtureMissing(LookupError):
+    """回放模式下没有对应的录制结果"""
+
+    def __init__(self, endpoint: str, key: str):
+        self.endpoint = endpoint
+        self.key = key
+        super().__init__(f"没有录制的数据源调用: {endpoint} ({key})")
+
+
+def fixture_key(args: tuple, kwargs: Dict[str, Any]) -> str:
+    """参数哈希（关键字参数按名称排序，非 JSON 类型按 str 处理）"""
+    payload = json.dumps([list(args), kwargs], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class FixtureStore:
+    """夹具目录（线程安全，写入先落临时文件再替换）"""
+
+    def __init__(
+        self,
+        mode: str = "live",
+        directory: Optional[Union[str, Path]] = None,
+        latency: str = "none",
+        rate_limited: bool = False,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"未知的数据源模式: {mode}（可选 {'/'.join(MODES)}）")
+        self.mode = mode
+        self.directory = Path(directory or DEFAULT_FIXTURE_DIR)
+        self.latency = latency
+        self.rate_limited = rate_limited
+        self.calls: Counter = Counter()
+        self.misses: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def path(self, endpoint: str, key: str) -> Path:
+        return self.directory / endpoint / f"{key}.pkl"
+
+    def record(
+        self,
+        endpoint: str,
+        args: tuple,
+        kwargs: Dict[str, Any],
+        result: Any = None,
+        error: Optional[BaseException] = None,
+        elapsed: float = 0.0,
+    ):
+        """写入一次调用（失败只记日志，不影响采集）"""
+        entry = {
+            "endpoint": endpoint,
+            "args": args,
+            "kwargs": kwargs,
+            "elapsed": round(elapsed, 4),
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        if error is not None:
+            try:
+                # 异常对象不一定能序列化 / 反序列化，不能时退化为带原类型名的 RuntimeError
+                pickle.loads(pickle.dumps(error))
+                entry["error"] = error
+            except Exception:
+                entry["error"] = RuntimeError(f"{type(error).__name__}: {error}")
+        else:
+            entry["result"] = result
+
+        path = self.path(endpoint, fixture_key(args, kwargs))
+        try:
+            data = pickle.dumps(entry)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except (OSError, pickle.PicklingError, TypeError) as e:
+            logger.warning(f"录制数据源调用失败 {endpoint}: {e}")
+            return
+        with self._lock:
+            self.calls[endpoint] += 1
+
+    def replay(self, endpoint: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """
+        返回录制结果（录制时抛出的异常原样抛出）
+
+        Raises:
+            FixtureMissing: 没有录制
+        """
+        key = fixture_key(args, kwargs)
+        try:
+            entry = pickle.loads(self.path(endpoint, key).read_bytes())
+        except FileNotFoundError:
+            with self._lock:
+                self.misses[endpoint] += 1
+            raise FixtureMissing(endpoint, key)
+
+        with self._lock:
+            self.calls[endpoint] += 1
+        delay = self._delay(entry.get("elapsed", 0.0))
+        if delay > 0:
+            time.sleep(delay)
+        if "error" in entry:
+            raise entry["error"]
+        return entry["result"]
+
+    def _delay(self, recorded: float) -> float:
+        if self.latency in ("", "none", "0"):
+            return 0.0
+        if self.latency == "recorded":
+            return recorded
+        return float(self.latency) / 1000
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "calls": dict(sorted(self.calls.items())),
+                "misses": dict(sorted(self.misses.items())),
+            }
+
+
+def iter_fixtures(directory: Optional[Union[str, Path]] = None) -> Iterator[dict]:
+    """遍历夹具目录（不含 result / error 本体，只返回元信息）"""
+    root = Path(directory or os.getenv("DATA_SOURCE_FIXTURES") or DEFAULT_FIXTURE_DIR)
+    for path in sorted(root.glob("*/*.pkl")):
+        try:
+            entry = pickle.loads(path.read_bytes())
+        except Exception as e:
+            logger.warning(f"无法读取夹具 {path}: {e}")
+            continue
+        result = entry.get("result")
+        yield {
+            "endpoint": entry.get("endpoint", path.parent.name),
+            "key": path.stem,
+            "args": entry.get("args"),
+            "kwargs": entry.get("kwargs"),
+            "error": str(entry["error"]) if "error" in entry else None,
+            "rows": len(result) if hasattr(result, "__len__") else None,
+            "elapsed": entry.get("elapsed"),
+            "recorded_at": entry.get("recorded_at"),
+            "bytes": path.stat().st_size,
+        }
+
+
+_store: Optional[FixtureStore] = None
+_store_lock = threading.Lock()
+
+
+def get_fixture_store() -> FixtureStore:
+    """当前进程的夹具目录（首次调用时按环境变量创建）"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FixtureStore(
+                    mode=os.getenv("DATA_SOURCE_MODE", "live").lower() or "live",
+                    directory=os.getenv("DATA_SOURCE_FIXTURES") or None,
+                    latency=os.getenv("DATA_SOURCE_REPLAY_LATENCY", "none").lower(),
+                    rate_limited=os.getenv("DATA_SOURCE_REPLAY_RATE_LIMIT", "false").lower() in ("1", "true", "yes"),
+                )
+                if _store.mode != "live":
+                    logger.info(f"📼 数据源{'录制' if _store.recording else '回放'}模式: {_store.directory}")
+    return _store
+
+
+def use_fixture_store(store: Optional[FixtureStore]) -> None:
+    """替换当前进程的夹具目录（基准测试用；None 恢复为按环境变量创建）"""
+    global _store
+    with _store_lock:
+        _store = store
@@ -0,0 +1,358 @@
+"""
+多数据源编排（健康度排序 + 熔断 + 对冲请求）
+
+同一份数据有多个来源时（如热门概念: Tushare / AKShare 同花顺 / AKShare 东方财富），
+原先按固定顺序逐个尝试，前一个彻底失败才换下一个，慢源失败前可能卡住好几分钟。这里:
+
+- 每个来源记录滚动（EWMA）耗时和错误率、连续失败次数
+- 按健康度排序（错误率相近时保持静态优先级），熔断中的来源跳过，冷却后放一次试探请求
+- 来源失败则立即启动下一个；来源抛出 SourceSkipped（如本次参数不适用）时直接换下一个，不计入健康度
+- 对冲（按数据集开启）: 当前来源超过自身滚动耗时的 HEDGE_LATENCY_FACTOR 倍（不低于
+  hedge_min_delay）仍未返回，就并行启动下一个，取最先返回的合格结果；还没有耗时记录的来源不对冲。
+  落败的调用通过 data_source.cancel_scope 取消，不再发起新的接口请求，结果也不计入健康度
+- 健康度写入 JSON 文件（调度进程与 API 进程共享），由 /api/ops/sources 查看
+
+Example:
+    orchestrator = SourceOrchestrator(
+        "hot_concepts",
+        [("tushare", fetch_tushare), ("akshare_ths", fetch_ths)],
+        accept=lambda result, trade_date: bool(result),
+        hedge=True,
+    )
+    source, result = orchestrator.run(trade_date)
+
+环境变量:
+    SOURCE_HEALTH_FILE           健康度文件（默认 backend/.cache/source_health.json）
+    SOURCE_BREAKER_FAILURES      连续失败多少次熔断（默认 3）
+    SOURCE_BREAKER_COOLDOWN      熔断冷却秒数（默认 600）
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from app.utils.data_source import cancel_scope
+
+DEFAULT_HEALTH_FILE = Path(__file__).resolve().parents[2] / ".cache" / "source_health.json"
+
+# EWMA 平滑系数（越大越看重最近几次）
+EWMA_ALPHA = 0.3
+
+# 对冲延迟 = 当前来源滚动耗时 × HEDGE_LATENCY_FACTOR（不低于 hedge_min_delay）
+HEDGE_LATENCY_FACTOR = 2.0
+
+# 开启对冲时，平均耗时超过 hedge_min_delay 多少倍视为慢源，排序降档
+SLOW_FACTOR = 2.0
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="source")
+_file_lock = threading.Lock()
+
+# 同名编排器（如每次新建的采集器实例）在进程内共享健康度: {name: ({来源: SourceHealth}, 锁)}
+_shared: Dict[str, Tuple[Dict[str, "SourceHealth"], threading.Lock]] = {}
+_shared_lock = threading.Lock()
+
+
+class SourceSkipped(Exception):
+    """来源不适用于本次调用（如只有当日数据的来源被用于历史日期），跳过且不计入健康度"""
+
+
+class SourcesExhausted(Exception):
+    """所有来源都失败（或熔断中）"""
+
+    def __init__(self, name: str, errors: Dict[str, str]):
+        self.errors = errors
+        detail = "; ".join(f"{key}: {error}" for key, error in errors.items()) or "没有可用来源"
+        super().__init__(f"{name} 所有数据源均失败 - {detail}")
+
+
+@dataclass
+class SourceHealth:
+    """单个来源的健康度"""
+
+    source: str
+    calls: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    error_rate: float = 0.0             # EWMA，0~1
+    latency_ms: Optional[float] = None  # EWMA
+    last_latency_ms: Optional[float] = None
+    state: str = "closed"               # closed / open / half_open
+    opened_at: Optional[float] = None
+    last_error: Optional[str] = None
+    last_success_at: Optional[str] = None
+    last_failure_at: Optional[str] = None
+
+    def record(self, ok: bool, latency: float, error: Optional[str], breaker_failures: int):
+        now = datetime.now().isoformat(timespec="seconds")
+        latency_ms = round(latency * 1000, 1)
+        self.calls += 1
+        self.last_latency_ms = latency_ms
+        self.latency_ms = latency_ms if self.latency_ms is None else round(
+            EWMA_ALPHA * latency_ms + (1 - EWMA_ALPHA) * self.latency_ms, 1
+        )
+        self.error_rate = round(EWMA_ALPHA * (0.0 if ok else 1.0) + (1 - EWMA_ALPHA) * self.error_rate, 4)
+
+        if ok:
+            self.consecutive_failures = 0
+            self.state = "closed"
+            self.opened_at = None
+            self.last_success_at = now
+            return
+
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = (error or "")[:200]
+        self.last_failure_at = now
+        if self.state == "half_open" or self.consecutive_failures >= breaker_failures:
+            self.state = "open"
+            self.opened_at = time.time()
+
+
+class SourceOrchestrator:
+    """按健康度编排多个等价数据源"""
+
+    def __init__(
+        self,
+        name: str,
+        sources: Sequence[Tuple[str, Callable[..., Any]]],
+        accept: Optional[Callable[..., bool]] = None,
+        hedge: bool = False,
+        hedge_min_delay: float = 60.0,
+        breaker_failures: Optional[int] = None,
+        breaker_cooldown: Optional[float] = None,
+        health_file: Optional[Path] = None,
+    ):
+        """
+        Args:
+            name: 编排器名称（健康度文件中的分组）
+            sources: [(来源名, 调用函数)]，顺序即静态优先级
+            accept: accept(结果, *run 的参数) 判断结果是否合格（不合格按失败处理），默认非空即合格
+            hedge: 是否对冲（当前来源明显慢于自身常态时并行启动下一个）
+            hedge_min_delay: 对冲延迟下限（秒）
+            breaker_failures: 连续失败多少次熔断
+            breaker_cooldown: 熔断冷却秒数
+            health_file: 健康度文件
+        """
+        self.name = name
+        self.sources = list(sources)
+        self.accept = accept or (lambda result, *args, **kwargs: bool(result))
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker_failures = breaker_failures or int(os.getenv("SOURCE_BREAKER_FAILURES", "3"))
+        self.breaker_cooldown = breaker_cooldown or float(os.getenv("SOURCE_BREAKER_COOLDOWN", "600"))
+        self.health_file = Path(health_file or os.getenv("SOURCE_HEALTH_FILE") or DEFAULT_HEALTH_FILE)
+        with _shared_lock:
+            if name not in _shared:
+                _shared[name] = ({}, threading.Lock())
+            self.health, self._lock = _shared[name]
+            for key, health in self._load().items():
+                self.health.setdefault(key, health)
+
+    # ==================== 健康度持久化 ====================
+
+    def _load(self) -> Dict[str, SourceHealth]:
+        saved = read_health_file(self.health_file).get(self.name, {})
+        health = {}
+        for key, _ in self.sources:
+            try:
+                health[key] = SourceHealth(**saved[key]) if key in saved else SourceHealth(key)
+            except TypeError:
+                health[key] = SourceHealth(key)
+        return health
+
+    def _save(self):
+        snapshot = self.snapshot()
+        with _file_lock:
+            try:
+                data = read_health_file(self.health_file)
+                data[self.name] = snapshot
+                self.health_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.health_file.with_suffix(".tmp")
+                tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+                os.replace(tmp, self.health_file)
+            except OSError as e:
+                logger.debug(f"写入数据源健康度失败: {e}")
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {key: asdict(health) for key, health in self.health.items()}
+
+    # ==================== 排序与熔断 ====================
+
+    def ordered(self) -> List[str]:
+        """
+        本次尝试顺序: 健康来源按（错误率档位 + 慢源降档, 静态优先级）排序，
+        冷却结束的熔断来源作为试探排在最后，冷却中的跳过
+        """
+        now = time.time()
+        ranked, probes = [], []
+        with self._lock:
+            for priority, (key, _) in enumerate(self.sources):
+                health = self.health[key]
+                if health.state == "open":
+                    if health.opened_at and now - health.opened_at >= self.breaker_cooldown:
+                        health.state = "half_open"
+                        probes.append(key)
+                    continue
+                penalty = health.error_rate
+                if self.hedge and health.latency_ms and health.latency_ms > self.hedge_min_delay * SLOW_FACTOR * 1000:
+                    penalty += 0.3
+                ranked.append((round(penalty, 1), priority, key))
+        return [key for _, _, key in sorted(ranked)] + probes
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """来源 key 启动后多少秒仍未返回就对冲（未开启对冲或还没有耗时记录时返回 None）"""
+        if not self.hedge:
+            return None
+        with self._lock:
+            latency_ms = self.health[key].latency_ms
+        if not latency_ms:
+            return None
+        return max(self.hedge_min_delay, latency_ms / 1000 * HEDGE_LATENCY_FACTOR)
+
+    # ==================== 执行 ====================
+
+    def _call(
+        self, key: str, func: Callable[..., Any], args, kwargs, cancelled: threading.Event
+    ) -> Tuple[str, Any, Optional[str]]:
+        """
+        Returns:
+            (状态 ok / failed / skipped / cancelled, 结果, 错误信息)
+        """
+        started = time.perf_counter()
+        try:
+            with cancel_scope(cancelled):
+                result = func(*args, **kwargs)
+            ok, error = bool(self.accept(result, *args, **kwargs)), None
+            if not ok:
+                error = "结果为空或不合格"
+        except SourceSkipped as e:
+            logger.info(f"⏭️ {self.name}: 跳过数据源 {key}（{e}）")
+            self._release_probes([key])
+            return "skipped", None, f"跳过: {e}"
+        except Exception as e:
+            result, ok, error = None, False, str(e)
+        latency = time.perf_counter() - started
+
+        # 对冲落败被取消的调用（可能在中途停下）不代表来源的真实表现
+        if cancelled.is_set():
+            self._release_probes([key])
+            return "cancelled", None, "已取消"
+
+        with self._lock:
+            self.health[key].record(ok, latency, error, self.breaker_failures)
+            state = self.health[key].state
+        self._save()
+        if not ok and state == "open":
+            logger.warning(f"🔌 数据源 {self.name}.{key} 熔断 {self.breaker_cooldown:.0f}s（{error}）")
+        return ("ok" if ok else "failed"), result, error
+
+    def run(self, *args, **kwargs) -> Tuple[str, Any]:
+        """
+        按健康度顺序（带对冲）取第一个合格结果
+
+        Returns:
+            (来源名, 结果)
+
+        Raises:
+            SourcesExhausted: 所有来源都失败
+        """
+        funcs = dict(self.sources)
+        queue = self.ordered()
+        if not queue:
+            raise SourcesExhausted(self.name, {})
+
+        pending: Dict[Future, Tuple[str, threading.Event]] = {}
+        errors: Dict[str, str] = {}
+        # 最近启动的来源的对冲时刻（None 不对冲）
+        hedge_at: Optional[float] = None
+
+        def launch() -> Optional[float]:
+            key = queue.pop(0)
+            logger.info(f"🔄 {self.name}: 启动数据源 {key}")
+            cancelled = threading.Event()
+            # 复制上下文: 对冲线程内的数据源调用仍计入当前采集台账步骤
+            context = contextvars.copy_context()
+            future = _executor.submit(context.run, self._call, key, funcs[key], args, kwargs, cancelled)
+            pending[future] = (key, cancelled)
+            delay = self.hedge_delay(key)
+            return time.monotonic() + delay if delay is not None else None
+
+        def running() -> str:
+            return ", ".join(key for key, _ in pending.values())
+
+        try:
+            hedge_at = launch()
+            while pending:
+                timeout = max(0.0, hedge_at - time.monotonic()) if queue and hedge_at is not None else None
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    logger.info(f"⏱️ {self.name}: {running()} 明显慢于常态，对冲启动下一个数据源")
+                    hedge_at = launch()
+                    continue
+
+                for future in done:
+                    key, _ = pending.pop(future)
+                    status, result, error = future.result()
+                    if status == "ok":
+                        if pending:
+                            logger.info(f"🏁 {self.name}: 采用 {key}，取消仍在执行的 {running()}")
+                        return key, result
+                    errors[key] = error
+                    if status == "failed":
+                        logger.warning(f"❌ {self.name}: 数据源 {key} 失败: {error}")
+
+                # 有来源失败或跳过: 不等对冲计时，立即启动下一个
+                if queue:
+                    hedge_at = launch()
+
+            raise SourcesExhausted(self.name, errors)
+        finally:
+            # 仍在执行的来源（对冲落败或出错退出）不再发起新的请求
+            for _, cancelled in pending.values():
+                cancelled.set()
+            # 未启动的试探来源恢复为熔断状态
+            self._release_probes(queue)
+
+    def _release_probes(self, unused: List[str]) -> None:
+        """
+        ordered() 已置为 half_open 但本次未启动（前面的来源已成功）、跳过或被取消的试探来源恢复为 open，
+        下次调用仍作为试探排在最后，不会被当作健康来源参与排序
+        """
+        released = False
+        with self._lock:
+            for key in unused:
+                if self.health[key].state == "half_open":
+                    self.health[key].state = "open"
+                    released = True
+        if released:
+            self._save()
+
+
+def read_health_file(path: Optional[Path] = None) -> Dict[str, Dict[str, dict]]:
+    """读取健康度文件（不存在或损坏时返回空）"""
+    path = Path(path or os.getenv("SOURCE_HEALTH_FILE") or DEFAULT_HEALTH_FILE)
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def get_source_health() -> Dict[str, Dict[str, dict]]:
+    """
+    全部编排器的健康度: 健康度文件（其他进程写入）+ 本进程内存中的最新值
+    """
+    data = read_health_file()
+    for name, (health, lock) in list(_shared.items()):
+        with lock:
+            data[name] = {key: asdict(item) for key, item in health.items()}
+    return data
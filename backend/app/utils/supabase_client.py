@@ -1,39 +1,438 @@
 """
 Supabase 客户端工具
+
+提供同步/异步两种客户端，底层 HTTP 连接统一由可调优的连接池承载
+（通过 ClientOptions.httpx_client 传入，PostgREST / Auth / Storage 共用）:
+- 连接池大小、keep-alive、HTTP/2 通过环境变量配置
+- 默认超时 + 可按调用覆盖的超时（supabase_timeout 上下文）
+- 对瞬时错误（502/503/504、Cloudflare 52x、连接重置）自动重试
+
+异步客户端绑定创建它的事件循环，换了事件循环（如测试中多次启动应用）时自动重建。
+
+环境变量:
+    DB_POOL_SIZE              keep-alive 连接数（默认 10）
+    DB_MAX_OVERFLOW           超出 keep-alive 的额外连接数（默认 20）
+    SUPABASE_TIMEOUT          读写超时秒数（默认 30）
+    SUPABASE_CONNECT_TIMEOUT  建连超时秒数（默认 5）
+    SUPABASE_MAX_RETRIES      瞬时错误重试次数（默认 2）
+    SUPABASE_HTTP2            是否启用 HTTP/2（默认在安装 h2 时启用）
 """
 
+import asyncio
+import importlib.util
 import os
-from supabase import create_client, Client
-from typing import Optional
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Set
+
+import httpx
+from loguru import logger
+from supabase import Client, create_client
+
+from app.utils.metrics import record_query, response_row_count
+
+
+# 可重试的状态码（网关错误 / Cloudflare 源站错误）
+RETRY_STATUS_CODES = {502, 503, 504, 520, 521, 522, 523, 524}
+
+# 幂等方法，响应异常时可以安全重发
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "PATCH"}
+
+# 请求尚未发出即失败的异常，任何方法都可以重试
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# 请求可能已发出的连接异常，仅幂等请求重试
+TRANSIENT_ERRORS = (
+    httpx.ReadError,
+    httpx.WriteError,
+    httpx.RemoteProtocolError,
+    httpx.ReadTimeout,
+)
+
+_call_timeout: ContextVar[Optional[float]] = ContextVar("supabase_call_timeout", default=None)
+
+# 正在关闭的异步连接池（持有引用，避免关闭任务在完成前被回收）
+_closing: Set[asyncio.Task] = set()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 需要 h2 包，未安装时自动降级为 HTTP/1.1"""
+    available = importlib.util.find_spec("h2") is not None
+    flag = os.getenv("SUPABASE_HTTP2")
+    if flag is None:
+        return available
+    enabled = flag.strip().lower() in ("1", "true", "yes", "on")
+    if enabled and not available:
+        logger.warning("SUPABASE_HTTP2 已开启但未安装 h2，使用 HTTP/1.1")
+        return False
+    return enabled
+
+
+@contextmanager
+def supabase_timeout(seconds: float):
+    """
+    在上下文内覆盖 Supabase 请求超时（对当前线程/协程生效）
+
+    Example:
+        with supabase_timeout(120):
+            supabase.table("ths_concept_members").select("*").execute()
+    """
+    token = _call_timeout.set(seconds)
+    try:
+        yield
+    finally:
+        _call_timeout.reset(token)
+
+
+def _is_retryable_request(request: httpx.Request) -> bool:
+    """判断请求在收到响应后是否可以重发"""
+    if request.method in IDEMPOTENT_METHODS:
+        return True
+    # PostgREST upsert（Prefer: resolution=merge-duplicates）重复执行结果一致
+    return request.method == "POST" and "resolution=" in request.headers.get("prefer", "")
+
+
+def _backoff(attempt: int) -> float:
+    return min(0.2 * (2 ** attempt), 2.0) + random.uniform(0, 0.1)
+
+
+def _apply_call_timeout(request: httpx.Request) -> None:
+    seconds = _call_timeout.get()
+    if seconds is not None:
+        request.extensions["timeout"] = httpx.Timeout(seconds).as_dict()
+
+
+class RetryTransport(httpx.BaseTransport):
+    """带瞬时错误重试的同步连接池 Transport（线程安全）"""
+
+    def __init__(self, transport: httpx.BaseTransport, max_retries: int = 2):
+        self._transport = transport
+        self.max_retries = max_retries
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        _apply_call_timeout(request)
+        start = time.perf_counter()
+        retries = [0]
+        response = None
+        try:
+            response = self._send(request, retries)
+            return response
+        finally:
+            rows = response_row_count(response) if response is not None else 0
+            record_query((time.perf_counter() - start) * 1000, rows, retries[0])
+
+    def _send(self, request: httpx.Request, retries: list) -> httpx.Response:
+        retryable = _is_retryable_request(request)
+        attempt = 0
+        while True:
+            try:
+                response = self._transport.handle_request(request)
+            except CONNECT_ERRORS as e:
+                error = e
+            except TRANSIENT_ERRORS as e:
+                if not retryable:
+                    raise
+                error = e
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or not retryable or attempt >= self.max_retries:
+                    return response
+                response.close()
+                error = None
+
+            if attempt >= self.max_retries:
+                raise error
+            attempt += 1
+            retries[0] = attempt
+            reason = type(error).__name__ if error else f"HTTP {response.status_code}"
+            logger.debug(f"Supabase 请求重试 {attempt}/{self.max_retries}: {request.method} {request.url.path} ({reason})")
+            time.sleep(_backoff(attempt))
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """带瞬时错误重试的异步连接池 Transport"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_retries: int = 2):
+        self._transport = transport
+        self.max_retries = max_retries
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        _apply_call_timeout(request)
+        start = time.perf_counter()
+        retries = [0]
+        response = None
+        try:
+            response = await self._send(request, retries)
+            return response
+        finally:
+            rows = response_row_count(response) if response is not None else 0
+            record_query((time.perf_counter() - start) * 1000, rows, retries[0])
+
+    async def _send(self, request: httpx.Request, retries: list) -> httpx.Response:
+        retryable = _is_retryable_request(request)
+        attempt = 0
+        while True:
+            try:
+                response = await self._transport.handle_async_request(request)
+            except CONNECT_ERRORS as e:
+                error = e
+            except TRANSIENT_ERRORS as e:
+                if not retryable:
+                    raise
+                error = e
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or not retryable or attempt >= self.max_retries:
+                    return response
+                await response.aclose()
+                error = None
+
+            if attempt >= self.max_retries:
+                raise error
+            attempt += 1
+            retries[0] = attempt
+            reason = type(error).__name__ if error else f"HTTP {response.status_code}"
+            logger.debug(f"Supabase 请求重试 {attempt}/{self.max_retries}: {request.method} {request.url.path} ({reason})")
+            await asyncio.sleep(_backoff(attempt))
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
 
 
 class SupabaseClient:
-    """Supabase 客户端单例类"""
+    """Supabase 客户端工厂（线程安全单例，同步/异步客户端共用配置）"""
 
     _instance: Optional[Client] = None
+    _async_instance = None
+    _http_client: Optional[httpx.Client] = None
+    _async_http_client: Optional[httpx.AsyncClient] = None
+    # 异步客户端及其初始化锁所属的事件循环
+    _async_loop: Optional[asyncio.AbstractEventLoop] = None
+    _lock = threading.Lock()
+    _async_lock: Optional[asyncio.Lock] = None
+    _async_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+    # 替换底层 Transport（基准测试 / 本地假 PostgREST 使用）
+    _transport_override: Optional[httpx.BaseTransport] = None
+
+    @staticmethod
+    def _get_credentials() -> tuple:
+        url = os.getenv("SUPABASE_URL")
+        key = os.getenv("SUPABASE_KEY")
+
+        if not url or url == "your_supabase_url":
+            raise ValueError("SUPABASE_URL 未配置或配置错误")
+
+        if not key or key == "your_service_role_key":
+            raise ValueError("SUPABASE_KEY 未配置或配置错误")
+
+        return url, key
+
+    @staticmethod
+    def _pool_limits() -> httpx.Limits:
+        pool_size = _env_int("DB_POOL_SIZE", 10)
+        max_overflow = _env_int("DB_MAX_OVERFLOW", 20)
+        return httpx.Limits(
+            max_connections=pool_size + max_overflow,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=_env_float("SUPABASE_KEEPALIVE_EXPIRY", 30.0),
+        )
+
+    @staticmethod
+    def _timeout() -> httpx.Timeout:
+        return httpx.Timeout(
+            _env_float("SUPABASE_TIMEOUT", 30.0),
+            connect=_env_float("SUPABASE_CONNECT_TIMEOUT", 5.0),
+        )
+
+    @staticmethod
+    def _client_options(http_client: httpx.Client):
+        try:
+            from supabase import ClientOptions
+        except ImportError:
+            from supabase.lib.client_options import ClientOptions
+
+        return ClientOptions(httpx_client=http_client)
+
+    @staticmethod
+    def _async_client_options(http_client: httpx.AsyncClient):
+        from supabase import AsyncClientOptions
+
+        return AsyncClientOptions(httpx_client=http_client)
+
+    @classmethod
+    def _build_transport(cls) -> httpx.BaseTransport:
+        base = cls._transport_override or httpx.HTTPTransport(limits=cls._pool_limits(), http2=_http2_enabled())
+        return RetryTransport(base, max_retries=_env_int("SUPABASE_MAX_RETRIES", 2))
+
+    @classmethod
+    def _build_async_transport(cls) -> httpx.AsyncBaseTransport:
+        base = cls._transport_override
+        if not isinstance(base, httpx.AsyncBaseTransport):
+            base = httpx.AsyncHTTPTransport(limits=cls._pool_limits(), http2=_http2_enabled())
+        return AsyncRetryTransport(base, max_retries=_env_int("SUPABASE_MAX_RETRIES", 2))
+
+    @classmethod
+    def _build_http_client(cls) -> httpx.Client:
+        return httpx.Client(transport=cls._build_transport(), timeout=cls._timeout(), follow_redirects=True)
+
+    @classmethod
+    def _build_async_http_client(cls) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=cls._build_async_transport(), timeout=cls._timeout(), follow_redirects=True)
 
     @classmethod
     def get_client(cls) -> Client:
         """
-        获取 Supabase 客户端实例（单例模式）
+        获取同步 Supabase 客户端（单例，可在线程池中共享）
 
         Returns:
             Supabase 客户端实例
         """
         if cls._instance is None:
-            url = os.getenv("SUPABASE_URL")
-            key = os.getenv("SUPABASE_KEY")
+            with cls._lock:
+                if cls._instance is None:
+                    url, key = cls._get_credentials()
+                    http_client = cls._build_http_client()
+                    cls._instance = create_client(url, key, options=cls._client_options(http_client))
+                    cls._http_client = http_client
+                    limits = cls._pool_limits()
+                    logger.info(
+                        f"✅ Supabase 客户端已初始化: {url} "
+                        f"(连接池 {limits.max_keepalive_connections}/{limits.max_connections}, "
+                        f"HTTP/2={'on' if _http2_enabled() else 'off'})"
+                    )
 
-            if not url or url == "your_supabase_url":
-                raise ValueError("SUPABASE_URL 未配置或配置错误")
+        return cls._instance
 
-            if not key or key == "your_service_role_key":
-                raise ValueError("SUPABASE_KEY 未配置或配置错误")
+    @classmethod
+    def _loop_lock(cls, loop: asyncio.AbstractEventLoop) -> asyncio.Lock:
+        """事件循环内的初始化锁（在线程锁内创建，并发的首次调用拿到同一把锁）"""
+        with cls._lock:
+            if cls._async_lock is None or cls._async_lock_loop is not loop:
+                cls._async_lock = asyncio.Lock()
+                cls._async_lock_loop = loop
+            return cls._async_lock
 
-            cls._instance = create_client(url, key)
-            print(f"✅ Supabase 客户端已初始化: {url}")
+    @classmethod
+    async def get_async_client(cls):
+        """
+        获取异步 Supabase 客户端（单例，绑定当前事件循环）
 
-        return cls._instance
+        Returns:
+            AsyncClient 实例
+        """
+        loop = asyncio.get_running_loop()
+        if cls._async_instance is None or cls._async_loop is not loop:
+            async with cls._loop_lock(loop):
+                if cls._async_instance is None or cls._async_loop is not loop:
+                    from supabase import acreate_client
+
+                    # 连接池不能跨事件循环复用，先关闭旧循环上的
+                    if cls._async_http_client is not None:
+                        _close_async_client(cls._async_http_client, cls._async_loop)
+                    url, key = cls._get_credentials()
+                    http_client = cls._build_async_http_client()
+                    cls._async_instance = await acreate_client(url, key, options=cls._async_client_options(http_client))
+                    cls._async_http_client = http_client
+                    cls._async_loop = loop
+                    logger.info(f"✅ Supabase 异步客户端已初始化: {url}")
+
+        return cls._async_instance
+
+    @classmethod
+    def use_transport(cls, transport: Optional[httpx.BaseTransport]) -> None:
+        """
+        指定客户端的底层 Transport（None 恢复默认连接池）
+
+        重试和查询统计仍然生效，仅替换真实的网络层；Transport 同时实现
+        httpx.AsyncBaseTransport 时异步客户端也使用它
+        """
+        cls.reset()
+        cls._transport_override = transport
+
+    @classmethod
+    def _detach(cls) -> tuple:
+        """清空单例，返回待关闭的连接池"""
+        with cls._lock:
+            detached = (cls._http_client, cls._async_http_client, cls._async_loop)
+            cls._instance = None
+            cls._http_client = None
+            cls._async_instance = None
+            cls._async_http_client = None
+            cls._async_loop = None
+            cls._async_lock = None
+            cls._async_lock_loop = None
+        return detached
+
+    @classmethod
+    def reset(cls) -> None:
+        """关闭连接池并清空单例（配置变更或测试时使用）"""
+        http_client, async_http_client, loop = cls._detach()
+        if http_client is not None:
+            http_client.close()
+        if async_http_client is not None:
+            _close_async_client(async_http_client, loop)
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """在事件循环内关闭连接池并清空单例（应用关闭时使用）"""
+        http_client, async_http_client, loop = cls._detach()
+        if http_client is not None:
+            http_client.close()
+        if async_http_client is not None:
+            if loop is asyncio.get_running_loop():
+                await async_http_client.aclose()
+            else:
+                _close_async_client(async_http_client, loop)
+
+
+def _closed(task: asyncio.Task) -> None:
+    _closing.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug(f"关闭 Supabase 异步连接池失败: {task.exception()}")
+
+
+def _close_async_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """
+    在异步连接池所属的事件循环上关闭它
+
+    事件循环已关闭时连接随之失效，无需处理；正在运行时投递关闭任务；未运行时就地运行到完成
+    """
+    if loop is None or loop.is_closed():
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+
+    try:
+        if running is loop:
+            task = loop.create_task(client.aclose())
+            _closing.add(task)
+            task.add_done_callback(_closed)
+        elif loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            loop.run_until_complete(client.aclose())
+    except Exception as e:
+        logger.debug(f"关闭 Supabase 异步连接池失败: {e}")
 
 
 # 导出便捷函数
@@ -45,3 +444,13 @@ def get_supabase() -> Client:
         Supabase 客户端实例
     """
     return SupabaseClient.get_client()
+
+
+async def get_async_supabase():
+    """
+    获取异步 Supabase 客户端
+
+    Returns:
+        Supabase AsyncClient 实例
+    """
+    return await SupabaseClient.get_async_client()
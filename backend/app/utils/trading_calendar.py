@@ -0,0 +1,254 @@
+"""
+A股多年份交易日历
+
+交易日数据保存在 app/data/trade_calendar.json（上交所日历），可通过 Tushare trade_cal 刷新：
+
+    python -m app.utils.trading_calendar --refresh --start 2023-01-01 --end 2026-12-31
+
+内存中以「有序数组 + 日期→下标字典」保存：
+- 交易日判断、前后交易日、N日偏移均为 O(1)（非交易日输入走一次二分查找）
+- 区间查询为两次二分查找后切片
+- 所有查询都不访问网络或数据库
+"""
+
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+
+CALENDAR_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data", "trade_calendar.json"
+)
+
+
+class TradingCalendar:
+    """A股交易日历（多年份）"""
+
+    def __init__(self, trading_days: List[str], start_date: str = None, end_date: str = None):
+        """
+        Args:
+            trading_days: 交易日列表 YYYY-MM-DD（无需有序）
+            start_date: 日历覆盖的起始日期，默认取首个交易日
+            end_date: 日历覆盖的结束日期，默认取最后一个交易日
+        """
+        self.days: List[str] = sorted(set(trading_days))
+        self.index: Dict[str, int] = {d: i for i, d in enumerate(self.days)}
+        self.start_date = start_date or (self.days[0] if self.days else None)
+        self.end_date = end_date or (self.days[-1] if self.days else None)
+
+    @classmethod
+    def from_file(cls, path: str = CALENDAR_FILE) -> "TradingCalendar":
+        """从日历文件加载"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            data.get("trading_days", []),
+            start_date=data.get("start_date"),
+            end_date=data.get("end_date"),
+        )
+
+    def covers(self, date: str) -> bool:
+        """日期是否在日历覆盖范围内（范围外的查询结果不可靠）"""
+        return bool(self.days) and self.start_date <= date <= self.end_date
+
+    def is_trading_day(self, date: str) -> bool:
+        """判断指定日期是否为交易日"""
+        return date in self.index
+
+    def get_previous_trading_day(self, date: str) -> Optional[str]:
+        """
+        获取指定日期的前一个交易日（不含当天）
+
+        Returns:
+            前一个交易日，超出日历范围返回 None
+        """
+        idx = self.index.get(date)
+        if idx is None:
+            idx = bisect_left(self.days, date)
+        return self.days[idx - 1] if idx > 0 else None
+
+    def get_next_trading_day(self, date: str) -> Optional[str]:
+        """
+        获取指定日期的下一个交易日（不含当天）
+
+        Returns:
+            下一个交易日，超出日历范围返回 None
+        """
+        idx = self.index.get(date)
+        idx = idx + 1 if idx is not None else bisect_right(self.days, date)
+        return self.days[idx] if idx < len(self.days) else None
+
+    def get_latest_trading_day(self, before_date: str = None) -> Optional[str]:
+        """
+        获取不晚于基准日期的最近交易日
+
+        Args:
+            before_date: 基准日期 YYYY-MM-DD，默认为今天
+        """
+        if not before_date:
+            before_date = datetime.now().strftime("%Y-%m-%d")
+        if before_date in self.index:
+            return before_date
+        idx = bisect_left(self.days, before_date)
+        return self.days[idx - 1] if idx > 0 else None
+
+    def offset(self, date: str, n: int) -> Optional[str]:
+        """
+        按交易日偏移
+
+        Args:
+            date: 基准日期 YYYY-MM-DD
+            n: 偏移量，正数向后，负数向前。offset(d, -1) 等价于前一交易日，
+               offset(d, 1) 等价于下一交易日，offset(d, 0) 等价于不晚于 d 的最近交易日
+
+        Returns:
+            偏移后的交易日，超出日历范围返回 None
+        """
+        idx = self.index.get(date)
+        if idx is not None:
+            target = idx + n
+        else:
+            # 非交易日: idx 指向其后的第一个交易日
+            idx = bisect_left(self.days, date)
+            target = idx + n if n < 0 else idx + n - 1
+        if 0 <= target < len(self.days):
+            return self.days[target]
+        return None
+
+    def get_trading_days(self, start_date: str = None, end_date: str = None) -> List[str]:
+        """
+        获取区间内的交易日（闭区间，升序）
+        """
+        lo = bisect_left(self.days, start_date) if start_date else 0
+        hi = bisect_right(self.days, end_date) if end_date else len(self.days)
+        return self.days[lo:hi]
+
+    def get_recent_trading_days(self, end_date: str, count: int) -> List[str]:
+        """
+        获取截至 end_date（含）的最近 count 个交易日（升序）
+        """
+        hi = bisect_right(self.days, end_date)
+        return self.days[max(0, hi - count):hi]
+
+
+def fetch_trade_cal_from_tushare(start_date: str, end_date: str, exchange: str = "SSE") -> List[str]:
+    """
+    从 Tushare trade_cal 拉取交易日
+
+    Args:
+        start_date: 开始日期 YYYY-MM-DD
+        end_date: 结束日期 YYYY-MM-DD
+
+    Returns:
+        交易日列表 YYYY-MM-DD（升序）
+    """
+    import tushare as ts
+
+    token = os.getenv("TUSHARE_TOKEN")
+    if not token:
+        raise ValueError("TUSHARE_TOKEN 未配置")
+
+    pro = ts.pro_api(token)
+    http_url = os.getenv("TUSHARE_HTTP_URL")
+    if http_url:
+        pro._DataApi__token = token
+        pro._DataApi__http_url = http_url
+
+    df = pro.trade_cal(
+        exchange=exchange,
+        start_date=start_date.replace("-", ""),
+        end_date=end_date.replace("-", ""),
+        is_open="1",
+    )
+    if df is None or df.empty:
+        raise ValueError(f"trade_cal 未返回数据: {start_date} ~ {end_date}")
+
+    return sorted(
+        f"{d[:4]}-{d[4:6]}-{d[6:8]}" for d in df["cal_date"].astype(str)
+    )
+
+
+def refresh_calendar_file(start_date: str, end_date: str, path: str = CALENDAR_FILE) -> int:
+    """
+    用 Tushare trade_cal 刷新日历文件，区间外的已有交易日会保留
+
+    Returns:
+        刷新后日历中的交易日总数
+    """
+    fetched = fetch_trade_cal_from_tushare(start_date, end_date)
+
+    existing = {"trading_days": [], "start_date": start_date, "end_date": end_date}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+
+    kept = [d for d in existing.get("trading_days", []) if not start_date <= d <= end_date]
+    days = sorted(set(kept) | set(fetched))
+
+    data = {
+        "exchange": "SSE",
+        "source": "tushare.trade_cal",
+        "start_date": min(existing.get("start_date") or start_date, start_date),
+        "end_date": max(existing.get("end_date") or end_date, end_date),
+        "trading_days": days,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+
+    reload_trading_calendar()
+    logger.info(f"✅ 交易日历已刷新: {data['start_date']} ~ {data['end_date']}, 共 {len(days)} 个交易日")
+    return len(days)
+
+
+# 全局单例
+_calendar: Optional[TradingCalendar] = None
+_calendar_lock = threading.Lock()
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """获取交易日历单例（首次调用时加载日历文件）"""
+    global _calendar
+    if _calendar is None:
+        with _calendar_lock:
+            if _calendar is None:
+                _calendar = TradingCalendar.from_file()
+                logger.debug(
+                    f"交易日历已加载: {_calendar.start_date} ~ {_calendar.end_date}, "
+                    f"{len(_calendar.days)} 个交易日"
+                )
+    return _calendar
+
+
+def reload_trading_calendar() -> TradingCalendar:
+    """重新加载日历文件"""
+    global _calendar
+    with _calendar_lock:
+        _calendar = TradingCalendar.from_file()
+    return _calendar
+
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="A股交易日历")
+    parser.add_argument("--refresh", action="store_true", help="从 Tushare trade_cal 刷新日历文件")
+    parser.add_argument("--start", default=f"{datetime.now().year - 1}-01-01", help="开始日期 YYYY-MM-DD")
+    parser.add_argument("--end", default=f"{datetime.now().year}-12-31", help="结束日期 YYYY-MM-DD")
+    args = parser.parse_args()
+
+    if args.refresh:
+        refresh_calendar_file(args.start, args.end)
+
+    calendar = get_trading_calendar()
+    days = calendar.get_trading_days(args.start, args.end)
+    print(f"日历覆盖: {calendar.start_date} ~ {calendar.end_date}")
+    print(f"{args.start} ~ {args.end}: {len(days)} 个交易日")
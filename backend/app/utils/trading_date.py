@@ -1,23 +1,27 @@
 """
 交易日期工具模块
 提供获取最近交易日的函数，避免使用系统当前时间导致的日期错误
-使用2025年交易日日历确保准确性
+基于多年份交易日历（app/utils/trading_calendar.py），查询不访问数据库
 """
 
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import List, Optional
 from loguru import logger
 
+from app.utils.trading_calendar import get_trading_calendar
+
+
+def _weekday_fallback(date_str: str, step: int) -> str:
+    """日历范围外的兜底：按工作日推算（不考虑节假日）"""
+    dt = datetime.strptime(date_str, "%Y-%m-%d")
+    while dt.weekday() >= 5:
+        dt += timedelta(days=step)
+    return dt.strftime("%Y-%m-%d")
+
 
 def get_latest_trading_date() -> str:
     """
-    获取最近的交易日期（使用2025年交易日日历）
-
-    逻辑:
-    1. 优先使用2025年交易日日历计算最近交易日
-    2. 从数据库获取已有数据的最新日期作为辅助验证
-    3. 如果日历不可用，回退到数据库日期
-    4. 最后回退到系统当前日期
+    获取最近的交易日期（不晚于今天）
 
     Returns:
         最近交易日期 YYYY-MM-DD
@@ -26,57 +30,17 @@ def get_latest_trading_date() -> str:
     - 在非交易日（周末/节假日）运行采集器时，自动获取上一个交易日的日期
     - 确保数据库中保存的是实际的交易日期，而不是系统当前日期
     """
-    # 方法1: 使用2025年交易日日历（最准确）
-    try:
-        import sys
-        import os
-        # 添加backend目录到path
-        backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        if backend_dir not in sys.path:
-            sys.path.insert(0, backend_dir)
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    calendar = get_trading_calendar()
 
-        from trading_calendar_2025 import get_calendar
-        calendar = get_calendar()
+    if calendar.covers(current_date):
+        return calendar.get_latest_trading_day(current_date)
 
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        latest_trading_day = calendar.get_latest_trading_day(current_date)
-
-        if latest_trading_day:
-            logger.debug(f"从交易日日历获取最近交易日: {latest_trading_day}")
-            return latest_trading_day
-
-    except Exception as e:
-        logger.debug(f"交易日日历获取失败: {e}")
-
-    # 方法2: 从数据库获取最新日期（备用）
-    latest_dates = []
-    try:
-        from app.utils.supabase_client import get_supabase
-        supabase = get_supabase()
-
-        # 检查多个表的最新日期
-        tables_to_check = ['hot_concepts', 'market_sentiment', 'limit_stocks_detail', 'market_index']
-        for table in tables_to_check:
-            try:
-                result = supabase.table(table).select('trade_date').order('trade_date', desc=True).limit(1).execute()
-                if result.data:
-                    db_date = result.data[0]['trade_date']
-                    latest_dates.append(db_date)
-                    logger.debug(f"从 {table} 表获取最新日期: {db_date}")
-            except Exception as e:
-                logger.debug(f"从 {table} 表获取日期失败: {e}")
-
-        if latest_dates:
-            latest_date = max(latest_dates)
-            logger.debug(f"从数据库获取最近交易日: {latest_date}")
-            return latest_date
-
-    except Exception as e:
-        logger.debug(f"数据库查询失败: {e}")
-
-    # 回退方案：使用系统当前日期
-    fallback_date = datetime.now().strftime("%Y-%m-%d")
-    logger.warning(f"所有数据源都失败，使用系统当前日期: {fallback_date}")
+    fallback_date = _weekday_fallback(current_date, -1)
+    logger.warning(
+        f"⚠️ {current_date} 超出交易日历范围({calendar.start_date} ~ {calendar.end_date})，"
+        f"按工作日推算: {fallback_date}，请刷新交易日历"
+    )
     return fallback_date
 
 
@@ -90,49 +54,56 @@ def get_previous_trading_date(current_date: str) -> Optional[str]:
     Returns:
         前一个交易日期 YYYY-MM-DD，失败返回 None
     """
-    # 方法1: 使用交易日日历
-    try:
-        import sys
-        import os
-        # 添加backend目录到path
-        backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        if backend_dir not in sys.path:
-            sys.path.insert(0, backend_dir)
-
-        from trading_calendar_2025 import get_calendar
-        calendar = get_calendar()
-
+    calendar = get_trading_calendar()
+    if calendar.covers(current_date):
         previous_day = calendar.get_previous_trading_day(current_date)
         if previous_day:
-            logger.debug(f"从交易日日历获取前一交易日: {current_date} -> {previous_day}")
             return previous_day
 
-    except Exception as e:
-        logger.debug(f"交易日日历获取失败: {e}")
-
-    # 方法2: 从数据库查询前一个交易日
     try:
-        from app.utils.supabase_client import get_supabase
-        supabase = get_supabase()
-
-        # 从limit_stocks_detail表查询小于当前日期的最大日期
-        result = supabase.table('limit_stocks_detail')\
-            .select('trade_date')\
-            .lt('trade_date', current_date)\
-            .order('trade_date', desc=True)\
-            .limit(1)\
-            .execute()
-
-        if result.data and len(result.data) > 0:
-            previous_date = result.data[0]['trade_date']
-            logger.debug(f"从数据库获取前一交易日: {current_date} -> {previous_date}")
-            return previous_date
-
-    except Exception as e:
-        logger.debug(f"数据库查询前一交易日失败: {e}")
-
-    logger.warning(f"无法获取 {current_date} 的前一交易日")
-    return None
+        dt = datetime.strptime(current_date, "%Y-%m-%d") - timedelta(days=1)
+    except ValueError:
+        logger.warning(f"无法获取 {current_date} 的前一交易日")
+        return None
+
+    fallback_date = _weekday_fallback(dt.strftime("%Y-%m-%d"), -1)
+    logger.warning(f"⚠️ {current_date} 超出交易日历范围，按工作日推算前一交易日: {fallback_date}")
+    return fallback_date
+
+
+def get_next_trading_date(current_date: str) -> Optional[str]:
+    """
+    获取指定日期的下一个交易日
+
+    Args:
+        current_date: 当前日期 YYYY-MM-DD
+
+    Returns:
+        下一个交易日期 YYYY-MM-DD，超出日历范围返回 None
+    """
+    calendar = get_trading_calendar()
+    if not calendar.covers(current_date):
+        return None
+    return calendar.get_next_trading_day(current_date)
+
+
+def get_trading_dates(start_date: str, end_date: str) -> List[str]:
+    """
+    获取区间内的交易日（闭区间，升序）
+    """
+    return get_trading_calendar().get_trading_days(start_date, end_date)
+
+
+def offset_trading_date(date_str: str, n: int) -> Optional[str]:
+    """
+    按交易日偏移，n 为负数向前、正数向后
+    """
+    return get_trading_calendar().offset(date_str, n)
+
+
+def is_trading_date(date_str: str) -> bool:
+    """判断是否为交易日"""
+    return get_trading_calendar().is_trading_day(date_str)
 
 
 def format_date_for_akshare(date_str: str) -> str:
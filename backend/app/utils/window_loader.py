@@ -0,0 +1,125 @@
+"""
+多日窗口加载
+
+环比 / 前几日对比类接口原先先查当日、再 .lt(...).limit(N) 查前几日，一个接口 2~4 次往返。
+这里按交易日历算出窗口起点，一条查询取回 [起点, end_date] 内的全部行，再按日期切分给各个消费方:
+
+    window = load_window("market_sentiment", trade_date, days=3)
+    today = window.row_on(trade_date)          # 当日行（没有返回 None）
+    prev_rows = window.before(trade_date, 2)   # 前两个有数据的交易日（倒序）
+
+    window = load_window("market_index", trade_date, days=2, key_column="index_code")
+    today_rows = window.rows_on(trade_date)
+
+窗口多取 WINDOW_SLACK 个交易日余量，个别交易日缺数据时仍能取到前一个有数据的交易日，
+语义与原先的 .lt(...).limit(N) 一致。日历未覆盖的日期退回按行数倒序取。
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from app.utils.supabase_client import get_supabase
+from app.utils.trading_calendar import get_trading_calendar
+
+# 窗口额外多取的交易日数（容忍个别交易日缺数据）
+WINDOW_SLACK = 3
+
+
+@dataclass
+class DayWindow:
+    """按交易日分组的多日数据（日期升序）"""
+
+    end_date: str
+    rows: List[dict]
+    key_column: Optional[str] = None
+    _by_date: Dict[str, List[dict]] = field(init=False, repr=False)
+    dates: List[str] = field(init=False)
+
+    def __post_init__(self):
+        self._by_date = {}
+        for row in self.rows:
+            self._by_date.setdefault(row["trade_date"], []).append(row)
+        self.dates = sorted(self._by_date)
+
+    def __bool__(self) -> bool:
+        return bool(self.rows)
+
+    def rows_on(self, trade_date: str) -> List[dict]:
+        """某日的全部行（多指数等按 key_column 分组的表）"""
+        return self._by_date.get(trade_date, [])
+
+    def row_on(self, trade_date: str) -> Optional[dict]:
+        """某日的单行（market_sentiment 等每日一行的表）"""
+        rows = self._by_date.get(trade_date)
+        return rows[0] if rows else None
+
+    def previous_date(self, trade_date: str, n: int = 1) -> Optional[str]:
+        """trade_date 之前第 n 个有数据的交易日"""
+        idx = bisect_left(self.dates, trade_date) - n
+        return self.dates[idx] if idx >= 0 else None
+
+    def before(self, trade_date: str, count: int) -> List[dict]:
+        """trade_date 之前最近 count 个有数据交易日的单行（按日期倒序）"""
+        hi = bisect_left(self.dates, trade_date)
+        return [self._by_date[d][0] for d in reversed(self.dates[max(0, hi - count):hi])]
+
+    def by_key(self, trade_date: str) -> Dict[Any, dict]:
+        """某日的行按 key_column 索引"""
+        return {row[self.key_column]: row for row in self.rows_on(trade_date)}
+
+
+def load_window(
+    table: str,
+    end_date: str,
+    days: int,
+    columns: str = "*",
+    key_column: Optional[str] = None,
+    keys: Optional[Iterable[Any]] = None,
+    filters: Optional[Dict[str, Union[str, int, bool]]] = None,
+    group_size: int = 1,
+) -> DayWindow:
+    """
+    一条查询加载截至 end_date（含）的最近 days 个交易日
+
+    Args:
+        table: 表名（需有 trade_date 列）
+        end_date: 窗口截止日期
+        days: 交易日数（含 end_date）
+        columns: select 列，需包含 trade_date（及 key_column）
+        key_column: 每日多行时的分组列（如 index_code）
+        keys: 只取这些 key_column 值
+        filters: 其他等值过滤
+        group_size: 每日行数估计（日历未覆盖时按行数截取用）
+
+    Returns:
+        DayWindow，最多包含 days 个有数据的交易日
+    """
+    query = get_supabase().table(table).select(columns).lte("trade_date", end_date)
+    if key_column and keys is not None:
+        query = query.in_(key_column, list(keys))
+    for column, value in (filters or {}).items():
+        query = query.eq(column, value)
+
+    calendar = get_trading_calendar()
+    recent = calendar.get_recent_trading_days(end_date, days + WINDOW_SLACK) if calendar.covers(end_date) else []
+
+    if recent and calendar.covers(recent[0]):
+        query = query.gte("trade_date", recent[0]).order("trade_date")
+        if key_column:
+            query = query.order(key_column)
+        rows = query.execute().data or []
+    else:
+        query = query.order("trade_date", desc=True)
+        if key_column:
+            query = query.order(key_column, desc=True)  # 反转后为升序
+        rows = query.limit(days * group_size).execute().data or []
+        rows.reverse()
+
+    # 只保留最近 days 个有数据的交易日
+    dates = sorted({row["trade_date"] for row in rows})
+    if len(dates) > days:
+        start = dates[-days]
+        rows = [row for row in rows if row["trade_date"] >= start]
+
+    return DayWindow(end_date=end_date, rows=rows, key_column=key_column)
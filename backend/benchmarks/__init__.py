@@ -0,0 +1,3 @@
+"""
+离线基准测试（内存版 PostgREST + 合成/录制数据）
+"""
@@ -0,0 +1,426 @@
+"""
+内存版 PostgREST（基准测试用）
+
+以 httpx Transport 的形式实现 PostgREST 的 HTTP 协议子集，挂到 SupabaseClient 上后，
+业务代码使用真实的 supabase-py 查询构建器，请求全部在进程内完成:
+
+- GET/HEAD: select 列、过滤（eq/neq/gt/gte/lt/lte/like/ilike/in/is/cs，支持 not. 前缀）、
+  or/and 逻辑组合、order（asc/desc/nullsfirst/nullslast）、limit/offset、Range 头、
+  Prefer: count=exact|planned|estimated、单对象 Accept 头
+- POST: insert / upsert（on_conflict + Prefer: resolution=merge-duplicates|ignore-duplicates）
+- PATCH: update
+- DELETE: delete
+- /rpc/*: 返回 404（调用方会走回退逻辑）
+- 与 Supabase 一致，单次查询最多返回 max_rows 行（默认 1000）
+
+可选的 latency_ms 模拟网络往返，用于放大 N+1 查询的影响。
+"""
+
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+
+REST_PREFIX = "/rest/v1/"
+
+
+def _split_top_level(s: str) -> List[str]:
+    """按顶层逗号切分（忽略括号和双引号内的逗号）"""
+    parts, depth, quoted, buf = [], 0, False, []
+    for ch in s:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            parts.append("".join(buf))
+            buf = []
+        else:
+            buf.append(ch)
+    if buf:
+        parts.append("".join(buf))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"')
+    return value
+
+
+def _coerce(raw: str, sample: Any) -> Any:
+    """按行内实际值的类型转换过滤值"""
+    if isinstance(sample, bool):
+        return raw.lower() == "true"
+    if isinstance(sample, (int, float)):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+def _like_to_regex(pattern: str, ignore_case: bool) -> re.Pattern:
+    regex = "".join(
+        ".*" if ch in "*%" else "." if ch == "_" else re.escape(ch) for ch in pattern
+    )
+    return re.compile(f"^{regex}$", re.IGNORECASE | re.DOTALL if ignore_case else re.DOTALL)
+
+
+Predicate = Callable[[Dict], bool]
+
+
+def _build_condition(column: str, expr: str) -> Predicate:
+    """构建单列条件，expr 形如 'eq.5'、'not.in.(a,b)'、'is.null'"""
+    negate = False
+    if expr.startswith("not."):
+        negate, expr = True, expr[4:]
+    op, _, raw = expr.partition(".")
+
+    if op == "in":
+        values = [_unquote(v) for v in _split_top_level(raw.strip()[1:-1])]
+
+        def check(row):
+            value = row.get(column)
+            return value is not None and any(value == _coerce(v, value) for v in values)
+    elif op == "is":
+        target = {"null": None, "true": True, "false": False}.get(raw.lower(), raw)
+
+        def check(row):
+            return row.get(column) is target
+    elif op in ("like", "ilike"):
+        pattern = _like_to_regex(_unquote(raw), ignore_case=(op == "ilike"))
+
+        def check(row):
+            value = row.get(column)
+            return value is not None and bool(pattern.match(str(value)))
+    elif op in ("cs", "cd"):
+        raw = raw.strip()
+        if raw.startswith("{"):
+            wanted = {_unquote(v) for v in _split_top_level(raw[1:-1])}
+        else:
+            wanted = set(json.loads(raw))
+
+        def check(row):
+            value = row.get(column)
+            if isinstance(value, str):
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    return False
+            if not isinstance(value, (list, tuple)):
+                return False
+            items = {str(v) for v in value}
+            return wanted <= items if op == "cs" else items <= wanted
+    else:
+        raw_value = _unquote(raw)
+        compare = {
+            "eq": lambda a, b: a == b,
+            "neq": lambda a, b: a != b,
+            "gt": lambda a, b: a > b,
+            "gte": lambda a, b: a >= b,
+            "lt": lambda a, b: a < b,
+            "lte": lambda a, b: a <= b,
+        }.get(op)
+        if compare is None:
+            raise ValueError(f"不支持的过滤操作: {op}")
+
+        def check(row):
+            value = row.get(column)
+            if value is None:
+                return False
+            try:
+                return compare(value, _coerce(raw_value, value))
+            except TypeError:
+                return compare(str(value), raw_value)
+
+    if negate:
+        return lambda row: not check(row)
+    return check
+
+
+def _parse_logic(expr: str, conjunction: str) -> Predicate:
+    """解析 or=(...) / and=(...) 逻辑表达式"""
+    expr = expr.strip()
+    if expr.startswith("(") and expr.endswith(")"):
+        expr = expr[1:-1]
+
+    predicates = []
+    for item in _split_top_level(expr):
+        negate = False
+        if item.startswith("not.") and (item[4:].startswith("and(") or item[4:].startswith("or(")):
+            negate, item = True, item[4:]
+        if item.startswith("and("):
+            pred = _parse_logic(item[3:], "and")
+        elif item.startswith("or("):
+            pred = _parse_logic(item[2:], "or")
+        else:
+            column, _, rest = item.partition(".")
+            pred = _build_condition(column, rest)
+        predicates.append((lambda p: (lambda row: not p(row)))(pred) if negate else pred)
+
+    if conjunction == "and":
+        return lambda row: all(p(row) for p in predicates)
+    return lambda row: any(p(row) for p in predicates)
+
+
+def _sort_rows(rows: List[Dict], order: str) -> List[Dict]:
+    rows = list(rows)
+    for spec in reversed(_split_top_level(order)):
+        parts = spec.split(".")
+        column = parts[0]
+        desc = "desc" in parts[1:]
+        nulls_first = "nullsfirst" in parts[1:] or (desc and "nullslast" not in parts[1:])
+        # 先按值排序，再按是否为空稳定排序（两次排序都是稳定的）
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: r[column], reverse=desc)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class FakePostgrest:
+    """内存表存储 + PostgREST 请求处理"""
+
+    def __init__(
+        self,
+        unique_keys: Optional[Dict[str, Tuple[str, ...]]] = None,
+        latency_ms: float = 0.0,
+        max_rows: Optional[int] = 1000,
+    ):
+        """
+        Args:
+            unique_keys: 表的唯一键（普通 insert 冲突检测用）
+            latency_ms: 每个请求额外的模拟网络延迟
+            max_rows: 单次查询返回行数上限（与 Supabase 默认 db-max-rows 一致，None 不限制）
+        """
+        self.tables: Dict[str, List[Dict]] = defaultdict(list)
+        self.unique_keys = unique_keys or {}
+        self.latency_ms = latency_ms
+        self.max_rows = max_rows
+        self.request_count = 0
+        self.requests_by_table: Dict[str, int] = defaultdict(int)
+        self._ids = defaultdict(lambda: count(1))
+        self._indexes: Dict[Tuple[str, Tuple[str, ...]], Dict[Tuple, Dict]] = {}
+        self._lock = threading.RLock()
+
+    # ---------- 数据管理 ----------
+
+    def seed(self, table: str, rows: List[Dict]) -> None:
+        """写入初始数据（自动补 id）"""
+        with self._lock:
+            for row in rows:
+                row = dict(row)
+                row.setdefault("id", next(self._ids[table]))
+                self.tables[table].append(row)
+            self._invalidate(table)
+
+    def reset_counters(self) -> None:
+        self.request_count = 0
+        self.requests_by_table.clear()
+
+    def _invalidate(self, table: str) -> None:
+        for key in [k for k in self._indexes if k[0] == table]:
+            del self._indexes[key]
+
+    def _index(self, table: str, columns: Tuple[str, ...]) -> Dict[Tuple, Dict]:
+        key = (table, columns)
+        index = self._indexes.get(key)
+        if index is None:
+            index = {tuple(r.get(c) for c in columns): r for r in self.tables[table]}
+            self._indexes[key] = index
+        return index
+
+    # ---------- 请求处理 ----------
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        path = request.url.path
+        if REST_PREFIX not in path:
+            return self._error(request, 404, "not found")
+        resource = path.split(REST_PREFIX, 1)[1].strip("/")
+        if resource.startswith("rpc/"):
+            return self._error(request, 404, f"Could not find the function {resource[4:]}")
+
+        with self._lock:
+            self.request_count += 1
+            self.requests_by_table[resource] += 1
+            try:
+                if request.method in ("GET", "HEAD"):
+                    return self._select(request, resource)
+                if request.method == "POST":
+                    return self._insert(request, resource)
+                if request.method == "PATCH":
+                    return self._update(request, resource)
+                if request.method == "DELETE":
+                    return self._delete(request, resource)
+            except ValueError as e:
+                return self._error(request, 400, str(e))
+        return self._error(request, 405, f"method {request.method} not allowed")
+
+    def _filters(self, request: httpx.Request) -> List[Predicate]:
+        predicates = []
+        for key, value in request.url.params.multi_items():
+            if key in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+                continue
+            if key in ("or", "and"):
+                predicates.append(_parse_logic(value, key))
+            elif key.startswith("not.") and key[4:] in ("or", "and"):
+                pred = _parse_logic(value, key[4:])
+                predicates.append(lambda row, p=pred: not p(row))
+            else:
+                predicates.append(_build_condition(key, value))
+        return predicates
+
+    def _matching(self, request: httpx.Request, table: str) -> List[Dict]:
+        predicates = self._filters(request)
+        return [r for r in self.tables[table] if all(p(r) for p in predicates)]
+
+    @staticmethod
+    def _project(rows: List[Dict], select: Optional[str]) -> List[Dict]:
+        if not select or select.strip() == "*":
+            return [dict(r) for r in rows]
+        columns = []
+        for col in _split_top_level(select.replace(" ", "")):
+            alias, _, source = col.partition(":")
+            columns.append((alias, source or alias) if source else (col, col))
+        return [{alias: r.get(source) for alias, source in columns} for r in rows]
+
+    @staticmethod
+    def _prefer(request: httpx.Request) -> str:
+        return request.headers.get("prefer", "")
+
+    def _json(self, request, status, payload, headers=None) -> httpx.Response:
+        body = b"" if request.method == "HEAD" else json.dumps(
+            payload, ensure_ascii=False, default=_json_default
+        ).encode("utf-8")
+        return httpx.Response(
+            status,
+            headers={"content-type": "application/json; charset=utf-8", **(headers or {})},
+            content=body,
+            request=request,
+        )
+
+    def _error(self, request, status, message) -> httpx.Response:
+        return self._json(request, status, {"code": str(status), "message": message, "details": None, "hint": None})
+
+    def _select(self, request: httpx.Request, table: str) -> httpx.Response:
+        params = request.url.params
+        rows = self._matching(request, table)
+        if params.get("order"):
+            rows = _sort_rows(rows, params["order"])
+        total = len(rows)
+
+        offset = int(params.get("offset", 0) or 0)
+        limit = params.get("limit")
+        range_header = request.headers.get("range")
+        if range_header and "-" in range_header:
+            start, _, end = range_header.partition("-")
+            offset = int(start)
+            if end:
+                limit = int(end) - offset + 1
+        page = rows[offset:offset + int(limit)] if limit is not None else rows[offset:]
+        if self.max_rows is not None:
+            page = page[:self.max_rows]
+
+        payload = self._project(page, params.get("select"))
+        counted = re.search(r"count=(exact|planned|estimated)", self._prefer(request))
+        total_str = str(total) if counted else "*"
+        content_range = f"{offset}-{offset + len(page) - 1}/{total_str}" if page else f"*/{total_str}"
+
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            if len(payload) != 1:
+                return self._error(request, 406, "JSON object requested, multiple (or no) rows returned")
+            return self._json(request, 200, payload[0], {"content-range": content_range})
+
+        status = 206 if counted and len(page) < total else 200
+        return self._json(request, status, payload, {"content-range": content_range})
+
+    def _insert(self, request: httpx.Request, table: str) -> httpx.Response:
+        body = json.loads(request.content or b"[]")
+        records = body if isinstance(body, list) else [body]
+        prefer = self._prefer(request)
+        on_conflict = request.url.params.get("on_conflict")
+
+        merge = "resolution=merge-duplicates" in prefer
+        ignore = "resolution=ignore-duplicates" in prefer
+        key_columns = tuple(c.strip() for c in on_conflict.split(",")) if on_conflict else self.unique_keys.get(table)
+        index = self._index(table, key_columns) if key_columns else None
+
+        result = []
+        for record in records:
+            key = tuple(record.get(c) for c in key_columns) if key_columns else None
+            existing = index.get(key) if index is not None else None
+            if existing is not None:
+                if merge:
+                    existing.update(record)
+                    result.append(existing)
+                    continue
+                if ignore:
+                    continue
+                return self._error(request, 409, f"duplicate key value violates unique constraint on {table}")
+            row = {"id": next(self._ids[table]), "created_at": datetime.now().isoformat(), **record}
+            self.tables[table].append(row)
+            if index is not None:
+                index[key] = row
+            result.append(row)
+
+        # 其他列组合的索引失效
+        for idx_key in [k for k in self._indexes if k[0] == table and k[1] != key_columns]:
+            del self._indexes[idx_key]
+
+        if "return=representation" in prefer:
+            return self._json(request, 201, self._project(result, request.url.params.get("select")))
+        return httpx.Response(201, request=request)
+
+    def _update(self, request: httpx.Request, table: str) -> httpx.Response:
+        changes = json.loads(request.content or b"{}")
+        rows = self._matching(request, table)
+        for row in rows:
+            row.update(changes)
+        self._invalidate(table)
+        if "return=representation" in self._prefer(request):
+            return self._json(request, 200, self._project(rows, request.url.params.get("select")))
+        return httpx.Response(204, request=request)
+
+    def _delete(self, request: httpx.Request, table: str) -> httpx.Response:
+        matched = self._matching(request, table)
+        matched_ids = {id(r) for r in matched}
+        self.tables[table] = [r for r in self.tables[table] if id(r) not in matched_ids]
+        self._invalidate(table)
+        if "return=representation" in self._prefer(request):
+            return self._json(request, 200, self._project(matched, request.url.params.get("select")))
+        return httpx.Response(204, request=request)
+
+
+class FakePostgrestTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """把请求转交给 FakePostgrest 的 httpx Transport（同步 / 异步客户端均可用）"""
+
+    def __init__(self, store: FakePostgrest):
+        self.store = store
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        return self.store.handle(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        return self.store.handle(request)
@@ -0,0 +1,445 @@
+"""
+基准测试数据集
+
+按真实规模生成确定性的合成数据（固定随机种子，可重复）:
+- 5400 只股票、400 个同花顺概念、约 60000 条概念成分股
+- 每个交易日约 150 只涨停（含连板梯队）、15 只跌停、40 只炸板
+- 指数、情绪、热门概念、昨日涨停表现等表数据
+
+也可以从录制的 JSON 夹具目录加载（每个表一个 <table>.json 文件），
+覆盖同名的合成表。
+
+FixtureTushare 基于同一份数据模拟 Tushare Pro 接口，供采集器处理路径离线运行。
+"""
+
+import json
+import os
+import random
+from typing import Dict, List, Optional
+
+from app.utils.trading_calendar import get_trading_calendar
+
+
+# 与数据库唯一约束保持一致（普通 insert 冲突检测用）
+UNIQUE_KEYS = {
+    "market_index": ("trade_date", "index_code"),
+    "market_sentiment": ("trade_date",),
+    "limit_stocks_detail": ("trade_date", "stock_code", "limit_type"),
+    "hot_concepts": ("trade_date", "concept_name"),
+    "ths_concept_members": ("concept_code", "stock_code"),
+    "yesterday_limit_performance": ("trade_date", "stock_code"),
+    "premium_score_backtest": ("stock_code", "trade_date"),
+}
+
+INDEXES = [
+    ("SH000001", "上证指数", "000001.SH", 3300.0),
+    ("SZ399001", "深证成指", "399001.SZ", 10500.0),
+    ("SZ399006", "创业板指", "399006.SZ", 2150.0),
+]
+
+
+class BenchmarkDataset:
+    """基准测试数据集（合成 + 可选的录制夹具）"""
+
+    def __init__(
+        self,
+        end_date: str,
+        days: int = 30,
+        stocks: int = 5400,
+        concepts: int = 400,
+        members_per_concept: int = 150,
+        limit_ups: int = 150,
+        seed: int = 20251211,
+    ):
+        self.rng = random.Random(seed)
+        self.dates: List[str] = get_trading_calendar().get_recent_trading_days(end_date, days)
+        self.end_date = self.dates[-1]
+        self.limit_ups = limit_ups
+
+        self.stocks = self._make_stocks(stocks)
+        self.stock_by_code = {s["code"]: s for s in self.stocks}
+        self.concepts = [
+            {"ts_code": f"{885000 + i}.TI", "name": f"概念{i:03d}"} for i in range(concepts)
+        ]
+        self.members = self._make_members(members_per_concept)
+        self.stock_concepts: Dict[str, List[str]] = {}
+        for m in self.members:
+            self.stock_concepts.setdefault(m["stock_code"], []).append(m["concept_name"])
+
+        self.daily: Dict[str, Dict[str, Dict]] = {}
+        self.limit_pool: Dict[str, Dict[str, List[Dict]]] = {}
+        self._simulate_market()
+        self.tables = self._build_tables()
+
+    # ---------- 基础数据 ----------
+
+    def _make_stocks(self, n: int) -> List[Dict]:
+        stocks = []
+        boards = [(600000, "SH", 0.35), (1, "SZ", 0.30), (300001, "SZ", 0.25), (688001, "SH", 0.10)]
+        for start, exchange, share in boards:
+            for i in range(int(n * share)):
+                code = f"{start + i:06d}"
+                stocks.append({
+                    "code": code,
+                    "ts_code": f"{code}.{exchange}",
+                    "name": f"股票{code}",
+                    "is_gem": code.startswith(("300", "688")),
+                    "base_price": round(self.rng.uniform(3, 80), 2),
+                })
+        return stocks
+
+    def _make_members(self, per_concept: int) -> List[Dict]:
+        members = []
+        for concept in self.concepts:
+            for stock in self.rng.sample(self.stocks, min(per_concept, len(self.stocks))):
+                members.append({
+                    "concept_code": concept["ts_code"],
+                    "concept_name": concept["name"],
+                    "stock_code": stock["code"],
+                    "stock_name": stock["name"],
+                })
+        return members
+
+    # ---------- 行情模拟 ----------
+
+    def _simulate_market(self) -> None:
+        """逐日模拟全市场涨跌、涨停池（保证连板梯队连续）"""
+        prices = {s["code"]: s["base_price"] for s in self.stocks}
+        streak: Dict[str, int] = {}
+
+        for date in self.dates:
+            previous = dict(streak)
+            streak = {}
+
+            # 昨日涨停股约 30% 晋级，其余从全市场抽取首板
+            promoted = [c for c in previous if self.rng.random() < 0.3]
+            pool = set(promoted)
+            candidates = [s["code"] for s in self.stocks if s["code"] not in previous]
+            for code in self.rng.sample(candidates, self.limit_ups - len(pool)):
+                pool.add(code)
+            for code in pool:
+                streak[code] = previous.get(code, 0) + 1
+
+            non_limit = [s["code"] for s in self.stocks if s["code"] not in pool]
+            limit_down = set(self.rng.sample(non_limit, 15))
+            exploded = set(self.rng.sample([c for c in non_limit if c not in limit_down], 40))
+
+            day = {}
+            for stock in self.stocks:
+                code = stock["code"]
+                pre_close = prices[code]
+                limit_pct = 20.0 if stock["is_gem"] else 10.0
+                if code in pool:
+                    pct = limit_pct
+                elif code in limit_down:
+                    pct = -limit_pct
+                elif code in exploded:
+                    pct = round(self.rng.uniform(3, limit_pct - 1), 2)
+                elif code in previous:
+                    # 昨日涨停未晋级：溢价分布偏正，少量大面
+                    pct = round(self.rng.gauss(1.0, 4.5), 2)
+                else:
+                    pct = round(self.rng.gauss(0.2, 2.2), 2)
+                pct = max(-limit_pct, min(limit_pct, pct))
+                close = round(pre_close * (1 + pct / 100), 2)
+                open_ = round(pre_close * (1 + self.rng.uniform(-2, 3) / 100), 2)
+                high = max(open_, close, round(pre_close * (1 + max(pct, 0) / 100 + 0.01), 2))
+                low = min(open_, close)
+                day[code] = {
+                    "ts_code": stock["ts_code"],
+                    "trade_date": date.replace("-", ""),
+                    "open": open_, "high": high, "low": low, "close": close,
+                    "pre_close": pre_close, "change": round(close - pre_close, 2),
+                    "pct_chg": pct,
+                    "vol": self.rng.randint(10_000, 2_000_000),
+                    "amount": round(self.rng.uniform(5_000, 3_000_000), 2),  # 千元
+                }
+                prices[code] = close
+
+            self.daily[date] = day
+            self.limit_pool[date] = {
+                "U": [self._pool_row(date, code, "U", streak[code]) for code in pool],
+                "D": [self._pool_row(date, code, "D", 0) for code in limit_down],
+                "Z": [self._pool_row(date, code, "Z", 0) for code in exploded],
+            }
+
+    def _pool_row(self, date: str, code: str, limit: str, days: int) -> Dict:
+        stock = self.stock_by_code[code]
+        quote = self.daily[date][code] if date in self.daily else None
+        first_time = f"{self.rng.choice([9, 10, 11, 13, 14])}{self.rng.randint(0, 59):02d}{self.rng.randint(0, 59):02d}"
+        concepts = self.stock_concepts.get(code, [])[:3]
+        return {
+            "ts_code": stock["ts_code"],
+            "trade_date": date.replace("-", ""),
+            "name": stock["name"],
+            "close": quote["close"] if quote else stock["base_price"],
+            "pct_chg": quote["pct_chg"] if quote else 0.0,
+            "amount": round(self.rng.uniform(5e7, 3e9), 2),
+            "float_mv": round(self.rng.uniform(2e9, 5e10), 2),
+            "total_mv": round(self.rng.uniform(3e9, 8e10), 2),
+            "turnover_ratio": round(self.rng.uniform(1, 40), 2),
+            "fd_amount": round(self.rng.uniform(1e7, 5e8), 2) if limit == "U" else None,
+            "first_time": first_time,
+            "last_time": first_time,
+            "open_times": self.rng.choice([0, 0, 0, 1, 2, 3]) if limit == "U" else 0,
+            "up_stat": f"{days}/{days}" if limit == "U" else None,
+            "limit_times": days if limit == "U" else 0,
+            "limit": limit,
+            "lu_desc": "+".join(concepts) if limit == "U" else None,
+            "industry": "行业",
+            "is_gem": stock["is_gem"],
+        }
+
+    # ---------- 数据库表 ----------
+
+    def _build_tables(self) -> Dict[str, List[Dict]]:
+        tables: Dict[str, List[Dict]] = {name: [] for name in UNIQUE_KEYS}
+        tables["ths_concept_members"] = [dict(m) for m in self.members]
+
+        for i, date in enumerate(self.dates):
+            pools = self.limit_pool[date]
+            day = self.daily[date]
+
+            # 涨跌停明细
+            for limit, limit_type in (("U", "limit_up"), ("D", "limit_down")):
+                for row in pools[limit]:
+                    code = row["ts_code"].split(".")[0]
+                    tables["limit_stocks_detail"].append({
+                        "trade_date": date,
+                        "stock_code": code,
+                        "stock_name": row["name"],
+                        "limit_type": limit_type,
+                        "change_pct": row["pct_chg"],
+                        "close_price": row["close"],
+                        "turnover_rate": row["turnover_ratio"],
+                        "amount": row["amount"],
+                        "first_limit_time": f"{row['first_time'][:-4].zfill(2)}:{row['first_time'][-4:-2]}:{row['first_time'][-2:]}",
+                        "last_limit_time": None,
+                        "continuous_days": row["limit_times"] if limit == "U" else 0,
+                        "opening_times": row["open_times"],
+                        "sealed_amount": row["fd_amount"],
+                        "is_st": False,
+                        "is_strong_limit": row["open_times"] == 0 and int(row["first_time"]) <= 93000,
+                        "concepts": self.stock_concepts.get(code, [])[:5],
+                        "market_cap": row["total_mv"],
+                        "circulation_market_cap": row["float_mv"],
+                        "main_net_inflow": round(self.rng.uniform(-2e8, 5e8), 2),
+                        "main_net_inflow_pct": round(self.rng.uniform(-20, 30), 2),
+                    })
+
+            # 市场情绪
+            pcts = [q["pct_chg"] for q in day.values()]
+            distribution: Dict[str, int] = {}
+            for row in pools["U"]:
+                key = str(row["limit_times"])
+                distribution[key] = distribution.get(key, 0) + 1
+            up = sum(1 for p in pcts if p > 0)
+            down = sum(1 for p in pcts if p < 0)
+            limit_up = len(pools["U"])
+            exploded = len(pools["Z"])
+            tables["market_sentiment"].append({
+                "trade_date": date,
+                "total_amount": sum(q["amount"] for q in day.values()) * 1000,
+                "up_count": up,
+                "down_count": down,
+                "flat_count": len(pcts) - up - down,
+                "up_down_ratio": round(up / down, 4) if down else None,
+                "limit_up_count": limit_up,
+                "limit_down_count": len(pools["D"]),
+                "continuous_limit_distribution": json.dumps(distribution),
+                "exploded_count": exploded,
+                "explosion_rate": round(exploded / (limit_up + exploded) * 100, 2),
+                "market_status": "强势" if up / len(pcts) >= 0.6 else "弱势" if up / len(pcts) < 0.4 else "震荡",
+            })
+
+            # 指数
+            for code, name, _, base in INDEXES:
+                close = round(base * (1 + self.rng.gauss(0, 0.01) * (i + 1) ** 0.5), 2)
+                tables["market_index"].append({
+                    "trade_date": date, "index_code": code, "index_name": name,
+                    "open_price": close, "high_price": close * 1.01, "low_price": close * 0.99,
+                    "close_price": close, "volume": self.rng.randint(10 ** 8, 10 ** 9),
+                    "amount": self.rng.uniform(3e11, 6e11), "change_pct": round(self.rng.gauss(0, 1), 2),
+                    "amplitude": round(self.rng.uniform(0.5, 2.5), 2),
+                    "ma5": close, "ma10": close, "ma20": close, "trend": "震荡",
+                    "ma5_position": "above", "ma10_position": "above", "ma20_position": "below",
+                    "change_5d": round(self.rng.gauss(0, 2), 2),
+                })
+
+            # 热门概念（TOP10 + 4 个异动）
+            picked = self.rng.sample(self.concepts, 14)
+            for rank, concept in enumerate(picked, 1):
+                leader = max(
+                    (r for r in pools["U"] if concept["name"] in (r["lu_desc"] or "")),
+                    key=lambda r: r["limit_times"],
+                    default=None,
+                )
+                tables["hot_concepts"].append({
+                    "trade_date": date,
+                    "concept_name": concept["name"],
+                    "day_change_pct": round(self.rng.uniform(-1, 6), 2),
+                    "change_pct": round(self.rng.uniform(0, 15), 2),
+                    "limit_up_count": self.rng.randint(0, 20),
+                    "rank": rank if rank <= 10 else None,
+                    "consecutive_days": self.rng.randint(1, 5),
+                    "concept_strength": round(self.rng.uniform(0, 15), 4),
+                    "is_new_concept": False,
+                    "first_seen_date": self.dates[0],
+                    "is_anomaly": rank > 10,
+                    "anomaly_type": None if rank <= 10 else ("limit_up" if rank <= 12 else "change_pct"),
+                    "leader_stock_code": leader["ts_code"].split(".")[0] if leader else None,
+                    "leader_stock_name": leader["name"] if leader else None,
+                    "leader_continuous_days": leader["limit_times"] if leader else None,
+                })
+
+            # 昨日涨停今日表现
+            if i > 0:
+                yesterday = self.dates[i - 1]
+                for row in self.limit_pool[yesterday]["U"]:
+                    code = row["ts_code"].split(".")[0]
+                    quote = day[code]
+                    pre = quote["pre_close"]
+                    tables["yesterday_limit_performance"].append({
+                        "trade_date": date,
+                        "stock_code": code,
+                        "stock_name": row["name"],
+                        "yesterday_continuous_days": row["limit_times"],
+                        "yesterday_is_strong_limit": row["open_times"] == 0,
+                        "today_open_pct": round((quote["open"] - pre) / pre * 100, 2),
+                        "today_change_pct": quote["pct_chg"],
+                        "today_high_pct": round((quote["high"] - pre) / pre * 100, 2),
+                        "today_low_pct": round((quote["low"] - pre) / pre * 100, 2),
+                        "today_amount": quote["amount"] * 1000,
+                        "is_limit_up": code in {r["ts_code"].split(".")[0] for r in pools["U"]},
+                        "is_limit_down": code in {r["ts_code"].split(".")[0] for r in pools["D"]},
+                        "is_big_loss": quote["pct_chg"] < -5,
+                        "is_big_high": 5 < quote["pct_chg"] < 9.8,
+                    })
+
+        return tables
+
+    def load_recorded(self, directory: str) -> List[str]:
+        """
+        用录制的 JSON 夹具覆盖同名表
+
+        Returns:
+            被覆盖的表名
+        """
+        loaded = []
+        if not directory or not os.path.isdir(directory):
+            return loaded
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".json"):
+                with open(os.path.join(directory, filename), "r", encoding="utf-8") as f:
+                    self.tables[filename[:-5]] = json.load(f)
+                loaded.append(filename[:-5])
+        return loaded
+
+    def summary(self) -> Dict[str, int]:
+        return {name: len(rows) for name, rows in self.tables.items()}
+
+
+class FixtureTushare:
+    """
+    基于 BenchmarkDataset 的 Tushare Pro 接口替身
+
+    只实现采集器用到的接口；未实现的接口抛出异常，采集器会走各自的回退逻辑
+    """
+
+    def __init__(self, dataset: BenchmarkDataset):
+        import pandas as pd
+
+        self._pd = pd
+        self.ds = dataset
+        self.calls: Dict[str, int] = {}
+
+    def __getattr__(self, name):
+        raise RuntimeError(f"FixtureTushare 未实现接口: {name}")
+
+    def _frame(self, api: str, rows: List[Dict]):
+        self.calls[api] = self.calls.get(api, 0) + 1
+        return self._pd.DataFrame(rows)
+
+    @staticmethod
+    def _to_date(value: Optional[str]) -> Optional[str]:
+        if not value:
+            return None
+        return f"{value[:4]}-{value[4:6]}-{value[6:8]}"
+
+    def _dates(self, trade_date=None, start_date=None, end_date=None) -> List[str]:
+        if trade_date:
+            return [self._to_date(trade_date)]
+        start, end = self._to_date(start_date), self._to_date(end_date)
+        return [d for d in self.ds.dates if (not start or d >= start) and (not end or d <= end)]
+
+    def daily(self, trade_date=None, ts_code=None, start_date=None, end_date=None, **_):
+        codes = {c.split(".")[0] for c in ts_code.split(",")} if ts_code else None
+        rows = []
+        for date in self._dates(trade_date, start_date, end_date):
+            for code, quote in self.ds.daily.get(date, {}).items():
+                if codes is None or code in codes:
+                    rows.append(quote)
+        return self._frame("daily", rows)
+
+    def limit_list_d(self, trade_date=None, limit_type=None, start_date=None, end_date=None, **_):
+        rows = []
+        for date in self._dates(trade_date, start_date, end_date):
+            pools = self.ds.limit_pool.get(date, {})
+            for limit in ([limit_type] if limit_type else ["U", "D", "Z"]):
+                rows.extend({k: v for k, v in r.items() if k != "is_gem"} for r in pools.get(limit, []))
+        return self._frame("limit_list_d", rows)
+
+    def limit_list_ths(self, trade_date=None, limit_type=None, **_):
+        date = self._to_date(trade_date)
+        rows = [
+            {
+                "ts_code": r["ts_code"], "name": r["name"], "pct_chg": r["pct_chg"],
+                "tag": "首板" if r["limit_times"] == 1 else f"{r['limit_times']}天{r['limit_times']}板",
+                "first_lu_time": r["first_time"],
+            }
+            for r in self.ds.limit_pool.get(date, {}).get("U", [])
+        ]
+        return self._frame("limit_list_ths", rows)
+
+    def ths_index(self, exchange=None, type=None, **_):
+        rows = [
+            {"ts_code": c["ts_code"], "name": c["name"], "count": 150, "exchange": "A", "list_date": "20200101", "type": "N"}
+            for c in self.ds.concepts
+        ]
+        return self._frame("ths_index", rows)
+
+    def ths_member(self, ts_code=None, **_):
+        rows = [
+            {"ts_code": m["concept_code"], "con_code": self.ds.stock_by_code[m["stock_code"]]["ts_code"], "con_name": m["stock_name"]}
+            for m in self.ds.members if m["concept_code"] == ts_code
+        ]
+        return self._frame("ths_member", rows)
+
+    def ths_daily(self, trade_date=None, ts_code=None, start_date=None, end_date=None, **_):
+        rows = []
+        for date in self._dates(trade_date, start_date, end_date):
+            rng = random.Random(f"{date}")
+            for concept in self.ds.concepts:
+                if ts_code and concept["ts_code"] != ts_code:
+                    continue
+                rows.append({
+                    "ts_code": concept["ts_code"], "trade_date": date.replace("-", ""),
+                    "close": round(rng.uniform(800, 1500), 2), "pct_change": round(rng.gauss(0.3, 2), 2),
+                })
+        return self._frame("ths_daily", rows)
+
+    def index_daily(self, ts_code=None, start_date=None, end_date=None, **_):
+        rows = []
+        for date in self._dates(None, start_date, end_date):
+            for code, _, index_ts_code, base in INDEXES:
+                if ts_code and index_ts_code != ts_code:
+                    continue
+                rng = random.Random(f"{date}{code}")
+                close = round(base * (1 + rng.gauss(0, 0.01)), 2)
+                rows.append({
+                    "ts_code": index_ts_code, "trade_date": date.replace("-", ""),
+                    "open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+                    "pre_close": close, "pct_chg": round(rng.gauss(0, 1), 2),
+                    "vol": rng.randint(10 ** 8, 10 ** 9), "amount": rng.uniform(3e8, 6e8),
+                })
+        return self._frame("index_daily", rows)
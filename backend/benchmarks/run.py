@@ -0,0 +1,394 @@
+"""
+离线基准测试
+
+在内存版 PostgREST（fake_postgrest）和合成/录制数据（fixtures）上运行服务层、
+接口和采集器处理路径，不访问 Supabase / Tushare / AKShare，结果写入 JSON 便于跨提交对比。
+
+使用方法（在 backend 目录下）:
+    python -m benchmarks.run                          # 全部基准，默认重复 3 次
+    python -m benchmarks.run --only sentiment,sector  # 只跑名称包含关键字的基准
+    python -m benchmarks.run --latency-ms 20          # 模拟每次请求 20ms 网络往返
+    python -m benchmarks.run --fixtures fixtures/     # 用录制的表数据覆盖合成数据
+    python -m benchmarks.run --date 2026-10-16 --only collector --replay .cache/source_fixtures
+                                                      # 采集器使用录制的 Tushare / AKShare 响应（DATA_SOURCE_MODE=record 录制）
+    python -m benchmarks.run --compare benchmarks/results/<旧结果>.json
+
+结果文件: benchmarks/results/<时间>_<提交>.json（本地对比用，已加入 .gitignore）
+"""
+
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from unittest import mock
+
+# 必须在导入 app 之前设置，避免读取真实的连接配置
+os.environ["SUPABASE_URL"] = "http://fake-postgrest.local"
+os.environ["SUPABASE_KEY"] = "bench.bench.bench"
+os.environ.setdefault("TUSHARE_TOKEN", "")
+# 本地状态文件指向临时目录: 合成的延迟 / 失败不能写进真实的数据源健康度
+# （/api/ops/sources、编排器排序），缓存失效也不能写进开发服务器读取的失效日志
+_STATE_DIR = tempfile.mkdtemp(prefix="bench-state-")
+atexit.register(shutil.rmtree, _STATE_DIR, ignore_errors=True)
+os.environ["SOURCE_HEALTH_FILE"] = os.path.join(_STATE_DIR, "source_health.json")
+os.environ["RESULT_CACHE_INVALIDATION_FILE"] = os.path.join(_STATE_DIR, "invalidations.log")
+
+from loguru import logger
+
+from app.utils.metrics import start_query_stats, stop_query_stats
+from app.utils.result_cache import result_cache
+from app.utils.source_fixtures import FixtureStore, use_fixture_store
+from app.utils.supabase_client import SupabaseClient
+from app.utils.trading_date import get_latest_trading_date
+from benchmarks.fake_postgrest import FakePostgrest, FakePostgrestTransport
+from benchmarks.fixtures import UNIQUE_KEYS, BenchmarkDataset, FixtureTushare
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+class _NoSleepTime:
+    """替换采集器模块里的 time / pace，跳过限频等待（其余属性透传）"""
+
+    def __init__(self):
+        self.skipped = 0.0
+
+    def sleep(self, seconds):
+        self.skipped += seconds
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+# ============================================
+# 基准定义
+# ============================================
+
+class BenchContext:
+    """单个基准运行的上下文（每次运行前重建数据库）"""
+
+    def __init__(
+        self,
+        dataset: BenchmarkDataset,
+        latency_ms: float,
+        keep_sleeps: bool,
+        replay: Optional[FixtureStore] = None,
+    ):
+        self.dataset = dataset
+        self.latency_ms = latency_ms
+        self.keep_sleeps = keep_sleeps
+        self.replay = replay
+        self.store: Optional[FakePostgrest] = None
+        self.tushare: Optional[FixtureTushare] = None
+        self.sleeper = _NoSleepTime()
+        self._patches = ExitStack()
+
+    def reset(self, tables: Optional[List[str]] = None) -> None:
+        """重建内存数据库（tables 为 None 时加载全部表）"""
+        self.store = FakePostgrest(unique_keys=UNIQUE_KEYS, latency_ms=self.latency_ms)
+        for name, rows in self.dataset.tables.items():
+            if tables is None or name in tables:
+                self.store.seed(name, rows)
+        self.store.reset_counters()
+        # 每次运行都从冷缓存开始，测量的是完整计算路径
+        result_cache.invalidate_local(None)
+        SupabaseClient.use_transport(FakePostgrestTransport(self.store))
+        self.tushare = FixtureTushare(self.dataset)
+        self.sleeper = _NoSleepTime()
+        if self.replay:
+            self.replay.calls.clear()
+            self.replay.misses.clear()
+
+    def patch_collector(self, collector):
+        """
+        注入 Tushare 夹具（回放模式下使用录制的响应），并跳过所在模块的限频等待
+
+        模块的 time / pace 只在本次运行内替换，restore() 时恢复
+        """
+        if hasattr(collector, "_tushare_pro") and not self.replay:
+            collector._tushare_pro = self.tushare
+        if not self.keep_sleeps:
+            module = sys.modules[type(collector).__module__]
+            if getattr(module, "time", None) is time:
+                self._patches.enter_context(mock.patch.object(module, "time", self.sleeper))
+            if hasattr(module, "pace"):
+                self._patches.enter_context(mock.patch.object(module, "pace", self.sleeper.sleep))
+        return collector
+
+    def restore(self) -> None:
+        """恢复 patch_collector 替换的模块属性"""
+        self._patches.close()
+        self._patches = ExitStack()
+
+
+def bench_sentiment_analysis(ctx: BenchContext):
+    from app.services.sentiment_service import SentimentService
+
+    return asyncio.run(SentimentService().get_analysis(ctx.dataset.end_date))
+
+
+def bench_sector_analysis(ctx: BenchContext):
+    from app.routers.sector import get_sector_analysis
+
+    return asyncio.run(get_sector_analysis(trade_date=ctx.dataset.end_date))
+
+
+def bench_backtest_batch_save(ctx: BenchContext):
+    from app.services.backtest_service import BacktestService
+
+    service = BacktestService()
+    service.ts_api = ctx.tushare
+    trade_date, next_date = ctx.dataset.dates[-2], ctx.dataset.end_date
+    return asyncio.run(
+        service.batch_save_backtest(trade_date, next_date, limit=ctx.dataset.limit_ups)
+    )
+
+
+def bench_collect_limit_stocks(ctx: BenchContext):
+    from app.services.collectors.limit_stocks_collector import LimitStocksCollector
+
+    collector = ctx.patch_collector(LimitStocksCollector())
+    # 资金流向走 AKShare 逐股接口，预填缓存
+    for code in ctx.dataset.stock_by_code:
+        collector._fund_flow_cache[f"{code}_{ctx.dataset.end_date}"] = {
+            "main_net_inflow": 1.0e8,
+            "main_net_inflow_pct": 5.0,
+        }
+    return collector.collect_and_save(ctx.dataset.end_date)
+
+
+def bench_collect_hot_concepts(ctx: BenchContext):
+    from app.services.collectors.hot_concepts_collector import HotConceptsCollector
+
+    collector = ctx.patch_collector(HotConceptsCollector())
+    return collector.collect_and_save(ctx.dataset.end_date)
+
+
+def bench_collect_market_sentiment(ctx: BenchContext):
+    from app.services.collectors.market_sentiment_collector import MarketSentimentCollector
+
+    collector = ctx.patch_collector(MarketSentimentCollector())
+    return collector.collect_and_save(ctx.dataset.end_date)
+
+
+def bench_collect_market_index(ctx: BenchContext):
+    from app.services.collectors.market_index_collector import MarketIndexCollector
+
+    collector = ctx.patch_collector(MarketIndexCollector())
+    return collector.collect_all_indexes(ctx.dataset.dates[0], ctx.dataset.end_date)
+
+
+def bench_collect_ths_concept(ctx: BenchContext):
+    from app.services.collectors.ths_concept_collector import ThsConceptCollector
+
+    collector = ctx.patch_collector(ThsConceptCollector())
+    return collector.collect_all_concept_members()
+
+
+def bench_collect_yesterday_limit(ctx: BenchContext):
+    from app.services.collectors.yesterday_limit_collector import YesterdayLimitCollector
+
+    collector = ctx.patch_collector(YesterdayLimitCollector())
+    return collector.collect(ctx.dataset.end_date)
+
+
+# 名称 -> (函数, 需要预置的表；None 表示全部)
+BENCHMARKS: Dict[str, tuple] = {
+    "service.sentiment_analysis": (bench_sentiment_analysis, None),
+    "api.sector_analysis": (bench_sector_analysis, None),
+    "service.backtest_batch_save": (bench_backtest_batch_save, None),
+    "collector.limit_stocks": (bench_collect_limit_stocks, ["limit_stocks_detail", "ths_concept_members"]),
+    "collector.hot_concepts": (bench_collect_hot_concepts, ["hot_concepts"]),
+    "collector.market_sentiment": (bench_collect_market_sentiment, ["market_sentiment"]),
+    "collector.market_index": (bench_collect_market_index, ["market_index"]),
+    "collector.ths_concept": (bench_collect_ths_concept, ["ths_concept_members"]),
+    "collector.yesterday_limit": (bench_collect_yesterday_limit, ["limit_stocks_detail", "yesterday_limit_performance"]),
+}
+
+
+# ============================================
+# 运行与结果
+# ============================================
+
+def run_benchmark(ctx: BenchContext, name: str, func: Callable, tables: Optional[List[str]], repeat: int) -> Dict:
+    """运行单个基准，返回耗时和查询统计"""
+    runs_ms = []
+    error = None
+    stats = None
+
+    for _ in range(repeat):
+        ctx.reset(tables)
+        stats, token = start_query_stats()
+        start = time.perf_counter()
+        try:
+            func(ctx)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.error(f"❌ 基准 {name} 运行失败: {error}")
+            break
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            stop_query_stats(token)
+            ctx.restore()
+        runs_ms.append(elapsed_ms)
+
+    result = {
+        "runs_ms": [round(ms, 2) for ms in runs_ms],
+        "error": error,
+    }
+    if runs_ms:
+        result.update({
+            "min_ms": round(min(runs_ms), 2),
+            "median_ms": round(statistics.median(runs_ms), 2),
+            "mean_ms": round(statistics.mean(runs_ms), 2),
+        })
+    # 查询统计取最后一次运行
+    result.update({
+        "db_requests": ctx.store.request_count,
+        "db_requests_by_table": dict(sorted(ctx.store.requests_by_table.items())),
+        "db_rows": stats.rows if stats else 0,
+        "db_ms": round(stats.db_ms, 2) if stats else 0.0,
+        "tushare_calls": dict(sorted(ctx.tushare.calls.items())),
+        "skipped_sleep_s": round(ctx.sleeper.skipped, 2),
+    })
+    if ctx.replay:
+        replay = ctx.replay.stats()
+        result["replayed_calls"] = replay["calls"]
+        result["replay_misses"] = replay["misses"]
+    return result
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.check_output(["git", *args], cwd=BENCH_DIR, text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return ""
+
+
+def compare_results(current: Dict, baseline_path: str, threshold: float) -> List[str]:
+    """
+    对比两次结果的中位耗时和查询次数
+
+    Returns:
+        退化的基准名称
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = []
+    print(f"\n对比基线: {baseline_path} ({baseline['meta'].get('commit', '?')[:8]})")
+    print(f"{'基准':<32}{'基线ms':>12}{'当前ms':>12}{'变化':>10}{'查询数':>14}")
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base or "median_ms" not in base or "median_ms" not in cur:
+            print(f"{name:<32}{'-':>12}{cur.get('median_ms', '-'):>12}")
+            continue
+        change = (cur["median_ms"] - base["median_ms"]) / base["median_ms"] * 100 if base["median_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = " ⚠️"
+            regressions.append(name)
+        queries = f"{base['db_requests']}→{cur['db_requests']}"
+        print(f"{name:<32}{base['median_ms']:>12.1f}{cur['median_ms']:>12.1f}{change:>+9.1f}%{queries:>14}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="离线基准测试")
+    parser.add_argument("--date", help="基准交易日 YYYY-MM-DD，默认最新交易日")
+    parser.add_argument("--days", type=int, default=30, help="生成的交易日数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每个基准重复次数")
+    parser.add_argument("--only", help="只运行名称包含这些关键字的基准（逗号分隔）")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="模拟每次数据库请求的网络延迟")
+    parser.add_argument("--keep-sleeps", action="store_true", help="保留采集器里的限频 sleep")
+    parser.add_argument("--fixtures", help="录制的表数据目录（<table>.json），覆盖同名合成表")
+    parser.add_argument("--replay", help="数据源录制目录（DATA_SOURCE_MODE=record 生成），采集器回放其中的 Tushare / AKShare 响应")
+    parser.add_argument("--replay-latency", default="none", help="回放延迟: none / recorded / 毫秒数")
+    parser.add_argument("--output", default=RESULTS_DIR, help="结果输出目录")
+    parser.add_argument("--compare", help="对比的基线结果文件")
+    parser.add_argument("--threshold", type=float, default=10.0, help="判定退化的中位耗时增幅（%%）")
+    parser.add_argument("--log-level", default="WARNING", help="业务日志级别")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    trade_date = args.date or get_latest_trading_date()
+    print(f"📦 生成基准数据集: {trade_date} 前 {args.days} 个交易日...")
+    dataset = BenchmarkDataset(trade_date, days=args.days)
+    if args.fixtures:
+        loaded = dataset.load_recorded(args.fixtures)
+        print(f"   已加载录制数据: {', '.join(loaded) or '无'}")
+    print(f"   {dataset.summary()}")
+
+    selected = BENCHMARKS
+    if args.only:
+        keywords = [k.strip() for k in args.only.split(",") if k.strip()]
+        selected = {n: b for n, b in BENCHMARKS.items() if any(k in n for k in keywords)}
+
+    replay = None
+    if args.replay:
+        replay = FixtureStore("replay", args.replay, latency=args.replay_latency)
+        use_fixture_store(replay)
+        print(f"   回放数据源录制: {args.replay}（延迟 {args.replay_latency}）")
+
+    ctx = BenchContext(dataset, args.latency_ms, args.keep_sleeps, replay)
+    results = {}
+    for name, (func, tables) in selected.items():
+        print(f"⏱️  {name} ...", end=" ", flush=True)
+        results[name] = run_benchmark(ctx, name, func, tables, args.repeat)
+        r = results[name]
+        if r["error"]:
+            print(f"失败: {r['error']}")
+        else:
+            print(f"中位 {r['median_ms']:.1f}ms, {r['db_requests']} 次查询, {r['db_rows']} 行")
+    SupabaseClient.use_transport(None)
+    use_fixture_store(None)
+
+    commit = _git("rev-parse", "HEAD")
+    output = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "branch": _git("rev-parse", "--abbrev-ref", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--", "app")),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "trade_date": dataset.end_date,
+            "days": args.days,
+            "repeat": args.repeat,
+            "latency_ms": args.latency_ms,
+            "keep_sleeps": args.keep_sleeps,
+            "replay": args.replay,
+            "replay_latency": args.replay_latency if args.replay else None,
+            "dataset": dataset.summary(),
+        },
+        "results": results,
+    }
+
+    os.makedirs(args.output, exist_ok=True)
+    filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit[:8] or 'nogit'}.json"
+    path = os.path.join(args.output, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 结果已写入 {path}")
+
+    failed = [n for n, r in results.items() if r["error"]]
+    regressions = compare_results(output, args.compare, args.threshold) if args.compare else []
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
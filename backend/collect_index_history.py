@@ -1,6 +1,6 @@
 """
 采集大盘指数历史数据（含均线）
-使用2025年交易日日历,确保采集正确的交易日数据
+使用交易日历,确保采集正确的交易日数据
 """
 
 import sys
@@ -16,11 +16,11 @@ env_path = project_root / ".env"
 load_dotenv(dotenv_path=env_path)
 
 from backend.app.services.collectors.market_index_collector import MarketIndexCollector
-from backend.trading_calendar_2025 import get_calendar
+from app.utils.trading_calendar import get_trading_calendar
 
 if __name__ == "__main__":
     collector = MarketIndexCollector()
-    calendar = get_calendar()
+    calendar = get_trading_calendar()
 
     # 使用交易日日历获取最近80个交易日(确保60天都有完整MA20数据)
     latest_trading_day = calendar.get_latest_trading_day("2025-12-11")
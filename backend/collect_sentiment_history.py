@@ -1,6 +1,7 @@
 """
 采集市场情绪历史数据
-使用2025年交易日日历,避免采集节假日数据
+使用交易日历,避免采集节假日数据
+按区间批量拉取 Tushare 数据并一次写入（逐日采集见 MarketSentimentCollector.collect_and_save）
 """
 
 import sys
@@ -16,11 +17,11 @@ env_path = project_root / ".env"
 load_dotenv(dotenv_path=env_path)
 
 from backend.app.services.collectors.market_sentiment_collector import MarketSentimentCollector
-from backend.trading_calendar_2025 import get_calendar
+from app.utils.trading_calendar import get_trading_calendar
 
 if __name__ == "__main__":
     collector = MarketSentimentCollector()
-    calendar = get_calendar()
+    calendar = get_trading_calendar()
 
     # 使用交易日日历获取最近60个交易日
     latest_trading_day = calendar.get_latest_trading_day("2025-12-11")
@@ -35,23 +36,9 @@ if __name__ == "__main__":
     print(f"日期范围: {target_days[0]} ~ {target_days[-1]}")
     print(f"交易日数: {len(target_days)}天\n")
 
-    success_count = 0
-    skip_count = 0
-
-    for date_str in target_days:
-        try:
-            print(f"采集 {date_str}...", end=" ")
-            result = collector.collect_and_save(date_str)
-            if result:
-                print("✅")
-                success_count += 1
-            else:
-                print("⚠️ 无数据")
-                skip_count += 1
-        except Exception as e:
-            print(f"❌ 错误: {e}")
-            skip_count += 1
+    # 区间批量模式：分页拉取整个区间的 daily / limit_list_d，一次批量写入
+    saved = collector.collect_and_save_range(target_days[0], target_days[-1])
 
     print(f"\n✅ 采集完成！")
-    print(f"   成功: {success_count} 天")
-    print(f"   跳过: {skip_count} 天")
+    print(f"   成功: {saved} 天")
+    print(f"   跳过: {len(target_days) - saved} 天")
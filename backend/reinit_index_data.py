@@ -16,7 +16,7 @@ load_dotenv(dotenv_path=env_path)
 
 from backend.app.utils.supabase_client import get_supabase
 from backend.app.services.collectors.market_index_collector import MarketIndexCollector
-from backend.trading_calendar_2025 import get_calendar
+from app.utils.trading_calendar import get_trading_calendar
 
 def clear_market_index_data():
     """清理 market_index 表中的所有数据"""
@@ -33,7 +33,7 @@ def clear_market_index_data():
 def collect_index_data():
     """重新采集大盘指数数据"""
     collector = MarketIndexCollector()
-    calendar = get_calendar()
+    calendar = get_trading_calendar()
 
     # 使用交易日日历获取最近80个交易日(确保60天都有完整MA20数据)
     latest_trading_day = calendar.get_latest_trading_day("2025-12-11")
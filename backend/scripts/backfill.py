@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+日期区间并行回补 - 短线复盘项目
+
+取代 collect_date.py / recollect_data.py / collect_index_history.py / collect_sentiment_history.py /
+collect_yesterday_limit.py 等逐日顺序执行的补采脚本: 按（采集步骤, 交易日）拆成单元并行执行，
+所有线程共享 Tushare / AKShare 全局限流预算（TUSHARE_CALLS_PER_MIN / AKSHARE_CALLS_PER_MIN）。
+
+用法:
+    python3 scripts/backfill.py --start 2026-07-01 --end 2026-09-30                # 全部步骤，跳过已有数据
+    python3 scripts/backfill.py --start 2026-07-01 --steps limit_stocks,yesterday_limit --workers 8
+    python3 scripts/backfill.py --date 2026-10-16 --force                          # 单日强制重采
+    python3 scripts/backfill.py --start 2026-07-01 --check                         # 只列出缺口，不采集
+    python3 scripts/backfill.py --list                                             # 列出可用步骤
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from loguru import logger
+from app.services.backfill import STEPS, BackfillRunner
+from app.services.completeness import EXPECTATIONS, find_gaps, log_gaps
+from app.utils.trading_date import get_latest_trading_date, get_trading_dates
+
+# 配置日志
+logger.remove()
+logger.add(
+    sys.stdout,
+    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level:8}</level> | <cyan>{thread.name}</cyan> | <level>{message}</level>",
+    level="INFO"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日期区间并行回补")
+    parser.add_argument("--start", help="开始日期 YYYY-MM-DD")
+    parser.add_argument("--end", help="结束日期 YYYY-MM-DD，默认最新交易日")
+    parser.add_argument("--date", help="只回补单个交易日 YYYY-MM-DD")
+    parser.add_argument("--steps", help=f"逗号分隔的采集步骤，默认全部（{','.join(STEPS)}）")
+    parser.add_argument("--workers", type=int, default=4, help="并行线程数（默认 4）")
+    parser.add_argument("--force", action="store_true", help="已有数据也重新采集")
+    parser.add_argument("--check", action="store_true", help="只检查缺口，不采集")
+    parser.add_argument("--list", action="store_true", help="列出可用步骤")
+    args = parser.parse_args()
+
+    if args.list:
+        for step in STEPS.values():
+            kind = "区间重建" if step.run_range else "逐日"
+            expectation = EXPECTATIONS[step.name]
+            print(f"{step.name:18} {step.label}（阶段 {step.stage}，{kind} -> {expectation.table} >= {expectation.min_rows} 行/日）")
+        return 0
+
+    start_date = args.date or args.start
+    end_date = args.date or args.end or get_latest_trading_date()
+    if not start_date:
+        parser.error("需要 --start 或 --date")
+
+    steps = [name.strip() for name in args.steps.split(",") if name.strip()] if args.steps else None
+
+    if args.check:
+        try:
+            gaps = find_gaps(start_date, end_date, steps)
+        except ValueError as e:
+            parser.error(str(e))
+        trade_dates = get_trading_dates(start_date, end_date)
+        logger.info(f"🔍 {start_date} ~ {end_date}: {len(trade_dates)} 个交易日，缺口 {len(gaps)} 个")
+        log_gaps(gaps, len(trade_dates), steps or EXPECTATIONS)
+        return 1 if gaps else 0
+
+    try:
+        runner = BackfillRunner(steps, start_date, end_date, workers=args.workers, force=args.force)
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = runner.run()
+    for name, trade_date in report.failed:
+        logger.warning(f"  失败: {name} {trade_date}")
+    return 0 if report.success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,8 @@
 每日自动数据采集脚本 - 短线复盘项目
 - 从系统获取当日日期和星期
 - 采集当日所有股票数据（大盘指数、涨停股池、市场情绪、热门概念）
-- 数据完整性检查
-- 失败后1小时重试补全
+- 数据完整性检查（completeness 缺口检测）
+- 有缺口时每隔 DAILY_RETRY_DELAY_MINUTES 分钟只重采缺口，最多 DAILY_RETRY_ATTEMPTS 次
 
 定时任务配置：
 0 16 * * 1-5 cd "/Users/win/Documents/ai 编程/cc/短线复盘/backend" && ./venv/bin/python3 scripts/daily_auto_collect.py >> "logs/daily_collect_$(date +\%Y\%m\%d).log" 2>&1
@@ -24,7 +24,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from loguru import logger
-from app.utils.supabase_client import get_supabase
+from app.services.completeness import DAILY_STEPS, EXPECTATIONS, fetch_date_counts
+from app.utils.trading_date import is_trading_date
 from app.services.collectors.market_index_collector import MarketIndexCollector
 from app.services.collectors.limit_stocks_collector import LimitStocksCollector
 from app.services.collectors.market_sentiment_collector import MarketSentimentCollector
@@ -38,6 +39,18 @@ logger.add(
     level="INFO"
 )
 
+# 缺口重试间隔（分钟）与次数
+RETRY_DELAY_MINUTES = int(os.getenv("DAILY_RETRY_DELAY_MINUTES", "10"))
+RETRY_ATTEMPTS = int(os.getenv("DAILY_RETRY_ATTEMPTS", "3"))
+
+# 模块显示名
+MODULE_LABELS = {
+    "market_index": "大盘指数",
+    "limit_stocks": "涨停股池",
+    "market_sentiment": "市场情绪",
+    "hot_concepts": "热门概念",
+}
+
 
 def get_trading_date():
     """
@@ -50,8 +63,8 @@ def get_trading_date():
     date_str = now.strftime("%Y-%m-%d")
     weekday = now.weekday()  # 0=周一, 6=周日
 
-    # 周一到周五是交易日
-    is_trading_day = weekday < 5
+    # 按交易日历判断（排除周末和节假日）
+    is_trading_day = is_trading_date(date_str)
 
     weekday_names = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
 
@@ -75,33 +88,17 @@ def check_data_completeness(trade_date: str):
     logger.info("🔍 检查数据完整性...")
     logger.info("=" * 80)
 
-    supabase = get_supabase()
     results = {}
 
     try:
-        # 1. 检查大盘指数（应该有3条：上证、深证、创业板）
-        response = supabase.table("market_index").select("*", count="exact").eq("trade_date", trade_date).execute()
-        count = response.count if response.count else 0
-        results["market_index"] = (count >= 1, count)  # 至少要有1条（上证）
-        logger.info(f"  大盘指数: {count} 条 {'✅' if count >= 1 else '❌ 不完整'}")
-
-        # 2. 检查涨停股池
-        response = supabase.table("limit_stocks_detail").select("*", count="exact").eq("trade_date", trade_date).execute()
-        count = response.count if response.count else 0
-        results["limit_stocks"] = (count > 0, count)
-        logger.info(f"  涨停股池: {count} 条 {'✅' if count > 0 else '❌ 缺失'}")
-
-        # 3. 检查市场情绪（应该只有1条）
-        response = supabase.table("market_sentiment").select("*", count="exact").eq("trade_date", trade_date).execute()
-        count = response.count if response.count else 0
-        results["market_sentiment"] = (count == 1, count)
-        logger.info(f"  市场情绪: {count} 条 {'✅' if count == 1 else '❌ 缺失'}")
-
-        # 4. 检查热门概念（应该有50条）
-        response = supabase.table("hot_concepts").select("*", count="exact").eq("trade_date", trade_date).execute()
-        count = response.count if response.count else 0
-        results["hot_concepts"] = (count >= 10, count)  # 至少10个概念
-        logger.info(f"  热门概念: {count} 条 {'✅' if count >= 10 else '❌ 不完整'}")
+        # 每张表一次按交易日分组计数，与期望行数比对
+        for module in DAILY_STEPS:
+            expectation = EXPECTATIONS[module]
+            count = fetch_date_counts(expectation.table, trade_date, trade_date).get(trade_date, 0)
+            complete = count >= expectation.min_rows
+            results[module] = (complete, count)
+            status = "✅" if complete else ("❌ 缺失" if count == 0 else f"❌ 不完整（至少 {expectation.min_rows} 条）")
+            logger.info(f"  {MODULE_LABELS[module]}: {count} 条 {status}")
 
     except Exception as e:
         logger.error(f"检查数据完整性失败: {str(e)}")
@@ -311,32 +308,35 @@ def main():
         logger.info("=" * 80)
         return 0
 
-    # 6. 数据不完整，1小时后重试
-    logger.info("\n" + "=" * 80)
-    logger.warning("⚠️  数据不完整，1小时后重试补全...")
-    logger.info("=" * 80)
+    # 6. 数据不完整，隔几分钟只重采缺口
+    final_completeness = completeness
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        missing = [module for module, (is_complete, _) in final_completeness.items() if not is_complete]
+        logger.info("\n" + "=" * 80)
+        logger.warning(f"⚠️  数据不完整（{', '.join(missing)}），{RETRY_DELAY_MINUTES} 分钟后重采缺口...")
+        logger.info("=" * 80)
 
-    retry_time = datetime.now() + timedelta(hours=1)
-    logger.info(f"⏰ 重试时间: {retry_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        retry_time = datetime.now() + timedelta(minutes=RETRY_DELAY_MINUTES)
+        logger.info(f"⏰ 重试时间: {retry_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        time.sleep(RETRY_DELAY_MINUTES * 60)
 
-    # 等待1小时
-    logger.info("⏳ 等待中...")
-    time.sleep(3600)  # 3600秒 = 1小时
+        # 7. 只重采缺口
+        logger.info("\n" + "=" * 80)
+        logger.info(f"🔄 第{attempt + 1}次采集（补全缺失数据）")
+        logger.info("=" * 80)
 
-    # 7. 重试补全
-    logger.info("\n" + "=" * 80)
-    logger.info("🔄 第2次采集（补全缺失数据）")
-    logger.info("=" * 80)
+        collect_missing_data(trade_date, final_completeness)
 
-    retry_results = collect_missing_data(trade_date, completeness)
+        # 8. 再次检查完整性
+        time.sleep(5)
+        final_completeness = check_data_completeness(trade_date)
 
-    # 8. 再次检查完整性
-    time.sleep(5)
-    final_completeness = check_data_completeness(trade_date)
+        if final_completeness is None:
+            logger.error("\n❌ 数据完整性检查失败")
+            return 1
 
-    if final_completeness is None:
-        logger.error("\n❌ 最终数据完整性检查失败")
-        return 1
+        if all(is_complete for is_complete, _ in final_completeness.values()):
+            break
 
     # 9. 最终结果
     all_complete_final = all(is_complete for is_complete, _ in final_completeness.values())
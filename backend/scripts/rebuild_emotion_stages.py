@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+重算情绪阶段历史 - 短线复盘项目
+
+情绪阶段判断阈值调整（emotion_stage.STAGE_VERSION 递增）后执行:
+从 market_sentiment 最早一天开始顺序重放状态机，批量写入 emotion_stage_daily。
+
+用法:
+    python3 scripts/rebuild_emotion_stages.py                      # 重算全部
+    python3 scripts/rebuild_emotion_stages.py --start 2026-01-01   # 只写入该日期之后（仍从头重放）
+    python3 scripts/rebuild_emotion_stages.py --date 2026-10-16    # 只计算单日
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from loguru import logger
+from app.services.emotion_stage import STAGE_VERSION, EmotionStageService
+
+# 配置日志
+logger.remove()
+logger.add(
+    sys.stdout,
+    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level:8}</level> | <level>{message}</level>",
+    level="INFO"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重算情绪阶段历史")
+    parser.add_argument("--start", help="写入的开始日期 YYYY-MM-DD")
+    parser.add_argument("--end", help="写入的结束日期 YYYY-MM-DD")
+    parser.add_argument("--date", help="只计算单个交易日 YYYY-MM-DD")
+    args = parser.parse_args()
+
+    service = EmotionStageService()
+    logger.info(f"🔁 情绪阶段判断版本: {STAGE_VERSION}")
+
+    if args.date:
+        result = service.compute(args.date)
+        return 0 if result else 1
+
+    written = service.rebuild(start_date=args.start, end_date=args.end)
+    return 0 if written else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+重建昨日涨停溢价日汇总 - 短线复盘项目
+
+从 yesterday_limit_performance 明细按日期顺序汇总（含 5/10/20 日滚动均值），
+批量写入 yesterday_limit_premium_daily。首次上线或补采历史明细后执行。
+
+用法:
+    python3 scripts/rebuild_premium_summary.py                      # 重建全部
+    python3 scripts/rebuild_premium_summary.py --start 2026-01-01   # 只写入该日期之后（滚动窗口仍从头计算）
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from loguru import logger
+from app.services.premium_summary import PremiumSummaryService
+
+# 配置日志
+logger.remove()
+logger.add(
+    sys.stdout,
+    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level:8}</level> | <level>{message}</level>",
+    level="INFO"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重建昨日涨停溢价日汇总")
+    parser.add_argument("--start", help="写入的开始日期 YYYY-MM-DD")
+    parser.add_argument("--end", help="写入的结束日期 YYYY-MM-DD")
+    args = parser.parse_args()
+
+    written = PremiumSummaryService().rebuild(start_date=args.start, end_date=args.end)
+    return 0 if written else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
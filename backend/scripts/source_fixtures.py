@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+查看数据源录制内容 - 短线复盘项目
+
+DATA_SOURCE_MODE=record 时 Tushare / AKShare 每次调用的参数和返回值写入夹具目录，
+回放（DATA_SOURCE_MODE=replay / benchmarks.run --replay）前用本脚本确认录制是否覆盖需要的日期和接口。
+
+用法:
+    python3 scripts/source_fixtures.py                                  # 按接口汇总
+    python3 scripts/source_fixtures.py --date 2026-10-16                # 只看参数里包含该日期的调用
+    python3 scripts/source_fixtures.py --endpoint tushare.ths_member -v # 列出每次调用
+    python3 scripts/source_fixtures.py --dir /path/to/fixtures
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from loguru import logger
+from app.utils.source_fixtures import iter_fixtures
+
+# 配置日志
+logger.remove()
+logger.add(sys.stdout, format="<level>{message}</level>", level="INFO")
+
+
+def _matches_date(fixture: dict, date: str) -> bool:
+    text = f"{fixture['args']} {fixture['kwargs']}"
+    return date in text or date.replace("-", "") in text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查看数据源录制内容")
+    parser.add_argument("--dir", help="夹具目录，默认 DATA_SOURCE_FIXTURES 或 backend/.cache/source_fixtures")
+    parser.add_argument("--date", help="只看参数中包含该日期（YYYY-MM-DD）的调用")
+    parser.add_argument("--endpoint", help="只看某个接口（如 tushare.limit_list_d）")
+    parser.add_argument("-v", "--verbose", action="store_true", help="列出每次调用的参数")
+    args = parser.parse_args()
+
+    fixtures = [
+        fixture for fixture in iter_fixtures(args.dir)
+        if (not args.endpoint or fixture["endpoint"] == args.endpoint)
+        and (not args.date or _matches_date(fixture, args.date))
+    ]
+    if not fixtures:
+        logger.warning("⚠️ 没有匹配的录制")
+        return 1
+
+    by_endpoint = defaultdict(list)
+    for fixture in fixtures:
+        by_endpoint[fixture["endpoint"]].append(fixture)
+
+    logger.info(f"{'接口':40}{'调用':>6}{'失败':>6}{'行数':>10}{'平均耗时':>10}{'大小':>10}")
+    for endpoint, items in sorted(by_endpoint.items()):
+        errors = sum(1 for item in items if item["error"])
+        rows = sum(item["rows"] or 0 for item in items)
+        elapsed = sum(item["elapsed"] or 0 for item in items) / len(items)
+        size = sum(item["bytes"] for item in items) / 1024
+        logger.info(f"{endpoint:40}{len(items):>6}{errors:>6}{rows:>10}{elapsed:>9.2f}s{size:>8.0f}KB")
+        if args.verbose:
+            for item in items:
+                status = f"❌ {item['error'][:60]}" if item["error"] else f"{item['rows']} 行"
+                logger.info(f"    {item['key']}  {item['args']} {item['kwargs']}  {status}  ({item['recorded_at']})")
+
+    logger.info(f"共 {len(fixtures)} 次调用，{len(by_endpoint)} 个接口")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
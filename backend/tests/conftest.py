@@ -0,0 +1,52 @@
+"""
+pytest 公共配置
+
+测试只覆盖纯逻辑（快照比对、事件日志、降采样、情绪阶段、区间汇总、缺口检测），
+不访问 Supabase / Tushare / AKShare；需要数据库的地方用 monkeypatch 替换，
+或用 fake_db 夹具把 Supabase 客户端接到内存版 PostgREST（benchmarks/fake_postgrest.py）。
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加 backend 目录到路径（从仓库根目录运行 pytest 时 app 包可导入）
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture(autouse=True)
+def isolated_state_files(monkeypatch, tmp_path):
+    """
+    测试不写本地状态文件: 失效日志（运行中的开发服务器会读取并清缓存）关闭，
+    数据源健康度（/api/ops/sources 与编排器排序使用）指向临时目录
+    """
+    from app.utils.result_cache import result_cache
+
+    monkeypatch.setattr(result_cache, "invalidation_file", None)
+    monkeypatch.setenv("SOURCE_HEALTH_FILE", str(tmp_path / "source_health.json"))
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """
+    内存版 PostgREST：业务代码照常使用 supabase-py 查询构建器，请求在进程内完成
+
+    Yields:
+        FakePostgrest（seed 写入初始数据，tables 查看写入结果）
+    """
+    from app.utils.result_cache import result_cache
+    from app.utils.supabase_client import SupabaseClient
+    from benchmarks.fake_postgrest import FakePostgrest, FakePostgrestTransport
+    from benchmarks.fixtures import UNIQUE_KEYS
+
+    monkeypatch.setenv("SUPABASE_URL", "http://fake-postgrest.local")
+    monkeypatch.setenv("SUPABASE_KEY", "test.test.test")
+    store = FakePostgrest(unique_keys=UNIQUE_KEYS)
+    SupabaseClient.use_transport(FakePostgrestTransport(store))
+    result_cache.invalidate_local(None)
+    try:
+        yield store
+    finally:
+        SupabaseClient.use_transport(None)
+        result_cache.invalidate_local(None)
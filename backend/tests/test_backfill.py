@@ -0,0 +1,149 @@
+"""
+分阶段回补：步骤解析与隐含重建、阶段顺序、缺口合并批量、区间重建时机
+"""
+
+import dataclasses
+import threading
+import time
+
+import pytest
+
+from app.services import backfill
+from app.services.backfill import BackfillRunner, resolve_steps
+from app.services.completeness import Gap
+
+TRADE_DATES = ["2026-10-12", "2026-10-13", "2026-10-14", "2026-10-15", "2026-10-16"]
+
+
+def test_resolve_steps_adds_implied_rebuilds_in_stage_order():
+    names = [step.name for step in resolve_steps(["yesterday_limit", "limit_stocks"])]
+    assert names == ["limit_stocks", "yesterday_limit", "premium_summary", "emotion_stage"]
+    assert [step.name for step in resolve_steps(["market_sentiment"])] == ["market_sentiment", "emotion_stage"]
+    assert [step.name for step in resolve_steps()] == list(backfill.STEPS)
+
+
+def test_resolve_steps_rejects_unknown():
+    with pytest.raises(ValueError):
+        resolve_steps(["limit_stocks", "no_such_step"])
+
+
+@pytest.fixture
+def fake_steps(monkeypatch, fake_db):
+    """把各步骤替换为记录执行事件的假实现，返回 (事件列表, 缺口表)"""
+    events = []
+    lock = threading.Lock()
+    gaps = {}
+
+    def record(*event):
+        with lock:
+            events.append(event)
+
+    def day(name):
+        def run(trade_date):
+            record("start", name, trade_date)
+            time.sleep(0.01)
+            record("end", name, trade_date)
+            return trade_date not in gaps.get(f"{name}:fail", ())
+        return run
+
+    def batch(name):
+        def run(start_date, end_date):
+            record("batch", name, start_date, end_date)
+            return TRADE_DATES.index(end_date) - TRADE_DATES.index(start_date) + 1
+        return run
+
+    def rebuild(name):
+        def run(start_date, end_date):
+            record("range", name, start_date, end_date)
+            return len(TRADE_DATES)
+        return run
+
+    steps = {}
+    for name, step in backfill.STEPS.items():
+        if step.run_day:
+            steps[name] = dataclasses.replace(step, run_day=day(name))
+        elif step.run_batch:
+            steps[name] = dataclasses.replace(step, run_batch=batch(name))
+        else:
+            steps[name] = dataclasses.replace(step, run_range=rebuild(name))
+
+    def fake_find_gaps(start_date, end_date, names, trade_dates):
+        return [
+            Gap(name, name, trade_date, 0, 1)
+            for name in names
+            for trade_date in trade_dates
+            if trade_date in gaps.get(name, ())
+        ]
+
+    monkeypatch.setattr(backfill, "STEPS", steps)
+    monkeypatch.setattr(backfill, "get_trading_dates", lambda start, end: list(TRADE_DATES))
+    monkeypatch.setattr(backfill, "find_gaps", fake_find_gaps)
+    return events, gaps
+
+
+def test_later_stage_starts_after_earlier_stage_finishes(fake_steps):
+    events, _ = fake_steps
+    runner = BackfillRunner(["limit_stocks", "hot_concepts", "yesterday_limit"], TRADE_DATES[0], TRADE_DATES[-1],
+                            workers=4, force=True)
+    report = runner.run()
+
+    assert report.success
+    assert report.total == report.done == 3 * len(TRADE_DATES)
+    last_stage1 = max(i for i, e in enumerate(events) if e[0] == "end" and e[1] != "yesterday_limit")
+    first_stage2 = min(i for i, e in enumerate(events) if e[1] == "yesterday_limit")
+    assert last_stage1 < first_stage2
+
+    # 区间重建在全部逐日单元之后，按阶段顺序各执行一次
+    ranges = [e for e in events if e[0] == "range"]
+    assert ranges == [
+        ("range", "premium_summary", TRADE_DATES[0], TRADE_DATES[-1]),
+        ("range", "emotion_stage", TRADE_DATES[0], TRADE_DATES[-1]),
+    ]
+    assert events.index(ranges[0]) > max(i for i, e in enumerate(events) if e[0] == "end")
+    assert report.ranges == {"premium_summary": 5, "emotion_stage": 5}
+
+
+def test_only_gaps_are_collected_and_batches_merge_consecutive_days(fake_steps):
+    events, gaps = fake_steps
+    gaps["limit_stocks"] = {"2026-10-14"}
+    gaps["market_sentiment"] = {"2026-10-12", "2026-10-13", "2026-10-16"}
+
+    report = BackfillRunner(["limit_stocks", "market_sentiment"], TRADE_DATES[0], TRADE_DATES[-1]).run()
+
+    assert report.skipped == 2 * len(TRADE_DATES) - 4
+    assert report.done == 4
+    assert [e for e in events if e[0] == "start"] == [("start", "limit_stocks", "2026-10-14")]
+    assert sorted(e for e in events if e[0] == "batch") == [
+        ("batch", "market_sentiment", "2026-10-12", "2026-10-13"),
+        ("batch", "market_sentiment", "2026-10-16", "2026-10-16"),
+    ]
+    # 有逐日单元执行，情绪阶段按区间重建
+    assert [e[1] for e in events if e[0] == "range"] == ["emotion_stage"]
+
+
+def test_complete_range_skips_rebuild(fake_steps):
+    events, _ = fake_steps
+    report = BackfillRunner(["market_sentiment"], TRADE_DATES[0], TRADE_DATES[-1]).run()
+    assert report.success and report.done == 0
+    assert events == []
+
+
+def test_summary_gap_alone_triggers_rebuild(fake_steps):
+    events, gaps = fake_steps
+    gaps["emotion_stage"] = {"2026-10-15"}
+    BackfillRunner(["emotion_stage"], TRADE_DATES[0], TRADE_DATES[-1]).run()
+    assert events == [("range", "emotion_stage", TRADE_DATES[0], TRADE_DATES[-1])]
+
+
+def test_failed_units_are_reported_and_ledgered(fake_steps, fake_db):
+    _, gaps = fake_steps
+    gaps["limit_stocks"] = {"2026-10-13", "2026-10-14"}
+    gaps["limit_stocks:fail"] = {"2026-10-14"}
+
+    report = BackfillRunner(["limit_stocks"], TRADE_DATES[0], TRADE_DATES[-1]).run()
+
+    assert report.failed == [("limit_stocks", "2026-10-14")]
+    assert report.done == 1
+    runs = {(r["step"], r["trade_date"]): r["status"] for r in fake_db.tables["collection_runs"]}
+    assert runs[("limit_stocks", "2026-10-13")] == "success"
+    assert runs[("limit_stocks", "2026-10-14")] == "failed"
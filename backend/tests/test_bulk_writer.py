@@ -0,0 +1,121 @@
+"""
+批量写入：按大小 / 行数切块，错误分类，失败块重试与二分定位坏行
+"""
+
+import threading
+
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+
+from app.utils import bulk_writer
+from app.utils.bulk_writer import BulkWriter, classify_error
+
+
+def _api_error(code):
+    return APIError({"message": "error", "code": code, "hint": None, "details": None})
+
+
+@pytest.mark.parametrize("error, kind", [
+    (httpx.ConnectTimeout("timeout"), "transient"),
+    (_api_error("40001"), "transient"),   # 序列化失败
+    (_api_error("57014"), "transient"),   # 语句超时
+    (_api_error("502"), "transient"),     # 网关错误页
+    (_api_error("23505"), "row"),         # 唯一约束
+    (_api_error("22P02"), "row"),         # 类型不符
+    (_api_error("42703"), "fatal"),       # 列不存在
+    (_api_error("404"), "fatal"),
+    (TypeError("not serializable"), "fatal"),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def _rows(n):
+    return [{"trade_date": "2026-10-16", "stock_code": f"{600000 + i}.SH", "name": "股票" * (i % 3)} for i in range(n)]
+
+
+def test_chunk_by_rows_and_bytes(fake_db):
+    rows = _rows(25)
+    chunks = BulkWriter("t", max_rows=10).chunk(rows)
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    assert [r for c in chunks for r in c] == rows
+
+    small = BulkWriter("t", max_payload_bytes=300).chunk(rows)
+    assert all(len(c) > 0 for c in small) and len(small) > 3
+    assert [r for c in small for r in c] == rows
+
+
+def test_write_upserts_all_chunks(fake_db):
+    rows = _rows(45)
+    result = BulkWriter("limit_stocks_detail", on_conflict="trade_date,stock_code", max_rows=10).write(rows)
+    assert result.success and result.written == 45 and result.chunks == 5
+    assert len(fake_db.tables["limit_stocks_detail"]) == 45
+
+    # 再次 upsert 不产生重复行
+    BulkWriter("limit_stocks_detail", on_conflict="trade_date,stock_code", max_rows=10).write(rows)
+    assert len(fake_db.tables["limit_stocks_detail"]) == 45
+
+
+@pytest.fixture
+def sent(monkeypatch, fake_db):
+    """替换块发送: 按规则抛错，记录每次发送的行"""
+    calls = []
+    lock = threading.Lock()
+    rules = {"bad": set(), "transient_failures": 0}
+
+    def fake_send(self, rows):
+        with lock:
+            calls.append([r["stock_code"] for r in rows])
+            if rules["transient_failures"] > 0:
+                rules["transient_failures"] -= 1
+                raise httpx.ReadTimeout("timeout")
+        if any(r["stock_code"] in rules["bad"] for r in rows):
+            raise _api_error("23502")
+
+    monkeypatch.setattr(BulkWriter, "_send", fake_send)
+    monkeypatch.setattr(bulk_writer.time, "sleep", lambda s: None)
+    return calls, rules
+
+
+def test_row_error_bisects_to_bad_row(sent):
+    calls, rules = sent
+    rows = _rows(8)
+    rules["bad"] = {rows[5]["stock_code"]}
+
+    result = BulkWriter("t", max_rows=8).write(rows)
+
+    assert result.written == 7 and result.failed == 1
+    assert result.retried_chunks > 0
+    # 坏行单独发送过，且没有在不拆块的情况下重试
+    assert [rows[5]["stock_code"]] in calls
+    assert calls.count([r["stock_code"] for r in rows]) == 1
+
+
+def test_transient_error_retries_without_splitting(sent):
+    calls, rules = sent
+    rules["transient_failures"] = 2
+    rows = _rows(6)
+
+    result = BulkWriter("t", max_rows=6, max_retries=2).write(rows)
+
+    assert result.success
+    assert len(calls) == 3 and all(len(c) == 6 for c in calls)
+
+
+def test_fatal_error_fails_whole_chunk(monkeypatch, fake_db):
+    calls = []
+
+    def fake_send(self, rows):
+        calls.append(len(rows))
+        raise _api_error("42703")
+
+    monkeypatch.setattr(BulkWriter, "_send", fake_send)
+    result = BulkWriter("t", max_rows=4).write(_rows(8))
+    assert result.written == 0 and result.failed == 8
+    assert calls == [4, 4]
+
+
+def test_rejects_unknown_mode(fake_db):
+    with pytest.raises(ValueError):
+        BulkWriter("t", mode="merge")
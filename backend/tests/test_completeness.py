@@ -0,0 +1,74 @@
+"""
+采集缺口检测（find_gaps）
+"""
+
+import pytest
+
+from app.services import completeness
+from app.services.completeness import EXPECTATIONS, Gap, find_gaps
+
+TRADE_DATES = ["2026-10-14", "2026-10-15", "2026-10-16"]
+
+
+@pytest.fixture
+def date_counts(monkeypatch):
+    """替换按交易日计数的查询，记录每张表的查询区间"""
+    counts = {}
+    calls = []
+
+    def fake_fetch(table, start_date, end_date):
+        calls.append((table, start_date, end_date))
+        return counts.get(table, {})
+
+    monkeypatch.setattr(completeness, "fetch_date_counts", fake_fetch)
+    return counts, calls
+
+
+def test_reports_missing_and_partial_days(date_counts):
+    counts, calls = date_counts
+    counts["hot_concepts"] = {"2026-10-14": 12, "2026-10-15": 4}
+    counts["market_index"] = {d: 3 for d in TRADE_DATES}
+
+    gaps = find_gaps(TRADE_DATES[0], TRADE_DATES[-1], ["hot_concepts", "market_index"], TRADE_DATES)
+
+    assert gaps == [
+        Gap("hot_concepts", "hot_concepts", "2026-10-15", 4, 10),
+        Gap("hot_concepts", "hot_concepts", "2026-10-16", 0, 10),
+    ]
+    assert [gap.status for gap in gaps] == ["partial", "missing"]
+    # 每张表只查询一次
+    assert calls == [
+        ("hot_concepts", "2026-10-14", "2026-10-16"),
+        ("market_index", "2026-10-14", "2026-10-16"),
+    ]
+
+
+def test_market_index_expects_every_default_index(date_counts):
+    counts, _ = date_counts
+    counts["market_index"] = {"2026-10-14": 3, "2026-10-15": 1, "2026-10-16": 2}
+
+    gaps = find_gaps(TRADE_DATES[0], TRADE_DATES[-1], ["market_index"], TRADE_DATES)
+
+    # 只有上证（或缺创业板）的日期是不完整，不是完整
+    assert gaps == [
+        Gap("market_index", "market_index", "2026-10-15", 1, 3),
+        Gap("market_index", "market_index", "2026-10-16", 2, 3),
+    ]
+    assert {gap.status for gap in gaps} == {"partial"}
+
+
+def test_checks_all_steps_by_default(date_counts):
+    gaps = find_gaps(TRADE_DATES[0], TRADE_DATES[-1], trade_dates=TRADE_DATES[:1])
+    assert [gap.step for gap in gaps] == list(EXPECTATIONS)
+    assert all(gap.status == "missing" for gap in gaps)
+
+
+def test_no_trading_days(date_counts):
+    _, calls = date_counts
+    assert find_gaps("2026-10-17", "2026-10-18", trade_dates=[]) == []
+    assert calls == []
+
+
+def test_unknown_step(date_counts):
+    with pytest.raises(ValueError):
+        find_gaps(TRADE_DATES[0], TRADE_DATES[-1], ["no_such_step"], TRADE_DATES)
@@ -0,0 +1,78 @@
+"""
+看板字段裁剪：fields 解析、列表 / 嵌套模块裁剪、未知字段与空参数
+"""
+
+import pytest
+
+from app.services.dashboard_service import apply_fields, parse_fields, parse_sections
+
+SECTIONS = {
+    "index": [
+        {"index_code": "SH000001", "close": 3300.5, "change_pct": 0.5},
+        {"index_code": "SZ399001", "close": 10500.0, "change_pct": -0.2},
+    ],
+    "stats": {"trade_date": "2026-10-16", "up_count": 3000, "down_count": 2000},
+    "hot_concepts": {"data": [{"concept_name": "银行", "change_pct": 3.1, "rank": 1}], "total": 1},
+    "index_history": {
+        "SH000001": {"dates": ["2026-10-16"], "close": [3300.5], "amount": [4.1e11]},
+        "SZ399001": {"dates": ["2026-10-16"], "close": [10500.0], "amount": [5.2e11]},
+        "SZ399006": None,
+    },
+    "emotion": None,
+}
+
+
+def test_parse_fields():
+    assert parse_fields("hot_concepts.concept_name, hot_concepts.change_pct,index.close") == {
+        "hot_concepts": ["concept_name", "change_pct"],
+        "index": ["close"],
+    }
+    # 缺少模块或字段的项忽略
+    assert parse_fields("close,index.,.close") == {}
+
+
+@pytest.mark.parametrize("value", [None, "", " ", ","])
+def test_empty_fields_returns_sections_unchanged(value):
+    assert parse_fields(value) == {}
+    assert apply_fields(SECTIONS, parse_fields(value)) is SECTIONS
+
+
+def test_list_and_dict_sections():
+    result = apply_fields(SECTIONS, parse_fields("index.close,stats.up_count"))
+    assert result["index"] == [{"close": 3300.5}, {"close": 10500.0}]
+    assert result["stats"] == {"up_count": 3000}
+    # 未指定字段的模块原样返回
+    assert result["hot_concepts"] is SECTIONS["hot_concepts"]
+    assert result["emotion"] is None
+
+
+def test_nested_sections():
+    result = apply_fields(SECTIONS, parse_fields("hot_concepts.concept_name,index_history.close,index_history.dates"))
+    # {"data": [...]}: 裁剪 data 中的每一项，其他键保留
+    assert result["hot_concepts"] == {"data": [{"concept_name": "银行"}], "total": 1}
+    # 按指数代码分组: 裁剪每个分组
+    assert result["index_history"] == {
+        "SH000001": {"dates": ["2026-10-16"], "close": [3300.5]},
+        "SZ399001": {"dates": ["2026-10-16"], "close": [10500.0]},
+        "SZ399006": None,
+    }
+
+
+def test_unknown_fields():
+    # 未知字段: 对应模块裁剪为空，已知字段照常保留
+    result = apply_fields(SECTIONS, parse_fields("stats.no_such,index.close,index.no_such"))
+    assert result["stats"] == {}
+    assert result["index"] == [{"close": 3300.5}, {"close": 10500.0}]
+    # 未知模块名不影响结果
+    assert apply_fields(SECTIONS, parse_fields("no_such.close")) == SECTIONS
+    # 不修改入参
+    assert SECTIONS["stats"] == {"trade_date": "2026-10-16", "up_count": 3000, "down_count": 2000}
+
+
+def test_parse_sections():
+    allowed = ("index", "stats", "hot_concepts")
+    assert parse_sections(None, allowed) == allowed
+    # 按模块定义顺序返回
+    assert parse_sections("stats, index", allowed) == ("index", "stats")
+    with pytest.raises(ValueError):
+        parse_sections("stats,no_such", allowed)
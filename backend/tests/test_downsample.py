@@ -0,0 +1,48 @@
+"""
+LTTB 降采样
+"""
+
+import math
+
+import pytest
+
+from app.utils.downsample import lttb_indices
+
+
+@pytest.mark.parametrize("threshold", [2, 10, 50])
+def test_short_series_returned_unchanged(threshold):
+    values = [float(i) for i in range(10)]
+    assert lttb_indices(values, threshold) == list(range(10))
+
+
+@pytest.mark.parametrize("n,threshold", [(100, 3), (250, 40), (1000, 500), (1001, 97)])
+def test_selects_exact_count_in_order(n, threshold):
+    values = [math.sin(i / 7) * 10 + i * 0.01 for i in range(n)]
+    indices = lttb_indices(values, threshold)
+    assert len(indices) == threshold
+    assert indices[0] == 0
+    assert indices[-1] == n - 1
+    assert all(a < b for a, b in zip(indices, indices[1:]))
+
+
+def test_keeps_spikes():
+    values = [1.0] * 200
+    values[57] = 50.0
+    values[143] = -40.0
+    indices = lttb_indices(values, 20)
+    assert 57 in indices
+    assert 143 in indices
+
+
+def test_handles_missing_values():
+    values = [None, None] + [float(i % 9) for i in range(100)] + [None]
+    indices = lttb_indices(values, 10)
+    assert len(indices) == 10
+    assert indices[0] == 0
+    assert indices[-1] == len(values) - 1
+
+
+def test_straight_line_keeps_endpoints():
+    indices = lttb_indices([float(i) for i in range(30)], 5)
+    assert (indices[0], indices[-1]) == (0, 29)
+    assert len(indices) == 5
@@ -0,0 +1,101 @@
+"""
+流式导出：跨页键集分页不重不漏，CSV 表头与 NDJSON 逐行输出（内存 PostgREST）
+"""
+
+import asyncio
+import csv
+import io
+import json
+from functools import partial
+
+import pytest
+
+from app.routers import export
+from app.routers.export import EXPORT_DATASETS, export_dataset, iter_rows
+
+DATES = ["2026-10-14", "2026-10-15", "2026-10-16"]
+PAGE_SIZE = 7
+
+
+def _seed(fake_db, per_day=9):
+    rows = []
+    for trade_date in DATES:
+        for i in range(per_day):
+            # 同一代码同时出现在涨停和跌停，唯一键后两列都参与排序
+            code = f"{600000 + i // 2}.SH"
+            rows.append({
+                "trade_date": trade_date,
+                "stock_code": code,
+                "limit_type": "limit_up" if i % 2 == 0 else "limit_down",
+                "stock_name": f"股票{i}",
+                "change_pct": 10.0 if i % 2 == 0 else -10.0,
+                "concepts": ["银行", "券商"] if i % 3 == 0 else [],
+            })
+    fake_db.seed("limit_stocks_detail", rows)
+    return sorted((r["trade_date"], r["stock_code"], r["limit_type"]) for r in rows)
+
+
+async def _collect(pages):
+    return [page async for page in pages]
+
+
+@pytest.mark.parametrize("per_day", [7, 9])  # 21 行恰好整页、27 行末页不满
+def test_iter_rows_pages_cover_range_once(fake_db, per_day):
+    expected = _seed(fake_db, per_day)
+    pages = asyncio.run(_collect(iter_rows(
+        EXPORT_DATASETS["limit_stocks"], DATES[0], DATES[-1], page_size=PAGE_SIZE,
+    )))
+    assert all(0 < len(page) <= PAGE_SIZE for page in pages)
+    keys = [(r["trade_date"], r["stock_code"], r["limit_type"]) for page in pages for r in page]
+    assert keys == expected
+
+
+def _export(monkeypatch, **params):
+    """调用导出接口（小页数），返回完整响应体"""
+    monkeypatch.setattr(export, "iter_rows", partial(iter_rows, page_size=PAGE_SIZE))
+    defaults = dict(end_date=DATES[-1], format="ndjson", columns=None, limit_type=None)
+    defaults.update(params)
+
+    async def run():
+        response = await export_dataset("limit_stocks", **defaults)
+        assert response.headers["cache-control"] == "no-store"
+        return b"".join([chunk async for chunk in response.body_iterator]).decode("utf-8")
+
+    return asyncio.run(run())
+
+
+def test_ndjson_export(fake_db, monkeypatch):
+    expected = _seed(fake_db)
+    lines = _export(monkeypatch, start_date=DATES[0]).splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert [(r["trade_date"], r["stock_code"], r["limit_type"]) for r in rows] == expected
+    assert not any("_error" in r for r in rows)
+
+
+def test_csv_export_has_single_header(fake_db, monkeypatch):
+    expected = _seed(fake_db)
+    body = _export(monkeypatch, start_date=DATES[0], format="csv", columns="stock_name,concepts")
+
+    assert body.startswith("﻿") and body.count("﻿") == 1
+    reader = list(csv.reader(io.StringIO(body.lstrip("﻿"))))
+    header, data = reader[0], reader[1:]
+    # 唯一键列总是在前
+    assert header == ["trade_date", "stock_code", "limit_type", "stock_name", "concepts"]
+    assert "trade_date" not in [row[0] for row in data]
+    assert [tuple(row[:3]) for row in data] == expected
+    # 列表值按 JSON 输出
+    concepts = {tuple(row[:3]): row[4] for row in data}
+    assert json.loads(concepts[(DATES[0], "600000.SH", "limit_up")]) == ["银行", "券商"]
+    assert json.loads(concepts[(DATES[0], "600000.SH", "limit_down")]) == []
+
+
+def test_csv_export_filters_and_empty_range(fake_db, monkeypatch):
+    _seed(fake_db)
+    body = _export(monkeypatch, start_date=DATES[1], end_date=DATES[1], format="csv", limit_type="limit_down")
+    data = list(csv.DictReader(io.StringIO(body.lstrip("﻿"))))
+    assert {(r["trade_date"], r["limit_type"]) for r in data} == {(DATES[1], "limit_down")}
+    assert len(data) == 4
+
+    # 区间内没有数据: 指定列时只输出表头
+    body = _export(monkeypatch, start_date="2026-10-01", end_date="2026-10-09", format="csv", columns="stock_name")
+    assert body == "﻿trade_date,stock_code,limit_type,stock_name\r\n"
@@ -0,0 +1,158 @@
+"""
+HTTP 缓存中间件：Cache-Control 策略、ETag / 304、压缩、已收盘交易日响应缓存与失效
+"""
+
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import http_cache
+from app.middleware.http_cache import (
+    DATA_COMPLETE,
+    HttpCacheMiddleware,
+    ResponseStore,
+    choose_encoding,
+    etag_matches,
+)
+from app.routers.market import router as market_router
+
+LATEST = "2026-10-16"
+CLOSED = "2026-10-15"
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(http_cache, "get_latest_trading_date", lambda: LATEST)
+    calls = {"n": 0}
+    api = FastAPI()
+
+    @api.get("/api/limit/stocks")
+    def stocks(trade_date: str = None, start_date: str = None, partial: bool = False):
+        calls["n"] += 1
+        content = {"trade_date": trade_date, "data": [{"stock_code": f"{600000 + i}.SH"} for i in range(100)]}
+        return JSONResponse(content, headers={} if partial else DATA_COMPLETE)
+
+    @api.get("/api/backtest/run")
+    def backtest():
+        return {"ok": True}
+
+    store = ResponseStore(1024 * 1024)
+    api.add_middleware(HttpCacheMiddleware, max_age=60, immutable_max_age=86400, min_compress_size=100, store=store)
+    return TestClient(api), store, calls
+
+
+def test_closed_complete_day_is_immutable_and_stored(app):
+    client, store, calls = app
+    first = client.get("/api/limit/stocks", params={"trade_date": CLOSED})
+    assert first.headers["cache-control"] == "public, max-age=86400, immutable"
+    assert "x-data-complete" not in first.headers
+    assert len(store) == 1
+
+    second = client.get("/api/limit/stocks", params={"trade_date": CLOSED})
+    assert calls["n"] == 1  # 第二次直接由响应缓存返回
+    assert second.json() == first.json()
+    assert second.headers["etag"] == first.headers["etag"]
+
+
+@pytest.mark.parametrize("params", [
+    {"trade_date": LATEST},
+    {},
+    {"trade_date": CLOSED, "start_date": "2026-10-01"},
+    {"trade_date": CLOSED, "partial": "true"},
+])
+def test_short_max_age_otherwise(app, params):
+    client, store, calls = app
+    for _ in range(2):
+        response = client.get("/api/limit/stocks", params=params)
+        assert response.headers["cache-control"] == "public, max-age=60"
+    assert calls["n"] == 2
+    assert len(store) == 0
+
+
+def test_mutable_endpoints_revalidate(app):
+    client, _, _ = app
+    assert client.get("/api/backtest/run").headers["cache-control"] == "no-cache"
+
+
+def test_if_none_match_returns_304(app):
+    client, _, _ = app
+    etag = client.get("/api/limit/stocks", params={"trade_date": LATEST}).headers["etag"]
+    response = client.get("/api/limit/stocks", params={"trade_date": LATEST}, headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_gzip_when_accepted(app):
+    client, _, _ = app
+    raw = client.get("/api/limit/stocks", params={"trade_date": CLOSED}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in raw.headers
+
+    response = client.get(
+        "/api/limit/stocks", params={"trade_date": CLOSED}, headers={"Accept-Encoding": "gzip"},
+    )
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == raw.json()
+    assert int(response.headers["content-length"]) < len(raw.content)
+
+
+def test_invalidate_trade_date_clears_store(app):
+    client, store, calls = app
+    client.get("/api/limit/stocks", params={"trade_date": CLOSED})
+    client.get("/api/limit/stocks", params={"trade_date": "2026-10-14"})
+    assert store.invalidate(CLOSED) == 1
+    client.get("/api/limit/stocks", params={"trade_date": CLOSED})
+    assert calls["n"] == 3
+
+
+def test_store_evicts_by_bytes():
+    def entry(trade_date, size):
+        return http_cache.CachedResponse(200, [], b"x" * size, "W/\"e\"", "public", trade_date)
+
+    store = ResponseStore(250)
+    store.put("a", entry("2026-10-14", 100))
+    store.put("b", entry("2026-10-15", 100))
+    store.get("a")
+    store.put("c", entry("2026-10-15", 100))
+    assert store.get("b") is None and store.get("a") is not None
+    assert store.bytes == 200
+    store.put("huge", entry("2026-10-15", 1000))  # 超过上限的不缓存
+    assert store.get("huge") is None
+
+
+def test_etag_and_encoding_negotiation():
+    assert etag_matches('"abc", W/"def"', 'W/"def"')
+    assert etag_matches("*", 'W/"x"')
+    assert not etag_matches(None, 'W/"x"')
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("deflate, gzip;q=0.5") == "gzip"
+    assert gzip.decompress(http_cache._compress(b"abc", "gzip")) == b"abc"
+
+
+def test_windowed_endpoints_are_not_immutable(monkeypatch, fake_db):
+    monkeypatch.setattr(http_cache, "get_latest_trading_date", lambda: LATEST)
+    for trade_date, amount in (("2026-10-14", 100.0), (CLOSED, 120.0)):
+        fake_db.seed("market_index", [
+            {"trade_date": trade_date, "index_code": code, "index_name": code, "amount": amount}
+            for code in ("000001.SH", "399001.SZ", "399006.SZ")
+        ])
+    fake_db.seed("market_sentiment", [{
+        "trade_date": CLOSED, "total_amount": 1.2e12, "up_count": 3000, "down_count": 2000,
+        "limit_up_count": 60, "limit_down_count": 5, "up_down_ratio": 1.5,
+    }])
+    api = FastAPI()
+    api.include_router(market_router, prefix="/api/market")
+    api.add_middleware(HttpCacheMiddleware, max_age=60, immutable_max_age=86400, store=ResponseStore(1024 * 1024))
+    client = TestClient(api)
+
+    # 成交额环比依赖前一交易日: 前一日重采后会变化，只用短 max-age
+    index = client.get("/api/market/index", params={"trade_date": CLOSED})
+    assert index.status_code == 200
+    assert index.json()["data"][0]["amount_change_pct"] == 20.0
+    assert index.headers["cache-control"] == "public, max-age=60"
+    # 单日数据仍为 immutable
+    stats = client.get("/api/market/stats", params={"trade_date": CLOSED})
+    assert stats.headers["cache-control"] == "public, max-age=86400, immutable"
@@ -0,0 +1,139 @@
+"""
+键集分页：游标编解码、过滤表达式，以及 /api/limit/stocks 翻页不重不漏（内存 PostgREST）
+"""
+
+import asyncio
+import json
+import random
+
+import pytest
+
+from app.routers.limit_stocks import count_limit_stocks, get_limit_stocks
+from app.utils.keyset import (
+    InvalidCursor,
+    KeysetField,
+    decode_cursor,
+    encode_cursor,
+    iter_pages,
+    keyset_filter,
+)
+from app.utils.supabase_client import get_supabase
+
+TRADE_DATE = "2026-10-16"
+
+KEYS = [KeysetField("change_pct", desc=True, nulls_first=True), KeysetField("stock_code")]
+
+
+def test_cursor_round_trip():
+    row = {"change_pct": 9.98, "stock_code": "600000.SH", "stock_name": "浦发银行"}
+    assert decode_cursor(encode_cursor(row, KEYS), KEYS) == [9.98, "600000.SH"]
+
+
+def test_cursor_rejects_other_order_and_garbage():
+    cursor = encode_cursor({"change_pct": 1.0, "stock_code": "000001.SZ"}, KEYS)
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, [KeysetField("amount", desc=True, nulls_first=True), KeysetField("stock_code")])
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor", KEYS)
+
+
+def test_keyset_filter_expression():
+    # 含 "." 的值加引号；stock_code 升序、空值在后，所以 "之后" 也包含空值
+    assert keyset_filter(KEYS, [5.0, "600000.SH"]) == (
+        'change_pct.lt."5.0",'
+        'and(change_pct.eq."5.0",or(stock_code.gt."600000.SH",stock_code.is.null))'
+    )
+    # 空值在前: 之后是全部非空值，以及同为空值且代码更大的行
+    assert keyset_filter(KEYS, [None, "600000.SH"]) == (
+        'change_pct.not.is.null,'
+        'and(change_pct.is.null,or(stock_code.gt."600000.SH",stock_code.is.null))'
+    )
+
+
+def _seed_stocks(fake_db, n=137):
+    rng = random.Random(7)
+    rows = []
+    for i in range(n):
+        rows.append({
+            "trade_date": TRADE_DATE,
+            "stock_code": f"{600000 + i}.SH",
+            "stock_name": f"股票{i}",
+            "limit_type": "limit_up" if i % 5 else "limit_down",
+            # 大量重复值和空值，排序只靠唯一列兜底
+            "change_pct": rng.choice([None, 5.0, 9.98, 10.0, 19.99, 20.0]),
+            "continuous_days": rng.choice([None, 1, 1, 1, 2, 3]),
+            "amount": rng.uniform(1e7, 1e9),
+            "is_st": i % 11 == 0,
+        })
+    fake_db.seed("limit_stocks_detail", rows)
+    return rows
+
+
+def _expected(rows, order_field, limit_type="limit_up"):
+    rows = [r for r in rows if r["limit_type"] == limit_type]
+    rows.sort(key=lambda r: r["stock_code"])
+    # 降序、空值在前
+    rows.sort(key=lambda r: (r[order_field] is not None, -(r[order_field] or 0)))
+    return [r["stock_code"] for r in rows]
+
+
+def _get(**params):
+    defaults = dict(
+        trade_date=TRADE_DATE, start_date=None, limit_type="limit_up", min_continuous_days=None,
+        continuous_days=None, filter_st=False, order_by="change_pct", cursor=None, page=1,
+        page_size=20, count="exact",
+    )
+    defaults.update(params)
+    response = asyncio.run(get_limit_stocks(**defaults))
+    return json.loads(response.body)
+
+
+@pytest.mark.parametrize("order_by", ["change_pct", "continuous_days", "amount"])
+def test_cursor_pages_cover_all_rows_once(fake_db, order_by):
+    rows = _seed_stocks(fake_db)
+    codes, cursor, pages = [], None, 0
+    while True:
+        body = _get(order_by=order_by, cursor=cursor)
+        codes.extend(item["stock_code"] for item in body["data"])
+        pages += 1
+        cursor = body["next_cursor"]
+        assert body["has_more"] == (cursor is not None)
+        if cursor is None:
+            break
+
+    expected = _expected(rows, order_by)
+    assert codes == expected
+    assert pages == -(-len(expected) // 20)
+    assert body["total"] == len(expected)
+
+
+def test_offset_page_matches_cursor_page(fake_db):
+    _seed_stocks(fake_db)
+    first = _get()
+    second_by_cursor = _get(cursor=first["next_cursor"])
+    second_by_offset = _get(page=2)
+    assert [r["stock_code"] for r in second_by_cursor["data"]] == [r["stock_code"] for r in second_by_offset["data"]]
+
+
+def test_count_is_cached_per_trade_date(fake_db):
+    _seed_stocks(fake_db)
+    _get()
+    requests = fake_db.request_count
+    _get(page=2)
+    # 第二页只查列表，计数读缓存
+    assert fake_db.request_count == requests + 1
+    assert count_limit_stocks(
+        end_date=TRADE_DATE, start_date=TRADE_DATE, limit_type="limit_up",
+        min_continuous_days=None, continuous_days=None, filter_st=False,
+    ) == _get()["total"]
+
+
+def test_iter_pages_scans_whole_table(fake_db):
+    rows = _seed_stocks(fake_db)
+    pages = list(iter_pages(
+        lambda: get_supabase().table("limit_stocks_detail").select("stock_code,change_pct").eq("limit_type", "limit_up"),
+        KEYS,
+        page_size=16,
+    ))
+    assert all(len(page) <= 16 for page in pages)
+    assert [r["stock_code"] for page in pages for r in page] == _expected(rows, "change_pct")
@@ -0,0 +1,143 @@
+"""
+盘中封板事件日志：编码 / 读取、时间线汇总、重启状态恢复
+"""
+
+import pytest
+
+from app.services.limit_event_log import (
+    EVENT_TYPES,
+    RECORD,
+    LimitEventLog,
+    build_timelines,
+    time_to_seconds,
+)
+
+
+def _event(event_type, code, when, **data):
+    return {"type": event_type, "code": code, "time": when, "data": data}
+
+
+def _record(when, event_type, code, opening_times=0, continuous_days=1, sealed=0.0):
+    return (time_to_seconds(when), EVENT_TYPES[event_type], code, opening_times, continuous_days, sealed)
+
+
+@pytest.fixture
+def event_log(tmp_path):
+    return LimitEventLog(str(tmp_path))
+
+
+def test_encode_uses_last_limit_time_for_seal_events():
+    raw = LimitEventLog.encode(_event(
+        "seal", "600000", "09:35:10",
+        last_limit_time="09:31:05", opening_times=2, continuous_days=3, sealed_amount=12_345_678,
+    ))
+    seconds, event_type, code, opening_times, continuous_days, sealed = RECORD.unpack(raw)
+    assert seconds == 34265
+    assert event_type == EVENT_TYPES["seal"]
+    assert code == b"600000"
+    assert (opening_times, continuous_days) == (2, 3)
+    assert sealed == pytest.approx(1234.5678, rel=1e-6)
+
+
+def test_encode_uses_poll_time_for_open_events():
+    raw = LimitEventLog.encode(_event("break", "000001", "10:00:00", last_limit_time="09:31:05", opening_times=1))
+    assert RECORD.unpack(raw)[0] == time_to_seconds("10:00:00")
+
+
+def test_append_and_read_round_trip(event_log):
+    written = event_log.append("2026-10-16", [
+        _event("seal", "600000", "09:31:00", last_limit_time="09:30:58", continuous_days=2),
+        _event("break", "600000", "10:00:00", opening_times=1),
+        _event("seal", "000001", "09:45:00", last_limit_time="09:44:30"),
+        {"type": "unknown", "code": "300001"},
+    ])
+    assert written == 3
+
+    records = event_log.read("2026-10-16")
+    assert [(r[0], r[1], r[2]) for r in records] == [
+        (time_to_seconds("09:30:58"), EVENT_TYPES["seal"], "600000"),
+        (time_to_seconds("10:00:00"), EVENT_TYPES["break"], "600000"),
+        (time_to_seconds("09:44:30"), EVENT_TYPES["seal"], "000001"),
+    ]
+    assert [r[2] for r in event_log.read("2026-10-16", "000001")] == ["000001"]
+    assert event_log.read("2026-10-15") == []
+
+
+def test_read_ignores_truncated_record(event_log):
+    event_log.append("2026-10-16", [_event("seal", "600000", "09:31:00", last_limit_time="09:31:00")])
+    with open(event_log.path("2026-10-16"), "ab") as f:
+        f.write(b"\x01\x02\x03")
+    assert len(event_log.read("2026-10-16")) == 1
+
+
+def test_build_timelines_seal_break_reseal():
+    rows = build_timelines("2026-10-16", [
+        _record("10:30:00", "reseal", "600000", opening_times=1, sealed=500.0),
+        _record("09:31:00", "seal", "600000", sealed=800.0),
+        _record("10:00:00", "break", "600000", opening_times=1),
+    ])
+    assert len(rows) == 1
+    row = rows[0]
+    assert row["limit_type"] == "limit_up"
+    assert row["events"] == [
+        [time_to_seconds("09:31:00"), EVENT_TYPES["seal"]],
+        [time_to_seconds("10:00:00"), EVENT_TYPES["break"]],
+        [time_to_seconds("10:30:00"), EVENT_TYPES["reseal"]],
+    ]
+    assert row["first_seal_time"] == "09:31:00"
+    assert row["last_seal_time"] == "10:30:00"
+    assert (row["break_count"], row["reseal_count"]) == (1, 1)
+    assert row["final_sealed"] is True
+    # 09:31~10:00 + 10:30~15:00 扣除午休 1.5 小时
+    assert row["sealed_seconds"] == 29 * 60 + (4.5 - 1.5) * 3600
+    assert row["max_sealed_amount"] == 8_000_000
+
+
+def test_build_timelines_reseal_between_polls_counts_break():
+    rows = build_timelines("2026-10-16", [
+        _record("09:31:00", "seal", "600000"),
+        _record("09:50:00", "reseal", "600000", opening_times=1),
+    ])
+    assert rows[0]["break_count"] == 1
+    assert rows[0]["reseal_count"] == 1
+
+
+def test_build_timelines_skips_repeated_seal_after_restart():
+    rows = build_timelines("2026-10-16", [
+        _record("09:31:00", "seal", "600000"),
+        _record("09:31:00", "seal", "600000"),
+    ])
+    assert rows[0]["events"] == [[time_to_seconds("09:31:00"), EVENT_TYPES["seal"]]]
+    assert rows[0]["break_count"] == 0
+
+
+def test_build_timelines_splits_limit_up_and_down():
+    rows = build_timelines("2026-10-16", [
+        _record("09:31:00", "seal", "600000"),
+        _record("09:40:00", "limit_down", "000002"),
+        _record("10:40:00", "limit_down_open", "000002"),
+    ])
+    by_type = {row["limit_type"]: row for row in rows}
+    assert by_type["limit_up"]["stock_code"] == "600000"
+    down = by_type["limit_down"]
+    assert down["stock_code"] == "000002"
+    assert down["break_count"] == 1
+    assert down["final_sealed"] is False
+    assert down["sealed_seconds"] == 3600
+
+
+def test_live_state_replays_log(event_log):
+    event_log.append("2026-10-16", [
+        _event("seal", "600000", "09:31:00", last_limit_time="09:31:00", continuous_days=2, sealed_amount=1e7),
+        _event("seal", "000001", "09:40:00", last_limit_time="09:40:00"),
+        _event("break", "000001", "10:00:00", opening_times=1),
+        _event("board_change", "600000", "10:05:00", continuous_days=3),
+        _event("limit_down", "000002", "09:45:00", last_limit_time="09:45:00", continuous_days=1),
+    ])
+    up, down, broken = event_log.live_state("2026-10-16")
+    assert set(up) == {"600000"}
+    assert up["600000"]["continuous_days"] == 3
+    assert up["600000"]["last_limit_time"] == "09:31:00"
+    assert up["600000"]["sealed_amount"] == pytest.approx(1e7)
+    assert set(down) == {"000002"}
+    assert broken == {"000001"}
@@ -0,0 +1,194 @@
+"""
+盘中涨停池监控：快照比对、重启后状态恢复、断线续传（Last-Event-ID / since）
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.services.limit_event_log import LimitEventLog
+from app.services.limit_live_monitor import TZ, LimitLiveMonitor, diff_pools
+
+TRADE_DATE = "2026-10-16"
+
+
+def _stock(last_limit_time="09:31:00", opening_times=0, continuous_days=1, sealed_amount=1e7, name="测试"):
+    return {
+        "name": name,
+        "last_limit_time": last_limit_time,
+        "opening_times": opening_times,
+        "continuous_days": continuous_days,
+        "sealed_amount": sealed_amount,
+    }
+
+
+def _at(clock: str) -> datetime:
+    hour, minute, second = (int(p) for p in clock.split(":"))
+    return datetime(2026, 10, 16, hour, minute, second, tzinfo=TZ)
+
+
+def _types(events):
+    return [(e["type"], e["code"]) for e in events]
+
+
+# ---------- diff_pools ----------
+
+def test_diff_pools_seal_break_reseal():
+    broken = set()
+    events = diff_pools({}, {"600000": _stock()}, {}, {}, broken)
+    assert _types(events) == [("seal", "600000")]
+
+    events = diff_pools({"600000": _stock()}, {}, {}, {}, broken)
+    assert _types(events) == [("break", "600000")]
+    assert events[0]["data"] == {"opening_times": 1}
+    assert broken == {"600000"}
+
+    events = diff_pools({}, {"600000": _stock(opening_times=1)}, {}, {}, broken)
+    assert _types(events) == [("reseal", "600000")]
+    assert broken == set()
+
+
+def test_diff_pools_reseal_between_polls():
+    events = diff_pools(
+        {"600000": _stock()},
+        {"600000": _stock(last_limit_time="10:02:00", opening_times=1)},
+        {}, {}, set(),
+    )
+    assert _types(events) == [("reseal", "600000")]
+    assert events[0]["data"] == {"opening_times": 1, "last_limit_time": "10:02:00"}
+
+
+def test_diff_pools_board_and_seal_changes():
+    prev = {"600000": _stock(sealed_amount=1e7), "000001": _stock(sealed_amount=1e7)}
+    curr = {"600000": _stock(continuous_days=2, sealed_amount=1.1e7), "000001": _stock(sealed_amount=0.7e7)}
+    events = diff_pools(prev, curr, {}, {}, set(), seal_change_pct=20)
+    assert _types(events) == [("board_change", "600000"), ("seal_change", "000001")]
+    assert events[1]["data"] == {"sealed_amount": 0.7e7}
+
+
+def test_diff_pools_limit_down():
+    events = diff_pools({}, {}, {}, {"000002": _stock()}, set())
+    assert _types(events) == [("limit_down", "000002")]
+    events = diff_pools({}, {}, {"000002": _stock()}, {}, set())
+    assert _types(events) == [("limit_down_open", "000002")]
+
+
+def test_diff_pools_no_change():
+    pool = {"600000": _stock()}
+    assert diff_pools(pool, dict(pool), {}, {}, set()) == []
+
+
+# ---------- 重启后恢复 ----------
+
+def _wired_monitor(event_log: LimitEventLog) -> LimitLiveMonitor:
+    monitor = LimitLiveMonitor(interval=1, fetcher=lambda date_str: ({}, {}))
+    monitor.add_listener(event_log.append)
+    monitor.set_state_loader(event_log.live_state)
+    return monitor
+
+
+@pytest.fixture
+def event_log(tmp_path):
+    return LimitEventLog(str(tmp_path))
+
+
+def test_restart_does_not_repeat_seals(event_log):
+    first = _wired_monitor(event_log)
+    assert _types(first.apply(TRADE_DATE, {"600000": _stock()}, {}, _at("09:31:05"))) == [("seal", "600000")]
+
+    # 进程重启：同一份涨停池不再产生 seal
+    second = _wired_monitor(event_log)
+    assert second.apply(TRADE_DATE, {"600000": _stock()}, {}, _at("09:40:00")) == []
+
+    timeline = event_log.timelines(TRADE_DATE)
+    assert len(timeline) == 1
+    assert timeline[0]["break_count"] == 0
+    assert timeline[0]["event_count"] == 1
+
+
+def test_restart_keeps_reseal_during_downtime(event_log):
+    first = _wired_monitor(event_log)
+    first.apply(TRADE_DATE, {"600000": _stock()}, {}, _at("09:31:05"))
+
+    # 停机期间炸板又回封：炸板次数增加，重启后仍记录回封
+    second = _wired_monitor(event_log)
+    events = second.apply(
+        TRADE_DATE, {"600000": _stock(last_limit_time="10:15:00", opening_times=1)}, {}, _at("10:20:00")
+    )
+    assert _types(events) == [("reseal", "600000")]
+
+    row = event_log.timelines(TRADE_DATE)[0]
+    assert (row["break_count"], row["reseal_count"]) == (1, 1)
+    assert row["last_seal_time"] == "10:15:00"
+
+
+def test_restart_reports_reseal_of_broken_stock(event_log):
+    first = _wired_monitor(event_log)
+    first.apply(TRADE_DATE, {"600000": _stock()}, {}, _at("09:31:05"))
+    first.apply(TRADE_DATE, {}, {}, _at("09:50:00"))
+
+    second = _wired_monitor(event_log)
+    assert second.broken == set()  # 首次 apply 时才恢复
+    events = second.apply(
+        TRADE_DATE, {"600000": _stock(last_limit_time="10:30:00", opening_times=1)}, {}, _at("10:30:05")
+    )
+    assert _types(events) == [("reseal", "600000")]
+
+
+def test_restart_detects_break_during_downtime(event_log):
+    first = _wired_monitor(event_log)
+    first.apply(TRADE_DATE, {"600000": _stock()}, {}, _at("09:31:05"))
+
+    second = _wired_monitor(event_log)
+    assert _types(second.apply(TRADE_DATE, {}, {}, _at("10:00:00"))) == [("break", "600000")]
+
+
+# ---------- 断线续传 ----------
+
+def _monitor_with_events(count: int, history: int = 5000) -> LimitLiveMonitor:
+    monitor = LimitLiveMonitor(interval=1, fetcher=lambda date_str: ({}, {}), history=history)
+    pool = {}
+    for i in range(count):
+        pool = {**pool, f"60{i:04d}": _stock()}
+        monitor.apply(TRADE_DATE, pool, {}, _at("09:31:00"))
+    return monitor
+
+
+def test_events_since_returns_missed_events():
+    monitor = _monitor_with_events(5)
+    assert monitor.event_id() == f"{monitor.epoch}-5"
+    assert [e["seq"] for e in monitor.events_since(monitor.event_id(2))] == [3, 4, 5]
+    assert [e["seq"] for e in monitor.events_since(monitor.event_id(0))] == [1, 2, 3, 4, 5]
+    assert monitor.events_since(monitor.event_id()) == []
+
+
+@pytest.mark.parametrize("event_id", ["", "garbage", "5", "20261016-abc-x"])
+def test_events_since_rejects_unparseable_ids(event_id):
+    assert _monitor_with_events(3).events_since(event_id) is None
+
+
+def test_events_since_rejects_other_process():
+    old = _monitor_with_events(5)
+    restarted = _monitor_with_events(2)
+    restarted._boot = f"{int(old._boot, 16) + 1:x}"
+    # 重启后序号从头计数，旧进程的 ID 不能当作本进程的序号
+    assert restarted.events_since(old.event_id(1)) is None
+    assert restarted.events_since(old.event_id(5)) is None
+
+
+def test_events_since_rejects_other_trade_date():
+    monitor = _monitor_with_events(3)
+    stale = monitor.event_id(1)
+    monitor.apply("2026-10-19", {}, {}, _at("09:31:00"))
+    assert monitor.events_since(stale) is None
+
+
+def test_events_since_rejects_future_seq():
+    monitor = _monitor_with_events(3)
+    assert monitor.events_since(monitor.event_id(4)) is None
+
+
+def test_events_since_rejects_evicted_history():
+    monitor = _monitor_with_events(5, history=2)
+    assert monitor.events_since(monitor.event_id(1)) is None
+    assert [e["seq"] for e in monitor.events_since(monitor.event_id(3))] == [4, 5]
@@ -0,0 +1,88 @@
+"""
+市场情绪区间汇总（aggregate_limit_data）与逐日采集口径一致
+"""
+
+import pandas as pd
+import pytest
+
+from app.services.collectors import market_sentiment_collector
+from app.services.collectors.market_sentiment_collector import MarketSentimentCollector
+
+
+class _StubTushare:
+    """按交易日返回区间数据中的当日部分"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    def limit_list_d(self, trade_date: str) -> pd.DataFrame:
+        return self.df[self.df["trade_date"] == trade_date].reset_index(drop=True)
+
+
+def _limit_df(rows) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["trade_date", "ts_code", "limit", "limit_times"])
+
+
+@pytest.fixture
+def limit_df() -> pd.DataFrame:
+    return _limit_df([
+        ("20261015", "600001.SH", "U", 1),
+        ("20261015", "600002.SH", "U", 2),
+        ("20261015", "600003.SH", "U", None),   # 连板数缺失按首板
+        ("20261015", "600004.SH", "Z", None),
+        ("20261015", "000001.SZ", "D", None),
+        ("20261016", "600002.SH", "U", 3),
+        ("20261016", "600005.SH", "U", 1),
+        ("20261016", "600006.SH", "Z", None),
+        ("20261016", "600007.SH", "Z", None),
+        ("20261019", "000002.SZ", "D", None),   # 当日无涨停
+        ("20261019", "000003.SZ", "D", None),
+    ])
+
+
+def test_aggregate_limit_data(limit_df):
+    result = MarketSentimentCollector.aggregate_limit_data(limit_df)
+    assert result == {
+        "2026-10-15": {
+            "limit_up_count": 3,
+            "limit_down_count": 1,
+            "exploded_count": 1,
+            "continuous_limit_distribution": {"1": 2, "2": 1},
+        },
+        "2026-10-16": {
+            "limit_up_count": 2,
+            "limit_down_count": 0,
+            "exploded_count": 2,
+            "continuous_limit_distribution": {"1": 1, "3": 1},
+        },
+        "2026-10-19": {
+            "limit_up_count": 0,
+            "limit_down_count": 2,
+            "exploded_count": 0,
+            "continuous_limit_distribution": {"1": 0},
+        },
+    }
+
+
+def test_aggregate_matches_daily_collection(limit_df, monkeypatch):
+    monkeypatch.setattr(market_sentiment_collector, "get_supabase", lambda: None)
+    collector = MarketSentimentCollector()
+    collector._tushare_pro = _StubTushare(limit_df)
+
+    aggregated = MarketSentimentCollector.aggregate_limit_data(limit_df)
+    for trade_date in limit_df["trade_date"].unique():
+        daily = collector.collect_limit_data(trade_date)
+        assert aggregated[f"{trade_date[:4]}-{trade_date[4:6]}-{trade_date[6:]}"] == daily
+
+
+def test_aggregate_without_limit_times_column():
+    df = pd.DataFrame([
+        ("20261016", "600001.SH", "U"),
+        ("20261016", "600002.SH", "U"),
+    ], columns=["trade_date", "ts_code", "limit"])
+    result = MarketSentimentCollector.aggregate_limit_data(df)
+    assert result["2026-10-16"]["continuous_limit_distribution"] == {"1": 2}
+
+
+def test_aggregate_empty():
+    assert MarketSentimentCollector.aggregate_limit_data(_limit_df([])) == {}
@@ -0,0 +1,127 @@
+"""
+昨日涨停溢价汇总：滚动均值、重采较早日期后的滚动重算
+"""
+
+import pytest
+
+from app.services import premium_summary
+from app.services.premium_summary import (
+    ROLLING_COLUMNS,
+    PremiumSummaryService,
+    add_rolling,
+    roll_forward,
+    summarize_day,
+)
+
+
+def _row(trade_date, premium):
+    return {"trade_date": trade_date, "avg_premium": premium}
+
+
+def _dates(n):
+    return [f"2026-10-{day:02d}" for day in range(1, n + 1)]
+
+
+def test_add_rolling_windows():
+    previous = [_row(d, float(i)) for i, d in enumerate(reversed(_dates(25)))]  # 倒序: 0, 1, 2, ...
+    row = add_rolling(_row("2026-10-26", 10.0), previous)
+    # 当日 + 之前 N-1 天
+    assert row["avg_premium_5d"] == round((10 + 0 + 1 + 2 + 3) / 5, 2)
+    assert row["avg_premium_10d"] == round((10 + sum(range(9))) / 10, 2)
+    assert row["avg_premium_20d"] == round((10 + sum(range(19))) / 20, 2)
+    # 缺失的指标不计入均值
+    assert row["promotion_rate_5d"] is None
+
+
+def test_add_rolling_skips_missing_values():
+    row = add_rolling(_row("2026-10-03", 3.0), [_row("2026-10-02", None), _row("2026-10-01", 1.0)])
+    assert row["avg_premium_5d"] == 2.0
+
+
+def test_roll_forward_matches_sequential_build():
+    premiums = [1.0, -2.0, 3.5, 0.5, 4.0, -1.0, 2.0, 6.0]
+    dates = _dates(len(premiums))
+
+    def build(values):
+        rows = []
+        for d, p in zip(dates, values):
+            rows.append(add_rolling(_row(d, p), list(reversed(rows))))
+        return rows
+
+    before = build(premiums)
+    changed = list(premiums)
+    changed[2] = -8.0
+    expected = build(changed)
+
+    # 第 3 天重采: 之前的行不变，当日重算，之后的行按新值滚动
+    day = add_rolling(_row(dates[2], -8.0), list(reversed(before[:2])))
+    updated = roll_forward([day] + list(reversed(before[:2])), before[3:])
+
+    assert [r["trade_date"] for r in updated] == dates[3:]
+    for got, want in zip(updated, expected[3:]):
+        assert {c: got[c] for c in ROLLING_COLUMNS} == {c: want[c] for c in ROLLING_COLUMNS}
+    # 不修改入参
+    assert before[3]["avg_premium_5d"] != updated[0]["avg_premium_5d"]
+
+
+def test_roll_forward_window_is_bounded():
+    previous = [_row(d, 100.0) for d in reversed(_dates(25))]
+    updated = roll_forward(previous, [_row("2026-10-26", 0.0)])
+    assert updated[0]["avg_premium_20d"] == round(100.0 * 19 / 20, 2)
+
+
+def test_summarize_day_counts():
+    records = [
+        {"today_change_pct": 5.0, "yesterday_continuous_days": 1, "is_limit_up": True},
+        {"today_change_pct": -6.0, "yesterday_continuous_days": 3, "is_big_loss": True},
+        {"today_change_pct": None, "yesterday_continuous_days": 2},
+    ]
+    row = summarize_day("2026-10-16", records)
+    assert row["total"] == 3 and row["with_data"] == 2
+    assert row["up_count"] == 1 and row["down_count"] == 1
+    assert row["promotion_rate"] == 33.3
+    assert row["high_board_big_loss_rate"] == 100.0
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """替换数据库读写，记录每次写入的行"""
+    written = []
+
+    class FakeWriter:
+        def __init__(self, table, on_conflict=None):
+            assert table == premium_summary.TABLE and on_conflict == "trade_date"
+
+        def write(self, rows):
+            written.append(rows)
+
+    monkeypatch.setattr(premium_summary, "get_supabase", lambda: None)
+    monkeypatch.setattr(premium_summary, "BulkWriter", FakeWriter)
+    monkeypatch.setattr(premium_summary, "invalidate_trade_dates", lambda dates: None)
+    return written
+
+
+def test_save_day_recomputes_following_rows(monkeypatch, writes):
+    service = PremiumSummaryService()
+    monkeypatch.setattr(service, "_previous_rows", lambda d: [_row("2026-10-14", 2.0)])
+    monkeypatch.setattr(service, "_following_rows", lambda d: [
+        add_rolling(_row("2026-10-16", 4.0), [_row("2026-10-15", 0.0), _row("2026-10-14", 2.0)]),
+    ])
+
+    records = [{"today_change_pct": 6.0}]
+    row = service.save_day("2026-10-15", records)
+
+    assert row["avg_premium_5d"] == 4.0
+    assert writes[0] == [row]
+    (following,) = writes[1]
+    assert set(following) == {"trade_date", *ROLLING_COLUMNS}
+    assert following["trade_date"] == "2026-10-16"
+    assert following["avg_premium_5d"] == 4.0  # (4 + 6 + 2) / 3
+
+
+def test_save_day_latest_date_writes_once(monkeypatch, writes):
+    service = PremiumSummaryService()
+    monkeypatch.setattr(service, "_previous_rows", lambda d: [])
+    monkeypatch.setattr(service, "_following_rows", lambda d: [])
+    service.save_day("2026-10-16", [{"today_change_pct": 1.0}])
+    assert len(writes) == 1
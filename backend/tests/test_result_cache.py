@@ -0,0 +1,176 @@
+"""
+结果缓存：TTL / LRU 淘汰、按交易日失效、跨进程失效日志、装饰器的 stale-while-revalidate
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.utils import result_cache as result_cache_module
+from app.utils.result_cache import ResultCache, cached
+
+LATEST = "2026-10-16"
+
+
+class FakeClock:
+    """替换模块内的 time（monotonic 可手动推进）"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(result_cache_module, "time", fake)
+    monkeypatch.setattr(result_cache_module, "get_latest_trading_date", lambda: LATEST)
+    return fake
+
+
+def test_ttl_then_stale_then_miss(clock):
+    cache = ResultCache(max_entries=10)
+    cache.set(("k",), "v", ttl=10, stale_ttl=5)
+    assert cache.get(("k",)) == ("v", "fresh")
+    clock.advance(11)
+    assert cache.get(("k",)) == ("v", "stale")
+    clock.advance(5)
+    assert cache.get(("k",)) == (None, "miss")
+    assert len(cache) == 0
+    assert (cache.hits, cache.stale_hits, cache.misses) == (1, 1, 1)
+
+
+def test_lru_evicts_least_recently_used(clock):
+    cache = ResultCache(max_entries=2)
+    cache.set(("a",), 1, ttl=60)
+    cache.set(("b",), 2, ttl=60)
+    cache.get(("a",))  # a 变为最近使用
+    cache.set(("c",), 3, ttl=60)
+    assert cache.get(("b",)) == (None, "miss")
+    assert cache.get(("a",)) == (1, "fresh")
+    assert cache.get(("c",)) == (3, "fresh")
+
+
+def test_disabled_cache_stores_nothing(clock):
+    cache = ResultCache(max_entries=0)
+    cache.set(("a",), 1, ttl=60)
+    assert cache.get(("a",)) == (None, "miss")
+
+
+def test_invalidate_by_trade_date_notifies_listeners(clock):
+    cache = ResultCache(max_entries=10)
+    notified = []
+    cache.add_listener(notified.append)
+    cache.set(("a",), 1, ttl=60, trade_date="2026-10-15")
+    cache.set(("b",), 2, ttl=60, trade_date=LATEST)
+    assert cache.invalidate_local("2026-10-15") == 1
+    assert cache.get(("a",))[1] == "miss"
+    assert cache.get(("b",))[1] == "fresh"
+    assert notified == ["2026-10-15"]
+
+
+def test_invalidation_journal_syncs_other_process(clock, tmp_path):
+    journal = str(tmp_path / "invalidations.log")
+    api = ResultCache(max_entries=10, invalidation_file=journal)
+    collector = ResultCache(max_entries=10, invalidation_file=journal)
+    api.set(("a",), 1, ttl=600, trade_date="2026-10-15")
+    api.set(("b",), 2, ttl=600, trade_date=LATEST)
+
+    collector.publish(["2026-10-15"])
+    # 检查间隔内不读日志
+    assert api.get(("a",))[1] == "fresh"
+    clock.advance(result_cache_module.JOURNAL_CHECK_INTERVAL)
+    assert api.get(("a",))[1] == "miss"
+    assert api.get(("b",))[1] == "fresh"
+
+    collector.publish([None])
+    api.sync_invalidations(force=True)
+    assert len(api) == 0
+
+
+def test_decorator_uses_long_ttl_for_past_dates(clock):
+    cache = ResultCache(max_entries=10)
+    calls = []
+
+    @cached("t.past", past_ttl=1000, current_ttl=10, stale_ttl=0, cache=cache)
+    def load(trade_date=None, n=1):
+        calls.append(trade_date)
+        return [trade_date, n]
+
+    assert load("2026-10-15") == ["2026-10-15", 1]
+    assert load() == [LATEST, 1]  # 空日期解析为最新交易日
+    assert load(LATEST) == [LATEST, 1]
+    assert load("2026-10-15", n=2) == ["2026-10-15", 2]
+    assert calls == ["2026-10-15", LATEST, "2026-10-15"]
+
+    clock.advance(11)
+    load(LATEST)
+    load("2026-10-15")
+    assert calls[-1] == LATEST and len(calls) == 4
+
+
+def test_decorator_skips_uncacheable_results(clock):
+    cache = ResultCache(max_entries=10)
+    results = iter([{"errors": ["x"]}, {"errors": []}, {"errors": ["y"]}])
+
+    @cached("t.partial", cache=cache, cacheable=lambda r: not r["errors"])
+    def load(trade_date=None):
+        return next(results)
+
+    assert load(LATEST) == {"errors": ["x"]}
+    assert load(LATEST) == {"errors": []}
+    assert load(LATEST) == {"errors": []}
+
+
+def test_sync_stale_value_returned_while_refreshing(clock):
+    cache = ResultCache(max_entries=10)
+    version = {"n": 0}
+    refreshed = threading.Event()
+
+    @cached("t.swr", current_ttl=10, stale_ttl=100, cache=cache)
+    def load(trade_date=None):
+        version["n"] += 1
+        if version["n"] > 1:
+            refreshed.set()
+        return version["n"]
+
+    assert load(LATEST) == 1
+    clock.advance(20)
+    # 过期但在 stale 窗口内: 立即返回旧值，后台刷新
+    assert load(LATEST) == 1
+    assert refreshed.wait(5)
+    # 刷新线程在函数返回后写入缓存
+    deadline = time.monotonic() + 5
+    while cache.get(("t.swr", (("trade_date", LATEST),)))[0] != 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert load(LATEST) == 2
+
+
+def test_async_stale_value_returned_while_refreshing(clock):
+    cache = ResultCache(max_entries=10)
+    version = {"n": 0}
+
+    @cached("t.aswr", current_ttl=10, stale_ttl=100, cache=cache)
+    async def load(trade_date=None):
+        version["n"] += 1
+        return version["n"]
+
+    async def scenario():
+        assert await load(LATEST) == 1
+        clock.advance(20)
+        assert await load(LATEST) == 1
+        # 让后台刷新任务运行完
+        await asyncio.gather(*result_cache_module._refresh_tasks)
+        return await load(LATEST)
+
+    assert asyncio.run(scenario()) == 2
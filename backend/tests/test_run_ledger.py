@@ -0,0 +1,85 @@
+"""
+采集台账：最近秩分位数、按步骤 / 状态汇总、步骤记录写入
+"""
+
+import pytest
+
+from app.utils.run_ledger import RunLedger, percentile, summarize_runs
+
+
+@pytest.mark.parametrize("values, pct, expected", [
+    ([], 50, None),
+    ([120.0], 50, 120.0),
+    ([120.0], 99, 120.0),
+    ([100.0, 300.0], 50, 100.0),    # 秩 ceil(0.5 * 2) = 1
+    ([100.0, 300.0], 51, 300.0),
+    ([100.0, 300.0], 90, 300.0),
+    ([100.0, 300.0], 0, 100.0),     # 秩至少为 1
+    ([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 90, 9),
+    ([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 99, 10),
+])
+def test_percentile_nearest_rank(values, pct, expected):
+    assert percentile(values, pct) == expected
+
+
+def _run(step, status="success", duration_ms=100, day="2026-10-16", **extra):
+    return {
+        "step": step, "status": status, "duration_ms": duration_ms,
+        "started_at": f"{day}T07:30:00+00:00", **extra,
+    }
+
+
+def test_summarize_groups_by_step_and_status():
+    rows = [
+        _run("market_index", duration_ms=100, rows_out=3, api_calls={"tushare.index_daily": 3}),
+        _run("market_index", status="failed", duration_ms=900, rows_out=None, retries=2),
+        _run("limit_stocks", duration_ms=2000, rows_out=80, api_calls={"tushare.limit_list_ths": 2, "akshare.x": 1}),
+        _run("market_index", duration_ms=300, rows_out=5, day="2026-10-15", api_calls={}),
+    ]
+    by_step = {s["step"]: s for s in summarize_runs(rows)}
+
+    assert [s["step"] for s in summarize_runs(rows)] == ["limit_stocks", "market_index"]
+    index = by_step["market_index"]
+    assert (index["runs"], index["failures"], index["failure_rate"]) == (3, 1, 0.3333)
+    assert index["duration_ms"] == {"p50": 300, "p90": 900, "p99": 900, "max": 900}
+    assert index["avg_rows_out"] == 4.0        # 没有 rows_out 的运行不计入
+    assert index["avg_api_calls"] == 1.0       # (3 + 0 + 0) / 3
+    assert index["retries"] == 2
+    assert index["daily"] == [
+        {"date": "2026-10-15", "runs": 1, "p50": 300, "p90": 300, "p99": 300, "max": 300},
+        {"date": "2026-10-16", "runs": 2, "p50": 100, "p90": 900, "p99": 900, "max": 900},
+    ]
+
+    limit = by_step["limit_stocks"]
+    assert (limit["runs"], limit["failures"], limit["failure_rate"]) == (1, 0, 0.0)
+    assert limit["duration_ms"]["p50"] == limit["duration_ms"]["max"] == 2000
+    assert limit["avg_api_calls"] == 3.0
+
+
+def test_summarize_without_durations():
+    (summary,) = summarize_runs([_run("hot_concepts", duration_ms=None)])
+    assert summary["duration_ms"] == {"p50": None, "p90": None, "p99": None, "max": None}
+    assert summary["avg_rows_out"] is None
+    assert summarize_runs([]) == []
+
+
+def test_ledger_records_steps(fake_db):
+    ledger = RunLedger("scheduler", run_id="test-run")
+    with ledger.step("limit_stocks", trade_date="2026-10-16"):
+        with ledger.step("fund_flow") as child:
+            child.add_api_call("akshare.stock_individual_fund_flow", rows=10, ok=True)
+    with pytest.raises(RuntimeError):
+        with ledger.step("hot_concepts", trade_date="2026-10-16"):
+            raise RuntimeError("boom")
+    assert ledger.run_step("market_index", lambda: False, trade_date="2026-10-16") is False
+
+    rows = {row["step"]: row for row in fake_db.tables["collection_runs"]}
+    assert {row["run_id"] for row in rows.values()} == {"test-run"}
+    assert rows["fund_flow"]["trade_date"] == "2026-10-16"   # 子步骤继承交易日
+    assert rows["fund_flow"]["parent_step"] == "limit_stocks"
+    # 子步骤的接口调用计入父步骤
+    assert rows["limit_stocks"]["api_calls"] == {"akshare.stock_individual_fund_flow": 1}
+    assert rows["limit_stocks"]["rows_in"] == 10
+    assert rows["limit_stocks"]["status"] == "success"
+    assert rows["hot_concepts"]["status"] == "failed" and "boom" in rows["hot_concepts"]["error"]
+    assert rows["market_index"]["status"] == "failed"
@@ -0,0 +1,96 @@
+"""
+可信行快速路径：Schema 字段裁剪与默认值、概念字段规范化、JSON 序列化回退
+"""
+
+import json
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.schemas.limit_stocks import LimitStockItem
+from app.services.collectors.limit_stocks_collector import normalize_concepts
+from app.utils import serialization
+from app.utils.serialization import dumps, project_rows, to_columns
+
+ROW = {
+    "id": 7,
+    "stock_code": "600000.SH",
+    "stock_name": "浦发银行",
+    "trade_date": "2026-10-16",
+    "limit_type": "limit_up",
+    "change_pct": 10.01,
+    "continuous_days": 2,
+    "concepts": ["银行", "上海国资"],
+    "created_at": "2026-10-16T15:30:00",
+}
+
+
+def test_project_rows_keeps_schema_fields_and_fills_defaults():
+    (item,) = project_rows(LimitStockItem, [ROW])
+    assert list(item) == list(LimitStockItem.model_fields)
+    assert "id" not in item and "created_at" not in item
+    assert item["continuous_days"] == 2
+    assert item["close_price"] is None and item["industry"] is None
+
+
+def test_project_rows_matches_pydantic_dump():
+    assert project_rows(LimitStockItem, [ROW]) == [LimitStockItem.model_validate(ROW).model_dump()]
+
+
+def test_project_rows_default_factory_is_not_shared():
+    rows = project_rows(LimitStockItem, [{"stock_code": "1"}, {"stock_code": "2"}])
+    assert rows[0]["concepts"] == [] and rows[1]["concepts"] == []
+    rows[0]["concepts"].append("x")
+    assert rows[1]["concepts"] == []
+    # 缺失的必填字段为 None（快速路径不校验）
+    assert rows[0]["stock_name"] is None
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, []),
+    ("", []),
+    ('["银行", "券商", "银行"]', ["银行", "券商"]),
+    ("银行, 券商,,银行", ["银行", "券商"]),
+    ("银行；券商;保险", ["银行", "券商", "保险"]),
+    ("[不是 JSON", ["[不是 JSON"]),
+    (["银行", " 券商 ", "", 5], ["银行", "券商", "5"]),
+])
+def test_normalize_concepts(value, expected):
+    assert normalize_concepts(value) == expected
+
+
+CONTENT = {"name": "涨停", "amount": Decimal("1.5"), "day": date(2026, 10, 16), "items": [1, None]}
+
+
+def test_dumps_orjson():
+    if serialization.orjson is None:
+        pytest.skip("未安装 orjson")
+    assert json.loads(dumps(CONTENT)) == {"name": "涨停", "amount": 1.5, "day": "2026-10-16", "items": [1, None]}
+
+
+def test_dumps_falls_back_to_json(monkeypatch):
+    monkeypatch.setattr(serialization, "orjson", None)
+    monkeypatch.setattr(serialization, "ujson", None)
+    body = dumps(CONTENT)
+    assert "涨停" in body.decode("utf-8")  # 不转义中文
+    assert json.loads(body) == {"name": "涨停", "amount": 1.5, "day": "2026-10-16", "items": [1, None]}
+
+
+def test_dumps_ujson_then_json_for_unsupported_types(monkeypatch):
+    def ujson_dumps(content, ensure_ascii=True):
+        if any(not isinstance(v, (str, int, float, list, type(None))) for v in content.values()):
+            raise TypeError("unsupported")
+        return json.dumps(content, ensure_ascii=ensure_ascii) + " "
+
+    monkeypatch.setattr(serialization, "orjson", None)
+    monkeypatch.setattr(serialization, "ujson", SimpleNamespace(dumps=ujson_dumps))
+    # ujson 能处理时使用 ujson
+    assert dumps({"a": 1}).endswith(b" ")
+    # ujson 抛 TypeError 时回退标准库 json
+    assert json.loads(dumps(CONTENT))["amount"] == 1.5
+
+
+def test_to_columns():
+    assert to_columns([{"a": 1, "b": 2}, {"a": 3}], ["a", "b"]) == {"a": [1, 3], "b": [2, None]}
@@ -0,0 +1,160 @@
+"""
+请求合并：并发相同调用只计算一次，异常共享，等待超时后自行计算
+"""
+
+import asyncio
+import threading
+import time
+
+from app.utils.single_flight import SingleFlight, single_flight
+
+
+def test_async_concurrent_calls_share_one_computation():
+    flight = SingleFlight("t.async", max_wait=5)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 42}
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do(("k",), compute) for _ in range(5)))
+        other = await flight.do(("other",), compute)
+        return results, other
+
+    results, other = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert all(r is results[0] for r in results)
+    assert other == {"value": 42}
+    assert flight.in_flight == 0
+
+
+def test_async_error_propagates_to_all_waiters():
+    flight = SingleFlight("t.async_error", max_wait=5)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        raise ValueError("boom")
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do(("k",), compute) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.in_flight == 0
+
+
+def test_async_leader_cancelled_does_not_cancel_computation():
+    flight = SingleFlight("t.async_cancel", max_wait=5)
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do(("k",), compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do(("k",), compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # 发起方断开
+        return await waiter
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_async_waiter_times_out_and_computes_itself():
+    flight = SingleFlight("t.async_timeout", max_wait=0.02)
+    calls = []
+
+    async def slow():
+        calls.append("slow")
+        await asyncio.sleep(0.2)
+        return "slow"
+
+    async def fast():
+        calls.append("fast")
+        return "fast"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do(("k",), slow))
+        await asyncio.sleep(0)
+        waited = await flight.do(("k",), fast)
+        return waited, await leader
+
+    assert asyncio.run(scenario()) == ("fast", "slow")
+    assert calls == ["slow", "fast"]
+
+
+def _run_threads(n, target):
+    results = [None] * n
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, target())) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results
+
+
+def test_sync_concurrent_calls_share_one_computation():
+    flight = SingleFlight("t.sync", max_wait=5)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return object()
+
+    results = _run_threads(6, lambda: flight.do_sync(("k",), compute))
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.in_flight == 0
+
+
+def test_sync_error_is_shared_then_key_is_released():
+    flight = SingleFlight("t.sync_error", max_wait=5)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        time.sleep(0.05)
+        raise RuntimeError("boom")
+
+    def attempt():
+        try:
+            flight.do_sync(("k",), failing)
+        except RuntimeError as e:
+            return e
+
+    results = _run_threads(4, attempt)
+    assert len(calls) == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    # 失败后不残留，下一次调用重新计算
+    assert flight.do_sync(("k",), lambda: "ok") == "ok"
+
+
+def test_decorator_coalesces_by_key():
+    calls = []
+
+    @single_flight("t.decorated", key_func=lambda trade_date: trade_date, max_wait=5)
+    async def analyze(trade_date):
+        calls.append(trade_date)
+        await asyncio.sleep(0.02)
+        return trade_date
+
+    async def scenario():
+        return await asyncio.gather(
+            analyze("2026-10-15"), analyze("2026-10-15"), analyze("2026-10-16"),
+        )
+
+    assert asyncio.run(scenario()) == ["2026-10-15", "2026-10-15", "2026-10-16"]
+    assert sorted(calls) == ["2026-10-15", "2026-10-16"]
+    assert analyze.flight.in_flight == 0
+
+
+def test_max_wait_reads_environment(monkeypatch):
+    monkeypatch.setenv("SINGLE_FLIGHT_MAX_WAIT", "7")
+    assert SingleFlight("t.env").max_wait == 7.0
@@ -0,0 +1,131 @@
+"""
+数据源录制 / 回放：录制结果（含异常）原样回放，回放不访问数据源、不等待限频
+"""
+
+import pandas as pd
+import pytest
+
+from app.utils import data_source
+from app.utils.data_source import RateLimitedApi
+from app.utils.source_fixtures import (
+    FixtureMissing,
+    FixtureStore,
+    fixture_key,
+    get_fixture_store,
+    iter_fixtures,
+    use_fixture_store,
+)
+
+
+class FakeSource:
+    """模拟数据源模块，记录实际调用"""
+
+    def __init__(self):
+        self.calls = []
+
+    def daily(self, trade_date, fields=None):
+        self.calls.append(("daily", trade_date, fields))
+        return pd.DataFrame({"ts_code": ["600000.SH", "000001.SZ"], "trade_date": [trade_date] * 2})
+
+    def broken(self, trade_date):
+        self.calls.append(("broken", trade_date))
+        raise ValueError(f"接口异常 {trade_date}")
+
+
+@pytest.fixture
+def use_store():
+    """切换当前进程的夹具目录，结束后恢复"""
+    def use(store):
+        use_fixture_store(store)
+        return store
+
+    yield use
+    use_fixture_store(None)
+
+
+def test_fixture_key_ignores_kwarg_order():
+    assert fixture_key(("a",), {"x": 1, "y": 2}) == fixture_key(("a",), {"y": 2, "x": 1})
+    assert fixture_key(("a",), {"x": 1}) != fixture_key(("b",), {"x": 1})
+
+
+def test_record_then_replay(tmp_path, use_store):
+    source = FakeSource()
+    use_store(FixtureStore("record", tmp_path))
+    api = RateLimitedApi("fake", lambda: source)
+
+    recorded = api.daily("20261016", fields="ts_code,trade_date")
+    with pytest.raises(ValueError):
+        api.broken("20261016")
+    assert len(source.calls) == 2
+
+    replay = use_store(FixtureStore("replay", tmp_path))
+    # 回放不加载数据源
+    api = RateLimitedApi("fake", lambda: pytest.fail("回放模式不应加载数据源"))
+    pd.testing.assert_frame_equal(api.daily("20261016", fields="ts_code,trade_date"), recorded)
+    with pytest.raises(ValueError, match="接口异常 20261016"):
+        api.broken("20261016")
+    with pytest.raises(FixtureMissing):
+        api.daily("20261015", fields="ts_code,trade_date")
+
+    assert replay.stats() == {
+        "mode": "replay",
+        "calls": {"fake.broken": 1, "fake.daily": 1},
+        "misses": {"fake.daily": 1},
+    }
+
+
+def test_last_recording_wins(tmp_path):
+    store = FixtureStore("record", tmp_path)
+    store.record("fake.daily", ("20261016",), {}, result=1)
+    store.record("fake.daily", ("20261016",), {}, result=2)
+    assert FixtureStore("replay", tmp_path).replay("fake.daily", ("20261016",), {}) == 2
+
+
+def test_unpicklable_error_recorded_as_runtime_error(tmp_path):
+    class LocalError(Exception):  # 局部类无法 pickle
+        pass
+
+    store = FixtureStore("record", tmp_path)
+    store.record("fake.daily", (), {}, error=LocalError("boom"))
+    with pytest.raises(RuntimeError, match="LocalError: boom"):
+        FixtureStore("replay", tmp_path).replay("fake.daily", (), {})
+
+
+def test_replay_latency_modes(tmp_path, monkeypatch):
+    FixtureStore("record", tmp_path).record("fake.daily", (), {}, result=1, elapsed=0.5)
+    slept = []
+    monkeypatch.setattr("app.utils.source_fixtures.time.sleep", slept.append)
+
+    for latency in ("none", "recorded", "200"):
+        FixtureStore("replay", tmp_path, latency=latency).replay("fake.daily", (), {})
+    assert slept == [0.5, 0.2]
+
+
+def test_replay_skips_pace(tmp_path, use_store, monkeypatch):
+    slept = []
+    monkeypatch.setattr(data_source.time, "sleep", slept.append)
+    use_store(FixtureStore("replay", tmp_path))
+    data_source.pace(3)
+    use_store(FixtureStore("live", tmp_path))
+    data_source.pace(3)
+    assert slept == [3]
+
+
+def test_iter_fixtures_lists_metadata(tmp_path):
+    store = FixtureStore("record", tmp_path)
+    store.record("fake.daily", ("20261016",), {}, result=[1, 2, 3], elapsed=0.12)
+    store.record("fake.broken", ("20261016",), {}, error=ValueError("x"))
+
+    entries = {e["endpoint"]: e for e in iter_fixtures(tmp_path)}
+    assert entries["fake.daily"]["rows"] == 3 and entries["fake.daily"]["error"] is None
+    assert entries["fake.broken"]["error"] == "x"
+
+
+def test_store_from_environment(tmp_path, monkeypatch, use_store):
+    monkeypatch.setenv("DATA_SOURCE_MODE", "replay")
+    monkeypatch.setenv("DATA_SOURCE_FIXTURES", str(tmp_path))
+    use_store(None)
+    store = get_fixture_store()
+    assert store.replaying and store.directory == tmp_path
+    with pytest.raises(ValueError):
+        FixtureStore("rewind")
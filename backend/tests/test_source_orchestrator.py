@@ -0,0 +1,154 @@
+"""
+多数据源编排：失败切换、熔断与试探、跳过、对冲与取消
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.utils import source_orchestrator
+from app.utils.data_source import CallCancelled, cancel_scope, raise_if_cancelled
+from app.utils.source_orchestrator import SourceOrchestrator, SourceSkipped, SourcesExhausted
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch, tmp_path):
+    """每个用例独立的健康度文件和进程内共享状态"""
+    monkeypatch.setenv("SOURCE_HEALTH_FILE", str(tmp_path / "health.json"))
+    monkeypatch.setattr(source_orchestrator, "_shared", {})
+
+
+def _failing(message="boom"):
+    def fetch(*args):
+        raise RuntimeError(message)
+    return fetch
+
+
+def _returning(value):
+    return lambda *args: value
+
+
+def test_falls_back_to_next_source():
+    orchestrator = SourceOrchestrator("t", [("a", _failing()), ("b", _returning([1]))])
+    assert orchestrator.run("2026-10-16") == ("b", [1])
+    health = orchestrator.snapshot()
+    assert health["a"]["failures"] == 1
+    assert health["b"]["calls"] == 1 and health["b"]["failures"] == 0
+
+
+def test_rejected_result_counts_as_failure():
+    orchestrator = SourceOrchestrator(
+        "t",
+        [("a", _returning([])), ("b", _returning([1]))],
+        accept=lambda result, trade_date: bool(result) and trade_date == "2026-10-16",
+    )
+    assert orchestrator.run("2026-10-16") == ("b", [1])
+    assert orchestrator.snapshot()["a"]["last_error"] == "结果为空或不合格"
+    with pytest.raises(SourcesExhausted):
+        orchestrator.run("2026-10-15")
+
+
+def test_breaker_opens_and_probes_after_cooldown(monkeypatch):
+    orchestrator = SourceOrchestrator(
+        "t", [("a", _failing()), ("b", _returning([1]))], breaker_failures=1, breaker_cooldown=60,
+    )
+    assert orchestrator.run() == ("b", [1])
+    assert orchestrator.snapshot()["a"]["state"] == "open"
+    assert orchestrator.ordered() == ["b"]
+
+    # 冷却结束: a 作为试探排在最后；b 成功后 a 未启动，恢复为熔断
+    now = time.time()
+    monkeypatch.setattr(source_orchestrator.time, "time", lambda: now + 61)
+    assert orchestrator.run() == ("b", [1])
+    assert orchestrator.snapshot()["a"]["state"] == "open"
+    assert orchestrator.ordered() == ["b", "a"]
+
+
+def test_half_open_probe_success_closes_breaker(monkeypatch):
+    calls = {"a": 0}
+
+    def flaky(*args):
+        calls["a"] += 1
+        if calls["a"] == 1:
+            raise RuntimeError("boom")
+        return [1]
+
+    orchestrator = SourceOrchestrator("t", [("a", flaky)], breaker_failures=1, breaker_cooldown=60)
+    with pytest.raises(SourcesExhausted):
+        orchestrator.run()
+    with pytest.raises(SourcesExhausted):
+        orchestrator.run()  # 冷却中，没有可用来源
+    assert calls["a"] == 1
+
+    now = time.time()
+    monkeypatch.setattr(source_orchestrator.time, "time", lambda: now + 61)
+    assert orchestrator.run() == ("a", [1])
+    assert orchestrator.snapshot()["a"]["state"] == "closed"
+
+
+def test_skipped_source_is_not_recorded():
+    def only_today(trade_date):
+        raise SourceSkipped("只有当日数据")
+
+    orchestrator = SourceOrchestrator("t", [("a", only_today), ("b", _returning([1]))])
+    assert orchestrator.run("2026-10-15") == ("b", [1])
+    assert orchestrator.snapshot()["a"]["calls"] == 0
+
+    orchestrator = SourceOrchestrator("t2", [("a", only_today)])
+    with pytest.raises(SourcesExhausted, match="跳过"):
+        orchestrator.run("2026-10-15")
+
+
+def test_hedging_is_opt_in_and_latency_based():
+    orchestrator = SourceOrchestrator("t", [("a", _returning([1]))])
+    assert orchestrator.hedge_delay("a") is None
+
+    orchestrator = SourceOrchestrator("t2", [("a", _returning([1]))], hedge=True, hedge_min_delay=0.5)
+    # 没有耗时记录时不对冲
+    assert orchestrator.hedge_delay("a") is None
+    orchestrator.health["a"].latency_ms = 100.0
+    assert orchestrator.hedge_delay("a") == 0.5
+    orchestrator.health["a"].latency_ms = 10_000.0
+    assert orchestrator.hedge_delay("a") == 20.0
+
+
+def test_hedge_cancels_losing_call():
+    release = threading.Event()
+    finished = threading.Event()
+    requests = []
+
+    def slow(*args):
+        try:
+            requests.append("first")
+            release.wait(5)
+            # 对冲落败后不再发起新的请求
+            raise_if_cancelled()
+            requests.append("second")
+            return [0]
+        finally:
+            finished.set()
+
+    orchestrator = SourceOrchestrator(
+        "t", [("slow", slow), ("fast", _returning([1]))], hedge=True, hedge_min_delay=0.05,
+    )
+    orchestrator.health["slow"].latency_ms = 10.0
+
+    assert orchestrator.run() == ("fast", [1])
+    release.set()
+    assert finished.wait(5)
+    time.sleep(0.05)  # slow 返回后 _call 收尾
+
+    assert requests == ["first"]
+    # 落败调用的结果不计入健康度
+    assert orchestrator.snapshot()["slow"]["calls"] == 0
+
+
+def test_cancel_scope():
+    raise_if_cancelled()  # 不在 cancel_scope 内时不生效
+    event = threading.Event()
+    with cancel_scope(event):
+        raise_if_cancelled()
+        event.set()
+        with pytest.raises(CallCancelled):
+            raise_if_cancelled()
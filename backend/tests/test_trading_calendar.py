@@ -0,0 +1,112 @@
+"""
+交易日历：节假日周、覆盖范围边界、范围外按工作日推算
+"""
+
+from datetime import datetime
+
+import pytest
+from loguru import logger
+
+from app.utils import trading_date
+from app.utils.trading_calendar import TradingCalendar
+
+# 2025 年国庆: 10-01 ~ 10-08 休市，09-28（周日）、10-11（周六）调休不开市
+NATIONAL_DAY = [
+    "2025-09-25", "2025-09-26", "2025-09-29", "2025-09-30",
+    "2025-10-09", "2025-10-10", "2025-10-13", "2025-10-14",
+]
+
+
+@pytest.fixture
+def calendar():
+    return TradingCalendar(NATIONAL_DAY, start_date="2025-09-22", end_date="2025-10-19")
+
+
+def test_holiday_week(calendar):
+    assert not calendar.is_trading_day("2025-10-01")
+    assert calendar.get_previous_trading_day("2025-10-09") == "2025-09-30"
+    assert calendar.get_next_trading_day("2025-09-30") == "2025-10-09"
+    # 假期中的日期
+    assert calendar.get_previous_trading_day("2025-10-05") == "2025-09-30"
+    assert calendar.get_next_trading_day("2025-10-05") == "2025-10-09"
+    assert calendar.get_latest_trading_day("2025-10-08") == "2025-09-30"
+    assert calendar.get_trading_days("2025-09-30", "2025-10-10") == ["2025-09-30", "2025-10-09", "2025-10-10"]
+
+
+@pytest.mark.parametrize("date, n, expected", [
+    ("2025-10-09", -1, "2025-09-30"),
+    ("2025-10-09", -3, "2025-09-26"),
+    ("2025-09-30", 2, "2025-10-10"),
+    ("2025-10-04", 0, "2025-09-30"),   # 非交易日: 0 为不晚于该日的最近交易日
+    ("2025-10-04", -1, "2025-09-30"),
+    ("2025-10-04", 1, "2025-10-09"),
+])
+def test_offset_across_holiday(calendar, date, n, expected):
+    assert calendar.offset(date, n) == expected
+
+
+def test_recent_trading_days(calendar):
+    assert calendar.get_recent_trading_days("2025-10-09", 3) == ["2025-09-29", "2025-09-30", "2025-10-09"]
+    assert calendar.get_recent_trading_days("2025-10-05", 2) == ["2025-09-29", "2025-09-30"]
+    # 不足 count 个时返回已有的
+    assert calendar.get_recent_trading_days("2025-09-26", 5) == ["2025-09-25", "2025-09-26"]
+
+
+def test_range_edges(calendar):
+    assert calendar.covers("2025-09-22") and calendar.covers("2025-10-19")
+    assert not calendar.covers("2025-09-21") and not calendar.covers("2025-10-20")
+    # 首尾交易日之外没有前后交易日
+    assert calendar.get_previous_trading_day("2025-09-25") is None
+    assert calendar.get_next_trading_day("2025-10-14") is None
+    assert calendar.offset("2025-09-25", -1) is None
+    assert calendar.offset("2025-10-14", 1) is None
+    assert calendar.get_latest_trading_day("2025-09-23") is None
+    assert calendar.get_trading_days("2025-01-01", "2025-09-25") == ["2025-09-25"]
+
+
+def test_empty_calendar_covers_nothing():
+    calendar = TradingCalendar([])
+    assert not calendar.covers("2025-10-09")
+    assert calendar.get_previous_trading_day("2025-10-09") is None
+
+
+def test_shipped_calendar_has_national_day_closure():
+    calendar = TradingCalendar.from_file()
+    assert calendar.covers("2025-10-01")
+    assert calendar.get_next_trading_day("2025-09-30") == "2025-10-09"
+
+
+@pytest.fixture
+def out_of_range(monkeypatch, calendar):
+    """trading_date 使用测试日历，返回收集到的 warning"""
+    monkeypatch.setattr(trading_date, "get_trading_calendar", lambda: calendar)
+    warnings = []
+    sink = logger.add(lambda message: warnings.append(str(message)), level="WARNING")
+    yield warnings
+    logger.remove(sink)
+
+
+def test_previous_date_outside_range_falls_back_to_weekdays(out_of_range):
+    # 2025-11-03 是周一，超出范围: 前一交易日按工作日推算为上周五
+    assert trading_date.get_previous_trading_date("2025-11-03") == "2025-10-31"
+    assert trading_date.get_previous_trading_date("2025-11-05") == "2025-11-04"
+    assert len(out_of_range) == 2 and "超出交易日历范围" in out_of_range[0]
+    # 范围内直接查日历，不告警
+    assert trading_date.get_previous_trading_date("2025-10-09") == "2025-09-30"
+    assert len(out_of_range) == 2
+
+
+def test_latest_date_outside_range_falls_back_to_weekdays(monkeypatch, out_of_range):
+    class FixedDateTime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2025, 11, 9, 15, 30)  # 周日
+
+    monkeypatch.setattr(trading_date, "datetime", FixedDateTime)
+    assert trading_date.get_latest_trading_date() == "2025-11-07"
+    assert len(out_of_range) == 1 and "请刷新交易日历" in out_of_range[0]
+
+
+def test_next_date_outside_range_is_none(out_of_range):
+    assert trading_date.get_next_trading_date("2025-11-03") is None
+    assert trading_date.get_next_trading_date("2025-09-30") == "2025-10-09"
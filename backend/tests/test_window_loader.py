@@ -0,0 +1,78 @@
+"""
+多日窗口加载：一条查询取回窗口，前几日不足、中间缺数据、日历范围外按行数截取（内存 PostgREST）
+"""
+
+from app.utils.window_loader import DayWindow, load_window
+
+
+def _sentiment(*dates):
+    return [{"trade_date": d, "limit_up_count": i + 1} for i, d in enumerate(dates)]
+
+
+def test_before_with_fewer_prior_days(fake_db):
+    # 表里只有当日和前一天
+    fake_db.seed("market_sentiment", _sentiment("2026-10-15", "2026-10-16"))
+    window = load_window("market_sentiment", "2026-10-16", days=3)
+
+    assert fake_db.request_count == 1
+    assert window.row_on("2026-10-16")["limit_up_count"] == 2
+    assert [r["trade_date"] for r in window.before("2026-10-16", 2)] == ["2026-10-15"]
+    assert window.previous_date("2026-10-16") == "2026-10-15"
+    assert window.previous_date("2026-10-16", 2) is None
+    # 最早一天之前没有数据
+    assert window.before("2026-10-15", 2) == []
+
+
+def test_no_prior_days_at_all(fake_db):
+    fake_db.seed("market_sentiment", _sentiment("2026-10-16"))
+    window = load_window("market_sentiment", "2026-10-16", days=3)
+    assert window.before("2026-10-16", 2) == []
+    assert window.previous_date("2026-10-16") is None
+
+
+def test_missing_day_is_skipped_across_holiday(fake_db):
+    # 10-13 缺数据；10-09 与 10-08 之间隔着国庆后的周末
+    fake_db.seed("market_sentiment", _sentiment(
+        "2026-09-30", "2026-10-08", "2026-10-09", "2026-10-12", "2026-10-14",
+    ))
+    window = load_window("market_sentiment", "2026-10-14", days=3)
+    # 前两个有数据的交易日（倒序），与 .lt(...).limit(2) 一致
+    assert [r["trade_date"] for r in window.before("2026-10-14", 2)] == ["2026-10-12", "2026-10-09"]
+    # 只保留最近 days 个有数据的交易日
+    assert window.dates == ["2026-10-09", "2026-10-12", "2026-10-14"]
+
+
+def test_end_date_without_data(fake_db):
+    fake_db.seed("market_sentiment", _sentiment("2026-10-14", "2026-10-15"))
+    window = load_window("market_sentiment", "2026-10-16", days=2)
+    assert window.row_on("2026-10-16") is None
+    assert [r["trade_date"] for r in window.before("2026-10-16", 2)] == ["2026-10-15", "2026-10-14"]
+
+
+def test_grouped_rows_and_keys(fake_db):
+    codes = ("SH000001", "SZ399001", "SZ399006")
+    fake_db.seed("market_index", [
+        {"trade_date": d, "index_code": code, "amount": n}
+        for n, d in enumerate(("2026-10-14", "2026-10-15", "2026-10-16"))
+        for code in codes
+    ])
+    window = load_window(
+        "market_index", "2026-10-16", days=2, key_column="index_code", keys=codes[:2], group_size=len(codes),
+    )
+    assert window.dates == ["2026-10-15", "2026-10-16"]
+    assert [r["index_code"] for r in window.rows_on("2026-10-16")] == ["SH000001", "SZ399001"]
+    assert window.by_key("2026-10-15")["SZ399001"]["amount"] == 1
+
+
+def test_outside_calendar_falls_back_to_row_limit(fake_db):
+    # 日历只覆盖到 2026 年底: 按行数倒序截取 days * group_size 行
+    fake_db.seed("market_sentiment", _sentiment("2027-01-04", "2027-01-05", "2027-01-06", "2027-01-07"))
+    window = load_window("market_sentiment", "2027-01-07", days=3)
+    assert window.dates == ["2027-01-05", "2027-01-06", "2027-01-07"]
+    assert [r["trade_date"] for r in window.before("2027-01-07", 2)] == ["2027-01-06", "2027-01-05"]
+
+
+def test_empty_window():
+    window = DayWindow(end_date="2026-10-16", rows=[])
+    assert not window
+    assert window.rows_on("2026-10-16") == [] and window.before("2026-10-16", 3) == []
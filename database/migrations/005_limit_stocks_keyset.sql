@@ -0,0 +1,37 @@
+-- 涨停列表键集分页与 ST 过滤索引
+-- 执行日期：2026-10-19
+--
+-- /api/limit/stocks 改为按 (排序字段, stock_code) 游标翻页，ST 过滤改为 is_st = false，
+-- 以下复合索引覆盖 "交易日 + 类型 [+ 非ST] + 排序字段 + 股票代码" 的访问路径，
+-- 任意页都只扫描当页的行。
+
+-- 1. is_st 列（schema.sql 已定义，旧库可能缺失）并回填
+ALTER TABLE limit_stocks_detail ADD COLUMN IF NOT EXISTS is_st BOOLEAN DEFAULT FALSE;
+
+UPDATE limit_stocks_detail
+SET is_st = (UPPER(stock_name) LIKE '%ST%')
+WHERE is_st IS DISTINCT FROM (UPPER(stock_name) LIKE '%ST%');
+
+-- 2. 单日列表：交易日 + 类型 + 排序字段 + 股票代码（排序方向与接口一致：降序、空值在前）
+CREATE INDEX IF NOT EXISTS idx_limit_stocks_keyset_continuous
+    ON limit_stocks_detail (trade_date, limit_type, continuous_days DESC NULLS FIRST, stock_code);
+
+CREATE INDEX IF NOT EXISTS idx_limit_stocks_keyset_change_pct
+    ON limit_stocks_detail (trade_date, limit_type, change_pct DESC NULLS FIRST, stock_code);
+
+CREATE INDEX IF NOT EXISTS idx_limit_stocks_keyset_amount
+    ON limit_stocks_detail (trade_date, limit_type, amount DESC NULLS FIRST, stock_code);
+
+-- 3. 过滤 ST 的默认排序（最常用的首页列表）
+CREATE INDEX IF NOT EXISTS idx_limit_stocks_keyset_continuous_non_st
+    ON limit_stocks_detail (trade_date, limit_type, continuous_days DESC NULLS FIRST, stock_code)
+    WHERE is_st = FALSE;
+
+-- 4. 多日区间：交易日倒序在最前
+CREATE INDEX IF NOT EXISTS idx_limit_stocks_keyset_range
+    ON limit_stocks_detail (limit_type, trade_date DESC, continuous_days DESC NULLS FIRST, stock_code);
+
+-- 5. 让 count=planned 的估算更准确
+ANALYZE limit_stocks_detail;
+
+COMMENT ON COLUMN limit_stocks_detail.is_st IS '是否ST（采集时按股票名称写入）';
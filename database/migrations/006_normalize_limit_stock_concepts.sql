@@ -0,0 +1,9 @@
+-- 涨停股概念字段规范化
+-- 执行日期：2026-10-19
+--
+-- 采集器写入时已把 concepts 规范化为字符串数组，接口直接返回数据库行不再逐行解析，
+-- 历史数据中的 NULL 统一为空数组。
+
+UPDATE limit_stocks_detail SET concepts = '{}' WHERE concepts IS NULL;
+
+ALTER TABLE limit_stocks_detail ALTER COLUMN concepts SET DEFAULT '{}';
@@ -0,0 +1,34 @@
+-- 盘中封板时间线（由盘中事件日志收盘后压缩生成）
+-- 执行日期：2026-10-19
+--
+-- 每只股票每天一行，通过 (trade_date, stock_code, limit_type) 与 limit_stocks_detail 对应。
+-- 盘中炸板后未回封的股票不在 limit_stocks_detail 中，因此不加外键约束。
+
+CREATE TABLE IF NOT EXISTS limit_intraday_timeline (
+    id BIGSERIAL PRIMARY KEY,
+    trade_date DATE NOT NULL,
+    stock_code VARCHAR(10) NOT NULL,
+    limit_type VARCHAR(10) NOT NULL,            -- 'limit_up' / 'limit_down'
+
+    -- 事件序列 [[当日秒数, 事件类型], ...]
+    -- 类型: 1=封板 2=炸板 3=回封 4=连板数变化 5=封单变化 6=跌停 7=跌停打开
+    events JSONB NOT NULL DEFAULT '[]',
+    event_count INT DEFAULT 0,
+
+    -- 汇总
+    first_seal_time TIME,                       -- 首次封板时间
+    last_seal_time TIME,                        -- 最后一次封板/回封时间
+    break_count INT DEFAULT 0,                  -- 炸板次数
+    reseal_count INT DEFAULT 0,                 -- 回封次数
+    sealed_seconds INT DEFAULT 0,               -- 封板总时长（秒，扣除午休）
+    max_sealed_amount DECIMAL(20, 2),           -- 盘中最大封板资金
+    final_sealed BOOLEAN DEFAULT FALSE,         -- 收盘是否封住
+
+    created_at TIMESTAMP DEFAULT NOW(),
+    UNIQUE(trade_date, stock_code, limit_type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_limit_timeline_date ON limit_intraday_timeline(trade_date, limit_type);
+
+COMMENT ON TABLE limit_intraday_timeline IS '盘中封板时间线，收盘后由事件日志压缩生成';
+COMMENT ON COLUMN limit_intraday_timeline.events IS '[[当日秒数, 事件类型], ...]，类型见表注释';
@@ -0,0 +1,38 @@
+-- 每日情绪阶段（收盘后由调度器计算，阈值调整后用 scripts/rebuild_emotion_stages.py 重算）
+-- 执行日期：2026-10-19
+--
+-- 情绪阶段依赖前几日状态（昨日原始阶段、最近 3 日空间板），
+-- 每个交易日计算一次保存下来，情绪分析 / 首页看板只读一行。
+
+CREATE TABLE IF NOT EXISTS emotion_stage_daily (
+    id BIGSERIAL PRIMARY KEY,
+    trade_date DATE NOT NULL UNIQUE,
+
+    -- 阶段
+    emotion_stage VARCHAR(10) NOT NULL,         -- 冰点期/回暖期/加速期/高潮期/退潮期
+    emotion_stage_color VARCHAR(10) NOT NULL,
+    stage_raw VARCHAR(10),                      -- 原始阶段（不带惯性）
+    previous_stage VARCHAR(10),                 -- 昨日原始阶段（惯性区间用）
+    total_score INT,
+    factor_scores JSONB,                        -- {因子: 得分}
+    had_recent_peak BOOLEAN,
+    is_deteriorating BOOLEAN,
+    used_inertia BOOLEAN,
+
+    -- 仪表盘指标
+    space_height INT,
+    space_height_change INT,
+    limit_up_count INT,
+    limit_up_change INT,
+    explosion_rate DECIMAL(6, 2),
+    explosion_rate_change DECIMAL(6, 2),
+    overall_promotion_rate DECIMAL(6, 2),
+    promotion_details JSONB DEFAULT '[]',
+    premium_stats JSONB,                        -- 昨日涨停今日表现统计
+
+    stage_version VARCHAR(10),                  -- 判断逻辑版本
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+COMMENT ON TABLE emotion_stage_daily IS '每日情绪阶段及因子得分（状态机按交易日顺序计算）';
+COMMENT ON COLUMN emotion_stage_daily.stage_version IS '判断逻辑版本，与 emotion_stage.STAGE_VERSION 不一致时需重算';
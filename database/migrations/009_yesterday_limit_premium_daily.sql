@@ -0,0 +1,43 @@
+-- 昨日涨停溢价日汇总（YesterdayLimitCollector 写入明细时顺带写入）
+-- 执行日期：2026-10-19
+--
+-- 每个交易日一行：当日统计 + 核心指标 5/10/20 日滚动均值（按日等权）。
+-- 情绪分析、情绪阶段和溢价走势图只读本表，不再拉取全部明细重算。
+-- 执行后运行 scripts/rebuild_premium_summary.py 回填历史。
+
+CREATE TABLE IF NOT EXISTS yesterday_limit_premium_daily (
+    id BIGSERIAL PRIMARY KEY,
+    trade_date DATE NOT NULL UNIQUE,            -- 表现日期（与 yesterday_limit_performance.trade_date 一致）
+
+    -- 当日统计
+    total INT,                                  -- 昨日涨停数
+    with_data INT,                              -- 有今日行情的数量
+    up_count INT,
+    down_count INT,
+    avg_premium DECIMAL(6, 2),                  -- 整体溢价率(%)
+    avg_open_premium DECIMAL(6, 2),             -- 开盘溢价率(%)
+    first_board_count INT,
+    first_board_premium DECIMAL(6, 2),
+    second_board_count INT,
+    second_board_premium DECIMAL(6, 2),
+    high_board_count INT,                       -- 3板+
+    high_board_premium DECIMAL(6, 2),
+    promotion_count INT,
+    promotion_rate DECIMAL(6, 2),               -- 晋级率(%)
+    big_loss_count INT,
+    big_loss_rate DECIMAL(6, 2),                -- 大面率(%)
+    high_board_big_loss INT,
+    high_board_big_loss_rate DECIMAL(6, 2),     -- 高位大面率(%)
+
+    -- 滚动均值（最近 N 个交易日）
+    avg_premium_5d DECIMAL(6, 2), avg_premium_10d DECIMAL(6, 2), avg_premium_20d DECIMAL(6, 2),
+    first_board_premium_5d DECIMAL(6, 2), first_board_premium_10d DECIMAL(6, 2), first_board_premium_20d DECIMAL(6, 2),
+    high_board_premium_5d DECIMAL(6, 2), high_board_premium_10d DECIMAL(6, 2), high_board_premium_20d DECIMAL(6, 2),
+    promotion_rate_5d DECIMAL(6, 2), promotion_rate_10d DECIMAL(6, 2), promotion_rate_20d DECIMAL(6, 2),
+    big_loss_rate_5d DECIMAL(6, 2), big_loss_rate_10d DECIMAL(6, 2), big_loss_rate_20d DECIMAL(6, 2),
+    high_board_big_loss_rate_5d DECIMAL(6, 2), high_board_big_loss_rate_10d DECIMAL(6, 2), high_board_big_loss_rate_20d DECIMAL(6, 2),
+
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+COMMENT ON TABLE yesterday_limit_premium_daily IS '昨日涨停溢价日汇总及 5/10/20 日滚动均值';
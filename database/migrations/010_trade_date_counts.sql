@@ -0,0 +1,33 @@
+-- 按交易日统计行数（数据完整性检查用）
+-- 执行日期：2026-10-19
+--
+-- app/services/completeness.py 检查一段日期内各采集表是否完整时，
+-- 每张表一次 RPC 拿到 [p_start, p_end] 内每个交易日的行数，不再逐日逐表 count。
+-- 未执行本迁移时代码退回按 trade_date 分页读取后在内存里计数（较慢但结果一致）。
+
+CREATE OR REPLACE FUNCTION trade_date_counts(p_table TEXT, p_start DATE, p_end DATE)
+RETURNS TABLE (trade_date DATE, row_count BIGINT)
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+    -- 只允许采集表，避免任意表名拼接
+    IF p_table NOT IN (
+        'market_index',
+        'limit_stocks_detail',
+        'market_sentiment',
+        'hot_concepts',
+        'yesterday_limit_performance',
+        'yesterday_limit_premium_daily',
+        'emotion_stage_daily'
+    ) THEN
+        RAISE EXCEPTION 'trade_date_counts: unsupported table %', p_table;
+    END IF;
+
+    RETURN QUERY EXECUTE format(
+        'SELECT trade_date, COUNT(*)::BIGINT FROM %I WHERE trade_date BETWEEN $1 AND $2 GROUP BY trade_date ORDER BY trade_date',
+        p_table
+    ) USING p_start, p_end;
+END;
+$$;
+
+COMMENT ON FUNCTION trade_date_counts(TEXT, DATE, DATE) IS '采集表按交易日的行数（完整性检查 / 缺口回补用）';
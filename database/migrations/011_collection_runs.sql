@@ -0,0 +1,36 @@
+-- 采集运行台账（每个采集步骤一行）
+-- 执行日期：2026-10-19
+--
+-- 调度器 / 回补脚本的每个步骤（含 _collect_stocks_daily_data 等子步骤）结束时写入一行:
+-- 起止时间、读入 / 写出行数、按接口统计的数据源调用次数、重试与错误。
+-- /api/ops/runs 按步骤汇总耗时 p50/p90/p99 及逐日趋势，提前发现夜间任务变慢。
+
+CREATE TABLE IF NOT EXISTS collection_runs (
+    id BIGSERIAL PRIMARY KEY,
+    run_id VARCHAR(32) NOT NULL,                -- 同一次调度 / 回补的所有步骤共享
+    source VARCHAR(20) NOT NULL,                -- scheduler / backfill / ...
+    step VARCHAR(60) NOT NULL,                  -- 步骤名，子步骤形如 limit_stocks.daily_data
+    parent_step VARCHAR(60),
+    trade_date DATE,
+
+    started_at TIMESTAMPTZ NOT NULL,
+    finished_at TIMESTAMPTZ NOT NULL,
+    duration_ms INT NOT NULL,
+    status VARCHAR(10) NOT NULL,                -- success / failed
+
+    rows_in INT DEFAULT 0,                      -- 数据源接口返回行数
+    rows_out INT,                               -- 写入行数（步骤上报）
+    api_calls JSONB DEFAULT '{}',               -- {"tushare.daily": 12, "akshare.stock_zt_pool_em": 1}
+    api_errors JSONB DEFAULT '{}',
+    db_queries INT DEFAULT 0,                   -- Supabase 查询次数
+    retries INT DEFAULT 0,                      -- 数据源重试 + Supabase 重试
+    error TEXT,
+
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_collection_runs_step_started ON collection_runs (step, started_at DESC);
+CREATE INDEX IF NOT EXISTS idx_collection_runs_started ON collection_runs (started_at DESC, id);
+CREATE INDEX IF NOT EXISTS idx_collection_runs_run_id ON collection_runs (run_id);
+
+COMMENT ON TABLE collection_runs IS '采集运行台账：每个采集步骤的耗时、行数、接口调用、重试和错误';